@@ -0,0 +1,469 @@
+# async_app.py (Mode serving async: /analyze, /history, /history/<id>, /stats, /update_status, /signals/stream, /metrics di atas aiohttp)
+#
+# Jalankan:
+#   cd backend && python async_app.py --port 5002
+#
+# Route dan response sama dengan versi Flask. Session dibaca dari cookie Flask
+# (FLASK_SECRET yang sama), jadi login/register/halaman tetap dilayani Flask dan
+# reverse proxy cukup mengarahkan path-path ini ke proses async. Fetch exchange
+# memakai ccxt.async_support lewat ExchangeGateway yang berbagi budget weight dan
+# circuit breaker dengan jalur sync; query MySQL lewat db_async (aiomysql bila
+# terpasang). Satu proses bisa melayani ratusan analisa bersamaan karena request
+# yang menunggu exchange/MySQL tidak memegang thread.
+import os
+import time
+import asyncio
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import partial, wraps
+from typing import Any, Awaitable, Dict, Optional, Tuple
+
+import ccxt.async_support as ccxt_async
+from aiohttp import web
+from itsdangerous import BadSignature
+
+import hybrid_analyzer_nofilter as analyzer
+from candles import Candles
+from db import DatabaseUnavailable
+from db_async import AsyncDatabase
+from gateway import ExchangeGateway, ExchangeUnavailable, GatewayError
+from history import NEXT_CURSOR_HEADER, STATS_SQL, HistoryQueryError, history_page, history_query, summarize_stats
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY, profiles, stage
+from outcomes import utc_datetime, utc_epoch
+from signals import SIGNAL_HEARTBEAT_SECONDS, parse_coins
+from singleflight import AsyncSingleFlight
+from snapshot import Snapshot
+
+logger = logging.getLogger("HybridAnalyzerV8")
+
+ASYNC_PORT = int(os.getenv("ASYNC_PORT", 5002))
+ASYNC_COMPUTE_WORKERS = int(os.getenv("ASYNC_COMPUTE_WORKERS", 32))   # Thread penunggu lease snapshot (miss)
+
+EXCHANGE = web.AppKey("exchange", object)
+GATEWAY = web.AppKey("gateway", ExchangeGateway)
+DB = web.AppKey("db", AsyncDatabase)
+FLIGHT = web.AppKey("analysis_flight", AsyncSingleFlight)
+COMPUTE = web.AppKey("snapshot_compute", ThreadPoolExecutor)
+
+routes = web.RouteTableDef()
+
+
+# ==============================================================
+# HTTP HELPERS (kompatibel dengan Flask)
+# ==============================================================
+
+def json_response(obj: Any, status: int = 200, headers: Optional[Dict[str, str]] = None) -> web.Response:
+    """Serialisasi sama dengan jsonify Flask (datetime, Decimal, urutan key)"""
+    text = analyzer.app.json.dumps(obj, separators=(",", ":")) + "\n"
+    return web.Response(text=text, status=status, content_type="application/json", headers=headers)
+
+
+def load_session(request: web.Request) -> Dict[str, Any]:
+    """Isi cookie session Flask; {} jika tidak ada atau signature tidak valid"""
+    flask_app = analyzer.app
+    cookie = request.cookies.get(flask_app.config["SESSION_COOKIE_NAME"])
+    if not cookie:
+        return {}
+    serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+    try:
+        return dict(serializer.loads(cookie, max_age=int(flask_app.permanent_session_lifetime.total_seconds())))
+    except BadSignature:
+        return {}
+
+
+def login_required(handler):
+    @wraps(handler)
+    async def decorated(request: web.Request) -> web.StreamResponse:
+        session = load_session(request)
+        if "user_id" not in session:
+            raise web.HTTPFound("/login")
+        request["session"] = session
+        return await handler(request)
+    return decorated
+
+
+@web.middleware
+async def error_middleware(request: web.Request, handler) -> web.StreamResponse:
+    try:
+        return await handler(request)
+    except GatewayError as e:
+        logger.error(f"Exchange error: {e}")
+        headers = {"Retry-After": str(int(e.retry_after + 0.999))} if e.retry_after is not None else None
+        return json_response(e.to_dict(), e.status, headers)
+    except DatabaseUnavailable as e:
+        logger.error(f"Database unavailable: {e}")
+        return json_response({"error": "Database unavailable"}, 503)
+
+
+@web.middleware
+async def metrics_middleware(request: web.Request, handler) -> web.StreamResponse:
+    """http_request_seconds (histogram yang sama dengan Flask) + profiler opt-in ?profile=1 untuk
+    user di PROFILE_USERS (session diperiksa dulu). Profil mencakup thread event loop, jadi
+    request lain yang berjalan bersamaan ikut terekam."""
+    started = time.perf_counter()
+    profiler = user_id = None
+    if request.query.get("profile") == "1" or request.headers.get("X-Profile") == "1":
+        user_id = load_session(request).get("user_id")
+        profiler = profiles.start(user_id, thread_ids=[threading.get_ident()], thread_prefixes=("asyncio",))
+    status = 500
+    try:
+        response = await handler(request)
+        status = response.status
+        if profiler is not None and not response.prepared:
+            response.headers["X-Profile-Id"] = profiles.finish(profiler, f"{request.method} {request.path_qs}",
+                                                               user_id)
+            profiler = None
+        return response
+    except web.HTTPException as e:
+        status = e.status
+        raise
+    finally:
+        resource = request.match_info.route.resource
+        route = resource.canonical if resource is not None else "unmatched"
+        analyzer.HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, route=route, method=request.method,
+                                              status=status)
+        if profiler is not None:
+            profiles.finish(profiler, f"{request.method} {request.path_qs}", user_id)
+
+
+# ==============================================================
+# DATA FETCH (ccxt.async_support)
+# ==============================================================
+
+async def exchange_ohlcv(app: web.Application, symbol: str, timeframe: str, since: Optional[int], limit: int):
+    return await app[GATEWAY].call_async("fetch_ohlcv", symbol, timeframe, since=since, limit=limit)
+
+
+async def fetch_candles(app: web.Application, symbol: str, timeframe: str, limit: int) -> Candles:
+    """Lewat candle_cache bersama; read-through candle store (file + REST sync) berjalan di thread"""
+    if analyzer.candle_store:
+        return await asyncio.to_thread(analyzer.fetch_candles_ccxt, symbol, timeframe, limit)
+    with stage(f"fetch_candles_{timeframe}"):
+        return await analyzer.candle_cache.get_async(symbol, timeframe, limit, partial(exchange_ohlcv, app))
+
+
+async def fetch_funding_rate(app: web.Application, symbol: str) -> float:
+    with stage("fetch_funding_rate"):
+        fr_data = await app[GATEWAY].call_async("fapiPublicGetPremiumIndex", {'symbol': analyzer.to_exchange_id(symbol)})
+    return float(fr_data.get("lastFundingRate", 0.0))
+
+
+async def fetch_long_short_ratio(app: web.Application, symbol: str) -> float:
+    params_ls = {'symbol': analyzer.to_exchange_id(symbol), 'period': '5m', 'limit': 30}
+    with stage("fetch_long_short_ratio"):
+        ls_data = await app[GATEWAY].call_async("fapiDataGetGlobalLongShortAccountRatio", params_ls)
+    if ls_data:
+        return float(ls_data[-1].get("longShortRatio", 1.0))
+    return 1.0
+
+
+async def fetch_concurrently(jobs: Dict[str, Awaitable], timeout: float = analyzer.FETCH_TIMEOUT
+                             ) -> Tuple[Dict[str, Any], Dict[str, Exception]]:
+    """Versi async fetch_concurrently: (results, errors) dengan timeout per job"""
+    names = list(jobs)
+    outcomes = await asyncio.gather(*(asyncio.wait_for(job, timeout) for job in jobs.values()),
+                                    return_exceptions=True)
+    results: Dict[str, Any] = {name: None for name in names}
+    errors: Dict[str, Exception] = {}
+    for name, outcome in zip(names, outcomes):
+        if isinstance(outcome, asyncio.TimeoutError):
+            logger.error(f"Fetch job {name} timed out after {timeout}s")
+            errors[name] = ExchangeUnavailable(f"{name}: timed out after {timeout}s", name)
+        elif isinstance(outcome, Exception):
+            logger.error(f"Fetch job {name} failed: {outcome}")
+            errors[name] = outcome
+        else:
+            results[name] = outcome
+    return results, errors
+
+
+async def get_all_market_data(app: web.Application, symbol: str) -> Optional[Dict[str, Any]]:
+    """Sama dengan analyzer.get_all_market_data, tanpa thread per panggilan exchange"""
+    try:
+        symbol_ccxt = symbol.upper() + "/USDT"
+
+        if analyzer.market_stream:
+            data = analyzer.market_stream.market_data(symbol_ccxt)
+            if data:
+                return data
+
+        with stage("market_data"):
+            results, errors = await fetch_concurrently({
+                **{tf: fetch_candles(app, symbol_ccxt, tf, limit)
+                   for tf, limit in analyzer.candle_jobs(symbol_ccxt).items()},
+                "funding_rate": fetch_funding_rate(app, symbol_ccxt),
+                "long_short_ratio": fetch_long_short_ratio(app, symbol_ccxt),
+            })
+        return analyzer.build_market_data(symbol_ccxt, results, errors)
+    except GatewayError:
+        raise
+    except Exception as e:
+        logger.error(f"Error compiling market data for {symbol}: {e}")
+        return None
+
+
+async def fetch_and_analyze(app: web.Application, symbol: str):
+    data = await get_all_market_data(app, symbol)
+    if not data:
+        return None
+    # CPU-bound (indikator + SMC): jangan jalankan di event loop
+    return await asyncio.to_thread(analyzer.analyze_and_generate_signal, data)
+
+
+async def analyze_symbol(app: web.Application, symbol: str):
+    """Satu eksekusi per (koin, bar 1h) untuk request bersamaan di proses ini (lihat analyzer.analyze_symbol)"""
+    symbol = symbol.upper()
+    result, _ = await app[FLIGHT].do((symbol, analyzer.bar_epoch()), fetch_and_analyze, app, symbol)
+    return result
+
+
+async def analysis_snapshot(app: web.Application, symbol: str) -> Optional[Snapshot]:
+    """analyzer.analysis_snapshot tanpa memblokir event loop: LRU dibaca langsung, L2 lewat
+    thread. Miss lewat SnapshotCache.compute (single-flight + lease L2 antar worker) di thread
+    COMPUTE; fetch dan analisa tetap berjalan async di loop ini."""
+    snapshots, symbol, epoch = analyzer.snapshots, symbol.upper(), analyzer.bar_epoch()
+    snapshots.track(symbol, epoch)
+    snapshot = snapshots.peek(symbol, epoch)
+    if snapshot is None and snapshots.remote is not None:
+        snapshot = await asyncio.to_thread(snapshots.get, symbol, epoch)
+    if snapshot is None:
+        snapshots.count("misses")
+        loop = asyncio.get_running_loop()
+
+        def compute(sym: str):
+            # Thread COMPUTE menunggu coroutine di loop; pool terpisah dari default executor
+            # (dipakai coroutine itu sendiri), jadi tidak bisa saling mengunci
+            return asyncio.run_coroutine_threadsafe(analyze_symbol(app, sym), loop).result()
+
+        return await loop.run_in_executor(app[COMPUTE], snapshots.compute, symbol, epoch, compute)
+    if not snapshots.fresh(snapshot):
+        snapshots.count("stale")
+        snapshots.refresh_later(symbol, epoch, analyzer.in_lane(analyzer.BACKGROUND, analyzer.analyze_symbol))
+    return snapshot
+
+
+async def warm_cooldowns(db: AsyncDatabase) -> None:
+    """Isi CooldownMap dari analisa terakhir lewat driver async (saat startup; diulang dari
+    /analyze jika load sebelumnya gagal)"""
+    cooldowns = analyzer.cooldowns
+    if not cooldowns.warm_due:
+        return
+    try:
+        rows = await db.fetchall(analyzer.RECENT_ANALYSES_SQL,
+                                 (utc_datetime() - timedelta(seconds=cooldowns.window),))
+        error = None
+    except Exception as e:
+        rows, error = [], e
+
+    def loader(window):
+        if error is not None:
+            raise error
+        return [(user_id, coin, utc_epoch(last)) for user_id, coin, last in rows]
+
+    await asyncio.to_thread(cooldowns.warm, loader)
+
+
+# ==============================================================
+# ROUTES
+# ==============================================================
+
+@routes.get("/health")
+async def health(request: web.Request) -> web.Response:
+    app = request.app
+    return json_response({"status": "ok", "mode": "async", "db": app[DB].stats(),
+                          "persistence": analyzer.analysis_writer.stats(),
+                          "cooldowns": dict(analyzer.cooldowns.stats, size=len(analyzer.cooldowns)),
+                          "analysis_flight": dict(app[FLIGHT].stats, keys=len(app[FLIGHT])),
+                          "exchange": app[GATEWAY].snapshot(), "signals": analyzer.signal_hub.snapshot(),
+                          "outcomes": analyzer.outcome_resolver.snapshot(),
+                          "snapshots": dict(analyzer.snapshots.snapshot(), warmer=analyzer.snapshot_warmer.stats),
+                          "scheduler": analyzer.scheduler.snapshot()})
+
+
+@routes.get("/metrics")
+async def metrics(request: web.Request) -> web.Response:
+    return web.Response(body=REGISTRY.render().encode(), headers={"Content-Type": METRICS_CONTENT_TYPE})
+
+
+@routes.get("/debug/profile/{profile_id}")
+@login_required
+async def get_profile(request: web.Request) -> web.Response:
+    text = profiles.get(request.match_info["profile_id"], request["session"]["user_id"])
+    if text is None:
+        return json_response({"error": "Profile not found"}, 404)
+    return web.Response(text=text, content_type="text/plain")
+
+
+@routes.post("/analyze")
+@login_required
+async def analyze_single_coin(request: web.Request) -> web.Response:
+    """Endpoint untuk menganalisis satu koin (kontrak sama dengan versi Flask)"""
+    start_time = time.time()
+
+    form = await request.post()
+    coin_symbol = form.get('coin_name', '').upper().strip()
+    if not coin_symbol:
+        return json_response({"error": "Coin symbol is required"}, 400)
+
+    user_id = request["session"]["user_id"]
+    cooldowns = analyzer.cooldowns
+
+    # Cooldown dan write-behind bisa blok (key-value bersama serve.py, antrian penuh): di thread
+    await warm_cooldowns(request.app[DB])
+    until = await asyncio.to_thread(cooldowns.try_acquire, user_id, coin_symbol)
+    if until is not None:
+        return json_response({
+            "cooldown": True,
+            "coin": coin_symbol,
+            "until": datetime.fromtimestamp(until).isoformat()
+        })
+
+    logger.info(f"Analyzing {coin_symbol}...")
+
+    try:
+        snapshot = await analysis_snapshot(request.app, coin_symbol)
+    except BaseException:
+        await asyncio.to_thread(cooldowns.release, user_id, coin_symbol)
+        raise
+    if not snapshot:
+        await asyncio.to_thread(cooldowns.release, user_id, coin_symbol)
+        return json_response({"error": f"Failed to fetch market data for {coin_symbol}"}, 500)
+
+    await asyncio.to_thread(analyzer.save_to_db, snapshot.output, snapshot.recommendation, snapshot.trade_levels,
+                            user_id=user_id)
+
+    latency = round(time.time() - start_time, 3)
+    logger.info(f"✅ {snapshot.output['coin_name']} | {snapshot.recommendation} | {latency}s (async)")
+
+    return web.Response(body=snapshot.body, content_type="application/json")
+
+
+@routes.get("/history")
+@login_required
+async def get_history(request: web.Request) -> web.Response:
+    try:
+        sql, params, limit = history_query(request["session"]["user_id"], request.query)
+    except HistoryQueryError as e:
+        return json_response({"error": str(e)}, 400)
+    try:
+        rows, next_cursor = history_page(await request.app[DB].fetchall(sql, params, dictionary=True), limit)
+        return json_response(analyzer.mark_trade_levels(rows),
+                             headers={NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None)
+    except Exception as e:
+        return json_response({"error": str(e)}, 500)
+
+
+@routes.get("/stats")
+@login_required
+async def get_stats(request: web.Request) -> web.Response:
+    try:
+        rows = await request.app[DB].fetchall(STATS_SQL, (request["session"]["user_id"],), dictionary=True)
+        return json_response(summarize_stats(rows))
+    except Exception as e:
+        return json_response({"error": str(e)}, 500)
+
+
+@routes.get(r"/history/{record_id:\d+}")
+@login_required
+async def get_history_detail(request: web.Request) -> web.Response:
+    record_id = int(request.match_info["record_id"])
+    row = await request.app[DB].fetchone(analyzer.HISTORY_DETAIL_SQL, (record_id, request["session"]["user_id"]),
+                                         dictionary=True)
+    if not row:
+        return json_response({"error": "Record not found"}, 404)
+    return json_response(row)
+
+
+@routes.post(r"/update_status/{record_id:\d+}")
+@login_required
+async def update_status(request: web.Request) -> web.Response:
+    record_id = int(request.match_info["record_id"])
+    new_status = (await request.post()).get("status")
+
+    if new_status not in analyzer.ENTRY_STATUSES:
+        return json_response({"error": "Invalid status"}, 400)
+
+    await request.app[DB].execute(analyzer.UPDATE_STATUS_SQL, (new_status, record_id, request["session"]["user_id"]))
+    return json_response({"success": True})
+
+
+@routes.get("/signals/stream")
+@login_required
+async def signal_stream(request: web.Request) -> web.StreamResponse:
+    """SSE sinyal live; hub (thread) sama dengan versi Flask, koneksi menunggu di event loop"""
+    coins = parse_coins(request.query.get('coins', ''))
+    if not coins:
+        return json_response({"error": "coins is required"}, 400)
+
+    response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache",
+                                           "X-Accel-Buffering": "no"})
+    await response.prepare(request)
+    sub = analyzer.signal_hub.subscribe(coins)
+    try:
+        await response.write(b"retry: 5000\n\n")
+        while not sub.closed:
+            events = await sub.aget(SIGNAL_HEARTBEAT_SECONDS)
+            if not events:
+                await response.write(b": keep-alive\n\n")
+            for event in events:
+                await response.write(event.frame.encode())
+    except ConnectionResetError:
+        pass  # klien menutup EventSource
+    finally:
+        analyzer.signal_hub.unsubscribe(sub)
+    return response
+
+
+# ==============================================================
+# APP
+# ==============================================================
+
+async def on_startup(app: web.Application) -> None:
+    if app[EXCHANGE] is None:
+        app[EXCHANGE] = ccxt_async.binance({'options': {'defaultType': 'future'}, 'enableRateLimit': False,
+                                            'timeout': int(analyzer.FETCH_TIMEOUT * 1000)})
+    await app[DB].start()
+    await warm_cooldowns(app[DB])
+    logger.info(f"Async app ready (db driver: {app[DB].driver})")
+
+
+async def on_cleanup(app: web.Application) -> None:
+    await app[EXCHANGE].close()
+    await app[DB].close()
+    app[COMPUTE].shutdown(wait=False)
+
+
+def make_app(exchange: Any = None, db: Optional[AsyncDatabase] = None) -> web.Application:
+    """`exchange` default ccxt.async_support.binance (dibuat saat startup); budget weight
+    dan circuit breaker dibagi dengan gateway sync di proses yang sama."""
+    app = web.Application(middlewares=[metrics_middleware, error_middleware])
+    app[EXCHANGE] = exchange
+    app[DB] = db or AsyncDatabase()
+    app[GATEWAY] = ExchangeGateway(lambda: app[EXCHANGE], limiter=analyzer.gateway.limiter,
+                                   breaker=analyzer.gateway.breaker)
+    app[FLIGHT] = AsyncSingleFlight(ttl=analyzer.ANALYSIS_SHARE_TTL)
+    app[COMPUTE] = ThreadPoolExecutor(max_workers=ASYNC_COMPUTE_WORKERS, thread_name_prefix="async-snapshot")
+    app.add_routes(routes)
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hybrid Analyzer: mode serving async (aiohttp)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=ASYNC_PORT)
+    args = parser.parse_args()
+
+    logger.info(f"Starting Hybrid Analyzer V8 async mode on port {args.port}")
+    analyzer.start_market_stream()
+    analyzer.start_outcome_resolver()
+    analyzer.start_scheduler()
+    web.run_app(make_app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
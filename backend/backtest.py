@@ -0,0 +1,318 @@
+# backtest.py (Backtest historis strategi OB 4H + RRR di atas data OHLCV 1h lokal)
+#
+# CLI:
+#   cd backend && python backtest.py --data data/BTCUSDT_1h.csv --set min_rrr=2.5
+#   cd backend && python backtest.py --data data/BTCUSDT_1h.parquet --tp tp2 --ttl 12 --json
+#
+# Sinyal dievaluasi di setiap close bar 1h persis seperti analyze_and_generate_signal
+# (bar 4H terakhir = bar yang sedang berjalan, disusun dari bar 1h), tetapi semua
+# fitur per bar dihitung sekali secara vektor; hanya generate_trade_levels yang
+# dipanggil per kandidat, dan fill/SL/TP dicari dengan pencarian array, bukan loop bar.
+import os
+import json
+import math
+import time
+import argparse
+from typing import Any, Dict, List
+
+import numpy as np
+
+from candles import Candles, FIELDS
+from indicators import atr_series
+from resample import resample as aggregate   # Re-export: agregasi yang sama dengan market data live
+from strategy import DEFAULT_STRATEGY, StrategyConfig, generate_trade_levels
+
+
+# ==============================================================
+# DATA
+# ==============================================================
+
+_COLUMN_ALIASES = {"timestamp": "open_time", "time": "open_time", "date": "open_time", "ts": "open_time"}
+
+
+def load_ohlcv(path: str) -> Candles:
+    """Baca OHLCV dari CSV (header: open_time/timestamp, open, high, low, close, volume) atau Parquet.
+
+    open_time boleh dalam ms atau detik epoch; baris diurutkan dan duplikat dibuang.
+    """
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet butuh pyarrow (pip install pyarrow)") from e
+        table = pq.read_table(path)
+        names = [_COLUMN_ALIASES.get(n.lower(), n.lower()) for n in table.column_names]
+        cols = {n: table.column(i).to_numpy() for i, n in enumerate(names)}
+    else:
+        with open(path) as f:
+            header = [_COLUMN_ALIASES.get(h.strip().lower(), h.strip().lower()) for h in f.readline().split(",")]
+        data = np.loadtxt(path, delimiter=",", skiprows=1, usecols=[header.index(f) for f in FIELDS], ndmin=2)
+        cols = {f: data[:, k] for k, f in enumerate(FIELDS)}
+
+    open_time = np.asarray(cols["open_time"], dtype=np.float64)
+    if len(open_time) and open_time.max() < 1e11:
+        open_time = open_time * 1000  # detik -> ms
+    order = np.argsort(open_time, kind="stable")
+    open_time = open_time[order].astype(np.int64)
+    keep = np.r_[True, open_time[1:] != open_time[:-1]]
+    return Candles(open_time[keep], *(np.asarray(cols[f], dtype=np.float64)[order][keep] for f in FIELDS[1:]))
+
+
+def save_ohlcv_csv(path: str, candles: Candles) -> None:
+    np.savetxt(path, np.column_stack([getattr(candles, f) for f in FIELDS]), delimiter=",",
+               header=",".join(FIELDS), comments="", fmt=["%d"] + ["%.10g"] * 5)
+
+
+# ==============================================================
+# FITUR PER BAR (VEKTOR)
+# ==============================================================
+
+def strategy_frame(c1h: Candles, config: StrategyConfig = DEFAULT_STRATEGY, tf_mid: str = "4h",
+                   window: int = 300) -> Dict[str, np.ndarray]:
+    """Input analyze_and_generate_signal untuk setiap close bar 1h, dihitung sekaligus.
+
+    Bar 4H ke-g (yang memuat bar 1h ke-i) diperlakukan sebagai bar yang sedang
+    berjalan: high/low-nya adalah running max/min bar 1h di bucket itu sampai i.
+    `ready` False untuk bar yang belum punya `window` bar 4H histori.
+    """
+    n = len(c1h)
+    c4, group = aggregate(c1h, tf_mid)
+    idx = np.arange(n)
+    pos = idx - np.r_[0, np.flatnonzero(np.diff(group)) + 1][group]  # posisi bar 1h di dalam bucket
+
+    # Bar 4H parsial pada close bar 1h ke-i
+    part_high, part_low = c1h.high.copy(), c1h.low.copy()
+    for k in range(1, int(pos.max(initial=0)) + 1):
+        m = pos >= k
+        part_high[m] = np.maximum(part_high[m], c1h.high[idx[m] - k])
+        part_low[m] = np.minimum(part_low[m], c1h.low[idx[m] - k])
+    price = c1h.close
+    atr_period, lookback = config.atr_period, config.ob_lookback
+
+    g = group
+    warmup = max(window - 1, lookback, atr_period + 1)
+    ready = g >= warmup
+    gc = np.where(ready, g, warmup)  # index aman untuk bar belum siap
+    gc = np.minimum(gc, len(c4) - 1)
+
+    # Bias 4H: slope dari close pertama jendela ke harga sekarang
+    first_close = c4.close[np.maximum(gc - (window - 1), 0)]
+    slope = (price - first_close) / first_close
+    bias = np.where(slope > config.bias_slope, "Bullish", np.where(slope < -config.bias_slope, "Bearish", "Sideways"))
+
+    # ATR 4H termasuk bar parsial (langkah Wilder terakhir = peek)
+    atr_closed = atr_series(c4.high, c4.low, c4.close, atr_period)[gc - 1]
+    prev_close = c4.close[gc - 1]
+    tr_part = np.maximum(part_high - part_low,
+                         np.maximum(np.abs(part_high - prev_close), np.abs(part_low - prev_close)))
+    atr = (atr_closed * (atr_period - 1) + tr_part) / atr_period
+
+    # OB: kandidat pertama (paling lama) di lookback-1 bar 4H close sebelum bar berjalan
+    j = gc[:, None] - (lookback - 1) + np.arange(lookback - 1)[None, :]
+    o, c = c4.open[j], c4.close[j]
+    p = price[:, None]
+    valid = (c != o) & ~((np.minimum(o, c) < p) & (p < np.maximum(o, c)))
+    has_ob = valid.any(axis=1) & ready
+    pick = j[idx, valid.argmax(axis=1)]
+    ob_low, ob_high = c4.low[pick], c4.high[pick]
+    demand = c4.close[pick] < c4.open[pick]
+
+    # Liquidity sweep 1h (sweep_window bar terakhir)
+    prior = config.sweep_window - 1
+    prior_high = np.full(n, np.inf)
+    prior_low = np.full(n, -np.inf)
+    if n > prior:
+        win_h = np.lib.stride_tricks.sliding_window_view(c1h.high, prior)[:-1]
+        win_l = np.lib.stride_tricks.sliding_window_view(c1h.low, prior)[:-1]
+        prior_high[prior:] = win_h.max(axis=1)
+        prior_low[prior:] = win_l.min(axis=1)
+    sweep = np.where(c1h.high > prior_high, 1, np.where(c1h.low < prior_low, -1, 0))  # 1 buy-side, -1 sell-side
+
+    return {
+        "open_time": c1h.open_time, "price": price, "ready": ready, "bias": bias, "atr": atr,
+        "has_ob": has_ob, "demand": demand, "ob_low": ob_low, "ob_high": ob_high,
+        "ob_mid": (ob_high + ob_low) / 2, "sweep": sweep,
+    }
+
+
+# ==============================================================
+# SIMULASI
+# ==============================================================
+
+def _first_hit(values: np.ndarray, level: float, start: int, stop: int, below: bool, chunk: int = 256) -> int:
+    """Index pertama di [start, stop) dengan values <= level (below) atau >= level; -1 jika tidak ada.
+
+    Dicari per blok yang membesar, jadi trade pendek tidak memindai sisa data.
+    """
+    while start < stop:
+        end = min(stop, start + chunk)
+        seg = values[start:end]
+        hit = seg <= level if below else seg >= level
+        if hit.any():
+            return start + int(hit.argmax())
+        start, chunk = end, chunk * 2
+    return -1
+
+
+def run_backtest(c1h: Candles, config: StrategyConfig = DEFAULT_STRATEGY, tp: str = "tp1", order_ttl: int = 24,
+                 fee_rate: float = 0.0, compound: bool = False, require_sweep: bool = False,
+                 window: int = 300) -> Dict[str, Any]:
+    """Replay sinyal OB + RRR di atas data 1h dan simulasikan limit order.
+
+    - Sinyal di close bar i memasang limit order di `entry`, berlaku `order_ttl` bar.
+      Selama order menunggu atau posisi terbuka, sinyal baru diabaikan (satu posisi).
+    - Fill jika harga menyentuh entry (gap melewati entry terisi di open).
+    - Di bar fill hanya SL yang dicek; setelahnya SL didahulukan jika SL & TP
+      tersentuh di bar yang sama (asumsi konservatif).
+    - Ukuran posisi = position_size_units dari generate_trade_levels, atau dihitung
+      ulang dari ekuitas berjalan jika `compound`.
+    Filter jarak & sisi dihitung vektor dulu; keputusan akhir tetap di generate_trade_levels.
+    """
+    t0 = time.perf_counter()
+    f = strategy_frame(c1h, config, window=window)
+    n = len(c1h)
+    price, mid = f["price"], f["ob_mid"]
+    dist = np.abs(price - mid) / price
+    side_ok = np.where(f["demand"], mid < price, mid > price)
+    candidates = np.flatnonzero(f["has_ob"] & side_ok & (dist <= config.distance_tolerance))
+
+    opens, highs, lows, closes = c1h.open, c1h.high, c1h.low, c1h.close
+    no_candles = Candles.empty()
+    trades: List[Dict[str, Any]] = []
+    signals = expired = 0
+    equity = balance = config.equity
+    free_from = 0
+
+    for i in candidates.tolist():
+        if i < free_from or i + 1 >= n:
+            continue
+        demand = bool(f["demand"][i])
+        zone = {"type": "Demand" if demand else "Supply", "low": float(f["ob_low"][i]),
+                "high": float(f["ob_high"][i]), "mid": float(mid[i])}
+        levels = generate_trade_levels(zone, str(f["bias"][i]), float(price[i]), no_candles,
+                                       atr=float(f["atr"][i]), config=config)
+        if not levels:
+            continue
+        long = levels["recommendation"] == "Long"
+        sweep_aligned = int(f["sweep"][i]) == (-1 if long else 1)
+        if require_sweep and not sweep_aligned:
+            continue
+        signals += 1
+
+        entry, sl, target = levels["entry"], levels["sl"], levels[tp]
+        expiry = min(n, i + 1 + order_ttl)
+        fill = _first_hit(lows if long else highs, entry, i + 1, expiry, below=long)
+        if fill < 0:
+            expired += 1
+            free_from = expiry
+            continue
+        fill_price = min(opens[fill], entry) if long else max(opens[fill], entry)
+
+        # Exit: SL di bar fill, lalu SL/TP mulai bar berikutnya
+        if (lows[fill] <= sl) if long else (highs[fill] >= sl):
+            exit_bar, outcome = fill, "SL"
+        else:
+            sl_bar = _first_hit(lows if long else highs, sl, fill + 1, n, below=long)
+            tp_bar = _first_hit(highs if long else lows, target, fill + 1, sl_bar if sl_bar >= 0 else n, below=not long)
+            if tp_bar >= 0 and (sl_bar < 0 or tp_bar < sl_bar):
+                exit_bar, outcome = tp_bar, "TP"
+            elif sl_bar >= 0:
+                exit_bar, outcome = sl_bar, "SL"
+            else:
+                exit_bar, outcome = n - 1, "open"
+
+        if outcome == "SL":
+            exit_price = sl if exit_bar == fill else (min(opens[exit_bar], sl) if long else max(opens[exit_bar], sl))
+        elif outcome == "TP":
+            exit_price = max(opens[exit_bar], target) if long else min(opens[exit_bar], target)
+        else:
+            exit_price = closes[-1]
+
+        risk_per_unit = abs(entry - sl)
+        units = (math.floor(balance * config.risk_per_trade_percent / 100 / risk_per_unit) if compound
+                 else levels["position_size_units"])
+        direction = 1 if long else -1
+        gross = (exit_price - fill_price) * direction * units
+        fees = fee_rate * (fill_price + exit_price) * units
+        pnl = gross - fees
+        balance += pnl
+        trades.append({
+            "signal_time": int(f["open_time"][i]), "fill_time": int(c1h.open_time[fill]),
+            "exit_time": int(c1h.open_time[exit_bar]), "side": levels["recommendation"],
+            "ob_type": levels["ob_type"], "entry": entry, "sl": sl, "tp": target,
+            "fill": float(fill_price), "exit": float(exit_price), "outcome": outcome,
+            "r": round((exit_price - fill_price) * direction / risk_per_unit, 4),
+            "units": units, "pnl": round(pnl, 4), "bars_held": exit_bar - fill,
+            "sweep_aligned": sweep_aligned, "counter_trend": levels["is_counter_trend"],
+        })
+        free_from = exit_bar + 1
+
+    summary = summarize(trades, equity)
+    summary.update({"bars": n, "signals": signals, "orders_expired": expired,
+                    "elapsed": round(time.perf_counter() - t0, 4)})
+    return {"summary": summary, "trades": trades}
+
+
+def summarize(trades: List[Dict[str, Any]], equity: float) -> Dict[str, Any]:
+    """Win rate, expectancy (R & $), profit factor dan drawdown dari trade yang sudah close"""
+    closed = [t for t in trades if t["outcome"] != "open"]
+    r = np.array([t["r"] for t in closed])
+    pnl = np.array([t["pnl"] for t in closed])
+    wins = int((pnl > 0).sum()) if len(closed) else 0
+    curve = equity + np.cumsum(np.r_[0.0, pnl])
+    peak = np.maximum.accumulate(curve)
+    gross_win, gross_loss = float(pnl[pnl > 0].sum()), float(-pnl[pnl < 0].sum())
+
+    def win_rate(rows):
+        return round(sum(1 for t in rows if t["pnl"] > 0) / len(rows), 4) if rows else None
+
+    return {
+        "trades": len(closed),
+        "open_trades": len(trades) - len(closed),
+        "wins": wins,
+        "losses": len(closed) - wins,
+        "win_rate": win_rate(closed),
+        "win_rate_sweep_aligned": win_rate([t for t in closed if t["sweep_aligned"]]),
+        "expectancy_r": round(float(r.mean()), 4) if len(r) else None,
+        "expectancy_usd": round(float(pnl.mean()), 4) if len(pnl) else None,
+        "profit_factor": round(gross_win / gross_loss, 4) if gross_loss > 0 else None,
+        "net_pnl": round(float(pnl.sum()), 4),
+        "final_equity": round(float(curve[-1]), 4),
+        "max_drawdown": round(float((peak - curve).max()), 4),
+        "max_drawdown_pct": round(float(((peak - curve) / peak).max() * 100), 4),
+        "zero_size_trades": sum(1 for t in closed if t["units"] == 0),
+        "avg_bars_held": round(float(np.mean([t["bars_held"] for t in closed])), 2) if closed else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest strategi OB 4H + RRR dari OHLCV 1h lokal")
+    parser.add_argument("--data", required=True, help="file OHLCV 1h (.csv atau .parquet)")
+    parser.add_argument("--tp", choices=["tp1", "tp2"], default="tp1", help="target exit (2.0R / 3.5R)")
+    parser.add_argument("--ttl", type=int, default=24, help="masa berlaku limit order (bar 1h)")
+    parser.add_argument("--fee", type=float, default=0.0, help="fee per sisi, misal 0.0004")
+    parser.add_argument("--compound", action="store_true", help="ukuran posisi dari ekuitas berjalan")
+    parser.add_argument("--require-sweep", action="store_true", help="hanya ambil sinyal yang dikonfirmasi sweep")
+    parser.add_argument("--set", action="append", default=[], metavar="FIELD=VALUE",
+                        help="override StrategyConfig, misal --set min_rrr=2.5 --set atr_period=21")
+    parser.add_argument("--json", action="store_true", help="cetak summary + trades sebagai JSON")
+    args = parser.parse_args()
+
+    config = StrategyConfig.from_dict(dict(kv.split("=", 1) for kv in args.set))
+    candles = load_ohlcv(args.data)
+    result = run_backtest(candles, config, tp=args.tp, order_ttl=args.ttl, fee_rate=args.fee,
+                          compound=args.compound, require_sweep=args.require_sweep)
+    if args.json:
+        print(json.dumps(result))
+        return
+    s = result["summary"]
+    print(f"{os.path.basename(args.data)}: {s['bars']} bars in {s['elapsed']}s")
+    print(f"signals {s['signals']} | expired {s['orders_expired']} | trades {s['trades']} (+{s['open_trades']} open)")
+    print(f"win rate {s['win_rate']} (sweep-aligned {s['win_rate_sweep_aligned']}) | "
+          f"expectancy {s['expectancy_r']}R / ${s['expectancy_usd']} | PF {s['profit_factor']}")
+    print(f"net ${s['net_pnl']} | equity ${s['final_equity']} | "
+          f"max DD ${s['max_drawdown']} ({s['max_drawdown_pct']}%)")
+
+
+if __name__ == "__main__":
+    main()
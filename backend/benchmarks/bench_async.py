@@ -0,0 +1,109 @@
+"""/analyze bersamaan: Flask (thread) vs mode async (aiohttp + ccxt.async_support) terhadap fake exchange.
+
+    cd backend && python -m benchmarks.bench_async --requests 200 --latency 0.1 --threads 16
+
+Setiap request memakai koin berbeda (tanpa coalescing / cache), jadi setiap
+analisa benar-benar menunggu 5 panggilan exchange. Mode sync dibatasi jumlah
+thread (worker + fetch_executor); mode async hanya dibatasi event loop.
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+from aiohttp.test_utils import TestServer
+
+import hybrid_analyzer_nofilter as analyzer
+from async_app import make_app
+from benchmarks.fake_exchange import AsyncFakeExchange, FakeExchange
+from gateway import PriorityTokenBucket
+
+
+def session_cookie(user_id: int = 1) -> str:
+    return analyzer.app.session_interface.get_signing_serializer(analyzer.app).dumps({"user_id": user_id})
+
+
+def fresh_coins(prefix, n):
+    analyzer.candle_cache.invalidate()
+    analyzer.cooldowns = type(analyzer.cooldowns)(analyzer.ANALYZE_COOLDOWN_SECONDS)
+    analyzer.cooldowns.warm(lambda window: [])
+    return [f"{prefix}{i}" for i in range(n)]
+
+
+def run_sync(coins, threads):
+    client = analyzer.app.test_client()
+    client.set_cookie(analyzer.app.config["SESSION_COOKIE_NAME"], session_cookie())
+
+    def one(coin):
+        t0 = time.perf_counter()
+        response = client.post("/analyze", data={"coin_name": coin})
+        return response.status_code, time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(one, coins))
+    return time.perf_counter() - t0, results
+
+
+async def run_async(coins, latency):
+    app = make_app(exchange=AsyncFakeExchange(latency=latency))
+    server = TestServer(app)
+    await server.start_server()
+    cookies = {analyzer.app.config["SESSION_COOKIE_NAME"]: session_cookie()}
+    connector = aiohttp.TCPConnector(limit=0)
+    try:
+        async with aiohttp.ClientSession(cookies=cookies, connector=connector) as http:
+            async def one(coin):
+                t0 = time.perf_counter()
+                async with http.post(server.make_url("/analyze"), data={"coin_name": coin}) as response:
+                    body = await response.json()
+                    assert response.status != 200 or body["coin_name"] == coin
+                    return response.status, time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            results = await asyncio.gather(*(one(c) for c in coins))
+            elapsed = time.perf_counter() - t0
+            async with http.get(server.make_url("/history")) as response:
+                history_status = response.status
+    finally:
+        await server.close()
+    return elapsed, results, history_status
+
+
+def report(label, elapsed, results):
+    ok = sum(1 for status, _ in results if status == 200)
+    latencies = [t for _, t in results]
+    print(f"{label:<8}: {elapsed:6.2f}s for {len(results)} analyses ({len(results) / elapsed:7.1f}/s), "
+          f"{ok} ok, p50 {statistics.median(latencies) * 1000:.0f} ms, max {max(latencies) * 1000:.0f} ms")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--threads", type=int, default=16, help="thread worker Flask (misal gunicorn gthread)")
+    args = parser.parse_args()
+
+    # Budget weight tidak dibatasi: yang diukur adalah konkurensi serving, bukan limit Binance
+    analyzer.gateway.limiter = PriorityTokenBucket(capacity=10 ** 9)
+    analyzer.exchange = FakeExchange(latency=args.latency)
+
+    sync_elapsed, sync_results = run_sync(fresh_coins("S", args.requests), args.threads)
+    sync_ok = report("flask", sync_elapsed, sync_results)
+
+    async_elapsed, async_results, history_status = asyncio.run(run_async(fresh_coins("A", args.requests), args.latency))
+    async_ok = report("async", async_elapsed, async_results)
+    print(f"history : HTTP {history_status} (tanpa MySQL: 500 dengan pesan error, sama dengan Flask)")
+
+    speedup = sync_elapsed / async_elapsed
+    ok = async_ok == args.requests and sync_ok == args.requests and speedup > 1
+    print(f"speedup : {speedup:.1f}x ({'OK' if ok else 'FAIL'})")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
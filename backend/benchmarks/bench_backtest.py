@@ -0,0 +1,51 @@
+"""Backtest satu symbol-tahun data 1h: kecepatan (< 1 detik per symbol-tahun).
+
+    cd backend && python -m benchmarks.bench_backtest --years 1
+
+Paritas fitur dengan fungsi analisa live dicek di tests/test_backtest.py.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import hybrid_analyzer_nofilter as analyzer
+from backtest import load_ohlcv, run_backtest, save_ohlcv_csv
+from benchmarks.fake_exchange import synthetic_ohlcv
+from candles import Candles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--years", type=float, default=1.0)
+    args = parser.parse_args()
+
+    window = analyzer.CANDLE_LIMITS[analyzer.TF_MID]
+    bars = int(args.years * 365 * 24) + window * 4
+    path = os.path.join(tempfile.mkdtemp(), "SYNTH_1h.csv")
+    save_ohlcv_csv(path, Candles.from_ccxt(synthetic_ohlcv(bars, "1h", seed=5)))
+
+    t0 = time.perf_counter()
+    c1h = load_ohlcv(path)
+    load_s = time.perf_counter() - t0
+    print(f"load csv           : {len(c1h)} bars in {load_s * 1000:.1f} ms")
+
+    run = lambda: run_backtest(c1h, analyzer.STRATEGY, window=window)
+    run()  # warm-up
+    samples = []
+    for _ in range(5):
+        t0 = time.perf_counter()
+        result = run()
+        samples.append(time.perf_counter() - t0)
+    best = min(samples)
+    s = result["summary"]
+    print(f"backtest           : {best * 1000:.1f} ms per {args.years:g} symbol-year "
+          f"({'OK' if best < args.years else 'FAIL'} < {args.years:g}s)")
+    print(f"summary            : signals {s['signals']}, trades {s['trades']}, win rate {s['win_rate']}, "
+          f"expectancy {s['expectancy_r']}R, max DD {s['max_drawdown_pct']}%")
+
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
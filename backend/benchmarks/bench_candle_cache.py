@@ -0,0 +1,37 @@
+"""Menghitung panggilan exchange untuk banyak /analyze dengan candle_cache.
+
+    cd backend && python -m benchmarks.bench_candle_cache --requests 200 --coins 5
+"""
+import argparse
+import time
+
+import hybrid_analyzer_nofilter as analyzer
+from benchmarks.fake_exchange import FakeExchange
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--coins", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.01)
+    args = parser.parse_args()
+
+    coins = ["BTC", "ETH", "BNB", "SOL", "XRP", "ADA", "DOGE", "LTC"][:args.coins]
+    fake = FakeExchange(latency=args.latency)
+    analyzer.exchange = fake
+
+    t0 = time.perf_counter()
+    for i in range(args.requests):
+        analyzer.get_all_market_data(coins[i % len(coins)])
+    elapsed = time.perf_counter() - t0
+
+    ohlcv_calls = fake.calls.count("fetch_ohlcv")
+    print(f"requests            : {args.requests} over {len(coins)} coins")
+    print(f"fetch_ohlcv calls   : {ohlcv_calls} (tanpa cache: {args.requests * 3})")
+    print(f"cache stats         : {analyzer.candle_cache.stats}")
+    print(f"cache size          : {len(analyzer.candle_cache)} entries, {analyzer.candle_cache.total_bytes / 1024:.0f} KiB")
+    print(f"total time          : {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Candle store lokal: backfill, tail zero-copy, cold start read-through, offline, gap setelah downtime.
+
+    cd backend && python -m benchmarks.bench_candle_store --days 365
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.fake_exchange import TIMEFRAME_MS, synthetic_ohlcv
+from candle_cache import CandleCache
+from candle_store import CandleStore
+from candles import Candles
+
+SYMBOL = "BTC/USDT"
+
+
+class HistoryExchange:
+    """fetch_ohlcv di atas histori tetap; `now` menentukan bar terakhir (berjalan) yang terlihat."""
+
+    def __init__(self, rows, timeframe="1h"):
+        self.rows = Candles.from_ccxt(rows)
+        self.step = TIMEFRAME_MS[timeframe]
+        self.now = (int(self.rows.open_time[-1]) + self.step // 2) / 1000
+        self.calls = 0
+        self.rows_served = 0
+        self.offline = False
+
+    def fetch(self, symbol, timeframe, since, limit):
+        self.calls += 1
+        if self.offline:
+            raise ConnectionError("network down")
+        visible = self.rows[:int(np.searchsorted(self.rows.open_time, self.now * 1000, side="right"))]
+        out = visible.since(since)[:limit] if since is not None else visible.tail(limit)
+        self.rows_served += len(out)
+        return out.to_rows()
+
+
+def child_read(root, n, queue):
+    store = CandleStore(root)
+    candles = store.tail(SYMBOL, "1h", n)
+    queue.put((float(candles.close.sum()), isinstance(candles.close.base, np.memmap)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, default=365)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp()
+    bars = args.days * 24
+    ex = HistoryExchange(synthetic_ohlcv(bars + 500, "1h", seed=21, end_time=1_700_000_000_000 // 3_600_000 * 3_600_000))
+    ex.now -= 500 * 3600  # 500 bar terakhir "belum terjadi"
+    store = CandleStore(root, clock=lambda: ex.now)
+
+    # 1. Backfill histori panjang (paginasi)
+    t0 = time.perf_counter()
+    added = store.backfill(ex.fetch, SYMBOL, "1h", int(ex.rows.open_time[0]))
+    print(f"backfill           : {added} bars in {time.perf_counter() - t0:.2f}s ({ex.calls} requests), "
+          f"{sum(os.path.getsize(os.path.join(store.path(SYMBOL, '1h'), f)) for f in os.listdir(store.path(SYMBOL, '1h'))) / 1e6:.2f} MB")
+    assert store.gaps(SYMBOL, "1h") == []
+
+    # 2. Tail zero-copy
+    samples = []
+    for _ in range(2000):
+        t0 = time.perf_counter()
+        tail = store.tail(SYMBOL, "1h", 300)
+        samples.append(time.perf_counter() - t0)
+    assert isinstance(tail.close.base, np.memmap) and not tail.close.flags.writeable
+    print(f"tail(300)          : {statistics.median(samples) * 1e6:.1f} us median (memmap view, no copy)")
+
+    # 3. Cold start: cache baru, hanya bar sejak bar tersimpan terakhir yang ditarik
+    ex.calls = ex.rows_served = 0
+    cache = CandleCache(store.read_through(ex.fetch), clock=lambda: ex.now)
+    candles = cache.get(SYMBOL, "1h", 300)
+    expected = ex.rows[:int(np.searchsorted(ex.rows.open_time, ex.now * 1000, side="right"))].tail(300)
+    np.testing.assert_array_equal(candles.close, expected.close)
+    print(f"cold start         : 300 bars with {ex.calls} request / {ex.rows_served} rows from exchange")
+
+    # 4. Offline: exchange mati, bar close tetap tersedia dari file
+    ex.offline = True
+    cache.invalidate()
+    offline = cache.get(SYMBOL, "1h", 300)
+    ex.offline = False
+    print(f"offline            : {len(offline)} bars served from store ({store.stats['offline_reads']} offline reads)")
+
+    # 5. Downtime: 300 bar berlalu, sync mengejar lewat paginasi tanpa gap
+    ex.now += 300 * 3600
+    before = store.length(SYMBOL, "1h")
+    cache.invalidate()
+    caught_up = cache.get(SYMBOL, "1h", 300)
+    print(f"catch-up           : +{store.length(SYMBOL, '1h') - before} bars after downtime, "
+          f"gaps {store.gaps(SYMBOL, '1h')}, last bar live={int(caught_up.open_time[-1]) + 3_600_000 > ex.now * 1000}")
+
+    # 6. Proses lain membaca file yang sama lewat memmap
+    queue = multiprocessing.Queue()
+    proc = multiprocessing.Process(target=child_read, args=(root, 1000, queue))
+    proc.start()
+    child_sum, child_memmap = queue.get(timeout=30)
+    proc.join()
+    assert abs(child_sum - float(store.tail(SYMBOL, "1h", 1000).close.sum())) < 1e-6
+    print(f"multi-process      : child read identical data (memmap={child_memmap})")
+    shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
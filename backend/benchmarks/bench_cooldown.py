@@ -0,0 +1,124 @@
+"""Query cooldown & history di tabel analyses multi-juta baris: tanpa index, dengan index komposit, dan CooldownMap.
+
+    cd backend && python -m benchmarks.bench_cooldown --rows 3000000 --users 5000
+
+Memakai SQLite (file sementara) sebagai pengganti MySQL; index yang dibuat
+sama dengan migrations/0002_analyses_indexes.sql. Query cooldown & history
+adalah query yang dulu dijalankan /analyze dan /history. Kesamaan CooldownMap dengan
+query DB dicek di tests/test_cooldown.py.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from cooldown import CooldownMap
+
+COINS = ["BTC", "ETH", "SOL", "BNB", "XRP", "DOGE", "ADA", "AVAX", "LINK", "DOT",
+         "TRX", "TON", "SUI", "APT", "ARB", "OP", "NEAR", "LTC", "ATOM", "INJ"]
+
+COOLDOWN_SQL = """
+    SELECT created_at FROM analyses
+    WHERE user_id = ? AND coin_name = ?
+    ORDER BY created_at DESC LIMIT 1
+"""
+HISTORY_SQL = """
+    SELECT id, coin_name, entry_price, recommendation, created_at, entry, sl, tp1, rrr, status_entry
+    FROM analyses WHERE user_id = ?
+    ORDER BY created_at DESC LIMIT 5
+"""
+INDEXES = [
+    "CREATE INDEX idx_analyses_user_coin_created ON analyses (user_id, coin_name, created_at)",
+    "CREATE INDEX idx_analyses_user_created ON analyses (user_id, created_at)",
+    "CREATE INDEX idx_analyses_created ON analyses (created_at)",
+]
+
+
+def populate(conn, rows, users, seed=7):
+    conn.execute("""
+        CREATE TABLE analyses (
+            id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, coin_name TEXT NOT NULL,
+            entry_price REAL, recommendation TEXT, entry REAL, sl REAL, tp1 REAL, rrr REAL,
+            status_entry TEXT NOT NULL DEFAULT 'no_entry', created_at INTEGER NOT NULL
+        )
+    """)
+    rng = random.Random(seed)
+    now = int(time.time())
+    chunk = 100_000
+    for start in range(0, rows, chunk):
+        batch = [(rng.randrange(users), rng.choice(COINS), 100.0, "LONG", 99.0, 97.0, 105.0, 2.5,
+                  now - (rows - i) * 10) for i in range(start, min(rows, start + chunk))]
+        conn.executemany("INSERT INTO analyses (user_id, coin_name, entry_price, recommendation, entry, sl, tp1, "
+                         "rrr, created_at) VALUES (?,?,?,?,?,?,?,?,?)", batch)
+    conn.commit()
+    return now
+
+
+def timed(fn, samples):
+    out = []
+    for args in samples:
+        t0 = time.perf_counter()
+        fn(*args)
+        out.append(time.perf_counter() - t0)
+    return statistics.median(out) * 1e6, max(out) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=3_000_000)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=30, help="sampel query tanpa index (full scan, lambat)")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "analyses.db")
+    conn = sqlite3.connect(path)
+    t0 = time.perf_counter()
+    now = populate(conn, args.rows, args.users)
+    print(f"populate           : {args.rows:,} rows, {args.users} users in {time.perf_counter() - t0:.1f}s")
+
+    rng = random.Random(1)
+    keys = [(rng.randrange(args.users), rng.choice(COINS)) for _ in range(max(args.queries, 1000))]
+
+    def cooldown_query(user_id, coin):
+        return conn.execute(COOLDOWN_SQL, (user_id, coin)).fetchone()
+
+    def history_query(user_id, _coin):
+        return conn.execute(HISTORY_SQL, (user_id,)).fetchall()
+
+    med, worst = timed(cooldown_query, keys[:args.queries])
+    print(f"cooldown, no index : {med:10.1f} us median, {worst:10.1f} us max")
+    med, worst = timed(history_query, keys[:args.queries])
+    print(f"history, no index  : {med:10.1f} us median, {worst:10.1f} us max")
+
+    t0 = time.perf_counter()
+    for ddl in INDEXES:
+        conn.execute(ddl)
+    conn.commit()
+    print(f"create indexes     : {time.perf_counter() - t0:.1f}s")
+
+    plan = " | ".join(r[-1] for r in conn.execute("EXPLAIN QUERY PLAN " + COOLDOWN_SQL, keys[0]))
+    print(f"cooldown plan      : {plan}")
+    med, worst = timed(cooldown_query, keys)
+    print(f"cooldown, indexed  : {med:10.1f} us median, {worst:10.1f} us max")
+    med, worst = timed(history_query, keys)
+    print(f"history, indexed   : {med:10.1f} us median, {worst:10.1f} us max")
+
+    # CooldownMap: warm-up dari baris dalam jendela 5 menit, lalu lookup murni di memori
+    cooldowns = CooldownMap(300, clock=lambda: float(now))
+    t0 = time.perf_counter()
+    warmed = cooldowns.warm(lambda window: conn.execute(
+        "SELECT user_id, coin_name, MAX(created_at) FROM analyses WHERE created_at >= ? GROUP BY user_id, coin_name",
+        (now - window,)).fetchall())
+    print(f"map warm-up        : {warmed} keys in {(time.perf_counter() - t0) * 1e3:.1f} ms")
+    med, worst = timed(cooldowns.until, keys)
+    print(f"cooldown, map      : {med:10.1f} us median, {worst:10.1f} us max (0 DB reads)")
+
+    conn.close()
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
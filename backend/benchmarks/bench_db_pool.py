@@ -0,0 +1,124 @@
+"""Load test koneksi DB: connect-per-query (pola lama) vs ConnectionPool.
+
+    cd backend && python -m benchmarks.bench_db_pool --users 32 --requests 50 --connect-ms 3
+
+Memakai SQLite (file sementara) sebagai pengganti MySQL lokal; --connect-ms
+meniru biaya handshake TCP + auth MySQL pada setiap koneksi baru. Setiap
+"request" meniru /analyze: satu query cooldown lalu satu INSERT.
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+from db import ConnectionPool
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    coin_name TEXT NOT NULL,
+    recommendation TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_user_coin_created ON analyses (user_id, coin_name, created_at);
+"""
+
+
+class Opener:
+    def __init__(self, path, connect_ms):
+        self.path = path
+        self.connect_ms = connect_ms
+        self.opened = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        time.sleep(self.connect_ms / 1000)
+        with self._lock:
+            self.opened += 1
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+
+def sqlite_alive(conn):
+    try:
+        conn.execute("SELECT 1")
+        return True
+    except sqlite3.Error:
+        return False
+
+
+def analyze_request(checkout, user_id, coin):
+    with checkout() as conn:
+        conn.execute("SELECT created_at FROM analyses WHERE user_id = ? AND coin_name = ? "
+                     "ORDER BY created_at DESC LIMIT 1", (user_id, coin)).fetchone()
+    with checkout() as conn:
+        conn.execute("INSERT INTO analyses (user_id, coin_name, recommendation) VALUES (?, ?, ?)",
+                     (user_id, coin, "NEUTRAL"))
+        conn.commit()
+
+
+def run(name, checkout, opener, users, requests):
+    latencies = []
+    lock = threading.Lock()
+
+    def user(uid):
+        local = []
+        for i in range(requests):
+            t0 = time.perf_counter()
+            analyze_request(checkout, uid, f"C{i % 7}")
+            local.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(local)
+
+    opened_before = opener.opened
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=user, args=(u,)) for u in range(users)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{name:<18} conns opened {opener.opened - opened_before:>6} | "
+          f"p50 {statistics.median(latencies) * 1e3:7.2f} ms | p99 {p99 * 1e3:7.2f} ms | "
+          f"{len(latencies) / elapsed:8.1f} req/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--connect-ms", type=float, default=3.0)
+    parser.add_argument("--pool-size", type=int, default=10)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "loadtest.db")
+    with sqlite3.connect(path) as conn:
+        conn.executescript(SCHEMA)
+    opener = Opener(path, args.connect_ms)
+
+    class ConnectPerQuery:
+        def __enter__(self):
+            self.conn = opener()
+            return self.conn
+
+        def __exit__(self, *exc):
+            self.conn.close()
+
+    print(f"{args.users} users x {args.requests} requests, connect cost {args.connect_ms} ms")
+    run("connect-per-query", ConnectPerQuery, opener, args.users, args.requests)
+
+    pool = ConnectionPool(opener, size=args.pool_size, timeout=30, health_check=sqlite_alive)
+    run(f"pool(size={args.pool_size})", pool.connection, opener, args.users, args.requests)
+    print(f"pool stats         {pool.stats}")
+
+
+if __name__ == "__main__":
+    main()
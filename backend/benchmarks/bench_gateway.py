@@ -0,0 +1,105 @@
+"""Exchange gateway terhadap fake exchange dengan limit weight ala Binance (skala waktu diperkecil).
+
+    cd backend && python -m benchmarks.bench_gateway --seconds 3 --limit 240
+
+Beban campuran: thread background (scan) memukul klines terus-menerus sementara
+satu klien interactive (/analyze) memanggil tiap 50 ms. Tanpa gateway server
+membalas 429 lalu 418 (ban); dengan gateway tidak ada 429 dan latency interactive
+tetap rendah. Retry, circuit breaker, lane prioritas dan error bertipe dicek di
+tests/test_gateway.py.
+"""
+import argparse
+import statistics
+import sys
+import threading
+import time
+
+from benchmarks.fake_exchange import FakeExchange
+from gateway import BACKGROUND, INTERACTIVE, ExchangeGateway, PriorityTokenBucket, lane
+
+SYMBOL = "BTC/USDT"
+
+
+def mixed_load(call, seconds, bg_threads):
+    """Jalankan beban campuran; return (latency interactive, jumlah call background, error per tipe)"""
+    stop = time.monotonic() + seconds
+    interactive, errors = [], {}
+    background = [0]
+    lock = threading.Lock()
+
+    def record_error(e):
+        with lock:
+            errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+
+    def bg_worker():
+        with lane(BACKGROUND):
+            while time.monotonic() < stop:
+                try:
+                    call(SYMBOL, "1h", limit=300)
+                    with lock:
+                        background[0] += 1
+                except Exception as e:
+                    record_error(e)
+                    time.sleep(0.01)
+
+    def fg_worker():
+        with lane(INTERACTIVE):
+            while time.monotonic() < stop:
+                t0 = time.perf_counter()
+                try:
+                    call(SYMBOL, "4h", limit=300)
+                    interactive.append(time.perf_counter() - t0)
+                except Exception as e:
+                    record_error(e)
+                time.sleep(0.05)
+
+    threads = [threading.Thread(target=bg_worker) for _ in range(bg_threads)] + [threading.Thread(target=fg_worker)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return interactive, background[0], errors
+
+
+def p95(samples):
+    return sorted(samples)[int(len(samples) * 0.95)] if samples else float("nan")
+
+
+def make_gateway(ex, limit, **kwargs):
+    kwargs.setdefault("limiter", PriorityTokenBucket(capacity=limit, period=1.0))
+    return ExchangeGateway(lambda: ex, base_delay=0.01, max_delay=0.1,
+                           max_wait={INTERACTIVE: 1.0, BACKGROUND: 10.0}, **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--limit", type=int, default=240, help="weight server per detik")
+    parser.add_argument("--threads", type=int, default=8, help="thread background")
+    args = parser.parse_args()
+    ok = True
+
+    # 1. Tanpa gateway: panggil exchange langsung
+    fake = dict(latency=0.005, weight_limit=args.limit, weight_window=1.0, ban_after=5, ban_seconds=args.seconds)
+    raw = FakeExchange(**fake)
+    lat, bg, errors = mixed_load(raw.fetch_ohlcv, args.seconds, args.threads)
+    print(f"direct             : interactive p50 {statistics.median(lat) * 1000 if lat else float('nan'):.1f} ms, "
+          f"{len(lat)} ok, background {bg} calls, server statuses {raw.statuses}")
+
+    # 2. Lewat gateway: budget weight sinkron dengan header X-MBX-USED-WEIGHT-1M, lane prioritas
+    ex = FakeExchange(**fake)
+    gw = make_gateway(ex, args.limit)
+    lat, bg, errors = mixed_load(gw.fetch_ohlcv, args.seconds, args.threads)
+    throttled = ex.statuses.get(429, 0) + ex.statuses.get(418, 0)
+    print(f"gateway            : interactive p50 {statistics.median(lat) * 1000:.1f} ms / p95 {p95(lat) * 1000:.1f} ms, "
+          f"{len(lat)} ok, background {bg} calls, server statuses {ex.statuses}, errors {errors}")
+    print(f"weight used        : {gw.stats['weight'] / args.seconds:.0f}/s of {args.limit}/s "
+          f"({'OK' if not throttled else 'FAIL'}: {throttled} throttled responses)")
+    ok &= not throttled and p95(lat) < 0.5
+
+    print("gateway            :", "OK" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""/history keyset vs OFFSET dan /stats dari analysis_stats vs GROUP BY penuh, untuk user dengan 100k analisa.
+
+    cd backend && python -m benchmarks.bench_history --rows 200000
+
+Memakai SQLite (file sementara) sebagai pengganti MySQL, dengan index dari
+migrations/0002 + 0004 dan trigger analysis_stats yang diterjemahkan ke dialek
+SQLite. SQL halaman history diambil langsung dari history.history_query(). Urutan keyset,
+filter dan kesamaan ringkasan dengan GROUP BY penuh dicek di tests/test_history.py.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from history import STATS_SQL, encode_cursor, history_page, history_query, summarize_stats
+
+COINS = ["BTC", "ETH", "SOL", "BNB", "XRP", "DOGE", "ADA", "AVAX", "LINK", "DOT"]
+RECOMMENDATIONS = ["LONG (Limit Order)", "SHORT (Limit Order)", "NEUTRAL", "BULLISH (Tunggu Retracement)"]
+
+SCHEMA = [
+    """CREATE TABLE analyses (
+        id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, coin_name TEXT NOT NULL, entry_price REAL,
+        market_structure_1h TEXT, market_structure_4h TEXT, rsi_1h REAL, macd_1h REAL, funding_rate REAL,
+        long_short_ratio REAL, volatility_prediction TEXT, recommendation TEXT, entry REAL, sl REAL, tp1 REAL,
+        rrr REAL, position_size_units INTEGER, ob_type TEXT, status_entry TEXT NOT NULL DEFAULT 'no_entry',
+        created_at TIMESTAMP NOT NULL)""",
+    "CREATE INDEX idx_analyses_user_coin_created ON analyses (user_id, coin_name, created_at)",
+    "CREATE INDEX idx_analyses_user_created ON analyses (user_id, created_at)",
+    "CREATE INDEX idx_analyses_user_status_created ON analyses (user_id, status_entry, created_at)",
+    """CREATE TABLE analysis_stats (
+        user_id INTEGER NOT NULL, coin_name TEXT NOT NULL, total INTEGER NOT NULL DEFAULT 0,
+        with_levels INTEGER NOT NULL DEFAULT 0, no_entry INTEGER NOT NULL DEFAULT 0,
+        filled INTEGER NOT NULL DEFAULT 0, expired INTEGER NOT NULL DEFAULT 0, tp INTEGER NOT NULL DEFAULT 0,
+        sl INTEGER NOT NULL DEFAULT 0, rrr_sum REAL NOT NULL DEFAULT 0, rrr_count INTEGER NOT NULL DEFAULT 0,
+        last_at TIMESTAMP, PRIMARY KEY (user_id, coin_name))""",
+    """CREATE TRIGGER trg_analyses_stats_insert AFTER INSERT ON analyses BEGIN
+        INSERT INTO analysis_stats VALUES (NEW.user_id, NEW.coin_name, 1,
+            NEW.entry IS NOT NULL AND NEW.sl IS NOT NULL AND NEW.tp1 IS NOT NULL,
+            NEW.status_entry = 'no_entry', NEW.status_entry = 'filled', NEW.status_entry = 'expired',
+            NEW.status_entry = 'TP', NEW.status_entry = 'SL', IFNULL(NEW.rrr, 0), NEW.rrr IS NOT NULL, NEW.created_at)
+        ON CONFLICT (user_id, coin_name) DO UPDATE SET
+            total = total + 1, with_levels = with_levels + excluded.with_levels,
+            no_entry = no_entry + excluded.no_entry, filled = filled + excluded.filled,
+            expired = expired + excluded.expired, tp = tp + excluded.tp, sl = sl + excluded.sl,
+            rrr_sum = rrr_sum + excluded.rrr_sum, rrr_count = rrr_count + excluded.rrr_count,
+            last_at = MAX(IFNULL(last_at, excluded.last_at), excluded.last_at);
+    END""",
+    """CREATE TRIGGER trg_analyses_stats_update AFTER UPDATE ON analyses BEGIN
+        UPDATE analysis_stats SET
+            no_entry = no_entry + (NEW.status_entry = 'no_entry') - (OLD.status_entry = 'no_entry'),
+            filled = filled + (NEW.status_entry = 'filled') - (OLD.status_entry = 'filled'),
+            expired = expired + (NEW.status_entry = 'expired') - (OLD.status_entry = 'expired'),
+            tp = tp + (NEW.status_entry = 'TP') - (OLD.status_entry = 'TP'),
+            sl = sl + (NEW.status_entry = 'SL') - (OLD.status_entry = 'SL')
+        WHERE user_id = NEW.user_id AND coin_name = NEW.coin_name;
+    END""",
+]
+
+FULL_SCAN_STATS_SQL = """
+    SELECT coin_name, COUNT(*) AS total,
+           SUM(entry IS NOT NULL AND sl IS NOT NULL AND tp1 IS NOT NULL) AS with_levels,
+           SUM(status_entry = 'no_entry') AS no_entry, SUM(status_entry = 'filled') AS filled,
+           SUM(status_entry = 'expired') AS expired, SUM(status_entry = 'TP') AS tp, SUM(status_entry = 'SL') AS sl,
+           IFNULL(SUM(rrr), 0) AS rrr_sum, COUNT(rrr) AS rrr_count, MAX(created_at) AS "last_at [timestamp]"
+    FROM analyses WHERE user_id = ?
+    GROUP BY coin_name ORDER BY total DESC, coin_name
+"""
+
+
+def sqlite(sql):
+    return sql.replace("%s", "?")
+
+
+def timed(fn, repeat=20):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        out = fn()
+    return out, (time.perf_counter() - t0) / repeat * 1000
+
+
+def populate(conn, rows, users, rng):
+    start = datetime(2025, 1, 1)
+    batch = []
+    for i in range(rows):
+        levels = rng.random() < 0.6
+        batch.append((0 if i % 2 == 0 else rng.randrange(1, users), rng.choice(COINS), 100.0, "Bullish", "Bullish",
+                      55.0, 0.1, 0.0001, 1.2, "Normal", rng.choice(RECOMMENDATIONS),
+                      *((99.0, 97.0, 105.0, round(rng.uniform(1.5, 4), 2)) if levels else (None,) * 4),
+                      10, "Demand", start + timedelta(seconds=i // 3)))   # created_at kembar -> tie-break id
+    conn.executemany("INSERT INTO analyses (user_id, coin_name, entry_price, market_structure_1h, "
+                     "market_structure_4h, rsi_1h, macd_1h, funding_rate, long_short_ratio, volatility_prediction, "
+                     "recommendation, entry, sl, tp1, rrr, position_size_units, ob_type, created_at) "
+                     "VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)", batch)
+    conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000, help="total baris (separuh milik user 0)")
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--page", type=int, default=50)
+    args = parser.parse_args()
+    rng = random.Random(3)
+
+    path = os.path.join(tempfile.mkdtemp(), "history.db")
+    conn = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES)
+    conn.row_factory = lambda cursor, row: {c[0]: v for c, v in zip(cursor.description, row)}
+    for ddl in SCHEMA:
+        conn.execute(ddl)
+    t0 = time.perf_counter()
+    populate(conn, args.rows, args.users, rng)
+    mine = args.rows // 2 + args.rows % 2
+    print(f"populate       : {args.rows:,} rows ({mine:,} for user 0) in {time.perf_counter() - t0:.1f}s")
+
+    # Status berubah lewat UPDATE (resolver/manual) -> trigger menjaga ringkasan
+    ids = [r["id"] for r in conn.execute("SELECT id FROM analyses WHERE entry IS NOT NULL")]
+    for status in ("filled", "expired", "TP", "SL"):
+        chosen = rng.sample(ids, len(ids) // 8)
+        conn.executemany("UPDATE analyses SET status_entry = ? WHERE id = ?", [(status, i) for i in chosen])
+    conn.commit()
+
+    def page(params, user_id=0):
+        sql, values, limit = history_query(user_id, params)
+        return history_page(conn.execute(sqlite(sql), values).fetchall(), limit)
+
+    # 1. Jalan semua halaman dengan cursor
+    full = [r["id"] for r in conn.execute(
+        "SELECT id FROM analyses WHERE user_id = 0 ORDER BY created_at DESC, id DESC")]
+    cursor, pages, t0 = None, 0, time.perf_counter()
+    while True:
+        _, cursor = page({"limit": str(args.page), **({"cursor": cursor} if cursor else {})})
+        pages += 1
+        if not cursor:
+            break
+    walk_ms = (time.perf_counter() - t0) * 1000
+    print(f"keyset walk    : {pages} pages of {args.page} in {walk_ms:.0f} ms")
+
+    # 2. Halaman dalam: keyset vs OFFSET
+    deep = full[-args.page - 1]
+    anchor = conn.execute("SELECT created_at, id FROM analyses WHERE id = ?", (deep,)).fetchone()
+    deep_cursor = encode_cursor(anchor["created_at"], anchor["id"])
+    _, keyset_ms = timed(lambda: page({"limit": str(args.page), "cursor": deep_cursor}))
+    offset_sql = ("SELECT id FROM analyses WHERE user_id = 0 ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?")
+    _, offset_ms = timed(lambda: conn.execute(offset_sql, (args.page, len(full) - args.page)).fetchall(), 5)
+    print(f"last page      : keyset {keyset_ms:.2f} ms vs OFFSET {len(full) - args.page:,} {offset_ms:.2f} ms")
+
+    # 3. Filter coin / status / recommendation
+    for params in ({"coin": "btc"}, {"status": "TP"}, {"recommendation": "long"},
+                   {"coin": "ETH", "status": "SL", "recommendation": "short"}):
+        _, filter_ms = timed(lambda: page(dict(params, limit=str(args.page))))
+        print(f"filter         : {params} {filter_ms:.2f} ms")
+
+    # 4. /stats: tabel ringkasan (trigger) == GROUP BY penuh
+    summary, summary_ms = timed(lambda: summarize_stats(conn.execute(sqlite(STATS_SQL), (0,)).fetchall()))
+    _, scan_ms = timed(lambda: summarize_stats(conn.execute(FULL_SCAN_STATS_SQL, (0,)).fetchall()), 5)
+    user = summary["user"]
+    print(f"stats          : summary table {summary_ms:.2f} ms vs full scan {scan_ms:.1f} ms")
+    print(f"user 0         : {user['total']:,} analyses, TP {user['tp']:,} / SL {user['sl']:,}, "
+          f"win rate {user['win_rate']}%, avg RRR {user['avg_rrr']}")
+
+    conn.close()
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
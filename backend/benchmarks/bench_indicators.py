@@ -0,0 +1,72 @@
+"""Benchmark indicators.py (RSI, EMA/MACD, ATR Wilder): per symbol, batch 2D dan deret panjang.
+
+    cd backend && python -m benchmarks.bench_indicators --symbols 200 --bars 300
+
+Nilai golden (RSI 14 StockCharts/Wilder) dan kesamaan dengan loop referensi dicek di
+tests/test_indicators.py.
+"""
+import argparse
+import time
+
+import numpy as np
+
+import indicators as ind
+
+def ref_ema(data, period):
+    """Loop EMA asli dari hybrid_analyzer_nofilter (seed SMA)"""
+    alpha = 2 / (period + 1)
+    ema = [float(np.mean(data[:period]))]
+    for price in data[period:]:
+        ema.append(alpha * price + (1 - alpha) * ema[-1])
+    return np.array(ema)
+
+
+def synthetic(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    spread = np.abs(rng.normal(0, 0.004, n)) * close
+    return close + spread, close - spread, close
+
+
+def bench(fn, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--symbols", type=int, default=200)
+    parser.add_argument("--bars", type=int, default=300)
+    args = parser.parse_args()
+
+    series = [synthetic(args.bars, seed=i) for i in range(args.symbols)]
+    cases = {
+        "rsi_series": lambda h, l, c: ind.rsi_series(c, 14),
+        "ema_series": lambda h, l, c: ind.ema_series(c, 26),
+        "macd_series": lambda h, l, c: ind.macd_series(c),
+        "atr_series": lambda h, l, c: ind.atr_series(h, l, c, 14),
+    }
+    print(f"batch              : {args.symbols} symbols x {args.bars} bars")
+    for name, fn in cases.items():
+        per_symbol = bench(lambda: [fn(*s) for s in series], 3) / args.symbols
+        print(f"{name:<19}: {per_symbol * 1e6:8.1f} us/symbol")
+
+    batch = tuple(np.stack(col) for col in zip(*series))  # (symbols, bars) per field
+    for name, fn in cases.items():
+        per_symbol = bench(lambda: fn(*batch), 5) / args.symbols
+        print(f"{name + ' (2D)':<19}: {per_symbol * 1e6:8.1f} us/symbol")
+
+    h, l, c = series[0]
+    loop = bench(lambda: ref_ema(c, 26), 10)
+    vec = bench(lambda: ind.ema_series(c, 26), 10)
+    print(f"ema loop vs vector : {loop * 1e6:.1f} us vs {vec * 1e6:.1f} us")
+
+    h, l, c = synthetic(1_000_000, seed=2)
+    print(f"macd 1M bars       : {bench(lambda: ind.macd_series(c), 3) * 1e3:.1f} ms")
+    print(f"atr 1M bars        : {bench(lambda: ind.atr_series(h, l, c, 14), 3) * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Membandingkan latency get_all_market_data: 5 panggilan berurutan vs paralel.
+
+    cd backend && python -m benchmarks.bench_market_fetch --latency 0.2 --runs 5
+"""
+import argparse
+import statistics
+import time
+
+import hybrid_analyzer_nofilter as analyzer
+from benchmarks.fake_exchange import FakeExchange
+
+
+def sequential_market_data(symbol: str):
+    """Jalur lama: 3x fetch_candles_ccxt lalu fetch_sentiment_data, satu per satu."""
+    symbol_ccxt = symbol.upper() + "/USDT"
+    candles_1d = analyzer.fetch_candles_ccxt(symbol_ccxt, analyzer.TF_HIGH, 200)
+    candles_4h = analyzer.fetch_candles_ccxt(symbol_ccxt, analyzer.TF_MID, 300)
+    candles_1h = analyzer.fetch_candles_ccxt(symbol_ccxt, analyzer.TF_LOW, 300)
+    sentiment = analyzer.fetch_sentiment_data(symbol_ccxt)
+    return candles_1d, candles_4h, candles_1h, sentiment
+
+
+def timed(fn, runs: int):
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn("BTC")
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples), max(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.2, help="latency per panggilan (detik)")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    analyzer.exchange = FakeExchange(latency=args.latency)
+
+    seq_med, seq_max = timed(sequential_market_data, args.runs)
+    par_med, par_max = timed(analyzer.get_all_market_data, args.runs)
+    print(f"latency/call       : {args.latency * 1000:.0f} ms")
+    print(f"sequential  median : {seq_med * 1000:.1f} ms (max {seq_max * 1000:.1f} ms)")
+    print(f"concurrent  median : {par_med * 1000:.1f} ms (max {par_max * 1000:.1f} ms)")
+    print(f"speedup            : {seq_med / par_med:.1f}x")
+
+    # Partial failure: sentimen lambat/gagal tidak boleh menahan atau menggagalkan analisa
+    analyzer.exchange = FakeExchange(
+        latency=args.latency,
+        slow_calls={"fapiPublicGetPremiumIndex": analyzer.FETCH_TIMEOUT + 5},
+        fail_calls={"fapiDataGetGlobalLongShortAccountRatio"},
+    )
+    t0 = time.perf_counter()
+    data = analyzer.get_all_market_data("BTC")
+    elapsed = time.perf_counter() - t0
+    print(f"partial failure    : {elapsed:.2f}s, data ok={data is not None}, sentiment={data and data['sentiment']}, "
+          f"degraded={data and data['degraded']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Instrumentasi: biaya observasi, breakdown latency per tahap, /metrics, profiler per request.
+
+    cd backend && python -m benchmarks.bench_metrics --requests 50 --latency 0.02
+
+Menjalankan /analyze lewat Flask test client terhadap fake exchange, lalu membaca
+analyzer_stage_seconds untuk melihat ke mana waktu request habis (exchange,
+indikator, SMC, antrian DB). Satu request diprofil dengan ?profile=1.
+"""
+import argparse
+import sys
+import time
+
+import hybrid_analyzer_nofilter as analyzer
+from benchmarks.fake_exchange import FakeExchange
+from gateway import PriorityTokenBucket
+from metrics import STAGE_SECONDS, Histogram, stage
+
+STAGES = ["market_data", "resample", "fetch_candles_1d", "fetch_candles_4h", "fetch_candles_1h", "fetch_funding_rate",
+          "fetch_long_short_ratio", "analyze_signal", "rsi", "macd", "atr", "structure", "smc_index", "liquidity_sweep",
+          "order_block", "trade_levels", "save_to_db", "cooldown_query"]
+
+
+def per_call_ns(fn, n=200_000):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.02)
+    args = parser.parse_args()
+    ok = True
+
+    # 1. Biaya instrumentasi di jalur panas
+    h = Histogram("bench_seconds", "bench", ("stage",))
+    observe = per_call_ns(lambda: h.observe(0.003, stage="rsi"))
+
+    def with_stage():
+        with stage("bench"):
+            pass
+    timer = per_call_ns(with_stage, 100_000)
+    print(f"overhead       : observe {observe:.0f} ns, stage() {timer:.0f} ns per call")
+    ok &= timer < 20_000
+
+    # 2. /analyze lewat Flask, lalu breakdown per tahap
+    analyzer.gateway.limiter = PriorityTokenBucket(capacity=10 ** 9)
+    analyzer.exchange = FakeExchange(latency=args.latency)
+    analyzer.cooldowns.warm(lambda window: [])
+    client = analyzer.app.test_client()
+    client.set_cookie(analyzer.app.config["SESSION_COOKIE_NAME"],
+                      analyzer.app.session_interface.get_signing_serializer(analyzer.app).dumps({"user_id": 1}))
+    for i in range(args.requests):
+        analyzer.candle_cache.invalidate()
+        response = client.post("/analyze", data={"coin_name": f"M{i}"})
+        ok &= response.status_code == 200
+
+    print(f"{'stage':<24}{'count':>7}{'mean ms':>10}{'p95 <= ms':>11}")
+    for name in STAGES:
+        s = STAGE_SECONDS.summary(stage=name)
+        if s["count"]:
+            print(f"{name:<24}{s['count']:>7}{s['sum'] / s['count'] * 1000:>10.2f}{s['p95'] * 1000:>11.1f}")
+    request = analyzer.HTTP_REQUEST_SECONDS.summary(route="/analyze", method="POST", status=200)
+    print(f"{'http /analyze':<24}{request['count']:>7}{request['sum'] / max(request['count'], 1) * 1000:>10.2f}"
+          f"{request.get('p95', float('nan')) * 1000:>11.1f}")
+    ok &= request["count"] == args.requests and STAGE_SECONDS.summary(stage="order_block")["count"] == args.requests
+
+    # 3. Scrape /metrics
+    t0 = time.perf_counter()
+    response = client.get("/metrics")
+    body = response.get_data(as_text=True)
+    scrape_ms = (time.perf_counter() - t0) * 1000
+    series = sum(1 for line in body.splitlines() if line and not line.startswith("#"))
+    print(f"/metrics       : HTTP {response.status_code}, {series} samples, {len(body) / 1024:.1f} KiB in {scrape_ms:.1f} ms")
+    for needle in ('analyzer_stage_seconds_bucket{stage="order_block",le="+Inf"}', "exchange_request_seconds_count",
+                   "exchange_weight_total", "http_request_seconds_count", "analysis_write_queue_depth"):
+        ok &= needle in body
+
+    # 4. Error exchange tercatat sebagai counter per endpoint + tipe
+    analyzer.exchange.inject(503)
+    analyzer.candle_cache.invalidate()
+    client.post("/analyze", data={"coin_name": "ERR"})
+    errors = analyzer.REGISTRY.get("exchange_errors_total").value(endpoint="fetch_ohlcv", error="ExchangeUnavailable")
+    print(f"exchange errors: fetch_ohlcv ExchangeUnavailable = {errors:.0f}")
+    ok &= errors >= 1
+
+    # 5. Profiler opt-in per request
+    analyzer.exchange = FakeExchange(latency=args.latency * 5)
+    analyzer.candle_cache.invalidate()
+    response = client.post("/analyze?profile=1", data={"coin_name": "PROF"})
+    profile_id = response.headers.get("X-Profile-Id")
+    text = client.get(f"/debug/profile/{profile_id}").get_data(as_text=True) if profile_id else ""
+    lines = text.splitlines()
+    print(f"profile        : id {profile_id}, {lines[0] if lines else 'missing'}")
+    for line in lines[1:4]:
+        stack, n = line.rsplit(" ", 1)
+        print(f"    {n:>4}  ...{stack[-110:]}")
+    ok &= bool(profile_id) and len(lines) > 1
+    plain = client.post("/analyze", data={"coin_name": "NOPROF"})
+    ok &= "X-Profile-Id" not in plain.headers
+
+    print("metrics        :", "OK" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
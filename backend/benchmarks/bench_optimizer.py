@@ -0,0 +1,63 @@
+"""Parameter sweep: throughput 1 worker vs semua core, lalu uji resume dari checkpoint.
+
+    cd backend && python -m benchmarks.bench_optimizer --symbols 8 --years 1
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from backtest import save_ohlcv_csv
+from benchmarks.fake_exchange import synthetic_ohlcv
+from candles import Candles
+from optimizer import grid_candidates, load_checkpoint, optimize, rank
+
+GRID = {"min_rrr": [1.5, 2.0, 2.5], "atr_multiplier": [1.5, 2.0, 3.0], "ob_lookback": [6, 10]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--symbols", type=int, default=8)
+    parser.add_argument("--years", type=float, default=1.0)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    bars = int(args.years * 365 * 24) + 1200
+    paths = []
+    for k in range(args.symbols):
+        path = os.path.join(tmp, f"SYM{k}_1h.csv")
+        save_ohlcv_csv(path, Candles.from_ccxt(synthetic_ohlcv(bars, "1h", seed=100 + k)))
+        paths.append(path)
+    candidates = grid_candidates(GRID)
+    print(f"sweep              : {len(candidates)} parameter sets x {args.symbols} symbols x {bars} bars")
+
+    cores = os.cpu_count() or 1
+    timings = {}
+    for workers in sorted({1, cores}):
+        t0 = time.perf_counter()
+        results = optimize(paths, candidates, workers=workers)
+        timings[workers] = time.perf_counter() - t0
+        print(f"{workers:>2} worker(s)       : {timings[workers]:.2f}s "
+              f"({len(candidates) * args.symbols / timings[workers]:.1f} symbol-backtests/s)")
+    if cores > 1:
+        print(f"speedup            : {timings[1] / timings[cores]:.1f}x on {cores} cores")
+
+    # Resume: checkpoint berisi separuh hasil + satu baris terpotong
+    checkpoint = os.path.join(tmp, "sweep.jsonl")
+    optimize(paths, candidates[:len(candidates) // 2], checkpoint, workers=cores)
+    with open(checkpoint, "a") as f:
+        f.write('{"key": "trunc')
+    t0 = time.perf_counter()
+    resumed = optimize(paths, candidates, checkpoint, workers=cores)
+    assert len(resumed) == len(candidates) and len(load_checkpoint(checkpoint)) == len(candidates)
+    by_key = {r["key"]: r for r in results}
+    assert all(r["expectancy_r"] == by_key[r["key"]]["expectancy_r"] for r in resumed), "hasil resume berbeda"
+    print(f"resume             : {len(candidates) - len(candidates) // 2} remaining sets in "
+          f"{time.perf_counter() - t0:.2f}s, results identical")
+
+    best = rank(resumed, min_trades=1)[0]
+    print(f"best expectancy    : {best['expectancy_r']}R over {best['trades']} trades {best['params']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Resolver outcome: keputusan vektor vs loop per baris, query/fetch per siklus.
+
+    cd backend && python -m benchmarks.bench_outcomes --rows 50000 --coins 200
+
+resolve() vektor dibandingkan dengan simulasi per baris memakai _first_hit backtest,
+lalu satu siklus OutcomeResolver dijalankan terhadap tabel analyses di memori (jumlah
+SELECT, load candle dan UPDATE per siklus). Kebenaran status dicek di tests/test_outcomes.py.
+"""
+import argparse
+import math
+import time
+
+import numpy as np
+
+from backtest import _first_hit
+from benchmarks.fake_exchange import synthetic_ohlcv
+from benchmarks.fixtures import synthetic_candles
+from candle_cache import timeframe_ms
+from outcomes import (EXPIRED, FILLED, NO_ENTRY, OPEN_STATUSES, SL, TP, CandleHistory, OutcomeResolver, resolve,
+                      resolve_sql, utc_datetime)
+
+STEP = timeframe_ms("1h")
+
+
+def reference(c, entry, sl, tp, created_ms, now_ms, ttl):
+    """Satu analisa, loop biasa (aturan run_backtest)"""
+    c = c[:int(np.searchsorted(c.open_time, now_ms - STEP, side="right"))]
+    n = len(c)
+    if not n:
+        return NO_ENTRY
+    long = sl < entry
+    start = int(np.searchsorted(c.open_time, created_ms))
+    fill = _first_hit(c.low if long else c.high, entry, start, min(n, start + ttl), below=long)
+    if fill < 0:
+        return EXPIRED if start + ttl <= n else NO_ENTRY
+    if (c.low[fill] <= sl) if long else (c.high[fill] >= sl):
+        return SL
+    sl_bar = _first_hit(c.low if long else c.high, sl, fill + 1, n, below=long)
+    tp_bar = _first_hit(c.high if long else c.low, tp, fill + 1, n, below=not long)
+    if tp_bar >= 0 and (sl_bar < 0 or tp_bar < sl_bar):
+        return TP
+    return SL if sl_bar >= 0 else FILLED
+
+
+def random_levels(rng, c, count, now_ms):
+    """Analisa acak: dibuat di tengah bar, entry dekat harga saat itu, SL/TP1 di sisi yang benar"""
+    idx = rng.integers(0, len(c), count)
+    created = c.open_time[idx] + rng.integers(1, STEP // 1000, count) * 1000
+    price = c.close[idx]
+    long = rng.random(count) < 0.5
+    sign = np.where(long, 1.0, -1.0)
+    entry = price * (1 - sign * rng.uniform(0, 0.02, count))
+    risk = entry * rng.uniform(0.003, 0.03, count)
+    sl = entry - sign * risk
+    tp = entry + sign * risk * rng.uniform(1.0, 3.0, count)
+    return entry, sl, tp, np.minimum(created, now_ms - 1000)
+
+
+class MemoryAnalyses:
+    """Tabel analyses di memori dengan semantik OPEN_ANALYSES_SQL / RESOLVE_SQL"""
+
+    def __init__(self):
+        self.rows = {}
+        self.selects = self.updates = 0
+
+    def select_page(self, after_id, since, limit):
+        self.selects += 1
+        out = []
+        for row_id in sorted(self.rows):
+            coin, entry, sl, tp, status, created = self.rows[row_id]
+            if row_id > after_id and status in OPEN_STATUSES and created >= since:
+                out.append((row_id, coin, entry, sl, tp, status, created))
+                if len(out) == limit:
+                    break
+        return out
+
+    def write(self, updates):
+        for status, ids in updates:
+            resolve_sql(len(ids))
+            self.updates += 1
+            for row_id in ids:
+                if self.rows[row_id][4] in OPEN_STATUSES:
+                    self.rows[row_id][4] = status
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--coins", type=int, default=200)
+    parser.add_argument("--bars", type=int, default=720)
+    parser.add_argument("--ttl", type=int, default=24)
+    args = parser.parse_args()
+    rng = np.random.default_rng(5)
+
+    # 1. Biaya: resolve() vs loop per baris pada satu koin
+    c = synthetic_candles(args.bars, seed=2)
+    now_ms = int(c.open_time[-1]) + STEP // 2          # Bar terakhir masih berjalan
+    n = min(args.rows, 20_000)
+    entry, sl, tp, created = random_levels(rng, c, n, now_ms)
+    t0 = time.perf_counter()
+    fast = resolve(c, entry, sl, tp, created, now_ms, "1h", args.ttl)
+    vector_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    [reference(c, *vals, now_ms, args.ttl) for vals in zip(entry, sl, tp, created)]
+    loop_s = time.perf_counter() - t0
+    counts = {s: int((fast == s).sum()) for s in (NO_ENTRY, FILLED, EXPIRED, TP, SL)}
+    print(f"decide         : {n} analyses on {args.bars} bars {counts}: vectorized {vector_s * 1000:.1f} ms, "
+          f"per-row loop {loop_s * 1000:.1f} ms ({loop_s / vector_s:.0f}x)")
+
+    # 2. Satu siklus resolver: tabel di memori, candle sintetis per koin
+    coins = [f"C{i}" for i in range(args.coins)]
+    series = {coin + "/USDT": synthetic_candles(args.bars, seed=100 + i) for i, coin in enumerate(coins)}
+    end = int(c.open_time[-1])                          # Semua deret sintetis berbagi jam yang sama
+    db = MemoryAnalyses()
+    per_coin = math.ceil(args.rows / args.coins)
+    row_id = 0
+    for coin in coins:
+        e, s, t, cr = random_levels(rng, series[coin + "/USDT"], per_coin, now_ms)
+        for vals in zip(e, s, t, cr):
+            row_id += 1
+            db.rows[row_id] = [coin, float(vals[0]), float(vals[1]), float(vals[2]), NO_ENTRY,
+                               utc_datetime(int(vals[3]) / 1000)]
+    loads = []
+
+    def load(symbol, timeframe, since, now):
+        loads.append(symbol)
+        return series[symbol].since(since // STEP * STEP)
+
+    resolver = OutcomeResolver(db.select_page, db.write, load, timeframe="1h", order_ttl=args.ttl,
+                               max_age_days=3650, page_size=5000, update_chunk=1000, clock=lambda: now_ms / 1000)
+    t0 = time.perf_counter()
+    changed = resolver.run_once()
+    cycle_s = time.perf_counter() - t0
+    print(f"cycle          : {row_id} open rows, {args.coins} coins in {cycle_s:.2f} s -> {changed}")
+    print(f"round trips    : {db.selects} SELECT (page 5000), {len(loads)} candle loads, {db.updates} UPDATE")
+
+    t0 = time.perf_counter()
+    resolver.run_once()
+    print(f"second cycle   : {resolver.stats['rows']} open rows in {time.perf_counter() - t0:.2f} s")
+
+    # 3. CandleHistory: fetch penuh sekali, lalu hanya bar baru
+    calls = []
+    rows = synthetic_ohlcv(3000, end_time=end)
+
+    def fetch(symbol, timeframe, since, limit):
+        calls.append(since)
+        return [r for r in rows if r[0] >= since][:limit]
+
+    history = CandleHistory(fetch)
+    first = history.load("C0/USDT", "1h", end - 2000 * STEP, now_ms)
+    cold = len(calls)
+    history.load("C0/USDT", "1h", end - 1500 * STEP, now_ms + STEP)
+    print(f"history        : first load {len(first)} bars in {cold} fetches, next cycle {len(calls) - cold} fetch, "
+          f"{history.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Resampling multi-timeframe: biaya agregasi vektor vs update inkremental, dan fetch per koin.
+
+    cd backend && python -m benchmarks.bench_resample --bars 1000000 --coins 20
+
+get_all_market_data dijalankan terhadap fake exchange dengan dan tanpa resampling
+untuk menghitung request klines per koin. Kesamaan hasil inkremental dengan agregasi
+vektor dicek di tests/test_resample.py.
+"""
+import argparse
+import time
+
+import hybrid_analyzer_nofilter as analyzer
+from benchmarks.fake_exchange import FakeExchange
+from benchmarks.fixtures import synthetic_candles
+from candles import Candles
+from gateway import PriorityTokenBucket
+from resample import ResampleCache, Resampler, resample
+
+def expected(window: Candles, timeframe: str, limit: int) -> Candles:
+    bars, _ = resample(window, timeframe)
+    if int(bars.open_time[0]) < int(window.open_time[0]):
+        bars = bars[1:]
+    return bars.tail(limit)
+
+
+def kline_calls(exchange: FakeExchange) -> int:
+    return sum(1 for name in exchange.calls if name == "fetch_ohlcv")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--bars", type=int, default=1_000_000)
+    parser.add_argument("--coins", type=int, default=20)
+    args = parser.parse_args()
+
+    # 1. Biaya
+    big = synthetic_candles(args.bars, seed=3)
+    t0 = time.perf_counter()
+    for tf in ("4h", "1d"):
+        resample(big, tf)
+    vector_ms = (time.perf_counter() - t0) * 1000
+    resampler = Resampler("1h", analyzer.CANDLE_LIMITS)
+    live = synthetic_candles(5300, seed=5)
+    for tf in (analyzer.TF_MID, analyzer.TF_HIGH):
+        resampler.seed(tf, expected(live[:4800], tf, analyzer.CANDLE_LIMITS[tf]))
+    t0 = time.perf_counter()
+    for end in range(4800, 5300):
+        resampler.update(live[end - 299:end + 1])
+    per_update = (time.perf_counter() - t0) / 500 * 1e6
+    print(f"vectorized     : {args.bars} 1h bars -> 4h + 1d in {vector_ms:.1f} ms")
+    print(f"per update     : {per_update:.1f} us for 4h + 1d (300 bar 1h, bar parsial inkremental)")
+
+    # 2. Request klines per koin: seed sekali lalu hanya 1h vs selalu tiga timeframe
+    analyzer.gateway.limiter = PriorityTokenBucket(capacity=10 ** 9)
+    rows = []
+    for mode in ("per-timeframe", "resampled"):
+        analyzer.resampler = ResampleCache(analyzer.TF_LOW, analyzer.CANDLE_LIMITS) if mode == "resampled" else None
+        analyzer.exchange = FakeExchange(latency=0.0)
+        analyzer.candle_cache.invalidate()
+        for i in range(args.coins):
+            analyzer.get_all_market_data(f"R{i}")
+        cold = kline_calls(analyzer.exchange)
+        for entry in analyzer.candle_cache._entries.values():
+            entry.expires_at = 0   # paksa refresh bar berjalan
+        again = [analyzer.get_all_market_data(f"R{i}") for i in range(args.coins)]
+        warm = kline_calls(analyzer.exchange) - cold
+        lengths = {tf: len(c) for tf, c in again[0]["candles"].items()}
+        rows.append((mode, cold / args.coins, warm / args.coins, lengths))
+    for mode, cold, warm, lengths in rows:
+        print(f"{mode:<15}: klines/coin first {cold:.0f}, refresh {warm:.0f}, bars {lengths}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Throughput scanner (symbols/detik) terhadap stub exchange.
+
+    cd backend && python -m benchmarks.bench_scanner --coins 60 --latency 0.05 --target 20
+
+Keluar dengan status 1 jika throughput konfigurasi default di bawah --target.
+Budget weight (lane background) diukur di bench_gateway.py.
+"""
+import argparse
+import sys
+import time
+
+import hybrid_analyzer_nofilter as analyzer
+from benchmarks.fake_exchange import FakeExchange
+from scanner import scan, scan_summary
+
+
+def run(coins, workers):
+    analyzer.candle_cache.invalidate()
+    started = time.time()
+    results = list(scan(coins, analyzer.get_all_market_data, analyzer.analyze_and_generate_signal,
+                        max_workers=workers))
+    return scan_summary(results, started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--coins", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--target", type=float, default=20.0, help="minimal symbols/detik")
+    args = parser.parse_args()
+
+    analyzer.exchange = FakeExchange(latency=args.latency)
+    coins = [f"C{i}" for i in range(args.coins)]
+
+    for workers in (1, 2, analyzer.scan_workers(64)):
+        summary = run(coins, workers)
+        print(f"workers={workers:<3} {summary['symbols_per_sec']:>7} symbols/s, "
+              f"{len(summary['ranked'])} setups, {summary['errors']} errors")
+
+    best = run(coins, analyzer.scan_workers(64))
+    ok = best["symbols_per_sec"] >= args.target
+    print(f"target {args.target}/s: {'OK' if ok else 'FAIL'} ({best['symbols_per_sec']}/s)")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
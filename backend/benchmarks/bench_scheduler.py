@@ -0,0 +1,165 @@
+"""Scheduler bar close: keselarasan + jitter, overlap, catch-up, batas pool, dan /analyze setelah close.
+
+    cd backend && python -m benchmarks.bench_scheduler --coins 30
+
+Bagian 1-4 memakai jam buatan (BarScheduler.tick dengan `now`), bagian 5 menjalankan
+thread scheduler sungguhan dengan timeframe 200 ms, bagian 6 membandingkan request
+pertama per koin setelah bar close tanpa vs dengan job analisa (FakeExchange).
+"""
+import argparse
+import random
+import statistics
+import sys
+import threading
+import time
+
+H = 3_600_000
+DAY = 24 * H
+
+
+def aligned(ok, label, detail):
+    print(f"{label:<15}: {detail}: {ok}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--coins", type=int, default=30)
+    parser.add_argument("--latency", type=float, default=0.05, help="latency per panggilan exchange (detik)")
+    args = parser.parse_args()
+    ok = True
+
+    from scheduler import BarScheduler
+
+    # 1. Dua hari jam buatan: satu run per bar close, di dalam [close + settle, close + settle + jitter]
+    start = 20_000 * DAY / 1000 + 600
+    now = [start]
+    sched = BarScheduler(workers=2, settle=3, jitter=5, clock=lambda: now[0], rng=random.Random(1))
+    runs = {"1h": [], "4h": [], "1d": []}
+    for name, tf in (("1h", H), ("4h", 4 * H), ("1d", DAY)):
+        sched.add(name, tf, lambda bar, name=name: runs[name].append((bar, now[0])))
+    while now[0] < start + 2 * DAY / 1000:
+        now[0] += 1
+        sched.tick(wait=True)
+    expected = {"1h": 48, "4h": 12, "1d": 2}
+    in_window = all(3 <= t - bar * tf / 1000 <= 3 + 5 + 1 for name, tf in (("1h", H), ("4h", 4 * H), ("1d", DAY))
+                    for bar, t in runs[name])
+    counts = {name: len(r) for name, r in runs.items()}
+    offsets = [t - bar * 3600 for bar, t in runs["1h"]]
+    ok &= aligned(counts == expected and in_window, "alignment",
+                  f"runs {counts}, 1h offset after close {min(offsets):.0f}..{max(offsets):.0f}s (settle 3 + jitter 5)")
+
+    # 2. Overlap: close berikutnya saat run masih berjalan -> tidak dobel, dikejar segera setelah selesai
+    now[0] = start
+    release, started = threading.Event(), []
+    sched = BarScheduler(settle=0, jitter=0, clock=lambda: now[0])
+    slow = sched.add("slow", H, lambda bar: (started.append(bar), release.wait(5)), run_on_start=True)
+    sched.tick()
+    now[0] += 3600
+    while len(started) < 1:
+        time.sleep(0.001)
+    overlapped = sched.tick()
+    release.set()
+    while slow.running:
+        time.sleep(0.001)
+    caught = sched.tick(wait=True)
+    overlap_ok = overlapped == 0 and caught == 1 and started == [started[0], started[0] + 1] \
+        and slow.stats["overlaps"] == 1 and slow.stats["missed"] == 0
+    ok &= aligned(overlap_ok, "overlap", f"bars run {started}, overlaps {slow.stats['overlaps']}")
+
+    # 3. Catch-up setelah proses tertidur 5 bar: satu run untuk bar terbaru, atau replay 2 bar terakhir
+    now[0] = start
+    seen = {"latest": [], "replay": []}
+    sched = BarScheduler(settle=0, jitter=0, clock=lambda: now[0])
+    latest = sched.add("latest", H, seen["latest"].append)
+    replay = sched.add("replay", H, seen["replay"].append, replay=2)
+    now[0] += 5 * 3600
+    sched.tick(wait=True)
+    current = int(now[0] * 1000) // H
+    catch_ok = (seen["latest"] == [current] and latest.stats["missed"] == 4
+                and seen["replay"] == [current - 2, current - 1, current] and replay.stats["missed"] == 2)
+    ok &= aligned(catch_ok, "catch-up", f"latest {[b - current for b in seen['latest']]}, "
+                                        f"replay {[b - current for b in seen['replay']]} (relative to current bar)")
+
+    # 4. Pool: dua job memanggil each() bersamaan, kerja paralel tidak pernah > workers
+    sched = BarScheduler(workers=3, settle=0, jitter=0, clock=lambda: now[0])
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def work(_):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.005)
+        with lock:
+            active[0] -= 1
+
+    for name in ("a", "b"):
+        sched.add(name, H, lambda bar: sched.each(work, range(40)), run_on_start=True)
+    t0 = time.perf_counter()
+    sched.tick(wait=True)
+    sched.stop()
+    ok &= aligned(peak[0] <= 3, "pool limit", f"80 items from 2 jobs, peak concurrency {peak[0]} (workers 3) "
+                                              f"in {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+    # 5. Thread sungguhan: timeframe 200 ms, run tepat setelah setiap batas bar
+    step = 200
+    stamps = []
+    sched = BarScheduler(settle=0.02, jitter=0.01)
+    sched.add("fast", step, lambda bar: stamps.append((bar, time.time())))
+    sched.start()
+    time.sleep(1.1)
+    sched.stop()
+    lags = [(t - bar * step / 1000) * 1000 for bar, t in stamps]
+    thread_ok = 4 <= len(stamps) <= 6 and len({b for b, _ in stamps}) == len(stamps) and all(15 <= l <= 80 for l in lags)
+    ok &= aligned(thread_ok, "live thread", f"{len(stamps)} runs, lag after bar open "
+                                            f"{min(lags or [0]):.0f}..{max(lags or [0]):.0f} ms")
+
+    # 6. /analyze pertama setelah close: dihitung saat request vs sudah disiapkan job analisa
+    import hybrid_analyzer_nofilter as analyzer
+    from benchmarks.fake_exchange import FakeExchange
+    from cooldown import CooldownMap
+    from gateway import PriorityTokenBucket
+    from snapshot import SnapshotCache
+
+    analyzer.logger.disabled = True
+    analyzer.gateway.limiter = PriorityTokenBucket(capacity=10 ** 9)
+    analyzer.analysis_writer.execute_batch = lambda rows: None
+    analyzer.cooldowns = CooldownMap(0)
+    coins = [f"J{i}" for i in range(args.coins)]
+    client = analyzer.app.test_client()
+    client.set_cookie(analyzer.app.config["SESSION_COOKIE_NAME"],
+                      analyzer.app.session_interface.get_signing_serializer(analyzer.app).dumps({"user_id": 1}))
+
+    def first_requests(warm):
+        analyzer.exchange = FakeExchange(latency=args.latency)
+        analyzer.candle_cache.invalidate()
+        analyzer.analysis_flight = type(analyzer.analysis_flight)(ttl=0)
+        analyzer.snapshots = SnapshotCache(analyzer.response_bytes)
+        analyzer.snapshot_warmer.cache = analyzer.snapshots
+        for coin in coins:
+            analyzer.snapshots.track(coin, analyzer.bar_epoch())
+        job_ms = 0.0
+        if warm:
+            t0 = time.perf_counter()
+            analyzer.snapshot_warmer.warm(analyzer.bar_epoch())
+            job_ms = (time.perf_counter() - t0) * 1000
+        latencies = []
+        for coin in coins:
+            t0 = time.perf_counter()
+            assert client.post("/analyze", data={"coin_name": coin}).status_code == 200
+            latencies.append((time.perf_counter() - t0) * 1000)
+        return statistics.median(latencies), max(latencies), job_ms, analyzer.snapshots.stats["misses"]
+
+    cold_p50, cold_max, _, cold_misses = first_requests(False)
+    warm_p50, warm_max, job_ms, warm_misses = first_requests(True)
+    print(f"on request     : first /analyze p50 {cold_p50:7.2f} ms, max {cold_max:7.2f} ms, {cold_misses} computed in request")
+    print(f"after job      : first /analyze p50 {warm_p50:7.2f} ms, max {warm_max:7.2f} ms, {warm_misses} computed in request "
+          f"(job: {len(coins)} coins in {job_ms:.0f} ms, {analyzer.scheduler.workers} workers)")
+    ok &= cold_misses == len(coins) and warm_misses == 0 and warm_p50 * 5 < cold_p50
+
+    print("scheduler      :", "OK" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
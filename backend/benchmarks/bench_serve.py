@@ -0,0 +1,134 @@
+"""Multi-proses (serve.py): req/s /analyze 1 vs N worker.
+
+    cd backend && python -m benchmarks.bench_serve --workers 4 --requests 2000
+
+Worker di-fork dari proses ini setelah exchange diganti FakeExchange dan write-behind
+queue tidak menulis ke MySQL; beban HTTP dikirim dari proses client terpisah supaya
+client tidak berbagi GIL dengan worker. Speedup hanya dinilai jika mesin punya >= 2 core.
+Budget, candle cache, cooldown, lease dan flush saat shutdown dicek di tests/test_serve.py.
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import sys
+import time
+from urllib.parse import urlencode
+
+import hybrid_analyzer_nofilter as analyzer
+from benchmarks.fake_exchange import FakeExchange
+from gateway import PriorityTokenBucket
+from serve import PreforkServer
+
+CTX = multiprocessing.get_context("fork")
+
+
+def post(address, path, form, cookie):
+    """Satu request (koneksi baru, server HTTP/1.0); return (status, body dict)"""
+    conn = http.client.HTTPConnection(*address, timeout=30)
+    conn.request("POST", path, urlencode(form), {"Content-Type": "application/x-www-form-urlencoded",
+                                                 "Cookie": cookie})
+    response = conn.getresponse()
+    body = response.read()
+    conn.close()
+    return response.status, json.loads(body)
+
+
+def session_cookie(user_id):
+    app = analyzer.get_app()
+    return f"{app.config['SESSION_COOKIE_NAME']}={app.session_interface.get_signing_serializer(app).dumps({'user_id': user_id})}"
+
+
+def serve(workers, cooldown):
+    """PreforkServer di port acak tanpa job latar; cooldown window dibaca worker saat start"""
+    analyzer.ANALYZE_COOLDOWN_SECONDS = cooldown
+    server = PreforkServer(workers, "127.0.0.1", 0, background=False)
+    server.start()
+    deadline = time.time() + 30
+    while True:
+        try:
+            http.client.HTTPConnection(*server.address, timeout=1).connect()
+            break
+        except OSError:
+            if time.time() > deadline:
+                raise
+            time.sleep(0.05)
+    return server
+
+
+def concurrently(fn, args_list):
+    """Jalankan fn di proses client terpisah, semua mulai bersamaan; return list hasil"""
+    queue = CTX.Queue()
+    start = CTX.Event()
+
+    def run(i, args):
+        start.wait()
+        queue.put((i, fn(*args)))
+
+    procs = [CTX.Process(target=run, args=(i, args)) for i, args in enumerate(args_list)]
+    for proc in procs:
+        proc.start()
+    start.set()
+    out = dict(queue.get() for _ in procs)
+    for proc in procs:
+        proc.join()
+    return [out[i] for i in range(len(procs))]
+
+
+def hammer(address, coins, cookie, requests):
+    done = 0
+    t0 = time.perf_counter()
+    for i in range(requests):
+        status, _ = post(address, "/analyze", {"coin_name": coins[i % len(coins)]}, cookie)
+        done += status == 200
+    return done, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--coins", type=int, default=10)
+    args = parser.parse_args()
+    ok = True
+    cores = os.cpu_count() or 1
+
+    import logging
+    analyzer.logger.disabled = True
+    logging.getLogger("werkzeug").disabled = True
+    analyzer.analysis_writer.execute_batch = lambda rows: None
+
+    analyzer.exchange = FakeExchange(latency=0.0)
+    analyzer.gateway.limiter = PriorityTokenBucket(capacity=10 ** 9)
+
+    # Throughput /analyze (snapshot cache hit) 1 worker vs N worker, cooldown mati
+    coins = [f"T{i}" for i in range(args.coins)]
+    per_client = max(1, args.requests // args.clients)
+    rates = {}
+    for workers in (1, args.workers):
+        server = serve(workers, cooldown=0)
+        try:
+            for coin in coins:
+                post(server.address, "/analyze", {"coin_name": coin}, session_cookie(1))
+            results = concurrently(hammer, [(server.address, coins, session_cookie(1), per_client)] * args.clients)
+            done = sum(d for d, _ in results)
+            rates[workers] = done / max(t for _, t in results)
+            ok &= done == per_client * args.clients
+            print(f"{workers:>2} worker(s)    : {rates[workers]:8.0f} req/s ({done} ok, {args.clients} client processes)")
+        finally:
+            server.stop()
+    ratio = rates[args.workers] / rates[1]
+    expected = min(args.workers, cores)
+    scaled = ratio >= 0.6 * expected if cores >= 2 else True
+    print(f"scaling        : {ratio:.2f}x with {args.workers} workers on {cores} core(s)"
+          + ("" if cores >= 2 else " (single core: not asserted)"))
+    ok &= scaled
+
+    print("serve          :", "OK" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
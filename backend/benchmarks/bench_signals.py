@@ -0,0 +1,119 @@
+"""Push sinyal live: satu analisa per koin per bar, di-fan-out ke banyak subscriber SSE.
+
+    cd backend && python -m benchmarks.bench_signals --subscribers 2000 --coins 20 --latency 0.02
+
+Setiap subscriber berlangganan 3 koin. Dibandingkan dengan polling (setiap
+dashboard re-POST /analyze per koin setiap bar), hub hanya menghitung sekali per
+koin lalu mengirim frame SSE yang sudah diserialisasi. Bar tanpa perubahan sinyal
+tidak mengirim event sama sekali; bar dengan data baru mengirim delta.
+"""
+import argparse
+import asyncio
+import random
+import sys
+import threading
+import time
+
+import hybrid_analyzer_nofilter as analyzer
+from benchmarks.fake_exchange import FakeExchange
+from gateway import PriorityTokenBucket
+from signals import SignalHub
+
+
+def make_compute(counter):
+    def compute(coin):
+        with counter["lock"]:
+            counter["n"] += 1
+        analyzer.candle_cache.invalidate()
+        return analyzer.fetch_and_analyze(coin)
+    return compute
+
+
+def drain(subs):
+    """Ambil semua event yang menunggu; return (jumlah event, koin yang muncul)"""
+    events = [e for sub in subs for e in sub.get(timeout=0)]
+    return len(events), {e.coin for e in events}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--subscribers", type=int, default=2000)
+    parser.add_argument("--coins", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.02)
+    args = parser.parse_args()
+    ok = True
+
+    analyzer.gateway.limiter = PriorityTokenBucket(capacity=10 ** 9)
+    analyzer.exchange = FakeExchange(latency=args.latency, seed=1)
+    counter = {"n": 0, "lock": threading.Lock()}
+    hub = SignalHub(make_compute(counter), workers=analyzer.scan_workers(analyzer.SCAN_WORKERS))
+
+    coins = [f"C{i}" for i in range(args.coins)]
+    rng = random.Random(3)
+    t0 = time.perf_counter()
+    subs = [hub.subscribe(rng.sample(coins, 3)) for _ in range(args.subscribers)]
+    # Koin baru dihitung segera oleh thread hub
+    while counter["n"] < len(coins) and time.perf_counter() - t0 < 60:
+        time.sleep(0.01)
+    time.sleep(0.1)
+    first, _ = drain(subs)
+    elapsed = time.perf_counter() - t0
+    expected = sum(len(sub.coins) for sub in subs)
+    print(f"subscribe      : {args.subscribers} subscribers x 3 coins -> {counter['n']} computes, "
+          f"{first}/{expected} events in {elapsed:.2f}s (polling: {expected} analyses)")
+    ok &= counter["n"] == len(coins) and first == expected
+
+    # Bar close tanpa perubahan data: dihitung ulang sekali per koin, tidak ada event
+    counter["n"] = 0
+    hub.refresh()
+    quiet, _ = drain(subs)
+    print(f"bar unchanged  : {counter['n']} computes, {quiet} events")
+    ok &= counter["n"] == len(coins) and quiet == 0
+
+    # Bar close dengan data baru: hanya koin yang sinyalnya berubah dikirim
+    analyzer.exchange = FakeExchange(latency=args.latency, seed=2)
+    counter["n"] = 0
+    t0 = time.perf_counter()
+    deltas = hub.refresh()
+    fanout, changed = drain(subs)
+    interested = sum(len(sub.coins & changed) for sub in subs)
+    print(f"bar changed    : {counter['n']} computes, {deltas} coins changed, {fanout} events "
+          f"({interested} expected) in {time.perf_counter() - t0:.2f}s")
+    ok &= counter["n"] == len(coins) and deltas == len(changed) and fanout == interested
+
+    # Subscriber yang bergabung belakangan menerima snapshot tanpa compute baru
+    counter["n"] = 0
+    late = hub.subscribe(coins[:3])
+    events = late.get(timeout=0)
+    print(f"late subscribe : {len(events)} snapshot events ({', '.join(e.kind for e in events)}), {counter['n']} computes")
+    ok &= len(events) == 3 and counter["n"] == 0 and all(e.kind == "snapshot" for e in events)
+
+    # Subscriber async (mode aiohttp) dibangunkan dari thread hub
+    async def async_subscriber():
+        sub = hub.subscribe([coins[0]])
+        sub.get(timeout=0)
+        waiter = asyncio.ensure_future(sub.aget(timeout=5))
+        await asyncio.sleep(0.05)
+        output, recommendation, trade_levels = analyzer.fetch_and_analyze(coins[0])
+        t = time.perf_counter()
+        hub.publish(coins[0], (dict(output, entry_price=-1.0), "Flip", trade_levels))
+        got = await waiter
+        hub.unsubscribe(sub)
+        return got, time.perf_counter() - t
+
+    got, wake = asyncio.run(async_subscriber())
+    print(f"async wakeup   : {len(got)} event in {wake * 1000:.1f} ms after publish")
+    ok &= len(got) == 1
+
+    for sub in subs + [late]:
+        hub.unsubscribe(sub)
+    print(f"hub            : {hub.snapshot()}")
+    hub.stop()
+    ok &= hub.snapshot()["subscribers"] == 0 and not hub.coins
+
+    print("signals        :", "OK" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""N user menganalisa koin yang sama bersamaan: tanpa vs dengan single-flight (analyze_symbol).
+
+    cd backend && python -m benchmarks.bench_singleflight --users 50 --latency 0.2
+
+Hasil yang dibagi dan semantik SingleFlight (exception, TTL) dicek di tests/test_singleflight.py.
+"""
+import argparse
+import threading
+import time
+from collections import Counter
+
+import hybrid_analyzer_nofilter as analyzer
+from benchmarks.fake_exchange import FakeExchange
+
+
+def burst(fn, users):
+    """Jalankan fn("BTC") dari `users` thread yang dilepas bersamaan; return (detik, hasil)."""
+    barrier = threading.Barrier(users + 1)
+    results = [None] * users
+
+    def worker(i):
+        barrier.wait()
+        results[i] = fn("BTC")
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(users)]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    t0 = time.perf_counter()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - t0, results
+
+
+def run(label, fn, users, latency):
+    analyzer.exchange = FakeExchange(latency=latency)
+    analyzer.candle_cache.invalidate()
+    elapsed, results = burst(fn, users)
+    calls = Counter(analyzer.exchange.calls)
+    ok = sum(1 for r in results if r)
+    print(f"{label:<14}: {elapsed * 1000:7.1f} ms, {ok}/{users} ok, {len(analyzer.exchange.calls)} exchange calls "
+          f"({dict(calls)})")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.2, help="latency per panggilan exchange (detik)")
+    args = parser.parse_args()
+
+    def uncoalesced(symbol):
+        data = analyzer.get_all_market_data(symbol)
+        return data and analyzer.analyze_and_generate_signal(data)
+
+    run("no coalescing", uncoalesced, args.users, args.latency)
+    run("single-flight", analyzer.analyze_symbol, args.users, args.latency)
+    print(f"flight stats  : {analyzer.analysis_flight.stats}")
+
+
+if __name__ == "__main__":
+    main()
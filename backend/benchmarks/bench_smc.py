@@ -0,0 +1,67 @@
+"""SMCIndex: build satu pass, append inkremental, lookup zona terdekat vs OB jendela legacy.
+
+    cd backend && python -m benchmarks.bench_smc --bars 1000000
+
+Kebenaran (inkremental == build sekali jalan, swing/mitigasi/nearest/sweep == brute force,
+query() di bawah index.lock) dicek di tests/test_smc.py.
+"""
+import argparse
+import time
+
+import hybrid_analyzer_nofilter as analyzer
+from benchmarks.fixtures import market_data, synthetic_candles
+from smc import DEMAND, SMCEngine, SMCIndex
+from strategy import detect_valid_order_block
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--bars", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    # 1. Build satu pass untuk histori panjang
+    big = synthetic_candles(args.bars, seed=3)
+    index, build_s = timed(lambda: SMCIndex.from_candles(big))
+    active = sum(index.summary(float(big.close[-1]))["active"].values())
+    print(f"build          : {args.bars} bars in {build_s:.2f} s ({build_s / args.bars * 1e6:.2f} us/bar), "
+          f"{len(index.zones)} zones, {active} still active")
+
+    # 2. Append bar baru + lookup
+    extra = synthetic_candles(args.bars + 1000, seed=3)
+    tail = extra[args.bars:]
+    _, append_s = timed(lambda: index.extend(tail))
+    price = float(extra.close[-1])
+    n = 100_000
+    _, lookup_s = timed(lambda: [index.nearest(DEMAND, price) for _ in range(n)])
+    _, summary_s = timed(lambda: [index.summary(price) for _ in range(n // 10)])
+    print(f"incremental    : append {append_s / len(tail) * 1e6:.1f} us/bar, nearest {lookup_s / n * 1e6:.2f} us, "
+          f"summary {summary_s / (n // 10) * 1e6:.1f} us")
+
+    # 3. Per request: engine (sudah hangat) vs OB jendela legacy
+    engine = SMCEngine()
+    window = analyzer.CANDLE_LIMITS[analyzer.TF_MID]
+    live = synthetic_candles(window + 500, seed=9, timeframe="4h")
+    engine.index("BENCH/USDT", "4h", live[:window])
+    _, warm_s = timed(lambda: [engine.index("BENCH/USDT", "4h", live[i - window:i]) for i in range(window + 1, len(live))])
+    _, legacy_s = timed(lambda: [detect_valid_order_block(live[i - window:i], "Bullish")
+                                 for i in range(window + 1, len(live))])
+    _, legacy_big_s = timed(lambda: detect_valid_order_block(big, "Bullish"))
+    print(f"per request    : engine {warm_s / 499 * 1e6:.1f} us (1 new bar), window OB {legacy_s / 499 * 1e6:.1f} us, "
+          f"window OB on {args.bars} bars {legacy_big_s * 1e6:.0f} us")
+
+    # 4. Analisa penuh dengan OB_DETECTOR=smc
+    analyzer.OB_DETECTOR = "smc"
+    output, _, levels = analyzer.analyze_and_generate_signal(market_data(synthetic_candles(2000, seed=4)))
+    analyzer.OB_DETECTOR = "window"
+    print(f"analyze (smc)  : 4h {output['smc']['4h']['trend']}, demand {output['smc']['4h']['demand_ob']}, "
+          f"levels {'yes' if levels else 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""/analyze dari snapshot cache vs hitung + jsonify per request, plus durasi warmer bar close.
+
+    cd backend && python -m benchmarks.bench_snapshot --requests 3000 --coins 20
+
+Exchange memakai FakeExchange, write-behind queue tidak menulis ke MySQL dan cooldown
+dimatikan (window 0) supaya setiap request benar-benar melewati jalur analisa. Body,
+L2 bersama, lease dan refresh snapshot basi dicek di tests/test_snapshot.py.
+"""
+import argparse
+import sys
+import time
+
+import hybrid_analyzer_nofilter as analyzer
+from benchmarks.fake_exchange import FakeExchange
+from cooldown import CooldownMap
+from gateway import PriorityTokenBucket
+from snapshot import SnapshotCache, SnapshotWarmer
+
+
+def client_for(user_id):
+    client = analyzer.app.test_client()
+    client.set_cookie(analyzer.app.config["SESSION_COOKIE_NAME"],
+                      analyzer.app.session_interface.get_signing_serializer(analyzer.app).dumps({"user_id": user_id}))
+    return client
+
+
+def hammer(client, coins, requests):
+    """Request /analyze bergiliran per koin; return (req/s, jumlah status != 200)"""
+    failed = 0
+    t0 = time.perf_counter()
+    for i in range(requests):
+        response = client.post("/analyze", data={"coin_name": coins[i % len(coins)]})
+        failed += response.status_code != 200
+    return requests / (time.perf_counter() - t0), failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--coins", type=int, default=20)
+    parser.add_argument("--min-speedup", type=float, default=2.0)
+    args = parser.parse_args()
+    ok = True
+
+    analyzer.logger.disabled = True                     # Log per request mendominasi jalur cache
+    analyzer.gateway.limiter = PriorityTokenBucket(capacity=10 ** 9)
+    analyzer.exchange = FakeExchange(latency=0.0)
+    analyzer.analysis_writer.execute_batch = lambda rows: None
+    analyzer.cooldowns = CooldownMap(0)
+    coins = [f"S{i}" for i in range(args.coins)]
+    client = client_for(1)
+
+    # 1. Baseline: tanpa snapshot (LRU 0 entri) -> analisa + serialisasi per request. Candle sudah
+    #    di candle_cache; share TTL 0 = request yang tidak bersamaan (jarak > ANALYSIS_SHARE_TTL)
+    analyzer.snapshots = SnapshotCache(analyzer.response_bytes, max_entries=0)
+    analyzer.analysis_flight.ttl = 0
+    for coin in coins:
+        analyzer.analyze_symbol(coin)
+    base_rps, base_failed = hammer(client, coins, args.requests)
+
+    # 2. Snapshot: analisa + serialisasi sekali per (koin, bar)
+    analyzer.analysis_flight.ttl = 3600
+    analyzer.snapshots = SnapshotCache(analyzer.response_bytes)
+    cached_rps, cached_failed = hammer(client, coins, args.requests)
+    stats = analyzer.snapshots.stats
+    speedup = cached_rps / base_rps
+    print(f"no snapshot    : {base_rps:8.0f} req/s ({base_failed} failed)")
+    print(f"snapshot       : {cached_rps:8.0f} req/s ({cached_failed} failed), {speedup:.1f}x, "
+          f"hits {stats['hits']} / misses {stats['misses']}")
+    ok &= base_failed == cached_failed == 0 and speedup >= args.min_speedup and stats["misses"] == len(coins)
+
+    t0 = time.perf_counter()
+    for i in range(args.requests * 10):
+        analyzer.analysis_snapshot(coins[i % len(coins)])
+    print(f"lookup         : {args.requests * 10 / (time.perf_counter() - t0):8.0f} lookups/s (tanpa HTTP)")
+
+    # 3. Warmer: setelah bar close, koin yang dilacak dihitung untuk bar baru
+    epoch = analyzer.bar_epoch()
+    now = [epoch * 3_600_000 / 1000 + 1800]
+    cache = SnapshotCache(analyzer.response_bytes, clock=lambda: now[0], max_age=60)
+    for coin in coins:
+        cache.get_or_compute(coin, epoch, analyzer.analyze_symbol)
+    warmer = SnapshotWarmer(cache, analyzer.analyze_symbol, cache.tracked, workers=4, clock=lambda: now[0])
+    now[0] = (epoch + 1) * 3.6e3 + 3
+    warmed = warmer.warm()
+    print(f"warmer         : {warmed} snapshots for bar {epoch + 1} in {warmer.stats['last_run_ms']} ms")
+
+    print("snapshot       :", "OK" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
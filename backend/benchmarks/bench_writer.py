@@ -0,0 +1,107 @@
+"""Write-behind persistence vs INSERT + commit sinkron per request.
+
+    cd backend && python -m benchmarks.bench_writer --rows 20000 --threads 8
+
+SQLite (file sementara, synchronous=FULL) dipakai sebagai pengganti MySQL.
+Mengukur latency di jalur request (submit vs insert+commit) dan throughput
+tulis sampai semua baris tersimpan.
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+from persistence import WriteBehindQueue
+
+SCHEMA = """
+CREATE TABLE analyses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER, coin_name TEXT, recommendation TEXT, entry REAL, sl REAL, tp1 REAL, rrr REAL
+)
+"""
+INSERT = "INSERT INTO analyses (user_id, coin_name, recommendation, entry, sl, tp1, rrr) VALUES (?,?,?,?,?,?,?)"
+
+
+def open_db(path):
+    conn = sqlite3.connect(path, timeout=60, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=FULL")
+    return conn
+
+
+def drive(rows, threads, write_one):
+    latencies = []
+    lock = threading.Lock()
+    per_thread = rows // threads
+
+    def worker(tid):
+        local = []
+        for i in range(per_thread):
+            t0 = time.perf_counter()
+            write_one((tid, f"C{i % 50}", "NEUTRAL", 1.0, 0.9, 1.2, 2.0))
+            local.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(local)
+
+    ts = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    t0 = time.perf_counter()
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    return latencies, time.perf_counter() - t0
+
+
+def report(name, latencies, elapsed, total):
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{name:<13} request p50 {statistics.median(latencies) * 1e3:7.3f} ms | p99 {p99 * 1e3:7.3f} ms | "
+          f"{total / elapsed:9.0f} rows/s end-to-end")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+
+    path = os.path.join(tmp, "sync.db")
+    open_db(path).execute(SCHEMA)
+    local = threading.local()
+
+    def sync_insert(row):
+        if not hasattr(local, "conn"):
+            local.conn = open_db(path)
+        local.conn.execute(INSERT, row)
+        local.conn.commit()
+
+    lat, elapsed = drive(args.rows, args.threads, sync_insert)
+    report("sync insert", lat, elapsed, len(lat))
+
+    path = os.path.join(tmp, "behind.db")
+    conn = open_db(path)
+    conn.execute(SCHEMA)
+
+    def execute_batch(rows):
+        conn.executemany(INSERT, rows)
+        conn.commit()
+
+    writer = WriteBehindQueue(execute_batch, maxsize=50000, batch_size=500, flush_interval=0.2)
+    t0 = time.perf_counter()
+    lat, _ = drive(args.rows, args.threads, writer.submit)
+    writer.flush()
+    elapsed = time.perf_counter() - t0
+    report("write-behind", lat, elapsed, len(lat))
+    writer.stop()
+    stored = conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+    print(f"stored        {stored} rows, stats {writer.stats()}")
+    assert stored == len(lat)
+
+
+if __name__ == "__main__":
+    main()
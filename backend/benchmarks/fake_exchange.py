@@ -0,0 +1,190 @@
+# fake_exchange.py (Stand-in lokal untuk ccxt.binance, dipakai benchmark)
+import time
+import random
+import zlib
+import asyncio
+import threading
+from collections import deque
+from typing import List, Dict, Any, Optional
+
+import ccxt
+
+from gateway import endpoint_weight
+
+TIMEFRAME_MS = {
+    "1m": 60_000, "5m": 300_000, "15m": 900_000, "1h": 3_600_000,
+    "2h": 7_200_000, "4h": 14_400_000, "12h": 43_200_000, "1d": 86_400_000,
+}
+
+
+def synthetic_ohlcv(n: int, timeframe: str = "1h", seed: int = 7, start_price: float = 100.0,
+                    end_time: Optional[int] = None) -> List[List[float]]:
+    """Random-walk OHLCV dengan format baris ccxt: [ts, o, h, l, c, v]"""
+    rng = random.Random(seed)
+    step = TIMEFRAME_MS[timeframe]
+    if end_time is None:
+        end_time = int(time.time() * 1000) // step * step
+    ts = end_time - (n - 1) * step
+    price = start_price
+    rows = []
+    for _ in range(n):
+        o = price
+        c = max(o * (1 + rng.gauss(0, 0.01)), 1e-6)
+        h = max(o, c) * (1 + abs(rng.gauss(0, 0.004)))
+        l = min(o, c) * (1 - abs(rng.gauss(0, 0.004)))
+        rows.append([ts, o, h, l, c, rng.uniform(100, 1000)])
+        price = c
+        ts += step
+    return rows
+
+
+class FakeExchange:
+    """Meniru endpoint ccxt.binance yang dipakai analyzer, dengan latency buatan.
+
+    `latency` adalah detik per panggilan; `slow_calls` bisa memberi latency
+    khusus per nama method (misal {"fapiPublicGetPremiumIndex": 30}) untuk
+    menguji timeout; `fail_calls` berisi nama method yang selalu melempar error.
+
+    Rate limit ala Binance: `weight_limit` adalah budget weight per `weight_window`
+    detik di sisi "server". Melewatinya menghasilkan 429 (RateLimitExceeded) dengan
+    Retry-After; setelah `ban_after` kali 429 dalam satu jendela, IP di-ban (418,
+    DDoSProtection) selama `ban_seconds`. `error_rate` adalah peluang RequestTimeout
+    acak, dan `inject()` menjadwalkan status tertentu untuk panggilan berikutnya.
+    Header X-MBX-USED-WEIGHT-1M diisi di `last_response_headers` seperti ccxt.
+    """
+
+    def __init__(self, latency: float = 0.1, slow_calls: Optional[Dict[str, float]] = None,
+                 fail_calls: Optional[set] = None, seed: int = 7, weight_limit: Optional[int] = None,
+                 weight_window: float = 60.0, ban_after: int = 5, ban_seconds: float = 120.0,
+                 error_rate: float = 0.0):
+        self.latency = latency
+        self.slow_calls = slow_calls or {}
+        self.fail_calls = fail_calls or set()
+        self.seed = seed
+        self.weight_limit = weight_limit
+        self.weight_window = weight_window
+        self.ban_after = ban_after
+        self.ban_seconds = ban_seconds
+        self.error_rate = error_rate
+        self.calls: List[str] = []
+        self.statuses: Dict[int, int] = {}
+        self.last_response_headers: Dict[str, str] = {}
+        self._used: deque = deque()
+        self._injected: deque = deque()
+        self._over_limit = 0
+        self._banned_until = 0.0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def inject(self, *statuses: int) -> None:
+        """Panggilan berikutnya (berurutan) menjawab status ini: 429, 418, 503 atau 400"""
+        self._injected.extend(statuses)
+
+    def _trim(self, now: float) -> int:
+        while self._used and self._used[0][0] <= now - self.weight_window:
+            self._used.popleft()
+        return sum(w for _, w in self._used)
+
+    def used_weight(self) -> int:
+        with self._lock:
+            return self._trim(time.monotonic())
+
+    def _status(self, name: str, weight: int) -> int:
+        now = time.monotonic()
+        with self._lock:
+            used = self._trim(now)
+            if self._injected:
+                status = self._injected.popleft()
+            elif now < self._banned_until:
+                status = 418
+            elif self.weight_limit is not None and used + weight > self.weight_limit:
+                self._over_limit += 1
+                status = 418 if self._over_limit > self.ban_after else 429
+                if status == 418:
+                    self._banned_until = now + self.ban_seconds
+            elif self.error_rate and self._rng.random() < self.error_rate:
+                status = 504
+            else:
+                status = 200
+                if self.weight_limit is not None and used < self.weight_limit // 2:
+                    self._over_limit = 0
+            if status != 418:
+                self._used.append((now, weight))   # Binance tetap menghitung weight request yang ditolak
+                used += weight
+            headers = {"X-MBX-USED-WEIGHT-1M": str(used)}
+            if status in (418, 429):
+                retry = max(self._banned_until - now, 0) if status == 418 else 1
+                headers["Retry-After"] = str(int(retry) or 1)
+            self.last_response_headers = headers
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            return status
+
+    def _call(self, name: str, weight: int = 1) -> None:
+        self.calls.append(name)
+        time.sleep(self.slow_calls.get(name, self.latency))
+        self._respond(name, weight)
+
+    def _respond(self, name: str, weight: int) -> None:
+        if name in self.fail_calls:
+            raise RuntimeError(f"fake {name} failure")
+        status = self._status(name, weight)
+        if status == 429:
+            raise ccxt.RateLimitExceeded(f"binance 429 Too Many Requests ({name})")
+        if status == 418:
+            raise ccxt.DDoSProtection(f"binance 418 I'm a teapot: IP banned ({name})")
+        if status == 503:
+            raise ccxt.ExchangeNotAvailable(f"binance 503 Service Unavailable ({name})")
+        if status == 504:
+            raise ccxt.RequestTimeout(f"binance GET {name} timed out")
+        if status == 400:
+            raise ccxt.BadSymbol(f"binance does not have market symbol ({name})")
+
+    def parse_timeframe(self, timeframe: str) -> int:
+        return TIMEFRAME_MS[timeframe] // 1000
+
+    def fetch_ohlcv(self, symbol: str, timeframe: str = "1h", since: Optional[int] = None,
+                    limit: Optional[int] = None, params: Optional[Dict[str, Any]] = None) -> List[List[float]]:
+        limit = limit or 500
+        self._call("fetch_ohlcv", endpoint_weight("fetch_ohlcv", (), {"limit": limit}))
+        return self._ohlcv(symbol, timeframe, since, limit)
+
+    def _ohlcv(self, symbol: str, timeframe: str, since: Optional[int], limit: int) -> List[List[float]]:
+        # crc32, bukan hash(): seed stabil antar proses (PYTHONHASHSEED) supaya data fixture reproducible
+        rows = synthetic_ohlcv(limit, timeframe, seed=zlib.crc32(f"{symbol}|{timeframe}|{self.seed}".encode()) & 0xFFFF)
+        if since is not None:
+            rows = [r for r in rows if r[0] >= since]
+        return rows
+
+    def fapiPublicGetPremiumIndex(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        self._call("fapiPublicGetPremiumIndex", endpoint_weight("fapiPublicGetPremiumIndex", (params,)))
+        return {"symbol": params["symbol"], "lastFundingRate": "0.00010000"}
+
+    def fapiDataGetGlobalLongShortAccountRatio(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        self._call("fapiDataGetGlobalLongShortAccountRatio")
+        return [{"symbol": params["symbol"], "longShortRatio": "1.2500"}]
+
+
+class AsyncFakeExchange(FakeExchange):
+    """Versi ccxt.async_support dari FakeExchange: method di-await, latency lewat asyncio.sleep"""
+
+    async def _acall(self, name: str, weight: int = 1) -> None:
+        self.calls.append(name)
+        await asyncio.sleep(self.slow_calls.get(name, self.latency))
+        self._respond(name, weight)
+
+    async def fetch_ohlcv(self, symbol: str, timeframe: str = "1h", since: Optional[int] = None,
+                          limit: Optional[int] = None, params: Optional[Dict[str, Any]] = None) -> List[List[float]]:
+        limit = limit or 500
+        await self._acall("fetch_ohlcv", endpoint_weight("fetch_ohlcv", (), {"limit": limit}))
+        return self._ohlcv(symbol, timeframe, since, limit)
+
+    async def fapiPublicGetPremiumIndex(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        await self._acall("fapiPublicGetPremiumIndex", endpoint_weight("fapiPublicGetPremiumIndex", (params,)))
+        return {"symbol": params["symbol"], "lastFundingRate": "0.00010000"}
+
+    async def fapiDataGetGlobalLongShortAccountRatio(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        await self._acall("fapiDataGetGlobalLongShortAccountRatio")
+        return [{"symbol": params["symbol"], "longShortRatio": "1.2500"}]
+
+    async def close(self) -> None:
+        pass
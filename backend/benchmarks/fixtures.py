@@ -0,0 +1,163 @@
+"""Fixture OHLCV untuk benchmark suite: sintetis (deterministik) dan hasil rekaman exchange.
+
+    cd backend && python -m benchmarks.fixtures record --symbols BTC,ETH --bars 10000
+
+Fixture sintetis dibangkitkan ulang dari seed yang sama setiap kali, jadi input
+identik di semua commit (checksum ikut disimpan di hasil suite). Fixture "real"
+adalah CSV (format backtest.save_ohlcv_csv) di benchmarks/fixtures/, direkam
+sekali lewat gateway lalu dipakai ulang tanpa jaringan. `record` juga menulis
+benchmarks/fixtures/SHA1SUMS (nama, jumlah bar, checksum); load_real menolak CSV
+yang tidak cocok, dan fixture REAL_FIXTURES yang belum direkam dilaporkan suite
+sebagai SKIPPED (bukan hilang diam-diam).
+"""
+import argparse
+import glob
+import hashlib
+import os
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backtest import load_ohlcv, save_ohlcv_csv
+from candle_cache import timeframe_ms
+from candles import Candles
+from resample import resample
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+MANIFEST = os.path.join(FIXTURE_DIR, "SHA1SUMS")
+REAL_FIXTURES = ("BTCUSDT_1h", "ETHUSDT_1h")   # Set rekaman yang diharapkan suite
+EPOCH_MS = 1_600_000_000_000 // 86_400_000 * 86_400_000   # Awal hari UTC: bucket 4h/1d rapi
+
+
+@lru_cache(maxsize=8)   # 1M bar = 48 MB
+def synthetic_candles(bars: int, seed: int = 0, timeframe: str = "1h", start_price: float = 100.0) -> Candles:
+    """Random walk log-normal dengan wick, vektor penuh (1M bar < 1 detik)"""
+    rng = np.random.default_rng(seed)
+    step = timeframe_ms(timeframe)
+    close = start_price * np.exp(np.cumsum(rng.normal(0, 0.01, bars)))
+    open_ = np.r_[start_price, close[:-1]]
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.004, bars)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.004, bars)))
+    open_time = EPOCH_MS + np.arange(bars, dtype=np.int64) * step
+    return Candles(open_time, open_, high, low, close, rng.uniform(100, 1000, bars))
+
+
+def checksum(candles: Candles) -> str:
+    h = hashlib.sha1()
+    for name in ("open_time", "open", "high", "low", "close", "volume"):
+        h.update(np.ascontiguousarray(getattr(candles, name)).tobytes())
+    return h.hexdigest()[:12]
+
+
+def market_data(c1h: Candles, symbol: str = "BENCH/USDT", tf_mid: str = "4h", tf_high: str = "1d") -> Dict[str, Any]:
+    """Input analyze_and_generate_signal dari satu deret 1h (4h dan 1d hasil agregasi)"""
+    return {
+        "symbol": symbol,
+        "candles": {tf_high: resample(c1h, tf_high)[0], tf_mid: resample(c1h, tf_mid)[0], "1h": c1h},
+        "sentiment": {"funding_rate": 0.0001, "open_interest": 0.0, "long_short_ratio": 1.25},
+        "current_price": float(c1h.close[-1]),
+        "degraded": [],
+    }
+
+
+class FixtureMissing(Exception):
+    """Fixture rekaman belum ada di benchmarks/fixtures/ (perlu `record` dengan akses exchange)"""
+
+
+def manifest() -> Dict[str, Tuple[int, str]]:
+    """{nama: (bars, checksum)} dari SHA1SUMS"""
+    if not os.path.exists(MANIFEST):
+        return {}
+    out = {}
+    with open(MANIFEST) as f:
+        for line in f:
+            if line.strip() and not line.startswith("#"):
+                name, bars, sha = line.split()
+                out[name] = (int(bars), sha)
+    return out
+
+
+def write_manifest(entries: Dict[str, Tuple[int, str]]) -> None:
+    with open(MANIFEST, "w") as f:
+        f.write("# name bars sha1[:12] (python -m benchmarks.fixtures record)\n")
+        for name in sorted(entries):
+            f.write(f"{name} {entries[name][0]} {entries[name][1]}\n")
+
+
+def real_fixtures() -> List[str]:
+    """Fixture rekaman yang diharapkan (REAL_FIXTURES + SHA1SUMS) ditambah CSV yang ada; SYMBOL_tf, misal BTCUSDT_1h"""
+    present = (os.path.splitext(os.path.basename(p))[0] for p in glob.glob(os.path.join(FIXTURE_DIR, "*.csv")))
+    return sorted(set(REAL_FIXTURES) | set(manifest()) | set(present))
+
+
+@lru_cache(maxsize=16)
+def load_real(name: str) -> Candles:
+    """CSV rekaman; FixtureMissing jika belum direkam, ValueError jika checksum beda dengan SHA1SUMS"""
+    path = os.path.join(FIXTURE_DIR, name + ".csv")
+    if not os.path.exists(path):
+        raise FixtureMissing(f"{name} not recorded (python -m benchmarks.fixtures record)")
+    candles = load_ohlcv(path)
+    expected = manifest().get(name)
+    if expected is not None and (len(candles), checksum(candles)) != expected:
+        raise ValueError(f"{name}: {len(candles)} bars sha {checksum(candles)}, SHA1SUMS says "
+                         f"{expected[0]} bars sha {expected[1]}")
+    return candles
+
+
+def record(symbol: str, timeframe: str, bars: int, fetch, page: int = 1500,
+           now_ms: Optional[int] = None) -> Candles:
+    """Ambil `bars` candle tertutup terakhir dengan paginasi `since`; fetch = exchange_ohlcv"""
+    step = timeframe_ms(timeframe)
+    now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+    end = now_ms // step * step              # bar yang sedang berjalan tidak ikut
+    since = end - bars * step
+    rows: List[List[float]] = []
+    while since < end:
+        chunk = [r for r in fetch(symbol, timeframe, since, page) if r[0] < end]
+        if not chunk:
+            break
+        rows.extend(chunk)
+        since = int(chunk[-1][0]) + step
+    return Candles.from_ccxt(rows) if rows else Candles.empty()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    rec = sub.add_parser("record", help="rekam candle Binance ke benchmarks/fixtures/")
+    rec.add_argument("--symbols", default="BTC,ETH")
+    rec.add_argument("--timeframe", default="1h")
+    rec.add_argument("--bars", type=int, default=10_000)
+    sub.add_parser("list", help="fixture yang tersedia")
+    args = parser.parse_args()
+
+    if args.cmd == "list":
+        for name in real_fixtures():
+            try:
+                candles = load_real(name)
+                print(f"{name:<20} {len(candles):>9} bars  sha {checksum(candles)}")
+            except (FixtureMissing, ValueError) as e:
+                print(f"{name:<20} {e}")
+        return
+
+    import hybrid_analyzer_nofilter as analyzer
+    from gateway import BACKGROUND, in_lane
+
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    fetch = in_lane(BACKGROUND, analyzer.exchange_ohlcv)
+    entries = manifest()
+    for coin in [s.strip().upper() for s in args.symbols.split(",") if s.strip()]:
+        candles = record(f"{coin}/USDT", args.timeframe, args.bars, fetch)
+        name = f"{coin}USDT_{args.timeframe}"
+        save_ohlcv_csv(os.path.join(FIXTURE_DIR, name + ".csv"), candles)
+        # Checksum dari CSV yang dibaca ulang (presisi float CSV), sama dengan yang diverifikasi load_real
+        reloaded = load_ohlcv(os.path.join(FIXTURE_DIR, name + ".csv"))
+        entries[name] = (len(reloaded), checksum(reloaded))
+        print(f"{name}: {len(reloaded)} bars, sha {entries[name][1]}")
+    write_manifest(entries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+"""Benchmark suite hot path analisa (gaya asv): hasil disimpan per commit lalu dibandingkan.
+
+    cd backend && python -m benchmarks.suite run                 # semua case, simpan hasil
+    cd backend && python -m benchmarks.suite run --quick -k rsi  # subset cepat
+    cd backend && python -m benchmarks.suite compare HEAD~1      # bandingkan dengan commit lain
+    cd backend && python -m benchmarks.suite list
+
+Setiap case diparametrisasi jumlah bar (300 = ukuran live, 10k, 1M) atau jumlah
+symbol (1..500). Waktu diukur seperti timeit: `number` panggilan per ulangan
+(dipilih otomatis sampai >= --min-time detik), `repeat` ulangan, yang disimpan
+median/min/stdev per panggilan. Hasil ada di benchmarks/results/<commit>.json
+beserta info mesin dan checksum fixture; angka hanya sebanding di mesin yang sama.
+Exchange diganti FakeExchange (latency 0) dan writer DB diganti no-op.
+"""
+import argparse
+import fnmatch
+import gc
+import glob
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import hybrid_analyzer_nofilter as analyzer
+from benchmarks.fake_exchange import FakeExchange
+from benchmarks.fixtures import FixtureMissing, checksum, load_real, market_data, real_fixtures, synthetic_candles
+from gateway import PriorityTokenBucket
+from smc import SMCIndex
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+BARS = (300, 10_000, 1_000_000)
+SYMBOLS = (1, 10, 100, 500)
+QUICK_BARS = (300, 10_000)
+QUICK_SYMBOLS = (1, 10)
+QUICK = {"bars": QUICK_BARS, "symbols": QUICK_SYMBOLS}
+
+# ==============================================================
+# REGISTRY
+# ==============================================================
+
+# Setup(params) -> (fn tanpa argumen yang diukur, info fixture)
+Setup = Callable[..., Tuple[Callable[[], Any], Dict[str, Any]]]
+CASES: List[Tuple[str, Dict[str, Tuple], Setup]] = []
+
+
+def benchmark(name: str, **grid: Tuple):
+    """Daftarkan case; setiap kombinasi `grid` menjadi satu baris hasil"""
+    def decorator(setup: Setup) -> Setup:
+        CASES.append((name, grid, setup))
+        return setup
+    return decorator
+
+
+def case_id(name: str, params: Dict[str, Any]) -> str:
+    return name + ("[" + ",".join(f"{k}={v}" for k, v in params.items()) + "]" if params else "")
+
+
+def expand(quick: bool) -> List[Tuple[str, Dict[str, Any], Setup]]:
+    out = []
+    for name, grid, setup in CASES:
+        if quick:
+            grid = {k: tuple(v for v in values if v in QUICK.get(k, values)) or values for k, values in grid.items()}
+        keys = list(grid)
+        for combo in itertools.product(*(grid[k] for k in keys)):
+            params = dict(zip(keys, combo))
+            out.append((case_id(name, params), params, setup))
+    return out
+
+
+# ==============================================================
+# STUBS (exchange + DB)
+# ==============================================================
+
+def install_stubs() -> None:
+    analyzer.exchange = FakeExchange(latency=0.0)
+    analyzer.gateway.limiter = PriorityTokenBucket(capacity=10 ** 12)
+    analyzer.analysis_writer.execute_batch = lambda rows: None
+    analyzer.cooldowns.warm(lambda window: [])
+
+
+def fresh_request_state() -> None:
+    """Tanpa cache/cooldown/coalescing dari putaran sebelumnya: setiap /analyze benar-benar dihitung"""
+    analyzer.candle_cache.invalidate()
+    analyzer.cooldowns = type(analyzer.cooldowns)(analyzer.ANALYZE_COOLDOWN_SECONDS)
+    analyzer.cooldowns.warm(lambda window: [])
+    analyzer.analysis_flight = type(analyzer.analysis_flight)(ttl=0)
+    analyzer.snapshots = type(analyzer.snapshots)(analyzer.response_bytes)
+
+
+def bars_fixture(bars: int) -> Tuple[Any, Dict[str, Any]]:
+    candles = synthetic_candles(bars)
+    return candles, {"fixture": f"synthetic:{bars}", "sha": checksum(candles)}
+
+
+# ==============================================================
+# CASES
+# ==============================================================
+
+@benchmark("indicators.rsi", bars=BARS)
+def bench_rsi(bars):
+    c, info = bars_fixture(bars)
+    return (lambda: analyzer.calculate_rsi(c.close)), info
+
+
+@benchmark("indicators.macd", bars=BARS)
+def bench_macd(bars):
+    c, info = bars_fixture(bars)
+    return (lambda: analyzer.calculate_macd(c.close)), info
+
+
+@benchmark("indicators.ema", bars=BARS)
+def bench_ema(bars):
+    c, info = bars_fixture(bars)
+    return (lambda: analyzer.calculate_ema(c.close, 50)), info
+
+
+@benchmark("indicators.atr", bars=BARS)
+def bench_atr(bars):
+    c, info = bars_fixture(bars)
+    return (lambda: analyzer.calculate_atr(c, analyzer.ATR_PERIOD)), info
+
+
+@benchmark("smc.order_block", bars=BARS)
+def bench_order_block(bars):
+    c, info = bars_fixture(bars)
+    bias = analyzer.calc_structure_and_bias(c)
+    return (lambda: analyzer.detect_valid_order_block(c, bias)), info
+
+
+@benchmark("smc.liquidity_sweep", bars=BARS)
+def bench_liquidity_sweep(bars):
+    c, info = bars_fixture(bars)
+    return (lambda: analyzer.detect_liquidity_sweep(c)), info
+
+
+@benchmark("smc.index_build", bars=(300, 10_000, 100_000))
+def bench_smc_index(bars):
+    """SMCIndex satu pass (swing, OB + mitigasi, FVG, pool likuiditas) dari nol"""
+    c, info = bars_fixture(bars)
+    return (lambda: SMCIndex.from_candles(c)), info
+
+
+@benchmark("analyze.signal", bars=BARS)
+def bench_analyze(bars):
+    """analyze_and_generate_signal end-to-end (1h = `bars`, 4h/1d hasil agregasi; index SMC sudah hangat)"""
+    c, info = bars_fixture(bars)
+    data = market_data(c, symbol=f"BENCH{bars}/USDT")
+    return (lambda: analyzer.analyze_and_generate_signal(data)), info
+
+
+@benchmark("analyze.signal_real", fixture=tuple(real_fixtures()))
+def bench_analyze_real(fixture):
+    c = load_real(fixture)
+    data = market_data(c, symbol=fixture.split("_")[0].replace("USDT", "/USDT"))
+    return (lambda: analyzer.analyze_and_generate_signal(data)), {"fixture": f"real:{fixture}", "sha": checksum(c)}
+
+
+@benchmark("analyze.symbols", symbols=SYMBOLS)
+def bench_analyze_symbols(symbols):
+    """Satu putaran analisa untuk `symbols` koin dengan candle live (300 bar)"""
+    datas = [market_data(synthetic_candles(300, seed=i), symbol=f"S{i}/USDT") for i in range(symbols)]
+
+    def run():
+        for data in datas:
+            analyzer.analyze_and_generate_signal(data)
+    return run, {"fixture": f"synthetic:300x{symbols}"}
+
+
+@benchmark("serialize.output", bars=(300,))
+def bench_serialize(bars):
+    """Serialisasi output /analyze (provider JSON Flask = jsonify)"""
+    c, info = bars_fixture(bars)
+    output = analyzer.analyze_and_generate_signal(market_data(c))[0]
+    dumps = analyzer.app.json.dumps
+    return (lambda: dumps(output)), info
+
+
+@benchmark("route.analyze", symbols=SYMBOLS)
+def bench_route(symbols):
+    """POST /analyze untuk `symbols` koin berbeda (Flask test client, exchange + DB di-stub)"""
+    install_stubs()
+    client = analyzer.app.test_client()
+    client.set_cookie(analyzer.app.config["SESSION_COOKIE_NAME"],
+                      analyzer.app.session_interface.get_signing_serializer(analyzer.app).dumps({"user_id": 1}))
+    coins = [f"R{i}" for i in range(symbols)]
+
+    def run():
+        fresh_request_state()
+        for coin in coins:
+            response = client.post("/analyze", data={"coin_name": coin})
+            if response.status_code != 200:
+                raise RuntimeError(f"/analyze {coin}: HTTP {response.status_code} {response.get_data(as_text=True)}")
+    return run, {"fixture": f"fake_exchange:{analyzer.CANDLE_LIMITS}"}
+
+
+# ==============================================================
+# RUNNER
+# ==============================================================
+
+def measure(fn: Callable[[], Any], repeat: int, min_time: float, max_time: float) -> Dict[str, Any]:
+    """Seperti timeit.autorange: naikkan `number` sampai satu ulangan >= min_time"""
+    fn()  # warm-up (import, cache numpy, lazy init)
+    number = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_time or number >= 1_000_000:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+    # Case berat (1M bar, 500 symbol): kurangi ulangan supaya suite tetap selesai
+    repeat = max(1, min(repeat, int(max_time / max(elapsed, 1e-9))))
+    samples = [elapsed / number]
+    gc_was = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat - 1):
+            t0 = time.perf_counter()
+            for _ in range(number):
+                fn()
+            samples.append((time.perf_counter() - t0) / number)
+    finally:
+        if gc_was:
+            gc.enable()
+    return {
+        "median": statistics.median(samples),
+        "min": min(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "number": number,
+        "repeat": len(samples),
+    }
+
+
+def git_commit() -> str:
+    try:
+        sha = subprocess.check_output(["git", "rev-parse", "--short=10", "HEAD"], text=True,
+                                      stderr=subprocess.DEVNULL).strip()
+        dirty = subprocess.run(["git", "diff", "--quiet", "HEAD", "--", "."], stderr=subprocess.DEVNULL).returncode
+        return sha + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def machine_info() -> Dict[str, Any]:
+    return {"python": platform.python_version(), "numpy": np.__version__, "platform": platform.platform(),
+            "machine": platform.machine(), "cpus": os.cpu_count()}
+
+
+def fmt_time(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def run(args) -> int:
+    install_stubs()
+    cases = [c for c in expand(args.quick) if not args.k or any(fnmatch.fnmatch(c[0], f"*{k}*") for k in args.k)]
+    results: Dict[str, Any] = {}
+    skipped: Dict[str, str] = {}
+    failed = 0
+    for cid, params, setup in cases:
+        try:
+            fn, info = setup(**params)
+            stats = measure(fn, args.repeat, args.min_time, args.max_time)
+        except FixtureMissing as e:
+            skipped[cid] = str(e)
+            print(f"{cid:<44} SKIPPED: {e}")
+            continue
+        except Exception as e:
+            failed += 1
+            print(f"{cid:<44} FAILED: {e}")
+            continue
+        results[cid] = dict(stats, **info)
+        print(f"{cid:<44} {fmt_time(stats['median']):>11}  ±{fmt_time(stats['stdev']):>10}  "
+              f"(x{stats['number']}, {stats['repeat']} runs)")
+
+    doc = {"commit": git_commit(), "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+           "machine": machine_info(), "quick": args.quick, "results": results, "skipped": skipped}
+    if not args.no_save:
+        path = args.output or os.path.join(RESULTS_DIR, f"{doc['commit']}.json")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if os.path.exists(path) and not args.output:
+            # Subset (-k) digabung dengan hasil commit yang sama yang sudah ada
+            with open(path) as f:
+                previous = json.load(f)
+            doc["results"] = dict(previous.get("results", {}), **results)
+        with open(path, "w") as f:
+            json.dump(doc, f, indent=1, sort_keys=True)
+        print(f"saved {len(results)} results -> {path}")
+    if skipped:
+        print(f"{len(skipped)} case(s) skipped: recorded fixtures missing")
+    return 1 if failed else 0
+
+
+def resolve(ref: Optional[str]) -> str:
+    """File hasil dari path, sha (prefix) atau ref git; None = hasil terbaru"""
+    files = sorted(glob.glob(os.path.join(RESULTS_DIR, "*.json")), key=os.path.getmtime)
+    if ref is None:
+        if not files:
+            sys.exit("no stored results; run `python -m benchmarks.suite run` first")
+        return files[-1]
+    if os.path.exists(ref):
+        return ref
+    try:
+        ref = subprocess.check_output(["git", "rev-parse", "--short=10", ref], text=True,
+                                      stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    matches = [f for f in files if os.path.basename(f).startswith(ref)]
+    if not matches:
+        sys.exit(f"no stored results for {ref}")
+    return matches[-1]
+
+
+def compare(args) -> int:
+    with open(resolve(args.base)) as f:
+        base = json.load(f)
+    with open(resolve(args.head)) as f:
+        head = json.load(f)
+    print(f"base {base['commit']} ({base['date']})  ->  head {head['commit']} ({head['date']})")
+    if base["machine"] != head["machine"]:
+        print("WARNING: results come from different machines; ratios are not meaningful")
+
+    regressions = 0
+    print(f"{'case':<44}{'base':>12}{'head':>12}{'ratio':>8}")
+    for cid in sorted(set(base["results"]) | set(head["results"])):
+        b, h = base["results"].get(cid), head["results"].get(cid)
+        if not b or not h:
+            print(f"{cid:<44}{fmt_time(b['median']) if b else '-':>12}{fmt_time(h['median']) if h else '-':>12}")
+            continue
+        ratio = h["median"] / b["median"]
+        note = ""
+        if b.get("sha") != h.get("sha"):
+            note = "  (fixture changed)"
+        # Regresi: lebih lambat dari threshold DAN di luar noise (min head > median base)
+        elif ratio > 1 + args.threshold and h["min"] > b["median"]:
+            note = "  REGRESSION"
+            regressions += 1
+        elif ratio < 1 / (1 + args.threshold) and h["median"] < b["min"]:
+            note = "  faster"
+        print(f"{cid:<44}{fmt_time(b['median']):>12}{fmt_time(h['median']):>12}{ratio:>7.2f}x{note}")
+    print(f"{regressions} regression(s) above {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_run = sub.add_parser("run", help="jalankan suite dan simpan hasil")
+    p_run.add_argument("-k", action="append", help="filter nama case (glob, boleh berulang)")
+    p_run.add_argument("--quick", action="store_true", help=f"bars {QUICK_BARS}, symbols {QUICK_SYMBOLS}")
+    p_run.add_argument("--repeat", type=int, default=7)
+    p_run.add_argument("--min-time", type=float, default=0.05, help="detik minimal per ulangan")
+    p_run.add_argument("--max-time", type=float, default=10.0, help="batas waktu total per case (detik)")
+    p_run.add_argument("--output", help="path file hasil (default results/<commit>.json)")
+    p_run.add_argument("--no-save", action="store_true")
+
+    p_cmp = sub.add_parser("compare", help="bandingkan dua hasil (path, sha atau ref git)")
+    p_cmp.add_argument("base")
+    p_cmp.add_argument("head", nargs="?", help="default: hasil terbaru")
+    p_cmp.add_argument("--threshold", type=float, default=0.10)
+
+    sub.add_parser("list", help="daftar case")
+    args = parser.parse_args()
+
+    if args.cmd == "list":
+        for cid, _, _ in expand(quick=False):
+            print(cid)
+        return
+    sys.exit(run(args) if args.cmd == "run" else compare(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+# candle_cache.py (Cache OHLCV process-wide, dipakai fetch_candles_ccxt)
+import time
+import struct
+import asyncio
+import threading
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import ccxt
+
+from candles import Candles
+
+logger = logging.getLogger("HybridAnalyzerV8")
+
+# fetcher(symbol, timeframe, since, limit) -> baris ccxt [ts, o, h, l, c, v] (list atau array (n, 6))
+Fetcher = Callable[[str, str, Optional[int], int], List[List[float]]]
+AsyncFetcher = Callable[[str, str, Optional[int], int], Awaitable[List[List[float]]]]
+
+
+def timeframe_ms(timeframe: str) -> int:
+    """'4h' -> 14_400_000"""
+    return ccxt.Exchange.parse_timeframe(timeframe) * 1000
+
+
+class CandleEntry:
+    __slots__ = ("rows", "limit", "expires_at", "nbytes")
+
+    def __init__(self, rows: Candles, limit: int, expires_at: float):
+        self.rows = rows
+        self.limit = limit
+        self.expires_at = expires_at
+        self.nbytes = rows.nbytes
+
+
+class CandleCache:
+    """Cache LRU untuk candle per (symbol, timeframe).
+
+    Entry kadaluarsa saat bar yang sedang berjalan ditutup. Karena bar terakhir
+    masih bergerak (harga saat ini diambil dari sana), entry juga disegarkan
+    paling lambat tiap `live_ttl` detik; set None untuk murni mengikuti
+    penutupan bar. Refresh hanya menarik bar sejak `open_time` terakhir yang
+    di-cache (ccxt `since=`) lalu menyambungkannya.
+
+    `remote` (opsional, key-value shared.py / Redis) membagi entry antar proses worker:
+    sebelum fetch, entry yang masih valid dari worker lain dipakai; setelah fetch, entry
+    baru dipublikasikan dengan TTL sampai expires_at.
+    """
+
+    def __init__(self, fetcher: Fetcher, max_entries: int = 512, max_bytes: int = 64 * 1024 * 1024,
+                 live_ttl: Optional[float] = 15.0, clock: Callable[[], float] = time.time,
+                 remote: Optional[Any] = None):
+        self.fetcher = fetcher
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.live_ttl = live_ttl
+        self.clock = clock
+        self.remote = remote
+
+        self._entries: "OrderedDict[Tuple[str, str], CandleEntry]" = OrderedDict()
+        self._key_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._async_locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "refreshes": 0, "evictions": 0, "remote_hits": 0, "remote_errors": 0}
+
+    def get(self, symbol: str, timeframe: str, limit: int) -> Candles:
+        """Ambil `limit` candle terakhir (view read-only), dari cache bila masih valid."""
+        key = (symbol, timeframe)
+        rows = self._hit(key, limit)
+        if rows is not None:
+            return rows
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Satu refresh per key; request lain menunggu hasilnya
+        with key_lock:
+            rows = self._hit(key, limit)
+            if rows is None and self.remote is not None:
+                rows = self._remote_hit(key, limit)
+            if rows is not None:
+                return rows
+            entry, since, fetch_limit = self._plan(key, timeframe, limit)
+            rows, stored = self._apply(key, timeframe, entry, fetch_limit, limit,
+                                       self.fetcher(symbol, timeframe, since, fetch_limit))
+            if stored is not None and self.remote is not None:
+                self._publish(key, stored)
+            return rows
+
+    async def get_async(self, symbol: str, timeframe: str, limit: int, fetcher: AsyncFetcher) -> Candles:
+        """get() untuk event loop: `fetcher` di-await, refresh per key digabung lewat asyncio.Lock.
+        Entry dan statistik sama dengan jalur sync."""
+        key = (symbol, timeframe)
+        rows = self._hit(key, limit)
+        if rows is not None:
+            return rows
+        with self._lock:
+            key_lock = self._async_locks.setdefault(key, asyncio.Lock())
+
+        async with key_lock:
+            rows = self._hit(key, limit)
+            if rows is None and self.remote is not None:
+                rows = await asyncio.to_thread(self._remote_hit, key, limit)
+            if rows is not None:
+                return rows
+            entry, since, fetch_limit = self._plan(key, timeframe, limit)
+            rows, stored = self._apply(key, timeframe, entry, fetch_limit, limit,
+                                       await fetcher(symbol, timeframe, since, fetch_limit))
+            if stored is not None and self.remote is not None:
+                await asyncio.to_thread(self._publish, key, stored)
+            return rows
+
+    def _hit(self, key: Tuple[str, str], limit: int) -> Optional[Candles]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry.limit >= limit and self.clock() < entry.expires_at:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry.rows.tail(limit)
+        return None
+
+    def _plan(self, key: Tuple[str, str], timeframe: str, limit: int
+              ) -> Tuple[Optional[CandleEntry], Optional[int], int]:
+        """(entry, since, limit) untuk fetcher. Refresh hanya menarik bar sejak open_time
+        terakhir (bar itu ikut ditarik ulang karena belum close); entry None = fetch penuh.
+        Entry yang menganggur lebih dari `entry.limit` bar juga di-fetch penuh: since=last_open
+        dengan limit terpotong akan mengembalikan bar TERTUA setelah last_open, bukan yang terbaru."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and entry.limit >= limit and len(entry.rows):
+            last_open = int(entry.rows.open_time[-1])
+            elapsed_bars = int((self.clock() * 1000 - last_open) // timeframe_ms(timeframe)) + 2
+            if elapsed_bars <= entry.limit:
+                return entry, last_open, elapsed_bars
+        return None, None, max(limit, entry.limit if entry else 0)
+
+    def _apply(self, key: Tuple[str, str], timeframe: str, entry: Optional[CandleEntry], fetch_limit: int,
+               limit: int, fetched) -> Tuple[Candles, Optional[CandleEntry]]:
+        """Sambungkan hasil fetcher ke entry lama (refresh) atau pakai langsung (miss), lalu simpan.
+        Return (candle untuk pemanggil, entry yang disimpan atau None)"""
+        if entry is not None:
+            keep = entry.limit
+            rows = entry.rows
+            if len(fetched):
+                fresh = Candles.from_ccxt(fetched)
+                kept = entry.rows[:int(np.searchsorted(entry.rows.open_time, fresh.open_time[0]))]
+                rows = Candles.concat([kept, fresh]).tail(keep)
+            stat = "refreshes"
+        else:
+            keep = fetch_limit
+            rows = Candles.from_ccxt(fetched)
+            stat = "misses"
+
+        with self._lock:
+            self.stats[stat] += 1
+
+        stored = None
+        if len(rows):
+            stored = CandleEntry(rows, keep, self._expiry(rows, timeframe))
+            self._store(key, stored)
+        return rows.tail(limit), stored
+
+    # --- Entry bersama antar proses (remote) ---
+
+    @staticmethod
+    def _remote_key(key: Tuple[str, str]) -> str:
+        return f"candles:{key[0]}:{key[1]}"
+
+    def _remote_hit(self, key: Tuple[str, str], limit: int) -> Optional[Candles]:
+        """Entry valid dari worker lain: format = expires_at (double) + limit (int64) + baris (n, 6) float64"""
+        try:
+            raw = self.remote.get(self._remote_key(key))
+        except Exception as e:
+            with self._lock:
+                self.stats["remote_errors"] += 1
+            logger.warning(f"Candle cache remote get failed: {e}")
+            return None
+        if raw is None:
+            return None
+        expires_at, keep = struct.unpack_from("<dq", raw)
+        if keep < limit or self.clock() >= expires_at:
+            return None
+        rows = Candles.from_ccxt(np.frombuffer(raw, dtype=np.float64, offset=16))
+        self._store(key, CandleEntry(rows, keep, expires_at))
+        with self._lock:
+            self.stats["remote_hits"] += 1
+        return rows.tail(limit)
+
+    def _publish(self, key: Tuple[str, str], entry: CandleEntry) -> None:
+        px = int((entry.expires_at - self.clock()) * 1000)
+        if px <= 0:
+            return
+        rows = np.column_stack([entry.rows.open_time.astype(np.float64), entry.rows.open, entry.rows.high,
+                                entry.rows.low, entry.rows.close, entry.rows.volume])
+        try:
+            self.remote.set(self._remote_key(key), struct.pack("<dq", entry.expires_at, entry.limit) + rows.tobytes(),
+                            px=px)
+        except Exception as e:
+            with self._lock:
+                self.stats["remote_errors"] += 1
+            logger.warning(f"Candle cache remote set failed: {e}")
+
+    def _expiry(self, rows: Candles, timeframe: str) -> float:
+        bar_close = (int(rows.open_time[-1]) + timeframe_ms(timeframe)) / 1000
+        if self.live_ttl is None:
+            return bar_close
+        return min(bar_close, self.clock() + self.live_ttl)
+
+    def _store(self, key: Tuple[str, str], entry: CandleEntry) -> None:
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old:
+                self.total_bytes -= old.nbytes
+            self._entries[key] = entry
+            self.total_bytes += entry.nbytes
+
+            while self._entries and (len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes):
+                evicted_key, evicted = self._entries.popitem(last=False)
+                self.total_bytes -= evicted.nbytes
+                self.stats["evictions"] += 1
+                logger.debug(f"Candle cache evict {evicted_key}")
+
+    def invalidate(self, symbol: Optional[str] = None) -> None:
+        """Hapus entry satu simbol (atau semua jika symbol None)."""
+        with self._lock:
+            for key in [k for k in self._entries if symbol is None or k[0] == symbol]:
+                self.total_bytes -= self._entries.pop(key).nbytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,346 @@
+# candle_store.py (Penyimpanan OHLCV lokal: file kolumnar append-only + memmap)
+#
+# CLI (histori panjang untuk riset/backtest):
+#   cd backend && python candle_store.py backfill --symbol BTC --timeframe 1h --days 365
+#   cd backend && python candle_store.py info --symbol BTC --timeframe 1h
+#   cd backend && python candle_store.py repair --symbol BTC --timeframe 1h     # isi gap dari exchange
+#   cd backend && python candle_store.py export --symbol BTC --timeframe 1h --out BTCUSDT_1h.csv
+#
+# Layout: <root>/<BTCUSDT>/<1h>/{open,high,low,close,volume,open_time}.bin, masing-masing
+# array mentah (float64 / int64 untuk open_time). Hanya bar yang sudah close yang
+# disimpan. open_time.bin ditulis paling akhir dan ukurannya menjadi jumlah bar yang
+# sah, jadi pembaca (thread atau proses lain) tidak pernah melihat bar setengah jadi.
+import os
+import time
+import shutil
+import logging
+import argparse
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from candles import Candles, FIELDS
+from candle_cache import Fetcher, timeframe_ms
+
+try:
+    import fcntl
+except ImportError:  # Windows: lock antar proses tidak tersedia, lock thread tetap jalan
+    fcntl = None
+
+logger = logging.getLogger("HybridAnalyzerV8")
+
+PAGE_LIMIT = 1000       # Bar per request saat sync/backfill (maks. Binance Futures 1500)
+MAX_SYNC_PAGES = 50     # Batas halaman per sync supaya request tidak menggantung setelah downtime panjang
+
+_DTYPES = {f: np.int64 if f == "open_time" else np.float64 for f in FIELDS}
+_WRITE_ORDER = FIELDS[1:] + FIELDS[:1]  # open_time terakhir = commit
+
+
+def store_key(symbol: str) -> str:
+    """'BTC/USDT' -> 'BTCUSDT'"""
+    return symbol.replace("/", "").replace(":", "").upper()
+
+
+class CandleStore:
+    """Satu set file kolumnar append-only per (symbol, timeframe), dibaca lewat memmap.
+
+    tail()/read() mengembalikan view read-only di atas page cache OS, jadi
+    banyak proses yang membaca file yang sama tidak menggandakan memori.
+    Penulis diserialkan per key (lock thread + flock antar proses).
+    """
+
+    def __init__(self, root: str, clock: Callable[[], float] = time.time):
+        self.root = root
+        self.clock = clock
+        self._maps: Dict[Tuple[str, str], Tuple[int, Candles]] = {}
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.stats = {"appended": 0, "synced_rows": 0, "offline_reads": 0, "gaps": 0, "gap_fills": 0}
+
+    def path(self, symbol: str, timeframe: str) -> str:
+        return os.path.join(self.root, store_key(symbol), timeframe)
+
+    # --- Baca ---
+
+    def length(self, symbol: str, timeframe: str) -> int:
+        try:
+            return os.path.getsize(os.path.join(self.path(symbol, timeframe), "open_time.bin")) // 8
+        except OSError:
+            return 0
+
+    def read(self, symbol: str, timeframe: str) -> Candles:
+        """Semua bar tersimpan (view memmap, tanpa copy); dipetakan ulang hanya jika file bertambah."""
+        key = (store_key(symbol), timeframe)
+        n = self.length(symbol, timeframe)
+        cached = self._maps.get(key)
+        if cached and cached[0] == n:
+            return cached[1]
+        if n == 0:
+            return Candles.empty()
+        base = self.path(symbol, timeframe)
+        candles = Candles(*(np.memmap(os.path.join(base, f"{f}.bin"), dtype=_DTYPES[f], mode="r", shape=(n,))
+                            for f in FIELDS))
+        self._maps[key] = (n, candles)
+        return candles
+
+    def tail(self, symbol: str, timeframe: str, n: int) -> Candles:
+        return self.read(symbol, timeframe).tail(n)
+
+    def last_open_time(self, symbol: str, timeframe: str) -> Optional[int]:
+        candles = self.read(symbol, timeframe)
+        return int(candles.open_time[-1]) if len(candles) else None
+
+    def gaps(self, symbol: str, timeframe: str) -> List[Tuple[int, int]]:
+        """Pasangan (open_time sebelum gap, open_time setelah gap) di data tersimpan"""
+        open_time = self.read(symbol, timeframe).open_time
+        jumps = np.flatnonzero(np.diff(open_time) != timeframe_ms(timeframe))
+        return [(int(open_time[i]), int(open_time[i + 1])) for i in jumps]
+
+    # --- Tulis ---
+
+    def closed(self, candles: Candles, timeframe: str) -> Candles:
+        """Buang bar yang belum close (bar berjalan tidak boleh masuk file append-only)"""
+        now_ms = int(self.clock() * 1000)
+        return candles[:int(np.searchsorted(candles.open_time, now_ms - timeframe_ms(timeframe), side="right"))]
+
+    def append(self, symbol: str, timeframe: str, candles: Candles, fetch: Optional[Fetcher] = None) -> int:
+        """Tambahkan bar close yang lebih baru dari bar terakhir; return jumlah bar yang ditulis.
+
+        Jika bar pertama tidak menyambung dengan bar tersimpan terakhir dan `fetch` diberikan,
+        rentang yang hilang (since = bar terakhir + 1 step) ditarik dulu dan ikut ditulis, jadi
+        file tetap tanpa lubang. Gap yang tetap ada (exchange gagal / tidak punya bar) dicatat
+        di stats["gaps"] dan bisa diisi belakangan dengan repair().
+        """
+        candles = self.closed(candles, timeframe)
+        if not len(candles):
+            return 0
+        step = timeframe_ms(timeframe)
+        with self._writer(symbol, timeframe) as base:
+            last = self.last_open_time(symbol, timeframe)
+            if last is not None:
+                candles = candles.since(last + 1)
+            if not len(candles):
+                return 0
+            first = int(candles.open_time[0])
+            if last is not None and first != last + step and fetch is not None:
+                missing = self._fill(fetch, symbol, timeframe, last + step, first)
+                candles = Candles.concat([missing, candles])
+            if last is not None and int(candles.open_time[0]) != last + step:
+                self.stats["gaps"] += 1
+                logger.warning(f"Candle store gap {symbol} {timeframe}: {last} -> {int(candles.open_time[0])}")
+            for f in _WRITE_ORDER:
+                with open(os.path.join(base, f"{f}.bin"), "ab") as fh:
+                    fh.write(np.ascontiguousarray(getattr(candles, f), dtype=_DTYPES[f]).tobytes())
+        self.stats["appended"] += len(candles)
+        return len(candles)
+
+    def _fill(self, fetch: Fetcher, symbol: str, timeframe: str, since: int, until: int,
+              max_pages: int = MAX_SYNC_PAGES) -> Candles:
+        """Bar close di [since, until) dari exchange; kosong jika fetch gagal"""
+        try:
+            found = self.closed(Candles.concat(self._pages(fetch, symbol, timeframe, since, until, max_pages)),
+                                timeframe)
+        except Exception as e:
+            logger.warning(f"Candle store gap fill {symbol} {timeframe} {since} -> {until} failed: {e}")
+            return Candles.empty()
+        self.stats["gap_fills"] += len(found)
+        return found
+
+    def repair(self, fetch: Fetcher, symbol: str, timeframe: str) -> int:
+        """Isi gap di data tersimpan (lihat gaps()); file ditulis ulang sekali jika ada bar yang
+        ditemukan. Return jumlah bar yang ditambahkan."""
+        step = timeframe_ms(timeframe)
+        found = [self._fill(fetch, symbol, timeframe, before + step, after, max_pages=10 ** 6)
+                 for before, after in self.gaps(symbol, timeframe)]
+        if not sum(len(c) for c in found):
+            return 0
+        with self._writer(symbol, timeframe):
+            before = self.length(symbol, timeframe)
+            merged = Candles.concat([self.read(symbol, timeframe)] + found)
+            _, order = np.unique(merged.open_time, return_index=True)
+            self._rewrite(symbol, timeframe, Candles(*(getattr(merged, f)[order] for f in FIELDS)))
+            added = self.length(symbol, timeframe) - before
+        logger.info(f"Candle store repaired {symbol} {timeframe}: +{added} bars, "
+                    f"{len(self.gaps(symbol, timeframe))} gaps left")
+        return added
+
+    def _writer(self, symbol: str, timeframe: str) -> "_WriterLock":
+        key = (store_key(symbol), timeframe)
+        with self._lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+        return _WriterLock(lock, self.path(symbol, timeframe))
+
+    def _rewrite(self, symbol: str, timeframe: str, candles: Candles) -> None:
+        """Ganti seluruh isi (dipakai backfill ke belakang); direktori lama diganti lewat rename."""
+        base = self.path(symbol, timeframe)
+        tmp, old = base + ".tmp", base + ".old"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for f in _WRITE_ORDER:
+            with open(os.path.join(tmp, f"{f}.bin"), "wb") as fh:
+                fh.write(np.ascontiguousarray(getattr(candles, f), dtype=_DTYPES[f]).tobytes())
+        if os.path.exists(base):
+            os.replace(base, old)
+        os.replace(tmp, base)
+        shutil.rmtree(old, ignore_errors=True)
+        self._maps.pop((store_key(symbol), timeframe), None)
+
+    # --- Sinkronisasi dengan exchange ---
+
+    def _pages(self, fetch: Fetcher, symbol: str, timeframe: str, since: int,
+               until: Optional[int] = None, max_pages: int = MAX_SYNC_PAGES) -> List[Candles]:
+        step = timeframe_ms(timeframe)
+        out = []
+        for _ in range(max_pages):
+            rows = fetch(symbol, timeframe, since, PAGE_LIMIT)
+            page = Candles.from_ccxt(rows) if len(rows) else Candles.empty()
+            page = page.since(since)
+            if until is not None:
+                page = page[:int(np.searchsorted(page.open_time, until))]
+            if not len(page):
+                break
+            out.append(page)
+            since = int(page.open_time[-1]) + step
+            if len(rows) < PAGE_LIMIT or (until is not None and since >= until):
+                break
+        return out
+
+    def sync(self, fetch: Fetcher, symbol: str, timeframe: str) -> Candles:
+        """Tarik semua bar setelah bar tersimpan terakhir (paginasi bila ada gap karena downtime),
+        simpan yang sudah close, dan return bar yang ditarik (termasuk bar berjalan)."""
+        last = self.last_open_time(symbol, timeframe)
+        if last is None:
+            return Candles.empty()
+        fresh = Candles.concat(self._pages(fetch, symbol, timeframe, last + timeframe_ms(timeframe)))
+        self.stats["synced_rows"] += len(fresh)
+        self.append(symbol, timeframe, fresh, fetch)
+        return fresh
+
+    def backfill(self, fetch: Fetcher, symbol: str, timeframe: str, start: int) -> int:
+        """Isi histori sejak `start` (ms): ke depan sampai bar terbaru, dan ke belakang bila
+        `start` lebih tua dari bar tersimpan pertama, lalu isi gap yang ada. Return jumlah bar baru."""
+        before = self.length(symbol, timeframe)
+        stored = self.read(symbol, timeframe)
+        if len(stored) and start < int(stored.open_time[0]):
+            older = Candles.concat(self._pages(fetch, symbol, timeframe, start, until=int(stored.open_time[0]),
+                                               max_pages=10 ** 6))
+            if len(older):
+                with self._writer(symbol, timeframe):
+                    self._rewrite(symbol, timeframe, Candles.concat([older, self.read(symbol, timeframe)]))
+        if not self.length(symbol, timeframe):
+            self.append(symbol, timeframe, Candles.concat(
+                self._pages(fetch, symbol, timeframe, start, max_pages=10 ** 6)))
+        while True:
+            n = self.length(symbol, timeframe)
+            self.sync(fetch, symbol, timeframe)
+            if self.length(symbol, timeframe) == n:
+                break
+        self.repair(fetch, symbol, timeframe)
+        return self.length(symbol, timeframe) - before
+
+    def read_through(self, fetch: Fetcher) -> Fetcher:
+        """Fetcher untuk CandleCache: bar close dari file lokal, hanya bar baru dari exchange.
+
+        Symbol yang belum pernah disimpan ditarik seperti biasa (limit terakhir) lalu
+        disimpan. Jika exchange gagal tetapi data lokal ada, bar tersimpan tetap
+        dikembalikan (cold start tanpa jaringan).
+        """
+        def fetcher(symbol: str, timeframe: str, since: Optional[int], limit: int) -> np.ndarray:
+            if not self.length(symbol, timeframe):
+                rows = Candles.from_ccxt(fetch(symbol, timeframe, since, limit))
+                self.append(symbol, timeframe, rows)
+                return _rows(rows)
+            try:
+                fresh = self.sync(fetch, symbol, timeframe)
+            except Exception as e:
+                self.stats["offline_reads"] += 1
+                logger.warning(f"Candle store offline read {symbol} {timeframe}: {e}")
+                fresh = Candles.empty()
+            stored = self.read(symbol, timeframe)
+            live = fresh.since(int(stored.open_time[-1]) + 1)
+            base = stored.since(since) if since is not None else stored
+            return _rows(Candles.concat([base.tail(limit), live]).tail(limit))
+        return fetcher
+
+
+def _rows(candles: Candles) -> np.ndarray:
+    """Candles -> array (n, 6) yang diterima Candles.from_ccxt"""
+    return np.column_stack([getattr(candles, f) for f in FIELDS]) if len(candles) else np.empty((0, 6))
+
+
+class _WriterLock:
+    """Lock thread + flock file <key>.lock; membuat direktori dan memotong sisa tulis yang gagal."""
+
+    def __init__(self, lock: threading.Lock, base: str):
+        self.lock = lock
+        self.base = base
+        self._fh = None
+
+    def __enter__(self) -> str:
+        self.lock.acquire()
+        try:
+            os.makedirs(self.base, exist_ok=True)
+            if fcntl:
+                self._fh = open(self.base + ".lock", "w")
+                fcntl.flock(self._fh, fcntl.LOCK_EX)
+            self._repair()
+        except BaseException:
+            self.__exit__(None, None, None)
+            raise
+        return self.base
+
+    def _repair(self) -> None:
+        # Tulis yang terputus sebelum commit (open_time) meninggalkan byte lebih di field lain
+        committed = os.path.join(self.base, "open_time.bin")
+        size = os.path.getsize(committed) if os.path.exists(committed) else 0
+        for f in FIELDS[1:]:
+            path = os.path.join(self.base, f"{f}.bin")
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                os.truncate(path, size)
+
+    def __exit__(self, *exc) -> None:
+        if self._fh:
+            fcntl.flock(self._fh, fcntl.LOCK_UN)
+            self._fh.close()
+            self._fh = None
+        self.lock.release()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kelola candle store lokal")
+    parser.add_argument("command", choices=["backfill", "info", "export", "repair"])
+    parser.add_argument("--symbol", required=True, help="koin tanpa /USDT, misal BTC")
+    parser.add_argument("--timeframe", default="1h")
+    parser.add_argument("--days", type=float, default=365, help="backfill: jumlah hari ke belakang")
+    parser.add_argument("--out", help="export: file CSV tujuan")
+    args = parser.parse_args()
+
+    import hybrid_analyzer_nofilter as analyzer
+    from gateway import BACKGROUND, in_lane
+
+    store = analyzer.candle_store or CandleStore(analyzer.DEFAULT_CANDLE_STORE_DIR)
+    symbol = args.symbol.upper() + "/USDT"
+    if args.command == "backfill":
+        start = int((time.time() - args.days * 86400) * 1000)
+        t0 = time.time()
+        added = store.backfill(in_lane(BACKGROUND, analyzer.exchange_ohlcv), symbol, args.timeframe, start)
+        print(f"{symbol} {args.timeframe}: +{added} bars in {time.time() - t0:.1f}s "
+              f"({store.length(symbol, args.timeframe)} total)")
+    elif args.command == "repair":
+        added = store.repair(in_lane(BACKGROUND, analyzer.exchange_ohlcv), symbol, args.timeframe)
+        print(f"{symbol} {args.timeframe}: +{added} bars filled")
+    elif args.command == "export":
+        from backtest import save_ohlcv_csv
+        save_ohlcv_csv(args.out, store.read(symbol, args.timeframe))
+        print(f"{store.length(symbol, args.timeframe)} bars -> {args.out}")
+    candles = store.read(symbol, args.timeframe)
+    if len(candles):
+        print(f"{store.path(symbol, args.timeframe)}: {len(candles)} bars, "
+              f"{time.strftime('%Y-%m-%d %H:%M', time.gmtime(candles.open_time[0] / 1000))} -> "
+              f"{time.strftime('%Y-%m-%d %H:%M', time.gmtime(candles.open_time[-1] / 1000))} UTC, "
+              f"{len(store.gaps(symbol, args.timeframe))} gaps")
+
+
+if __name__ == "__main__":
+    main()
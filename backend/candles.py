@@ -0,0 +1,89 @@
+# candles.py (Representasi candle kolumnar berbasis NumPy)
+from typing import Any, Dict, Iterable, List, Sequence, Union
+
+import numpy as np
+
+FIELDS = ("open_time", "open", "high", "low", "close", "volume")
+
+
+class Candles:
+    """Deret OHLCV dengan satu array kontigu per field.
+
+    `open_time` disimpan sebagai int64 (ms), sisanya float64. Slicing
+    menghasilkan view (tanpa copy), dan array dibuat read-only karena satu
+    objek bisa dibagi antar request lewat candle_cache.
+    """
+
+    __slots__ = FIELDS
+
+    def __init__(self, open_time: np.ndarray, open: np.ndarray, high: np.ndarray,
+                 low: np.ndarray, close: np.ndarray, volume: np.ndarray):
+        self.open_time = open_time
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        for name in FIELDS:
+            getattr(self, name).flags.writeable = False
+
+    @classmethod
+    def from_ccxt(cls, ohlcv: Union[Sequence[Sequence[float]], np.ndarray]) -> "Candles":
+        """Bangun langsung dari payload ccxt [[ts, o, h, l, c, v], ...] tanpa dict per bar"""
+        rows = np.asarray(ohlcv, dtype=np.float64).reshape(-1, 6)
+        block = np.ascontiguousarray(rows.T)  # (6, n): tiap baris = satu kolom kontigu
+        return cls(block[0].astype(np.int64), block[1], block[2], block[3], block[4], block[5])
+
+    @classmethod
+    def from_dicts(cls, candles: Iterable[Dict[str, float]]) -> "Candles":
+        """Konversi format lama list-of-dicts"""
+        return cls.from_ccxt([[c[f] for f in FIELDS] for c in candles])
+
+    @classmethod
+    def empty(cls) -> "Candles":
+        return cls.from_ccxt(np.empty((0, 6)))
+
+    @classmethod
+    def concat(cls, parts: List["Candles"]) -> "Candles":
+        parts = [p for p in parts if len(p)]
+        if not parts:
+            return cls.empty()
+        return cls(*(np.concatenate([getattr(p, f) for p in parts]) for f in FIELDS))
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+    def __getitem__(self, key: Union[int, slice]) -> Any:
+        if isinstance(key, slice):
+            return Candles(*(getattr(self, f)[key] for f in FIELDS))
+        # Akses per bar tetap didukung untuk kode lama: candles[-1]["close"]
+        return {f: (int(getattr(self, f)[key]) if f == "open_time" else float(getattr(self, f)[key]))
+                for f in FIELDS}
+
+    def tail(self, n: int) -> "Candles":
+        """View n bar terakhir"""
+        return self[-n:] if n < len(self) else self
+
+    def since(self, open_time: int) -> "Candles":
+        """View bar dengan open_time >= open_time"""
+        return self[int(np.searchsorted(self.open_time, open_time)):]
+
+    def to_rows(self) -> List[List[float]]:
+        """Kembali ke format baris ccxt"""
+        return np.column_stack([getattr(self, f) for f in FIELDS]).tolist()
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, f).nbytes for f in FIELDS)
+
+    def __repr__(self) -> str:
+        return f"Candles(n={len(self)})"
+
+
+def as_candles(candles: Union[Candles, Sequence[Dict[str, float]], Sequence[Sequence[float]]]) -> Candles:
+    """Terima Candles, list-of-dicts lama, atau baris ccxt"""
+    if isinstance(candles, Candles):
+        return candles
+    if len(candles) and isinstance(candles[0], dict):
+        return Candles.from_dicts(candles)
+    return Candles.from_ccxt(candles) if len(candles) else Candles.empty()
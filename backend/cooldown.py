@@ -0,0 +1,261 @@
+# cooldown.py (Cooldown /analyze per (user, koin) di memori, tanpa query DB di hot path)
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+logger = logging.getLogger("HybridAnalyzerV8")
+
+Key = Tuple[Hashable, str]
+
+# loader(window_seconds) -> iterable (user_id, coin_name, last_epoch) untuk analisa dalam jendela cooldown
+WarmLoader = Callable[[float], Iterable[Tuple[Any, str, float]]]
+
+
+class CooldownMap:
+    """Peta TTL: (user_id, coin) -> waktu analisa terakhir (epoch detik).
+
+    try_acquire() mengecek dan langsung mencatat dalam satu lock, jadi dua
+    request bersamaan untuk koin yang sama tidak bisa lolos dua-duanya.
+    touch() dipanggil saat baris analyses di-insert; warm() mengisi peta
+    dari DB saat start supaya restart tidak mereset cooldown: selama load
+    pertama berjalan try_acquire() menunggu, dan load yang gagal dicoba
+    lagi paling cepat `retry_after` detik kemudian.
+    Entri kedaluwarsa dibersihkan bertahap setiap `purge_every` panggilan.
+    """
+
+    def __init__(self, window: float = 300.0, clock: Callable[[], float] = time.time, purge_every: int = 1024,
+                 retry_after: float = 30.0):
+        self.window = window
+        self.clock = clock
+        self.purge_every = purge_every
+        self.retry_after = retry_after
+        self._last: Dict[Key, float] = {}
+        self._lock = threading.Lock()
+        self._warming = threading.Lock()   # Dipegang selama loader berjalan
+        self._ops = 0
+        self._warmed = False
+        self._retry_at = 0.0
+        self.stats = {"allowed": 0, "blocked": 0, "warmed": 0, "purged": 0, "warm_failed": 0}
+
+    @property
+    def warmed(self) -> bool:
+        return self._warmed
+
+    @property
+    def warm_due(self) -> bool:
+        """Belum ter-warm dan tidak sedang menunggu jeda retry"""
+        return not self._warmed and self.clock() >= self._retry_at
+
+    def __len__(self) -> int:
+        return len(self._last)
+
+    def until(self, user_id: Hashable, coin: str) -> Optional[float]:
+        """Epoch akhir cooldown, atau None jika boleh analisa sekarang."""
+        last = self._last.get((user_id, coin))
+        if last is None:
+            return None
+        end = last + self.window
+        return end if self.clock() < end else None
+
+    def try_acquire(self, user_id: Hashable, coin: str) -> Optional[float]:
+        """Jika tidak cooldown: catat sekarang dan return None; jika cooldown: return epoch akhirnya."""
+        key = (user_id, coin)
+        if not self._warmed:
+            with self._warming:   # Tunggu load pertama yang sedang berjalan
+                pass
+        with self._lock:
+            now = self.clock()
+            last = self._last.get(key)
+            if last is not None and now < last + self.window:
+                self.stats["blocked"] += 1
+                return last + self.window
+            self._last[key] = now
+            self.stats["allowed"] += 1
+            self._maybe_purge(now)
+        return None
+
+    def release(self, user_id: Hashable, coin: str) -> None:
+        """Batalkan try_acquire (misal fetch gagal) supaya user bisa langsung coba lagi."""
+        with self._lock:
+            self._last.pop((user_id, coin), None)
+
+    def touch(self, user_id: Hashable, coin: str, at: Optional[float] = None) -> None:
+        """Catat analisa yang tersimpan (dipanggil bersamaan dengan insert)."""
+        at = self.clock() if at is None else at
+        with self._lock:
+            key = (user_id, coin)
+            if at > self._last.get(key, 0.0):
+                self._last[key] = at
+            self._maybe_purge(at)
+
+    def warm(self, loader: WarmLoader) -> int:
+        """Isi dari DB sampai berhasil sekali; pemanggil bersamaan menunggu load yang sedang berjalan.
+        Kegagalan dicatat (cooldown sementara kosong) dan dicoba lagi setelah `retry_after` detik."""
+        if self._warmed:
+            return 0
+        with self._warming:
+            if not self.warm_due:
+                return 0
+            try:
+                rows = list(loader(self.window))
+            except Exception as e:
+                self._retry_at = self.clock() + self.retry_after
+                self.stats["warm_failed"] += 1
+                logger.warning(f"Cooldown warm-up failed, retrying in {self.retry_after:.0f}s: {e}")
+                return 0
+            for user_id, coin, at in rows:
+                self.touch(user_id, coin, at)
+            self._warmed = True
+        self.stats["warmed"] += len(rows)
+        logger.info(f"Cooldown map warmed with {len(rows)} recent analyses")
+        return len(rows)
+
+    def _maybe_purge(self, now: float) -> None:
+        # Dipanggil dengan lock dipegang
+        self._ops += 1
+        if self._ops % self.purge_every:
+            return
+        expired = [k for k, t in self._last.items() if now >= t + self.window]
+        for k in expired:
+            del self._last[k]
+        self.stats["purged"] += len(expired)
+
+
+class SharedCooldownMap:
+    """CooldownMap di key-value store bersama (shared.py / Redis): satu cooldown untuk semua
+    worker proses. try_acquire = SET NX PX per (user, koin), jadi dua worker yang menerima
+    request bersamaan tidak bisa lolos dua-duanya. API sama dengan CooldownMap; len()
+    hanya menghitung entri yang dicatat worker ini.
+
+    Warm-up dibagi lewat key `<prefix>:warmed`: worker yang mendapat SET NX menulis "loading"
+    (lease `load_timeout` detik), memuat dari DB lalu menulis "done"; worker lain menunggu
+    sampai "done". Load yang gagal menghapus key supaya worker berikutnya mencoba lagi."""
+
+    def __init__(self, kv: Any, window: float = 300.0, clock: Callable[[], float] = time.time,
+                 prefix: str = "cooldown", retry_after: float = 30.0, load_timeout: float = 30.0,
+                 poll: float = 0.05):
+        self.kv = kv
+        self.window = window
+        self.clock = clock
+        self.prefix = prefix
+        self.retry_after = retry_after
+        self.load_timeout = load_timeout
+        self.poll = poll
+        self._local: Dict[Key, float] = {}
+        self._lock = threading.Lock()
+        self._warming = threading.Lock()
+        self._warmed = False
+        self._retry_at = 0.0
+        self.stats = {"allowed": 0, "blocked": 0, "warmed": 0, "purged": 0, "warm_failed": 0}
+
+    @property
+    def warmed(self) -> bool:
+        return self._warmed
+
+    @property
+    def warm_due(self) -> bool:
+        return not self._warmed and self.clock() >= self._retry_at
+
+    def __len__(self) -> int:
+        now = self.clock()
+        with self._lock:
+            for k in [k for k, t in self._local.items() if now >= t + self.window]:
+                del self._local[k]
+            return len(self._local)
+
+    def _key(self, user_id: Hashable, coin: str) -> str:
+        return f"{self.prefix}:{user_id}:{coin}"
+
+    def _count(self, name: str, key: Key, at: Optional[float] = None) -> None:
+        with self._lock:
+            self.stats[name] += 1
+            if at is not None:
+                self._local[key] = at
+
+    def _set(self, user_id: Hashable, coin: str, at: float, nx: bool = False) -> bool:
+        px = int((at + self.window - self.clock()) * 1000)
+        return px > 0 and bool(self.kv.set(self._key(user_id, coin), repr(at), px=px, nx=nx))
+
+    def until(self, user_id: Hashable, coin: str) -> Optional[float]:
+        if self.window <= 0:
+            return None
+        raw = self.kv.get(self._key(user_id, coin))
+        if raw is None:
+            return None
+        end = float(raw) + self.window
+        return end if self.clock() < end else None
+
+    def try_acquire(self, user_id: Hashable, coin: str) -> Optional[float]:
+        key = (user_id, coin)
+        if not self._warmed:
+            with self._warming:
+                pass
+        if self.window <= 0:
+            self._count("allowed", key)
+            return None
+        now = self.clock()
+        for _ in range(2):   # Key bisa kedaluwarsa di antara SET NX dan GET
+            if self._set(user_id, coin, now, nx=True):
+                self._count("allowed", key, now)
+                return None
+            end = self.until(user_id, coin)
+            if end is not None:
+                self._count("blocked", key)
+                return end
+        self._set(user_id, coin, now)
+        self._count("allowed", key, now)
+        return None
+
+    def release(self, user_id: Hashable, coin: str) -> None:
+        if self.window > 0:
+            self.kv.delete(self._key(user_id, coin))
+        with self._lock:
+            self._local.pop((user_id, coin), None)
+
+    def touch(self, user_id: Hashable, coin: str, at: Optional[float] = None) -> None:
+        if self.window <= 0:
+            return
+        at = self.clock() if at is None else at
+        end = self.until(user_id, coin)
+        if end is None or at + self.window > end:
+            self._set(user_id, coin, at)
+            with self._lock:
+                self._local[(user_id, coin)] = at
+
+    def warm(self, loader: WarmLoader) -> int:
+        """Isi dari DB sekali untuk semua worker (worker yang memegang key warm); worker lain
+        menunggu load itu selesai, paling lama `load_timeout` detik per panggilan"""
+        if self._warmed:
+            return 0
+        with self._warming:
+            if not self.warm_due:
+                return 0
+            if self.window <= 0:
+                self._warmed = True
+                return 0
+            key = f"{self.prefix}:warmed"
+            deadline = time.monotonic() + self.load_timeout
+            while not self.kv.set(key, "loading", px=int(self.load_timeout * 1000), nx=True):
+                state = self.kv.get(key)
+                if state is not None and state not in ("loading", b"loading"):
+                    self._warmed = True   # Worker lain sudah memuat
+                    return 0
+                if time.monotonic() >= deadline:
+                    return 0              # Masih loading di worker lain; dicek lagi di panggilan berikutnya
+                time.sleep(self.poll)
+            try:
+                rows = list(loader(self.window))
+            except Exception as e:
+                self.kv.delete(key)
+                self._retry_at = self.clock() + self.retry_after
+                self.stats["warm_failed"] += 1
+                logger.warning(f"Cooldown warm-up failed, retrying in {self.retry_after:.0f}s: {e}")
+                return 0
+            for user_id, coin, at in rows:
+                self.touch(user_id, coin, at)
+            self.kv.set(key, "done", px=int(self.window * 1000))
+            self._warmed = True
+        self.stats["warmed"] += len(rows)
+        logger.info(f"Shared cooldowns warmed with {len(rows)} recent analyses")
+        return len(rows)
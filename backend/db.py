@@ -1,22 +1,210 @@
-import mysql.connector
 import os
-from dotenv import load_dotenv
+import time
+import queue
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
 import mysql.connector
+from dotenv import load_dotenv
 
 
 load_dotenv()
 
+logger = logging.getLogger("HybridAnalyzerV8")
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 5))              # Maks. menunggu koneksi kosong (detik)
+DB_HEALTHCHECK_INTERVAL = float(os.getenv("DB_HEALTHCHECK_INTERVAL", 30))  # Ping koneksi idle lebih lama dari ini
 
-def get_conn():
- try:
-    conn = mysql.connector.connect (
+
+class DatabaseUnavailable(Exception):
+    """Tidak bisa membuka koneksi atau pool habis sampai timeout."""
+
+
+def connect_mysql():
+    return mysql.connector.connect(
       host=os.getenv("DB_HOST"),
       port=os.getenv("DB_PORT"),
       user=os.getenv("DB_USER"),
       password=os.getenv("DB_PASSWORD"),
       database=os.getenv("DB_NAME")
     )
-    print(f"Connected to Database Succes!")
-    return conn
- except mysql.connector.Error as err:
-    print(f" Cannot connect: {err}")
\ No newline at end of file
+
+
+def mysql_is_alive(conn) -> bool:
+    try:
+        conn.ping(reconnect=False)
+        return True
+    except Exception:
+        return False
+
+
+class PooledConnection:
+    """Proxy koneksi: close() mengembalikan koneksi ke pool, bukan menutupnya."""
+
+    def __init__(self, pool: "ConnectionPool", raw: Any):
+        self._pool = pool
+        self._raw = raw
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._raw, name)
+
+    def close(self, broken: bool = False) -> None:
+        if self._raw is not None:
+            self._pool.release(self._raw, broken=broken)
+            self._raw = None
+
+
+class ConnectionPool:
+    """Pool koneksi thread-safe dengan ukuran tetap dan health check saat checkout.
+
+    `factory` membuat koneksi baru (MySQL di produksi, SQLite di load test);
+    `health_check` dipanggil untuk koneksi yang idle lebih lama dari
+    `check_interval` detik, dan koneksi yang gagal dibuang lalu diganti.
+    """
+
+    def __init__(self, factory: Callable[[], Any], size: int = DB_POOL_SIZE, timeout: float = DB_POOL_TIMEOUT,
+                 health_check: Optional[Callable[[Any], bool]] = None,
+                 check_interval: float = DB_HEALTHCHECK_INTERVAL):
+        self.factory = factory
+        self.size = size
+        self.timeout = timeout
+        self.health_check = health_check
+        self.check_interval = check_interval
+
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._open = 0
+        self.stats = {"created": 0, "reused": 0, "discarded": 0, "waits": 0, "timeouts": 0}
+
+    def _create(self) -> Any:
+        try:
+            conn = self.factory()
+        except Exception as e:
+            with self._lock:
+                self._open -= 1
+            raise DatabaseUnavailable(f"Cannot connect: {e}") from e
+        with self._lock:
+            self.stats["created"] += 1
+        return conn
+
+    def _discard(self, conn: Any) -> None:
+        with self._lock:
+            self._open -= 1
+            self.stats["discarded"] += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def acquire(self) -> Any:
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                conn, idle_since = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_create = self._open < self.size
+                    if can_create:
+                        self._open += 1
+                if can_create:
+                    return self._create()
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    with self._lock:
+                        self.stats["timeouts"] += 1
+                    raise DatabaseUnavailable(f"No free connection after {self.timeout}s (pool size {self.size})")
+                with self._lock:
+                    self.stats["waits"] += 1
+                try:
+                    conn, idle_since = self._idle.get(timeout=remaining)
+                except queue.Empty:
+                    continue
+
+            if self.health_check and time.monotonic() - idle_since > self.check_interval \
+                    and not self.health_check(conn):
+                self._discard(conn)
+                continue
+            with self._lock:
+                self.stats["reused"] += 1
+            return conn
+
+    def release(self, conn: Any, broken: bool = False) -> None:
+        if not broken:
+            try:
+                conn.rollback()  # jangan wariskan transaksi yang belum selesai
+            except Exception:
+                broken = True
+        if broken:
+            self._discard(conn)
+        else:
+            self._idle.put((conn, time.monotonic()))
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close_all(self) -> None:
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(conn)
+
+    @property
+    def in_use(self) -> int:
+        return self._open - self._idle.qsize()
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Pool MySQL bersama, dibuat saat pertama dipakai"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(connect_mysql, health_check=mysql_is_alive)
+                logger.info(f"MySQL pool ready (size {DB_POOL_SIZE})")
+    return _pool
+
+
+@contextmanager
+def db_cursor(dictionary: bool = False, commit: bool = False) -> Iterator[Any]:
+    """Checkout koneksi dari pool dan yield cursor; commit otomatis jika commit=True.
+
+        with db_cursor(dictionary=True) as cursor:
+            cursor.execute("SELECT ...", params)
+    """
+    with get_pool().connection() as conn:
+        cursor = conn.cursor(dictionary=dictionary)
+        try:
+            yield cursor
+            if commit:
+                conn.commit()
+        finally:
+            cursor.close()
+
+
+def get_conn() -> Optional[PooledConnection]:
+    """Kompatibilitas lama: koneksi dari pool, conn.close() mengembalikannya ke pool"""
+    try:
+        pool = get_pool()
+        return PooledConnection(pool, pool.acquire())
+    except DatabaseUnavailable as err:
+        logger.error(f"Cannot connect: {err}")
+        return None
+
+
+def pool_stats() -> Dict[str, Any]:
+    pool = get_pool()
+    return dict(pool.stats, size=pool.size, open=pool._open, in_use=pool.in_use)
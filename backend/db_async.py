@@ -0,0 +1,146 @@
+# db_async.py (Akses MySQL untuk mode async: aiomysql jika terpasang, selain itu pool sync di thread)
+import os
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence
+
+from db import DB_POOL_SIZE, DB_POOL_TIMEOUT, DatabaseUnavailable, db_cursor
+
+try:
+    import aiomysql
+except ImportError:  # opsional: tanpa aiomysql query dijalankan lewat pool sync di thread terpisah
+    aiomysql = None
+
+logger = logging.getLogger("HybridAnalyzerV8")
+
+
+class AsyncDatabase:
+    """Query MySQL yang bisa di-await dari event loop.
+
+    Dengan aiomysql, koneksi berasal dari pool async berukuran `size`. Tanpa
+    aiomysql (atau `use_aiomysql=False`), setiap query memakai `cursor`
+    (default db.db_cursor) di executor berukuran sama dengan pool sync, jadi
+    event loop tidak pernah memblok menunggu MySQL.
+    """
+
+    def __init__(self, size: int = DB_POOL_SIZE, timeout: float = DB_POOL_TIMEOUT,
+                 cursor: Callable[..., Any] = db_cursor, use_aiomysql: Optional[bool] = None):
+        self.size = size
+        self.timeout = timeout
+        self.cursor_factory = cursor
+        self.use_aiomysql = aiomysql is not None if use_aiomysql is None else use_aiomysql
+        self._pool = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def driver(self) -> str:
+        return "aiomysql" if self.use_aiomysql else "thread"
+
+    async def start(self) -> None:
+        if not self.use_aiomysql:
+            self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="db")
+            return
+        try:
+            self._pool = await asyncio.wait_for(aiomysql.create_pool(
+                host=os.getenv("DB_HOST"),
+                port=int(os.getenv("DB_PORT") or 3306),
+                user=os.getenv("DB_USER"),
+                password=os.getenv("DB_PASSWORD"),
+                db=os.getenv("DB_NAME"),
+                minsize=1,
+                maxsize=self.size,
+                pool_recycle=3600,
+            ), self.timeout)
+            logger.info(f"aiomysql pool ready (size {self.size})")
+        except Exception as e:
+            # Pool dibuat ulang saat query berikutnya
+            logger.error(f"aiomysql pool unavailable: {e}")
+
+    async def close(self) -> None:
+        if self._pool is not None:
+            self._pool.close()
+            await self._pool.wait_closed()
+            self._pool = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    @asynccontextmanager
+    async def _connection(self) -> AsyncIterator[Any]:
+        if self._pool is None:
+            await self.start()
+            if self._pool is None:
+                raise DatabaseUnavailable("Cannot connect: aiomysql pool not available")
+        try:
+            conn = await asyncio.wait_for(self._pool.acquire(), self.timeout)
+        except asyncio.TimeoutError as e:
+            raise DatabaseUnavailable(f"No free connection after {self.timeout}s (pool size {self.size})") from e
+        except Exception as e:
+            raise DatabaseUnavailable(f"Cannot connect: {e}") from e
+        try:
+            yield conn
+        finally:
+            self._pool.release(conn)
+
+    async def _run(self, fn: Callable[[Any], Any], dictionary: bool = False, commit: bool = False) -> Any:
+        """Jalankan fn(cursor) dalam satu koneksi; commit otomatis jika commit=True"""
+        if not self.use_aiomysql:
+            def work():
+                with self.cursor_factory(dictionary=dictionary, commit=commit) as cursor:
+                    return fn(cursor)
+            if self._executor is None:
+                await self.start()
+            return await asyncio.get_running_loop().run_in_executor(self._executor, work)
+
+        async with self._connection() as conn:
+            async with conn.cursor(aiomysql.DictCursor if dictionary else aiomysql.Cursor) as cursor:
+                try:
+                    result = await fn(cursor)
+                    if commit:
+                        await conn.commit()
+                    return result
+                except BaseException:
+                    await conn.rollback()
+                    raise
+
+    async def fetchall(self, sql: str, params: Sequence[Any] = (), dictionary: bool = False) -> List[Any]:
+        if self.use_aiomysql:
+            async def fn(cursor):
+                await cursor.execute(sql, params)
+                return list(await cursor.fetchall())
+        else:
+            def fn(cursor):
+                cursor.execute(sql, params)
+                return cursor.fetchall()
+        return await self._run(fn, dictionary=dictionary)
+
+    async def fetchone(self, sql: str, params: Sequence[Any] = (), dictionary: bool = False) -> Optional[Any]:
+        if self.use_aiomysql:
+            async def fn(cursor):
+                await cursor.execute(sql, params)
+                return await cursor.fetchone()
+        else:
+            def fn(cursor):
+                cursor.execute(sql, params)
+                return cursor.fetchone()
+        return await self._run(fn, dictionary=dictionary)
+
+    async def execute(self, sql: str, params: Sequence[Any] = ()) -> int:
+        """Jalankan satu statement tulis lalu commit; return rowcount"""
+        if self.use_aiomysql:
+            async def fn(cursor):
+                await cursor.execute(sql, params)
+                return cursor.rowcount
+        else:
+            def fn(cursor):
+                cursor.execute(sql, params)
+                return cursor.rowcount
+        return await self._run(fn, commit=True)
+
+    def stats(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"driver": self.driver, "size": self.size}
+        if self._pool is not None:
+            out.update(open=self._pool.size, free=self._pool.freesize)
+        return out
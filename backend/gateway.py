@@ -0,0 +1,541 @@
+# gateway.py (Akses REST exchange terpusat: budget weight, lane prioritas, retry, circuit breaker)
+#
+# Semua panggilan REST ke Binance lewat ExchangeGateway.call(). Setiap panggilan
+# mengambil weight endpoint-nya dari satu bucket bersama (limit IP Binance Futures
+# 2400/menit). Lane "interactive" (/analyze) selalu dilayani lebih dulu; lane
+# "background" (scan, backfill) tidak boleh memakai cadangan milik interactive.
+# Error ccxt diterjemahkan ke GatewayError bertipe supaya pemanggil bisa
+# membedakan rate limit, exchange down, dan request yang memang salah.
+import os
+import time
+import asyncio
+import random
+import logging
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional
+
+import ccxt
+
+from metrics import REGISTRY
+
+logger = logging.getLogger("HybridAnalyzerV8")
+
+EXCHANGE_WEIGHT_PER_MIN = int(os.getenv("EXCHANGE_WEIGHT_PER_MIN", 2400))
+EXCHANGE_INTERACTIVE_RESERVE = float(os.getenv("EXCHANGE_INTERACTIVE_RESERVE", 0.25))  # Porsi bucket khusus interactive
+EXCHANGE_MAX_RETRIES = int(os.getenv("EXCHANGE_MAX_RETRIES", 3))
+EXCHANGE_BREAKER_THRESHOLD = int(os.getenv("EXCHANGE_BREAKER_THRESHOLD", 5))     # Kegagalan beruntun sebelum open
+EXCHANGE_BREAKER_COOLDOWN = float(os.getenv("EXCHANGE_BREAKER_COOLDOWN", 30))    # Detik sebelum half-open
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+# Lane aktif untuk thread/context saat ini; fetch_concurrently menyalin context ke worker
+current_lane: ContextVar[str] = ContextVar("exchange_lane", default=INTERACTIVE)
+
+# Metrik Prometheus (lihat metrics.py); stats/snapshot() tetap untuk /health
+EXCHANGE_REQUEST_SECONDS = REGISTRY.histogram(
+    "exchange_request_seconds", "Latency satu percobaan panggilan exchange", ("endpoint", "outcome"))
+EXCHANGE_BUDGET_WAIT_SECONDS = REGISTRY.histogram(
+    "exchange_budget_wait_seconds", "Lama menunggu budget weight sebelum panggilan exchange", ("lane",))
+EXCHANGE_ERRORS = REGISTRY.counter(
+    "exchange_errors_total", "Error exchange per endpoint dan tipe GatewayError", ("endpoint", "error"))
+EXCHANGE_WEIGHT_USED = REGISTRY.counter(
+    "exchange_weight_total", "Request weight yang dikirim ke exchange", ("endpoint", "lane"))
+
+
+@contextmanager
+def lane(name: str):
+    """Semua panggilan gateway di dalam blok memakai lane `name`"""
+    token = current_lane.set(name)
+    try:
+        yield
+    finally:
+        current_lane.reset(token)
+
+
+def in_lane(name: str, fn: Callable) -> Callable:
+    """Bungkus `fn` supaya selalu berjalan di lane `name` (misal fetch untuk scanner)"""
+    def run(*args, **kwargs):
+        with lane(name):
+            return fn(*args, **kwargs)
+    return run
+
+
+# ==============================================================
+# TYPED ERRORS
+# ==============================================================
+
+class GatewayError(Exception):
+    """Kegagalan panggilan exchange; `status` dipakai sebagai HTTP status oleh Flask"""
+    status = 502
+
+    def __init__(self, message: str, endpoint: Optional[str] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+    def to_dict(self) -> Dict[str, Any]:
+        out = {"error": str(self), "type": type(self).__name__}
+        if self.retry_after is not None:
+            out["retry_after"] = round(self.retry_after, 1)
+        return out
+
+
+class RateLimited(GatewayError):
+    """HTTP 429 dari Binance, atau budget weight lokal tidak cukup dalam batas tunggu"""
+    status = 429
+
+
+class Banned(GatewayError):
+    """HTTP 418: IP diblokir sementara karena tetap mengirim request setelah 429"""
+    status = 503
+
+
+class CircuitOpen(GatewayError):
+    """Circuit breaker terbuka; request ditolak tanpa menyentuh exchange"""
+    status = 503
+
+
+class ExchangeUnavailable(GatewayError):
+    """Timeout / network error / maintenance yang masih gagal setelah retry"""
+    status = 503
+
+
+class BadRequest(GatewayError):
+    """Request ditolak exchange (symbol tidak ada, parameter salah); tidak di-retry"""
+    status = 400
+
+
+def translate(e: Exception, endpoint: str, retry_after: Optional[float] = None) -> GatewayError:
+    """ccxt exception -> GatewayError"""
+    if isinstance(e, GatewayError):
+        return e
+    if isinstance(e, ccxt.DDoSProtection):        # 418
+        return Banned(f"{endpoint}: IP banned by exchange ({e})", endpoint, retry_after)
+    if isinstance(e, ccxt.RateLimitExceeded):     # 429
+        return RateLimited(f"{endpoint}: rate limited by exchange ({e})", endpoint, retry_after)
+    if isinstance(e, (ccxt.NetworkError, TimeoutError, ConnectionError)):
+        return ExchangeUnavailable(f"{endpoint}: {type(e).__name__}: {e}", endpoint, retry_after)
+    if isinstance(e, (ccxt.BadRequest, ccxt.BadSymbol)):
+        return BadRequest(f"{endpoint}: {e}", endpoint)
+    return GatewayError(f"{endpoint}: {type(e).__name__}: {e}", endpoint)
+
+
+def is_retryable(e: GatewayError) -> bool:
+    # 418 tidak di-retry: request tambahan hanya memperpanjang ban
+    return isinstance(e, (RateLimited, ExchangeUnavailable))
+
+
+# ==============================================================
+# ENDPOINT WEIGHTS
+# ==============================================================
+
+def kline_weight(limit: Optional[int]) -> int:
+    """Weight endpoint /fapi/v1/klines berdasarkan limit (default Binance 500)"""
+    limit = limit or 500
+    if limit < 100: return 1
+    if limit < 500: return 2
+    if limit <= 1000: return 5
+    return 10
+
+
+def _params(args, kwargs) -> Dict[str, Any]:
+    return (args[0] if args else kwargs.get("params")) or {}
+
+
+# method ccxt -> fungsi (args, kwargs) -> weight, sesuai dokumentasi Binance USDⓈ-M Futures
+ENDPOINT_WEIGHTS: Dict[str, Callable[[tuple, Dict[str, Any]], int]] = {
+    "fetch_ohlcv": lambda args, kwargs: kline_weight(kwargs.get("limit", args[3] if len(args) > 3 else None)),
+    "fapiPublicGetPremiumIndex": lambda args, kwargs: 1 if _params(args, kwargs).get("symbol") else 10,
+    "fapiDataGetGlobalLongShortAccountRatio": lambda args, kwargs: 1,
+    "fapiPublicGetExchangeInfo": lambda args, kwargs: 1,
+    "load_markets": lambda args, kwargs: 1,
+}
+
+
+def endpoint_weight(method: str, args: tuple = (), kwargs: Optional[Dict[str, Any]] = None) -> int:
+    fn = ENDPOINT_WEIGHTS.get(method)
+    return fn(args, kwargs or {}) if fn else 1
+
+
+# ==============================================================
+# PRIORITY TOKEN BUCKET
+# ==============================================================
+
+class PriorityTokenBucket:
+    """Token bucket weight per `period` detik dengan dua lane.
+
+    Interactive boleh memakai seluruh bucket; background hanya boleh mengambil
+    token selama sisa setelahnya >= `reserve` bagian kapasitas, dan selalu
+    mengalah jika ada request interactive yang sedang menunggu.
+    """
+
+    def __init__(self, capacity: int = EXCHANGE_WEIGHT_PER_MIN, period: float = 60.0,
+                 reserve: float = EXCHANGE_INTERACTIVE_RESERVE, clock: Callable[[], float] = time.monotonic):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.reserve = capacity * reserve
+        self.clock = clock
+        self.tokens = float(capacity)
+        self.updated = clock()
+        self._cond = threading.Condition()
+        self._waiting = {INTERACTIVE: 0, BACKGROUND: 0}
+        self.stats = {"granted": 0, "waited": 0, "rejected": 0, "wait_seconds": 0.0}
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _needed(self, weight: int, lane_name: str) -> float:
+        """Token yang masih kurang agar request ini boleh lewat sekarang (0 = boleh)"""
+        if lane_name == INTERACTIVE:
+            return max(0.0, weight - self.tokens)
+        if self._waiting[INTERACTIVE]:
+            return max(1.0, weight + self.reserve - self.tokens)
+        return max(0.0, weight + self.reserve - self.tokens)
+
+    def _take(self, weight: int, lane_name: str, started: float, max_wait: Optional[float]) -> float:
+        """Dipanggil dengan lock dipegang: ambil token (return 0) atau return lama tunggu berikutnya"""
+        self._refill()
+        needed = self._needed(weight, lane_name)
+        if not needed:
+            self.tokens -= weight
+            waited = self.clock() - started
+            self.stats["granted"] += 1
+            if waited > 0:
+                self.stats["waited"] += 1
+                self.stats["wait_seconds"] += waited
+            return 0.0
+        delay = needed / self.rate
+        if max_wait is not None and self.clock() - started + delay > max_wait:
+            self.stats["rejected"] += 1
+            raise RateLimited(f"local weight budget exhausted ({lane_name} lane)", retry_after=delay)
+        return delay
+
+    def acquire(self, weight: int, lane_name: str = INTERACTIVE, max_wait: Optional[float] = None) -> float:
+        """Blok sampai `weight` tersedia untuk lane; return lama menunggu.
+        RateLimited jika perkiraan tunggu melewati `max_wait`."""
+        weight = min(weight, self.capacity)
+        started = self.clock()
+        with self._cond:
+            self._waiting[lane_name] += 1
+            try:
+                while True:
+                    delay = self._take(weight, lane_name, started, max_wait)
+                    if not delay:
+                        return self.clock() - started
+                    self._cond.wait(delay)
+            finally:
+                self._waiting[lane_name] -= 1
+                self._cond.notify_all()
+
+    async def acquire_async(self, weight: int, lane_name: str = INTERACTIVE, max_wait: Optional[float] = None) -> float:
+        """Seperti acquire(), tetapi menunggu dengan asyncio.sleep (tidak memblok event loop)"""
+        weight = min(weight, self.capacity)
+        started = self.clock()
+        with self._cond:
+            self._waiting[lane_name] += 1
+        try:
+            while True:
+                with self._cond:
+                    delay = self._take(weight, lane_name, started, max_wait)
+                if not delay:
+                    return self.clock() - started
+                await asyncio.sleep(delay)
+        finally:
+            with self._cond:
+                self._waiting[lane_name] -= 1
+                self._cond.notify_all()
+
+    def observe_used(self, used: int) -> None:
+        """Sinkronkan dengan header X-MBX-USED-WEIGHT-1M: proses lain di IP yang sama ikut memakai budget"""
+        with self._cond:
+            self._refill()
+            self.tokens = min(self.tokens, float(self.capacity - used))
+
+    def drain(self, seconds: float) -> None:
+        """Setelah 429/418: kosongkan bucket selama `seconds` supaya semua lane berhenti"""
+        with self._cond:
+            self._refill()
+            self.tokens = min(self.tokens, -seconds * self.rate)
+
+    def available(self) -> float:
+        with self._cond:
+            self._refill()
+            return self.tokens
+
+
+class _SharedCounts:
+    """Counter per lane di shared memory (pengganti dict `_waiting`)"""
+
+    def __init__(self, array: Any, slots: Dict[str, int]):
+        self._array = array
+        self._slots = slots
+
+    def __getitem__(self, lane_name: str) -> float:
+        return self._array[self._slots[lane_name]]
+
+    def __setitem__(self, lane_name: str, value: float) -> None:
+        self._array[self._slots[lane_name]] = value
+
+
+class SharedTokenBucket(PriorityTokenBucket):
+    """PriorityTokenBucket untuk beberapa proses worker di IP yang sama: token, waktu refill
+    dan jumlah penunggu per lane ada di shared memory, dijaga satu lock antar proses.
+
+    Harus dibuat sebelum fork (serve.py). Penunggu di proses lain tidak di-notify, tetapi
+    sudah bangun sendiri setelah perkiraan waktu tunggunya; stats tetap per proses.
+    """
+
+    def __init__(self, capacity: int = EXCHANGE_WEIGHT_PER_MIN, period: float = 60.0,
+                 reserve: float = EXCHANGE_INTERACTIVE_RESERVE, clock: Callable[[], float] = time.monotonic,
+                 context: Any = None):
+        context = context or multiprocessing.get_context("fork")
+        self._shared = context.RawArray("d", 4)   # tokens, updated, waiting interactive, waiting background
+        super().__init__(capacity, period, reserve, clock)
+        self._cond = threading.Condition(context.Lock())
+        self._waiting = _SharedCounts(self._shared, {INTERACTIVE: 2, BACKGROUND: 3})
+
+    @property
+    def tokens(self) -> float:
+        return self._shared[0]
+
+    @tokens.setter
+    def tokens(self, value: float) -> None:
+        self._shared[0] = value
+
+    @property
+    def updated(self) -> float:
+        return self._shared[1]
+
+    @updated.setter
+    def updated(self, value: float) -> None:
+        self._shared[1] = value
+
+
+# ==============================================================
+# CIRCUIT BREAKER
+# ==============================================================
+
+class CircuitBreaker:
+    """closed -> open setelah `threshold` kegagalan beruntun; setelah `cooldown` detik
+    satu request percobaan (half-open) menentukan kembali closed atau open lagi."""
+
+    def __init__(self, threshold: int = EXCHANGE_BREAKER_THRESHOLD, cooldown: float = EXCHANGE_BREAKER_COOLDOWN,
+                 clock: Callable[[], float] = time.monotonic):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.open_for = cooldown
+        self._trial = False
+        self._lock = threading.Lock()
+        self.stats = {"opened": 0, "rejected": 0}
+
+    def before(self, endpoint: str) -> None:
+        with self._lock:
+            if self.state == "open":
+                remaining = self.opened_at + self.open_for - self.clock()
+                if remaining > 0:
+                    self.stats["rejected"] += 1
+                    raise CircuitOpen(f"{endpoint}: exchange circuit open", endpoint, retry_after=remaining)
+                self.state = "half_open"
+                self._trial = False
+            if self.state == "half_open":
+                if self._trial:
+                    self.stats["rejected"] += 1
+                    raise CircuitOpen(f"{endpoint}: exchange circuit half-open, trial in flight", endpoint)
+                self._trial = True
+
+    def success(self) -> None:
+        with self._lock:
+            if self.state != "closed":
+                logger.info("Exchange circuit closed")
+            self.state = "closed"
+            self.failures = 0
+            self._trial = False
+
+    def failure(self, open_for: Optional[float] = None) -> None:
+        """Catat kegagalan; `open_for` langsung membuka circuit (misal Retry-After dari 418)"""
+        with self._lock:
+            self.failures += 1
+            self._trial = False
+            if open_for is not None or self.state == "half_open" or self.failures >= self.threshold:
+                if self.state != "open":
+                    self.stats["opened"] += 1
+                    logger.warning(f"Exchange circuit open after {self.failures} failures")
+                self.state = "open"
+                self.opened_at = self.clock()
+                self.open_for = max(open_for or 0.0, self.cooldown)
+
+    def release(self) -> None:
+        """Request selesai tanpa vonis (misal BadRequest): lepas slot percobaan half-open"""
+        with self._lock:
+            self._trial = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.stats, state=self.state, failures=self.failures)
+
+
+# ==============================================================
+# GATEWAY
+# ==============================================================
+
+class ExchangeGateway:
+    """Pintu tunggal ke exchange ccxt.
+
+    `get_exchange` mengembalikan instance ccxt dan dibaca ulang setiap panggilan,
+    jadi instance bisa diganti saat runtime. Backoff retry memakai full jitter
+    (sleep acak di [0, min(max_delay, base * 2^n)]); setelah 429/418 bucket
+    dikosongkan selama Retry-After sehingga semua lane ikut berhenti.
+    """
+
+    def __init__(self, get_exchange: Callable[[], Any], limiter: Optional[PriorityTokenBucket] = None,
+                 breaker: Optional[CircuitBreaker] = None, max_retries: int = EXCHANGE_MAX_RETRIES,
+                 base_delay: float = 0.25, max_delay: float = 8.0,
+                 max_wait: Optional[Dict[str, float]] = None,
+                 sleep: Callable[[float], None] = time.sleep, rng: Optional[random.Random] = None):
+        self.get_exchange = get_exchange
+        self.limiter = limiter or PriorityTokenBucket()
+        self.breaker = breaker or CircuitBreaker()
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_wait = max_wait or {INTERACTIVE: 5.0, BACKGROUND: 120.0}
+        self.sleep = sleep
+        self.rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "retries": 0, "errors": 0, "weight": 0}
+        self.endpoints: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, endpoint: str, key: str, n: int = 1) -> None:
+        with self._lock:
+            self.stats[key] += n
+            per = self.endpoints.setdefault(endpoint, {"calls": 0, "retries": 0, "errors": 0, "weight": 0})
+            per[key] += n
+
+    def _headers(self, exchange: Any) -> Dict[str, str]:
+        headers = getattr(exchange, "last_response_headers", None) or {}
+        return {str(k).lower(): v for k, v in headers.items()}
+
+    def _retry_after(self, headers: Dict[str, str]) -> Optional[float]:
+        try:
+            return float(headers["retry-after"])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def _backoff(self, attempt: int) -> float:
+        return self.rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _sent(self, method: str, weight: int, lane_name: str, waited: float) -> None:
+        self._count(method, "calls")
+        self._count(method, "weight", weight)
+        EXCHANGE_WEIGHT_USED.inc(weight, endpoint=method, lane=lane_name)
+        EXCHANGE_BUDGET_WAIT_SECONDS.observe(waited, lane=lane_name)
+
+    def _failed(self, method: str, exchange: Any, e: Exception, attempt: int) -> float:
+        """Terjemahkan + catat kegagalan; lempar GatewayError jika tidak di-retry, else return backoff"""
+        error = translate(e, method, self._retry_after(self._headers(exchange)))
+        self._count(method, "errors")
+        EXCHANGE_ERRORS.inc(endpoint=method, error=type(error).__name__)
+        if isinstance(error, (RateLimited, Banned)):
+            # Budget kita tidak sinkron dengan server: hentikan semua lane sampai Retry-After
+            pause = error.retry_after or (60.0 if isinstance(error, Banned) else 1.0)
+            self.limiter.drain(pause)
+        if isinstance(error, Banned):
+            self.breaker.failure(open_for=pause)
+        elif isinstance(error, ExchangeUnavailable):
+            self.breaker.failure()
+        else:
+            self.breaker.release()   # 429 / BadRequest: exchange hidup, bukan alasan membuka circuit
+        if not is_retryable(error) or attempt >= self.max_retries:
+            logger.warning(f"Exchange {method} failed ({type(error).__name__}) after {attempt + 1} attempts")
+            raise error from e
+        delay = self._backoff(attempt)
+        self._count(method, "retries")
+        logger.info(f"Exchange {method}: {type(error).__name__}, retry {attempt + 1} in {delay:.2f}s")
+        return delay
+
+    def _succeeded(self, exchange: Any) -> None:
+        self.breaker.success()
+        used = self._headers(exchange).get("x-mbx-used-weight-1m")
+        if used is not None:
+            try:
+                self.limiter.observe_used(int(used))
+            except ValueError:
+                pass
+
+    def call(self, method: str, *args, weight: Optional[int] = None, **kwargs) -> Any:
+        """exchange.<method>(*args, **kwargs) dengan budget weight, retry dan circuit breaker.
+        Selalu melempar GatewayError (bukan exception ccxt) jika gagal."""
+        lane_name = current_lane.get()
+        weight = endpoint_weight(method, args, kwargs) if weight is None else weight
+        attempt = 0
+        while True:
+            self.breaker.before(method)
+            try:
+                waited = self.limiter.acquire(weight, lane_name, self.max_wait.get(lane_name))
+            except RateLimited:
+                self.breaker.release()
+                raise
+            exchange = self.get_exchange()
+            self._sent(method, weight, lane_name, waited)
+            started = time.perf_counter()
+            try:
+                result = getattr(exchange, method)(*args, **kwargs)
+            except Exception as e:
+                EXCHANGE_REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=method, outcome="error")
+                self.sleep(self._failed(method, exchange, e, attempt))
+                attempt += 1
+                continue
+            EXCHANGE_REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=method, outcome="ok")
+            self._succeeded(exchange)
+            return result
+
+    async def call_async(self, method: str, *args, weight: Optional[int] = None, **kwargs) -> Any:
+        """call() untuk exchange ccxt.async_support: method di-await, tunggu budget dan
+        backoff memakai asyncio.sleep. Budget dan breaker sama dengan jalur sync jika
+        gateway dibuat dengan limiter/breaker yang sama."""
+        lane_name = current_lane.get()
+        weight = endpoint_weight(method, args, kwargs) if weight is None else weight
+        attempt = 0
+        while True:
+            self.breaker.before(method)
+            try:
+                waited = await self.limiter.acquire_async(weight, lane_name, self.max_wait.get(lane_name))
+            except RateLimited:
+                self.breaker.release()
+                raise
+            exchange = self.get_exchange()
+            self._sent(method, weight, lane_name, waited)
+            started = time.perf_counter()
+            try:
+                result = await getattr(exchange, method)(*args, **kwargs)
+            except Exception as e:
+                EXCHANGE_REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=method, outcome="error")
+                await asyncio.sleep(self._failed(method, exchange, e, attempt))
+                attempt += 1
+                continue
+            EXCHANGE_REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=method, outcome="ok")
+            self._succeeded(exchange)
+            return result
+
+    def fetch_ohlcv(self, symbol: str, timeframe: str, since: Optional[int] = None,
+                    limit: Optional[int] = None) -> Any:
+        return self.call("fetch_ohlcv", symbol, timeframe, since=since, limit=limit)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Metrik untuk /health"""
+        with self._lock:
+            stats = dict(self.stats)
+            endpoints = {k: dict(v) for k, v in self.endpoints.items()}
+        return dict(stats, endpoints=endpoints, breaker=self.breaker.snapshot(),
+                    limiter=dict(self.limiter.stats, available=round(self.limiter.available(), 1),
+                                 capacity=self.limiter.capacity))
@@ -0,0 +1,175 @@
+# history.py (/history dengan paginasi keyset + /stats dari tabel ringkasan analysis_stats)
+#
+# Dipakai bersama oleh hybrid_analyzer_nofilter.py (Flask) dan async_app.py (aiohttp):
+# modul ini hanya menyusun SQL + parameter dan membentuk response, eksekusi query
+# tetap di driver masing-masing.
+#
+#   GET /history?limit=20&coin=BTC&recommendation=long&status=TP&cursor=...
+#
+# Urutan created_at DESC, id DESC; cursor = (created_at, id) baris terakhir halaman
+# sebelumnya, jadi halaman ke-N sama murahnya dengan halaman pertama (tanpa OFFSET).
+# Body tetap list baris (kompatibel dengan frontend lama); cursor halaman berikutnya
+# ada di header X-Next-Cursor (tidak ada = halaman terakhir).
+import os
+import base64
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from outcomes import OUTCOME_STATUSES
+
+HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", 20))
+HISTORY_MAX_PAGE_SIZE = int(os.getenv("HISTORY_MAX_PAGE_SIZE", 100))
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Baris history sudah memuat semua kolom detail, jadi klik "Lihat Detail" tidak perlu
+# round-trip ke /history/<id> (route itu tetap ada untuk link langsung)
+HISTORY_PAGE_SQL = """
+    SELECT
+        id,
+        coin_name,
+        entry_price,
+        market_structure_1h,
+        market_structure_4h,
+        rsi_1h,
+        macd_1h,
+        funding_rate,
+        long_short_ratio,
+        volatility_prediction,
+        recommendation,
+        entry,
+        sl,
+        tp1,
+        rrr,
+        position_size_units,
+        ob_type,
+        status_entry,
+        created_at
+    FROM analyses
+    WHERE user_id = %s{filters}
+    ORDER BY created_at DESC, id DESC
+    LIMIT %s
+"""
+
+HISTORY_COIN_FILTER = " AND coin_name = %s"
+HISTORY_STATUS_FILTER = " AND status_entry = %s"
+HISTORY_RECOMMENDATION_FILTER = " AND recommendation LIKE %s ESCAPE '!'"
+# created_at <= cursor membuat batas range index (user_id, [..,] created_at); OR hanya memotong
+# baris dengan created_at sama (id ikut di setiap index sekunder InnoDB)
+HISTORY_CURSOR_FILTER = " AND created_at <= %s AND (created_at < %s OR id < %s)"
+
+# analysis_stats diisi trigger MySQL (migrations/0004) setiap INSERT/UPDATE/DELETE analyses:
+# satu baris per (user, koin), jadi /stats membaca puluhan baris, bukan 100k analisa
+STATS_SQL = """
+    SELECT
+        coin_name,
+        total,
+        with_levels,
+        no_entry,
+        filled,
+        expired,
+        tp,
+        sl,
+        rrr_sum,
+        rrr_count,
+        last_at
+    FROM analysis_stats
+    WHERE user_id = %s
+    ORDER BY total DESC, coin_name
+"""
+
+STATS_COUNTERS = ("total", "with_levels", "no_entry", "filled", "expired", "tp", "sl", "rrr_count")
+
+
+class HistoryQueryError(ValueError):
+    """Parameter /history tidak valid (-> 400)"""
+
+
+def encode_cursor(created_at: datetime, record_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{record_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, record_id = raw.split("|")
+        return datetime.fromisoformat(created_at), int(record_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HistoryQueryError("Invalid cursor") from e
+
+
+def _like_prefix(text: str) -> str:
+    """'LONG' -> 'LONG%' (prefix match; % dan _ dari input di-escape)"""
+    return text.replace("!", "!!").replace("%", "!%").replace("_", "!_") + "%"
+
+
+def history_query(user_id: Any, args: Mapping[str, str]) -> Tuple[str, Tuple[Any, ...], int]:
+    """(sql, params, limit) untuk satu halaman; query mengambil limit + 1 baris untuk tahu
+    apakah masih ada halaman berikutnya. HistoryQueryError jika parameter tidak valid."""
+    try:
+        limit = int(args.get("limit") or HISTORY_PAGE_SIZE)
+    except ValueError:
+        raise HistoryQueryError("limit must be an integer")
+    if not 1 <= limit <= HISTORY_MAX_PAGE_SIZE:
+        raise HistoryQueryError(f"limit must be between 1 and {HISTORY_MAX_PAGE_SIZE}")
+
+    filters, params = [], [user_id]
+    coin = (args.get("coin") or "").upper().strip()
+    if coin:
+        filters.append(HISTORY_COIN_FILTER)
+        params.append(coin.replace("/USDT", "").replace("USDT", "") or coin)
+    status = args.get("status")
+    if status:
+        if status not in OUTCOME_STATUSES:
+            raise HistoryQueryError("Invalid status")
+        filters.append(HISTORY_STATUS_FILTER)
+        params.append(status)
+    recommendation = (args.get("recommendation") or "").strip()
+    if recommendation:
+        filters.append(HISTORY_RECOMMENDATION_FILTER)
+        params.append(_like_prefix(recommendation.upper()))
+    cursor = args.get("cursor")
+    if cursor:
+        created_at, record_id = decode_cursor(cursor)
+        filters.append(HISTORY_CURSOR_FILTER)
+        params.extend([created_at, created_at, record_id])
+    params.append(limit + 1)
+    return HISTORY_PAGE_SQL.format(filters="".join(filters)), tuple(params), limit
+
+
+def history_page(rows: Sequence[Dict[str, Any]], limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Potong baris ke `limit` dan susun cursor halaman berikutnya (None jika habis)"""
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+
+
+def _rates(row: Dict[str, Any]) -> Dict[str, Any]:
+    closed = row["tp"] + row["sl"]
+    row["win_rate"] = round(row["tp"] / closed * 100, 2) if closed else None
+    row["avg_rrr"] = round(row["rrr_sum"] / row["rrr_count"], 2) if row["rrr_count"] else None
+    return row
+
+
+def summarize_stats(rows: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """Response /stats: total user (jumlah baris per koin) + rincian per koin.
+
+    win_rate = TP / (TP + SL) dalam persen (analisa yang belum selesai tidak dihitung),
+    avg_rrr = rata-rata RRR analisa yang punya RRR."""
+    user: Dict[str, Any] = dict({k: 0 for k in STATS_COUNTERS}, rrr_sum=0.0, last_at=None)
+    coins = []
+    for row in rows:
+        coin = dict({k: int(row[k] or 0) for k in STATS_COUNTERS}, coin=row["coin_name"],
+                    rrr_sum=float(row["rrr_sum"] or 0), last_at=row["last_at"])
+        for k in STATS_COUNTERS + ("rrr_sum",):
+            user[k] += coin[k]
+        if coin["last_at"] is not None and (user["last_at"] is None or coin["last_at"] > user["last_at"]):
+            user["last_at"] = coin["last_at"]
+        coins.append(coin)
+    for row in coins + [user]:
+        _rates(row)
+        del row["rrr_sum"]
+    return {"user": user, "coins": coins}
@@ -1,15 +1,43 @@
 # hybrid_analyzer_nofilter.py (Final Core: SMC Simple + Liquidity Sweep Filter) 
 import os
+import json
 import time
 import math
 import logging
+import threading
+import contextvars
 from typing import List, Dict, Any, Optional, Tuple
 import ccxt
 import numpy as np
 from flask import Flask, request, jsonify, render_template
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from db import get_conn
-from flask import Flask, request, jsonify, render_template, redirect, url_for, session
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from db import db_cursor, pool_stats, DatabaseUnavailable
+from candle_cache import CandleCache, timeframe_ms
+from candle_store import CandleStore
+from candles import Candles
+from indicators import rsi_series, ema_series, macd_series, atr_series
+from stream import MarketStream, WebsocketSource
+from persistence import WriteBehindQueue
+from cooldown import CooldownMap, SharedCooldownMap
+from singleflight import SingleFlight
+from strategy import (StrategyConfig, calc_structure_and_bias, detect_valid_order_block, detect_liquidity_sweep,
+                      generate_trade_levels)
+from scanner import load_universe, scan, scan_summary
+from gateway import BACKGROUND, ExchangeGateway, ExchangeUnavailable, GatewayError, in_lane
+from signals import SIGNAL_HEARTBEAT_SECONDS, SignalHub, parse_coins
+from smc import SMCEngine
+from resample import ResampleCache, resample
+from history import (NEXT_CURSOR_HEADER, STATS_SQL, HistoryQueryError, history_page, history_query,
+                     summarize_stats)
+from snapshot import (SNAPSHOT_REDIS_URL, SNAPSHOT_SYMBOLS, SNAPSHOT_TRACK_BARS, Snapshot, SnapshotCache,
+                      SnapshotWarmer)
+from shared import connect_kv
+from scheduler import SCHEDULER_WORKERS, BarScheduler
+from outcomes import (OPEN_ANALYSES_SQL, OUTCOME_STATUSES, OUTCOME_TIMEFRAME, CandleHistory, OutcomeResolver,
+                      resolve_sql, utc_datetime, utc_epoch)
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY, profiles, stage, timed
+from flask import (Blueprint, Flask, request, jsonify, render_template, redirect, url_for, session, Response,
+                   stream_with_context, g)
 from werkzeug.security import generate_password_hash, check_password_hash
 from functools import wraps
 from datetime import datetime, timedelta
@@ -18,39 +46,89 @@ from flask_cors import CORS
 
 
 
-def save_to_db(output, recommendation, trade_levels):
-    conn = get_conn()
-    if not conn:
-        print("DB connection failed. Skip saving.")
-        return
-
-    cursor = conn.cursor()
-
-    sql = """
-        INSERT INTO analyses (
-            user_id,
-            coin_name,
-            entry_price,
-            market_structure_1h,
-            market_structure_4h,
-            rsi_1h,
-            macd_1h,
-            funding_rate,
-            long_short_ratio,
-            volatility_prediction,
-            recommendation,
-            entry,
-            sl,
-            tp1,
-            rrr,
-            position_size_units,
-            ob_type,
-            status_entry
-        ) VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
-    """
-
-    values = (
-        session["user_id"],
+ANALYSIS_INSERT_SQL = """
+    INSERT INTO analyses (
+        user_id,
+        coin_name,
+        entry_price,
+        market_structure_1h,
+        market_structure_4h,
+        rsi_1h,
+        macd_1h,
+        funding_rate,
+        long_short_ratio,
+        volatility_prediction,
+        recommendation,
+        entry,
+        sl,
+        tp1,
+        rrr,
+        position_size_units,
+        ob_type,
+        status_entry,
+        created_at
+    ) VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+"""
+
+
+RECENT_ANALYSES_SQL = """
+    SELECT user_id, coin_name, MAX(created_at)
+    FROM analyses
+    WHERE created_at >= %s
+    GROUP BY user_id, coin_name
+"""
+
+HISTORY_DETAIL_SQL = """
+    SELECT 
+        id,
+        coin_name,
+        entry_price,
+        market_structure_1h,
+        market_structure_4h,
+        rsi_1h,
+        macd_1h,
+        funding_rate,
+        long_short_ratio,
+        volatility_prediction,
+        recommendation,
+        entry,
+        sl,
+        tp1,
+        rrr,
+        position_size_units,
+        ob_type,
+        created_at
+    FROM analyses
+    WHERE id = %s AND user_id = %s 
+"""
+
+UPDATE_STATUS_SQL = """
+    UPDATE analyses 
+    SET status_entry = %s 
+    WHERE id = %s AND user_id = %s
+"""
+
+ENTRY_STATUSES = OUTCOME_STATUSES   # Override manual /update_status (resolver otomatis: outcomes.py)
+
+
+def mark_trade_levels(rows):
+    """Tandai baris history yang punya level trading lengkap (dipakai frontend)"""
+    for row in rows:
+        row ["has_trade_levels"] = (
+            row["entry"] is not None and
+            row["sl"] is not None and
+            row["tp1"] is not None and
+            row["rrr"] is not None
+        )
+    return rows
+
+
+def analysis_row(user_id, output, recommendation, trade_levels):
+    """Satu baris INSERT analyses dari output analyze_and_generate_signal.
+    created_at ditulis eksplisit dalam UTC (bukan DEFAULT CURRENT_TIMESTAMP zona waktu server
+    MySQL) dan saat analisa dibuat, bukan saat write-behind queue menulisnya."""
+    return (
+        user_id,
         output["coin_name"],
         output["entry_price"],
         output["market_structure"]["1h"],
@@ -68,287 +146,399 @@ def save_to_db(output, recommendation, trade_levels):
         trade_levels["position_size_units"]if trade_levels else None,
         trade_levels["ob_type"]if trade_levels else None,
         "no_entry",
+        utc_datetime(),
     )
 
-    cursor.execute(sql, values)
-    conn.commit()
-    cursor.close()
-    conn.close()
 
-    print("Analisa Tersimpan di DB")
+@timed("db_write")
+def write_analyses(rows):
+    """Batch INSERT (executemany -> multi-row INSERT) dalam satu commit"""
+    with db_cursor(commit=True) as cursor:
+        cursor.executemany(ANALYSIS_INSERT_SQL, rows)
+    logger.info(f"{len(rows)} analisa tersimpan di DB")
+
+
+@timed("outcome_query")
+def select_open_analyses(after_id, since, limit):
+    """Satu halaman keyset analisa terbuka (id > after_id) untuk OutcomeResolver"""
+    with db_cursor() as cursor:
+        cursor.execute(OPEN_ANALYSES_SQL, (after_id, since, limit))
+        return cursor.fetchall()
+
+
+@timed("outcome_write")
+def write_outcomes(updates):
+    """UPDATE status per kelompok id (WHERE id IN (...)) dalam satu commit"""
+    with db_cursor(commit=True) as cursor:
+        for status, ids in updates:
+            cursor.execute(resolve_sql(len(ids)), (status, *ids))
+
+
+@timed("save_to_db")
+def save_to_db(output, recommendation, trade_levels, user_id=None):
+    """Antrikan analisa untuk disimpan; response tidak menunggu MySQL"""
+    if user_id is None:
+        user_id = session["user_id"]
+    analysis_writer.submit(analysis_row(user_id, output, recommendation, trade_levels))
+    cooldowns.touch(user_id, output["coin_name"])
+
+
+@timed("cooldown_query")
+def load_recent_analyses(window):
+    """(user_id, coin_name, epoch) analisa terakhir dalam jendela cooldown, untuk warm-up CooldownMap"""
+    with db_cursor() as cursor:
+        cursor.execute(RECENT_ANALYSES_SQL, (utc_datetime() - timedelta(seconds=window),))
+        return [(user_id, coin, utc_epoch(last)) for user_id, coin, last in cursor.fetchall()]
 
 # ==============================================================
 # CONFIGURATION & INITIALIZATION
 # ==============================================================
 
-app = Flask(__name__)
-app.secret_key = os.getenv("FLASK_SECRET", "replace-with-a-random-secret")
-exchange = ccxt.binance({'options': {'defaultType': 'future'}})
-CORS(app)
+# Route didaftarkan ke blueprint; Flask app dan client exchange dibuat lewat factory
+# (create_app / create_exchange) saat pertama dipakai, bukan saat import, supaya serve.py
+# bisa fork worker dari master tanpa membawa koneksi/state milik proses lain.
+bp = Blueprint("analyzer", __name__)
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 logger = logging.getLogger("HybridAnalyzerV8")
 
 # --- TRADING PARAMETERS ---
-MIN_RRR = 2.0                 # Rasio Risiko/Imbalan minimum (Dikembalikan ke 2.0)
-ATR_MULTIPLIER = 2.0          # Koefisien untuk SL
-ATR_PERIOD = 14               # Periode ATR
-RISK_PER_TRADE_PERCENT = 1.0  
-EQUITY = 10000                # Asumsi Modal Awal untuk perhitungan ukuran posisi
+# Semua parameter sinyal ada di StrategyConfig (strategy.py); nama lama tetap sebagai alias
+STRATEGY = StrategyConfig()
+
+MIN_RRR = STRATEGY.min_rrr                                  # Rasio Risiko/Imbalan minimum
+ATR_MULTIPLIER = STRATEGY.atr_multiplier                    # Koefisien untuk SL
+ATR_PERIOD = STRATEGY.atr_period                            # Periode ATR
+RISK_PER_TRADE_PERCENT = STRATEGY.risk_per_trade_percent
+EQUITY = STRATEGY.equity                                    # Asumsi Modal Awal untuk perhitungan ukuran posisi
 
 # Timeframes
 TF_HIGH = "1d"
 TF_MID = "4h"
 TF_LOW = "1h"
 
+# --- FETCH PARAMETERS ---
+FETCH_TIMEOUT = float(os.getenv("FETCH_TIMEOUT", 10))   # Batas waktu per panggilan exchange (detik)
+FETCH_WORKERS = int(os.getenv("FETCH_WORKERS", 16))     # Thread fetch untuk request interaktif (/analyze)
+FETCH_JOBS_PER_COIN = 5                                  # get_all_market_data: 3 timeframe + funding + L/S ratio
+
+
+def create_exchange() -> Any:
+    """Client ccxt Binance futures; throttle bawaan ccxt dimatikan (budget weight dan retry diatur ExchangeGateway)"""
+    client = ccxt.binance({'options': {'defaultType': 'future'}, 'enableRateLimit': False})
+    client.timeout = int(FETCH_TIMEOUT * 1000)
+    return client
+
+
+exchange: Optional[Any] = None   # Dibuat saat panggilan exchange pertama; benchmark boleh mengisi FakeExchange
+_exchange_lock = threading.Lock()
+
+
+def get_exchange() -> Any:
+    global exchange
+    if exchange is None:
+        with _exchange_lock:
+            if exchange is None:
+                exchange = create_exchange()
+    return exchange
+
+
+# --- EXCHANGE GATEWAY ---
+# Budget weight per IP, lane interactive/background, retry + circuit breaker (lihat gateway.py);
+# `exchange` dibaca ulang setiap panggilan supaya bisa diganti (benchmark pakai FakeExchange)
+gateway = ExchangeGateway(get_exchange)
+
+# --- CANDLE CACHE ---
+CANDLE_CACHE_MAX_ENTRIES = int(os.getenv("CANDLE_CACHE_MAX_ENTRIES", 512))
+CANDLE_CACHE_MAX_MB = float(os.getenv("CANDLE_CACHE_MAX_MB", 64))
+CANDLE_LIVE_TTL = float(os.getenv("CANDLE_LIVE_TTL", 15))   # Refresh bar yang sedang berjalan (detik)
+
+# --- LOCAL CANDLE STORE ---
+# Direktori file kolumnar per (symbol, timeframe); kosong = tanpa store (REST saja)
+DEFAULT_CANDLE_STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "candles")
+CANDLE_STORE_DIR = os.getenv("CANDLE_STORE_DIR", "")
+
+candle_store: Optional[CandleStore] = CandleStore(CANDLE_STORE_DIR) if CANDLE_STORE_DIR else None
+
+
+def exchange_ohlcv(symbol: str, timeframe: str, since: Optional[int], limit: int) -> List[List[float]]:
+    return gateway.fetch_ohlcv(symbol, timeframe, since=since, limit=limit)
+
+
+candle_cache = CandleCache(
+    candle_store.read_through(exchange_ohlcv) if candle_store else exchange_ohlcv,
+    max_entries=CANDLE_CACHE_MAX_ENTRIES,
+    max_bytes=int(CANDLE_CACHE_MAX_MB * 1024 * 1024),
+    live_ttl=CANDLE_LIVE_TTL,
+)
+
+# --- SMC INDEX ---
+# Zona SMC (OB + mitigasi, FVG, equal highs/lows) per (symbol, timeframe), diperbarui
+# inkremental per bar. OB_DETECTOR=window memakai OB `ob_lookback` candle terakhir
+# (sama dengan backtest/optimizer); OB_DETECTOR=smc memakai zona aktif terdekat dari index.
+OB_DETECTOR = os.getenv("OB_DETECTOR", "window")
+SMC_HISTORY_BARS = int(os.getenv("SMC_HISTORY_BARS", 5000))   # Bar dari candle store saat index dibangun
+
+
+def smc_history(symbol: str, timeframe: str) -> Candles:
+    """Histori panjang dari candle store untuk seed SMCIndex (timeframe turunan di-resample dari base)"""
+    if not resampler or timeframe == TF_LOW:
+        return candle_store.tail(symbol, timeframe, SMC_HISTORY_BARS)
+    ratio = timeframe_ms(timeframe) // timeframe_ms(TF_LOW)
+    bars, _ = resample(candle_store.tail(symbol, TF_LOW, (SMC_HISTORY_BARS + 2) * ratio), timeframe)
+    return bars[1:-1]   # Bucket pertama/terakhir bisa belum lengkap
+
+
+smc_engine = SMCEngine(history=smc_history if candle_store else None)
+
+# --- STREAMING ---
+# Daftar koin (misal "BTC,ETH,SOL") yang di-stream via websocket; kosong = REST saja
+STREAM_SYMBOLS = [s.strip().upper() for s in os.getenv("STREAM_SYMBOLS", "").split(",") if s.strip()]
+CANDLE_LIMITS = {TF_HIGH: 200, TF_MID: 300, TF_LOW: 300}
+
+market_stream: Optional[MarketStream] = None
+
+# --- RESAMPLING ---
+# Timeframe di atas TF_LOW (4h, 1d, dan timeframe baru di CANDLE_LIMITS) diturunkan dari deret 1h:
+# histori bar close di-fetch sekali per koin (seed), setelah itu cukup satu fetch 1h per analisa
+# dan bar berjalan 4h/1d disusun dari bar 1h yang sama. RESAMPLE_HIGHER_TF=0 = fetch per timeframe.
+RESAMPLE_HIGHER_TF = os.getenv("RESAMPLE_HIGHER_TF", "1") == "1"
+
+resampler: Optional[ResampleCache] = ResampleCache(TF_LOW, CANDLE_LIMITS) if RESAMPLE_HIGHER_TF else None
+
+# --- SCANNER ---
+SCAN_WORKERS = int(os.getenv("SCAN_WORKERS", 3))           # Koin yang dianalisa bersamaan (default /scan, SignalHub)
+SCAN_MAX_WORKERS = int(os.getenv("SCAN_MAX_WORKERS", 8))   # Batas ?workers= di /scan
+SCAN_MAX_SYMBOLS = int(os.getenv("SCAN_MAX_SYMBOLS", 500))
+
+# Pool fetch dibagi /analyze dan pemakai paralel (/scan, SignalHub, scheduler). Setiap koin yang
+# dianalisa bersamaan memakai FETCH_JOBS_PER_COIN thread, jadi pool diukur dari konkurensi itu
+# supaya job tidak mengantri di pool (antrian ikut memakan FETCH_TIMEOUT)
+FETCH_POOL_SIZE = FETCH_WORKERS + FETCH_JOBS_PER_COIN * (SCAN_MAX_WORKERS + SCAN_WORKERS + SCHEDULER_WORKERS)
+
+fetch_executor = ThreadPoolExecutor(max_workers=FETCH_POOL_SIZE, thread_name_prefix="fetch")
+
+# --- PERSISTENCE (write-behind) ---
+DB_WRITE_QUEUE_SIZE = int(os.getenv("DB_WRITE_QUEUE_SIZE", 10000))
+DB_WRITE_BATCH_SIZE = int(os.getenv("DB_WRITE_BATCH_SIZE", 500))
+DB_WRITE_FLUSH_INTERVAL = float(os.getenv("DB_WRITE_FLUSH_INTERVAL", 0.5))
+
+analysis_writer = WriteBehindQueue(
+    write_analyses,
+    maxsize=DB_WRITE_QUEUE_SIZE,
+    batch_size=DB_WRITE_BATCH_SIZE,
+    flush_interval=DB_WRITE_FLUSH_INTERVAL,
+    name="analysis-writer",
+)
+
+# --- COOLDOWN ---
+ANALYZE_COOLDOWN_SECONDS = float(os.getenv("ANALYZE_COOLDOWN_SECONDS", 300))   # Jeda /analyze per user per koin
+
+cooldowns = CooldownMap(ANALYZE_COOLDOWN_SECONDS)
+
+# --- REQUEST COALESCING ---
+# Request /analyze bersamaan untuk koin + bar 1h yang sama berbagi satu fetch + analisa;
+# hasil boleh dipakai ulang beberapa detik (harga live tetap di-refresh oleh candle_cache)
+ANALYSIS_SHARE_TTL = float(os.getenv("ANALYSIS_SHARE_TTL", 5))
+
+analysis_flight = SingleFlight(ttl=ANALYSIS_SHARE_TTL)
+
+# --- OUTCOME RESOLVER ---
+# status_entry (no_entry -> filled -> TP/SL, atau expired) diputuskan otomatis dari candle di
+# thread latar (lihat outcomes.py); /update_status tetap ada sebagai override manual.
+# Candle dimuat sekali per koin per siklus: dari candle store bila ada, jika tidak dari
+# histori di memori yang hanya mem-fetch bar baru. OUTCOME_RESOLVER=0 = manual saja.
+OUTCOME_RESOLVER = os.getenv("OUTCOME_RESOLVER", "1") == "1"
+
+
+def outcome_candles(symbol: str, timeframe: str, since: int, now_ms: int) -> Candles:
+    """Bar close sejak `since` dari candle store (histori yang belum ada di-backfill dulu)"""
+    candle_store.backfill(in_lane(BACKGROUND, exchange_ohlcv), symbol, timeframe, since)
+    return candle_store.read(symbol, timeframe).since(since)
+
+
+outcome_history = None if candle_store else CandleHistory(in_lane(BACKGROUND, exchange_ohlcv))
+outcome_resolver = OutcomeResolver(
+    select_open_analyses, write_outcomes,
+    outcome_candles if candle_store else outcome_history.load,
+    retain=outcome_history.retain if outcome_history else None,
+)
+
+# --- SNAPSHOT CACHE ---
+# Output analisa per (koin, bar 1h) diserialisasi sekali lalu dibagi semua user: /analyze =
+# lookup snapshot + persistence per user. SNAPSHOT_REDIS_URL=local/redis://... menambah L2
+# yang bisa dibagi antar proses; snapshot koin yang dilacak dihitung ulang setelah bar close.
+
+
+def response_bytes(obj: Any) -> bytes:
+    """Body yang identik dengan jsonify(obj)"""
+    return (get_app().json.dumps(obj, separators=(",", ":")) + "\n").encode()
+
+
+snapshots = SnapshotCache(response_bytes, remote=connect_kv(SNAPSHOT_REDIS_URL))
+
+# --- SCHEDULER ---
+# Kerja periodik selaras bar close (scheduler.py), di lane background dengan pool SCHEDULER_WORKERS:
+#   1h  -> candle + indikator + analisa + snapshot (L2) untuk koin yang dilacak
+#   4h  -> hal yang sama untuk seluruh universe scanner (SCHEDULER_UNIVERSE_TIMEFRAME, kosong = mati)
+#   1d  -> sinkron candle store untuk koin yang dilacak (jika CANDLE_STORE_DIR diisi)
+# SCHEDULER=0 = analisa hanya saat user meminta.
+SCHEDULER = os.getenv("SCHEDULER", "1") == "1"
+SCHEDULER_UNIVERSE_TIMEFRAME = os.getenv("SCHEDULER_UNIVERSE_TIMEFRAME", TF_MID)
+SCHEDULER_UNIVERSE_MAX = int(os.getenv("SCHEDULER_UNIVERSE_MAX", SCAN_MAX_SYMBOLS))
+
 # ==============================================================
 # DATA FETCH CORE (Menggunakan CCXT)
 # ==============================================================
  
-def fetch_candles_ccxt(symbol: str, timeframe: str, limit: int) -> List[Dict[str, float]]:
-    """Fetch OHLCV data using ccxt"""
-    try:
-        ohlcv = exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
-        return [
-            {
-                "open_time": x[0], "open": float(x[1]), "high": float(x[2]), 
-                "low": float(x[3]), "close": float(x[4]), "volume": float(x[5]),
-            }
-            for x in ohlcv
-        ]
-    except Exception as e:
-        logger.error(f"CCXT fetch error {symbol} {timeframe}: {e}")
-        return []
-
+def fetch_candles_ccxt(symbol: str, timeframe: str, limit: int) -> Candles:
+    """Fetch OHLCV data using ccxt (lewat candle_cache bersama, hasil kolumnar).
+    Kegagalan exchange dilempar sebagai GatewayError, bukan Candles kosong."""
+    with stage(f"fetch_candles_{timeframe}"):
+        return candle_cache.get(symbol, timeframe, limit)
+
+def to_exchange_id(symbol: str) -> str:
+    """'BTC/USDT' -> 'BTCUSDT' (format id market Binance)"""
+    return symbol.replace('/USDT', '').replace('/', '') + 'USDT'
+
+@timed("fetch_funding_rate")
+def fetch_funding_rate(symbol: str) -> float:
+    """Fetch Funding Rate terakhir (premiumIndex); GatewayError jika gagal"""
+    fr_data = gateway.call("fapiPublicGetPremiumIndex", {'symbol': to_exchange_id(symbol)})
+    return float(fr_data.get("lastFundingRate", 0.0))
+
+@timed("fetch_long_short_ratio")
+def fetch_long_short_ratio(symbol: str) -> float:
+    """Fetch Global Long/Short Account Ratio terakhir; GatewayError jika gagal"""
+    params_ls = {'symbol': to_exchange_id(symbol), 'period': '5m', 'limit': 30}
+    ls_data = gateway.call("fapiDataGetGlobalLongShortAccountRatio", params_ls)
+    if ls_data:
+        return float(ls_data[-1].get("longShortRatio", 1.0))
+    return 1.0
+
+# Nilai netral jika data sentimen gagal diambil (sentimen hanya konfluensi)
+NEUTRAL_SENTIMENT = {"funding_rate": 0.0, "open_interest": 0.0, "long_short_ratio": 1.0}
+
+@timed("fetch_sentiment")
 def fetch_sentiment_data(symbol: str) -> Dict[str, Any]:
-    """Fetch Funding Rate dan Long/Short Ratio"""
-    sentiment = {"funding_rate": 0.0, "open_interest": 0.0, "long_short_ratio": 1.0}
-    try:
-        symbol_no_slash = symbol.replace('/USDT', '').replace('/', '') + 'USDT'
-        
-        fr_data = exchange.fapiPublicGetPremiumIndex({'symbol': symbol_no_slash})
-        sentiment["funding_rate"] = float(fr_data.get("lastFundingRate", 0.0))
-        
-        params_ls = {'symbol': symbol_no_slash, 'period': '5m', 'limit': 30}
-        ls_data = exchange.fapiDataGetGlobalLongShortAccountRatio(params_ls)
-        if ls_data:
-            sentiment["long_short_ratio"] = float(ls_data[-1].get("longShortRatio", 1.0))
-            
-    except Exception as e:
-        logger.warning(f"Failed to fetch sentiment data for {symbol}: {e}")
-        
+    """Fetch Funding Rate dan Long/Short Ratio; field yang gagal bernilai netral dan
+    namanya dicatat di "degraded" supaya tidak diam-diam dianggap data asli"""
+    sentiment = dict(NEUTRAL_SENTIMENT, degraded=[])
+    for name, fetch in (("funding_rate", fetch_funding_rate), ("long_short_ratio", fetch_long_short_ratio)):
+        try:
+            sentiment[name] = fetch(symbol)
+        except GatewayError as e:
+            logger.warning(f"Failed to fetch {name} for {symbol}: {e}")
+            sentiment["degraded"].append(name)
     return sentiment
 
+def fetch_concurrently(jobs: Dict[str, Tuple], timeout: float = FETCH_TIMEOUT
+                       ) -> Tuple[Dict[str, Any], Dict[str, Exception]]:
+    """Menjalankan semua panggilan exchange secara paralel.
+
+    `jobs` memetakan nama -> (fungsi, *args). Return (results, errors): hasil yang
+    gagal atau melewati `timeout` bernilai None di `results` dan exception-nya ada
+    di `errors`, sehingga pemanggil bisa memutuskan sendiri data mana yang wajib ada.
+    Setiap job berjalan di salinan context pemanggil (lane gateway ikut terbawa).
+    """
+    futures = {fetch_executor.submit(contextvars.copy_context().run, fn, *args): name
+               for name, (fn, *args) in jobs.items()}
+    done, not_done = wait(futures, timeout=timeout)
+
+    results: Dict[str, Any] = {name: None for name in jobs}
+    errors: Dict[str, Exception] = {}
+    for future in done:
+        name = futures[future]
+        try:
+            results[name] = future.result()
+        except Exception as e:
+            logger.error(f"Fetch job {name} failed: {e}")
+            errors[name] = e
+    for future in not_done:
+        future.cancel()
+        name = futures[future]
+        logger.error(f"Fetch job {name} timed out after {timeout}s")
+        errors[name] = ExchangeUnavailable(f"{name}: timed out after {timeout}s", name)
+    return results, errors
+
 # ==============================================================
 # ANALYSIS CORE (SMC & INDICATORS)
 # ==============================================================
 
-def calculate_rsi(closes: List[float], period: int = 14) -> Optional[float]:
-    """Menghitung Relative Strength Index (RSI)"""
+@timed("rsi")
+def calculate_rsi(closes: np.ndarray, period: int = 14) -> Optional[float]:
+    """Menghitung Relative Strength Index (RSI) Wilder pada bar terakhir"""
     if len(closes) < period + 1: return None
-    
-    deltas = np.diff(closes)
-    gains = deltas * (deltas > 0)
-    losses = -deltas * (deltas < 0)
-    
-    avg_gain = np.mean(gains[:period])
-    avg_loss = np.mean(losses[:period])
-    
-    if avg_loss == 0: return 100.0 if avg_gain > 0 else 50.0
-    rs = avg_gain / avg_loss
-    rsi = 100 - (100 / (1 + rs))
-    return float(rsi)
-
-def calculate_ema(data: List[float], period: int) -> List[float]:
-    """Menghitung Exponential Moving Average (EMA) secara rekursif"""
-    if len(data) < period: return []
-    prices = np.array(data)
-    alpha = 2 / (period + 1)
-    ema = np.zeros_like(prices)
-    ema[period - 1] = np.mean(prices[:period])
-    for i in range(period, len(prices)):
-        ema[i] = alpha * prices[i] + (1 - alpha) * ema[i - 1]
-    return list(ema[period - 1:])
-
-def calculate_macd(closes: List[float], fast: int = 12, slow: int = 26, signal: int = 9) -> Optional[float]:
-    """Menghitung MACD Line (hanya satu nilai terakhir) menggunakan EMA yang stabil"""
-    if len(closes) < slow: return None
-    ema_fast_list = calculate_ema(closes, fast)
-    ema_slow_list = calculate_ema(closes, slow)
-    if not ema_slow_list: return None
-    diff_len = len(ema_fast_list) - len(ema_slow_list)
-    macd_line = np.array(ema_fast_list[diff_len:]) - np.array(ema_slow_list)
-    return float(macd_line[-1])
-
-def calc_structure_and_bias(candles: List[Dict[str, float]]) -> str:
-    """Menentukan bias dasar pasar"""
-    if len(candles) < 20: return "Sideways"
-    closes = [c["close"] for c in candles]
-    slope = (closes[-1] - closes[0]) / closes[0]
-    if slope > 0.01: return "Bullish"
-    elif slope < -0.01: return "Bearish"
-    else: return "Sideways"
-
-def calculate_atr(candles: List[Dict[str, float]], period: int) -> float:
-    """Menghitung Average True Range (ATR)"""
-    if len(candles) < period: return 0.0
-    true_ranges = []
-    for i in range(1, len(candles)):
-        h, l, pc = candles[i]["high"], candles[i]["low"], candles[i-1]["close"]
-        tr = max(h - l, abs(h - pc), abs(l - pc))
-        true_ranges.append(tr)
-    if len(true_ranges) < period: return 0.0
-    return sum(true_ranges[-period:]) / period
-
-def detect_valid_order_block(candles: List[Dict[str, float]], bias: str) -> Optional[Dict[str, float]]:
-    """Mendeteksi Order Block dasar (tanpa FVG ketat) di 10 candle terakhir."""
-    
-    # Jendela pencarian OB dikembalikan ke 10 candle terakhir (40 jam)
-    if len(candles) < 10: return None
-        
-    for i in range(len(candles) - 10, len(candles) - 1): 
-        ob_candle = candles[i]
-        is_bullish_ob = ob_candle["close"] < ob_candle["open"] # Lilin Merah/Bearish -> Demand OB
-        is_bearish_ob = ob_candle["close"] > ob_candle["open"] # Lilin Hijau/Bullish -> Supply OB
-        
-        # Filter: Harga saat ini tidak boleh berada di dalam OB
-        current_price = candles[-1]["close"]
-        if min(ob_candle["open"], ob_candle["close"]) < current_price < max(ob_candle["open"], ob_candle["close"]): 
-            continue 
-            
-        if is_bullish_ob or is_bearish_ob:
-            return {
-                "type": "Demand" if is_bullish_ob else "Supply",
-                "low": ob_candle["low"], 
-                "high": ob_candle["high"], 
-                "mid": (ob_candle["high"] + ob_candle["low"]) / 2,
-            }
-    return None
-
-def detect_liquidity_sweep(candles: List[Dict[str, float]]) -> str:
-    """Mendeteksi pola stop-hunt di 5 lilin terakhir."""
-    if len(candles) < 5: return "None"
-    last_highs = [c["high"] for c in candles[-5:]]
-    last_lows = [c["low"] for c in candles[-5:]]
-    
-    # Sweep terjadi jika lilin terakhir menembus High/Low sebelumnya (tanpa menembus Low/High)
-    sweep_high = last_highs[-1] > max(last_highs[:-1])
-    sweep_low = last_lows[-1] < min(last_lows[:-1])
-    
-    if sweep_high: return "Buy-side liquidity sweep"
-    elif sweep_low: return "Sell-side liquidity sweep"
-    return "None"
-
+    return float(rsi_series(closes, period)[-1])
 
-# --- TRADE DECISION CORE ---
-
-def calculate_rrr(entry: float, sl: float, tp: float, side: str) -> float:
-    """Menghitung Rasio Risiko/Imbalan"""
-    if side == "Long":
-        risk = abs(entry - sl)
-        reward = abs(tp - entry)
-    else:
-        risk = abs(sl - entry)
-        reward = abs(entry - tp)
-        
-    return reward / risk if risk > 0 else 0.0
+def calculate_ema(data: np.ndarray, period: int) -> np.ndarray:
+    """Menghitung Exponential Moving Average (EMA), dimulai dari bar ke-period"""
+    if len(data) < period: return np.empty(0)
+    return ema_series(data, period)[period - 1:]
 
+@timed("macd")
+def calculate_macd(closes: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9) -> Optional[float]:
+    """Menghitung MACD Line (hanya satu nilai terakhir); deret lengkap ada di indicators.macd_series"""
+    if len(closes) < slow: return None
+    macd_line, _, _ = macd_series(closes, fast, slow, signal)
+    return float(macd_line[-1])
 
-def generate_trade_levels(ob_zone: Dict[str, float], bias: str, current_price: float, candles_4h: List[Dict[str, float]]) -> Optional[Dict[str, Any]]:
-    """Menghitung level Entry, SL, TP dinamis. RRR minimal 2.0 untuk semua sinyal."""
-    
-    MIN_RRR = 2.0  # RRR minimal 2.0 di semua kondisi
-    DISTANCE_TOLERANCE = 0.05 # Maksimal 5% jarak dari harga saat ini
-    
-    entry = ob_zone["mid"]
-    current_atr = calculate_atr(candles_4h, ATR_PERIOD)
-    
-    # Tentukan Side
-    if ob_zone["type"] == "Demand": side = "Long"
-    elif ob_zone["type"] == "Supply": side = "Short"
-    else: return None 
-    
-    # Filter 1: POSISI HARGA SAAT INI (Logika Limit Order)
-    if side == "Long":
-        # Entry di bawah Current Price
-        if entry >= current_price or (current_price - entry) / current_price > DISTANCE_TOLERANCE: return None 
-    elif side == "Short":
-        # Entry di atas Current Price
-        if entry <= current_price or (entry - current_price) / current_price > DISTANCE_TOLERANCE: return None
-    else:
-        return None
-        
-    # SL Dinamis (ATR-Based)
-    atr_risk = current_atr * ATR_MULTIPLIER
-    
-    if side == "Long":
-        sl = min(ob_zone["low"] * 0.999, entry - atr_risk) 
-        tp1 = entry + (entry - sl) * MIN_RRR
-        tp2 = entry + (entry - sl) * 3.5 
-    else: # side == "Short"
-        sl = max(ob_zone["high"] * 1.001, entry + atr_risk)
-        tp1 = entry - (sl - entry) * MIN_RRR
-        tp2 = entry - (sl - entry) * 3.5
-        
-    # 2. Hitung RRR dan Filter
-    rrr1 = calculate_rrr(entry, sl, tp1, side)
-    
-    if rrr1 < MIN_RRR:
-        return None
-        
-    # Periksa apakah ini counter-trend
-    is_counter = (bias == "Bearish" and side == "Long") or (bias == "Bullish" and side == "Short")
-        
-    # Jika lolos RRR, kembalikan level
-    risk_dollars = EQUITY * (RISK_PER_TRADE_PERCENT / 100)
-    risk_per_unit = abs(entry - sl)
-    size_units = math.floor(risk_dollars / risk_per_unit) 
-
-    return {
-        "recommendation": side,
-        "ob_type": ob_zone["type"],
-        "is_counter_trend": is_counter, # Pertahankan flag risiko
-        "entry": round(entry, 4),
-        "sl": round(sl, 4),
-        "tp1": round(tp1, 4),
-        "tp2": round(tp2, 4),
-        "rrr": round(rrr1, 2),
-        "required_rrr": MIN_RRR,
-        "position_size_units": size_units,
-    }
+@timed("atr")
+def calculate_atr(candles: Candles, period: int) -> float:
+    """Menghitung Average True Range (ATR) dengan smoothing Wilder"""
+    if len(candles) < period + 1: return 0.0
+    return float(atr_series(candles.high, candles.low, candles.close, period)[-1])
 
 
 # --- FUNGSI INI MENGGANTIKAN FUNGSI analyze_and_generate_signal LAMA ---
 # --- FUNGSI analyze_and_generate_signal YANG BARU ---
-def analyze_and_generate_signal(data: Dict[str, Any]) -> Tuple[Dict[str, Any], str, Optional[Dict[str, Any]]]:
+@timed("analyze_signal")
+def analyze_and_generate_signal(data: Dict[str, Any], config: Optional[StrategyConfig] = None
+                                ) -> Tuple[Dict[str, Any], str, Optional[Dict[str, Any]]]:
     """Mengaktifkan mode Frekuensi Tinggi: Sinyal muncul berdasarkan OB + RRR 2.0 (Sweep hanya Konfluensi)."""
-    
+    config = config or STRATEGY
+
     c_1h = data["candles"][TF_LOW]
     c_4h = data["candles"][TF_MID]
     
-    closes_1h = [c["close"] for c in c_1h]
+    closes_1h = c_1h.close
     
-    # 1. Indikator Klasik & Struktur
-    rsi_1h = calculate_rsi(closes_1h)
-    macd_1h = calculate_macd(closes_1h)
-    atr_4h = calculate_atr(c_4h, ATR_PERIOD)
-    bias_1h = calc_structure_and_bias(c_1h)
-    bias_4h = calc_structure_and_bias(c_4h)
+    # 1. Indikator Klasik & Struktur (pakai state inkremental dari stream jika ada)
+    pre = data.get("precomputed") or {}
+    rsi_1h = pre["RSI_1h"] if "RSI_1h" in pre else calculate_rsi(closes_1h)
+    macd_1h = pre["MACD_1h"] if "MACD_1h" in pre else calculate_macd(closes_1h)
+    atr_4h = pre.get("ATR_4h") or calculate_atr(c_4h, config.atr_period)
+    with stage("structure"):
+        bias_1h = calc_structure_and_bias(c_1h, config)
+        bias_4h = calc_structure_and_bias(c_4h, config)
     
     # 2. Sentimen & Liquidity
     sent = data["sentiment"]
     frate = sent.get("funding_rate", 0.0)
     ls_ratio = sent.get("long_short_ratio", 1.0)
-    liquidity_status_1h = detect_liquidity_sweep(c_1h) # Cek Sweep di 1H
+    price = data["current_price"]
+    use_smc = OB_DETECTOR == "smc"
+    with stage("smc_index"):
+        # Index dipakai bersama request lain (/scan, scheduler): semua baca di bawah index.lock
+        # Bar 1h berjalan vs pool likuiditas aktif (swing / equal highs-lows)
+        smc_1h, smc_sweep_1h = smc_engine.query(data["symbol"], TF_LOW, c_1h, lambda index: (
+            index.summary(price),
+            index.sweep_status(float(c_1h.high[-1]), float(c_1h.low[-1]), float(closes_1h[-1])) if use_smc else None))
+        smc_4h, smc_ob_4h = smc_engine.query(data["symbol"], TF_MID, c_4h, lambda index: (
+            index.summary(price), index.order_block(bias_4h, price) if use_smc else None))
+    with stage("liquidity_sweep"):
+        liquidity_status_1h = smc_sweep_1h if use_smc else detect_liquidity_sweep(c_1h, config) # Cek Sweep di 1H
     
     # 3. SMC & Level Perdagangan
-    ob_zone = detect_valid_order_block(c_4h, bias_4h) 
+    with stage("order_block"):
+        ob_zone = smc_ob_4h if use_smc else detect_valid_order_block(c_4h, bias_4h, config)
     trade_levels = None
     
     # --- Filter UTAMA: OB Harus Ada DAN lolos RRR 2.0 ---
     if ob_zone:
         # Hitung level trading (RRR filter ada di dalam fungsi ini)
-        trade_levels = generate_trade_levels(ob_zone, bias_4h, data["current_price"], c_4h)
+        with stage("trade_levels"):
+            trade_levels = generate_trade_levels(ob_zone, bias_4h, data["current_price"], c_4h, atr=atr_4h, config=config)
 
     # 4. Volatility Prediction
     volatility_pred = "Moderate"
@@ -390,7 +580,7 @@ def analyze_and_generate_signal(data: Dict[str, Any]) -> Tuple[Dict[str, Any], s
         analysis_text += f"ENTRY ({trade_levels['ob_type']}): ${trade_levels['entry']:.4f}\n"
         analysis_text += f"SL (ATR-Based): ${trade_levels['sl']:.4f}\n"
         analysis_text += f"TP1 ({trade_levels['rrr']:.2f} RRR): ${trade_levels['tp1']:.4f}\n"
-        analysis_text += f"Ukuran Posisi: {trade_levels['position_size_units']} unit ({RISK_PER_TRADE_PERCENT}% risiko)."
+        analysis_text += f"Ukuran Posisi: {trade_levels['position_size_units']} unit ({config.risk_per_trade_percent}% risiko)."
         
     elif bias_4h != "Sideways":
         # Prioritas 2: Mode menunggu (jika OB tidak lolos RRR atau tidak ada OB sama sekali)
@@ -428,6 +618,9 @@ def analyze_and_generate_signal(data: Dict[str, Any]) -> Tuple[Dict[str, Any], s
         "volatility_pred": volatility_pred,
         "analysis": analysis_text,
         "trade_levels": trade_levels, 
+        "liquidity_sweep": liquidity_status_1h,
+        "smc": {"1h": smc_1h, "4h": smc_4h},
+        "degraded": data.get("degraded", []),
     }
     
     return output_data, recommendation, trade_levels
@@ -437,44 +630,313 @@ def analyze_and_generate_signal(data: Dict[str, Any]) -> Tuple[Dict[str, Any], s
 # ORCHESTRATION & FLASK ROUTES
 # ==============================================================
 
+def build_market_data(symbol_ccxt: str, results: Dict[str, Any], errors: Dict[str, Exception]
+                      ) -> Optional[Dict[str, Any]]:
+    """Rakit data analisa dari hasil job fetch (results/errors seperti fetch_concurrently).
+    Dengan resampler, timeframe tinggi disusun dari candle 1h (+ histori seed jika ikut di-fetch)."""
+    fetched = [tf for tf in CANDLE_LIMITS if tf in results]
+    if resampler is not None and all(results[tf] is not None for tf in fetched):
+        seeds = {tf: results[tf] for tf in fetched if tf != TF_LOW}
+        with stage("resample"):
+            results = dict(results, **resampler.update(symbol_ccxt, results[TF_LOW], seeds))
+    candles_1d, candles_4h, candles_1h = results.get(TF_HIGH), results.get(TF_MID), results.get(TF_LOW)
+    if not all([candles_1d, candles_4h, candles_1h]):
+        logger.error(f"Failed to get essential candles for {symbol_ccxt}")
+        for tf in (TF_HIGH, TF_MID, TF_LOW):
+            if isinstance(errors.get(tf), GatewayError):
+                raise errors[tf]
+        return None
+
+    # Sentimen hanya konfluensi: jika gagal/timeout, pakai nilai netral dan tandai "degraded"
+    sentiment = dict(NEUTRAL_SENTIMENT)
+    degraded = []
+    for name in ("funding_rate", "long_short_ratio"):
+        if results[name] is None:
+            degraded.append(name)
+        else:
+            sentiment[name] = results[name]
+
+    return {
+        "symbol": symbol_ccxt,
+        "candles": {TF_HIGH: candles_1d, TF_MID: candles_4h, TF_LOW: candles_1h},
+        "sentiment": sentiment,
+        "current_price": float(candles_1h.close[-1]),
+        "degraded": degraded,
+    }
+
+
+def candle_jobs(symbol_ccxt: str) -> Dict[str, int]:
+    """{timeframe: limit} yang perlu di-fetch untuk satu koin: dengan resampler cukup 1h,
+    kecuali histori timeframe tinggi belum ada / sudah di luar jendela 1h (seed ulang)"""
+    if resampler is None or resampler.needs_seed(symbol_ccxt, int(time.time() * 1000)):
+        return dict(CANDLE_LIMITS)
+    return {TF_LOW: CANDLE_LIMITS[TF_LOW]}
+
+
+@timed("market_data")
 def get_all_market_data(symbol: str) -> Optional[Dict[str, Any]]:
-    """Mengumpulkan semua data yang dibutuhkan untuk analisis"""
+    """Mengumpulkan semua data yang dibutuhkan untuk analisis (5 panggilan exchange paralel;
+    3 jika histori 4h/1d sudah ada di resampler).
+    Candle wajib ada: kegagalan exchange dilempar sebagai GatewayError."""
     try:
         symbol_ccxt = symbol.upper() + "/USDT"
-        
-        candles_1d = fetch_candles_ccxt(symbol_ccxt, TF_HIGH, 200)
-        candles_4h = fetch_candles_ccxt(symbol_ccxt, TF_MID, 300)
-        candles_1h = fetch_candles_ccxt(symbol_ccxt, TF_LOW, 300)
-        
-        if not all([candles_1d, candles_4h, candles_1h]):
-             logger.error(f"Failed to get essential candles for {symbol}")
-             return None
-
-        sentiment = fetch_sentiment_data(symbol_ccxt)
-
-        return {
-            "symbol": symbol_ccxt,
-            "candles": {TF_HIGH: candles_1d, TF_MID: candles_4h, TF_LOW: candles_1h},
-            "sentiment": sentiment,
-            "current_price": candles_1h[-1]["close"]
-        }
+
+        # Jalur cepat: symbol yang di-stream dijawab dari memori
+        if market_stream:
+            data = market_stream.market_data(symbol_ccxt)
+            if data:
+                return data
+
+        results, errors = fetch_concurrently({
+            **{tf: (fetch_candles_ccxt, symbol_ccxt, tf, limit) for tf, limit in candle_jobs(symbol_ccxt).items()},
+            "funding_rate": (fetch_funding_rate, symbol_ccxt),
+            "long_short_ratio": (fetch_long_short_ratio, symbol_ccxt),
+        })
+
+        return build_market_data(symbol_ccxt, results, errors)
+    except GatewayError:
+        raise
     except Exception as e:
         logger.error(f"Error compiling market data for {symbol}: {e}")
         return None
+
+
+def bar_epoch(timeframe: str = TF_LOW, now: Optional[float] = None) -> int:
+    """Nomor bar `timeframe` yang sedang berjalan (open_time // durasi bar)"""
+    return int((time.time() if now is None else now) * 1000) // timeframe_ms(timeframe)
+
+
+def fetch_and_analyze(symbol: str) -> Optional[Tuple[Dict[str, Any], str, Optional[Dict[str, Any]]]]:
+    data = get_all_market_data(symbol)
+    if not data:
+        return None
+    return analyze_and_generate_signal(data)
+
+
+def analyze_symbol(symbol: str) -> Optional[Tuple[Dict[str, Any], str, Optional[Dict[str, Any]]]]:
+    """get_all_market_data + analyze_and_generate_signal, satu eksekusi per (koin, bar 1h) untuk
+    semua request yang datang bersamaan. Hasil tidak berisi data user (user_id baru ditempel di
+    save_to_db) dan dibagi antar request, jadi jangan dimutasi."""
+    symbol = symbol.upper()
+    result, _ = analysis_flight.do((symbol, bar_epoch()), fetch_and_analyze, symbol)
+    return result
+
+
+def analysis_snapshot(symbol: str) -> Optional[Snapshot]:
+    """Snapshot bar 1h berjalan untuk `symbol` (dihitung lewat analyze_symbol jika belum ada)"""
+    return snapshots.get_or_compute(symbol.upper(), bar_epoch(), analyze_symbol)
+
+
+def snapshot_symbols(epoch: int) -> List[str]:
+    """Koin yang dihangatkan setelah bar close: SNAPSHOT_SYMBOLS + koin yang baru diminta user"""
+    return SNAPSHOT_SYMBOLS + snapshots.tracked(epoch, SNAPSHOT_TRACK_BARS)
+
+
+def universe_symbols(epoch: int) -> List[str]:
+    return load_universe()[:SCHEDULER_UNIVERSE_MAX]
+
+
+def sync_candle_store(bar: int) -> int:
+    """Job harian: tarik bar close yang belum tersimpan untuk koin yang dilacak (termasuk koin
+    yang tidak diminta sejak kemarin, supaya histori store tidak bolong)"""
+    timeframes = [TF_LOW] if resampler else list(CANDLE_LIMITS)
+    fetch = in_lane(BACKGROUND, exchange_ohlcv)
+
+    def one(symbol: str) -> int:
+        try:
+            return sum(len(candle_store.sync(fetch, symbol + "/USDT", tf)) for tf in timeframes)
+        except Exception as e:
+            logger.warning(f"Candle store sync {symbol} failed: {e}")
+            return 0
+    return sum(scheduler.each(one, list(dict.fromkeys(snapshot_symbols(bar_epoch())))))
+
+
+def scan_workers(requested: int) -> int:
+    """Jumlah worker scan efektif: `requested` dibatasi SCAN_MAX_WORKERS (fetch_executor diukur
+    dari batas ini, lihat FETCH_POOL_SIZE)"""
+    workers = max(1, min(requested, SCAN_MAX_WORKERS))
+    if workers != requested:
+        logger.info(f"Scan workers: {requested} requested, using {workers} (SCAN_MAX_WORKERS={SCAN_MAX_WORKERS})")
+    return workers
+
+
+def start_market_stream(symbols: List[str] = STREAM_SYMBOLS, source: Any = None) -> Optional[MarketStream]:
+    """Menyalakan ingestion websocket untuk `symbols` (koin tanpa /USDT)"""
+    global market_stream
+    if not symbols:
+        return None
+    market_stream = MarketStream(
+        [s.upper() + "/USDT" for s in symbols], CANDLE_LIMITS, in_lane(BACKGROUND, fetch_candles_ccxt),
+        source=source or WebsocketSource(ls_ratio_loader=in_lane(BACKGROUND, fetch_long_short_ratio)),
+        tf_low=TF_LOW, tf_mid=TF_MID, atr_period=STRATEGY.atr_period,
+    )
+    market_stream.start()
+    logger.info(f"Market stream started for {len(symbols)} symbols")
+    return market_stream
+
+
+def start_scheduler() -> Optional[BarScheduler]:
+    if not SCHEDULER:
+        return None
+    scheduler.start()
+    logger.info(f"Scheduler started: {', '.join(scheduler.jobs)} ({scheduler.workers} workers, snapshot L2: "
+                f"{type(snapshots.remote).__name__ if snapshots.remote is not None else 'none'})")
+    return scheduler
+
+
+def start_outcome_resolver() -> Optional[OutcomeResolver]:
+    if not OUTCOME_RESOLVER:
+        return None
+    outcome_resolver.start()
+    logger.info(f"Outcome resolver started ({OUTCOME_TIMEFRAME}, every {outcome_resolver.interval:.0f}s)")
+    return outcome_resolver
+
+
+def stop_services() -> None:
+    """Hentikan job latar lalu flush antrian write-behind (shutdown worker serve.py)"""
+    if market_stream is not None:
+        market_stream.stop()
+    scheduler.stop()
+    outcome_resolver.stop()
+    signal_hub.stop()
+    analysis_writer.stop()
+
+
+# Live signals (SSE): dashboard berlangganan koin lewat /signals/stream; analisa dihitung sekali
+# per koin setiap bar 1h close (lihat signals.py) di lane background lalu delta dikirim ke subscriber
+signal_hub = SignalHub(in_lane(BACKGROUND, analyze_symbol), timeframe_ms=timeframe_ms(TF_LOW),
+                       workers=max(1, SCAN_WORKERS))
+
+# Job bar close (lihat bagian SCHEDULER); pool per koin dibatasi seperti scan
+scheduler = BarScheduler(workers=SCHEDULER_WORKERS)
+snapshot_warmer = SnapshotWarmer(snapshots, in_lane(BACKGROUND, analyze_symbol), snapshot_symbols,
+                                 timeframe_ms=timeframe_ms(TF_LOW), each=scheduler.each)
+universe_warmer = SnapshotWarmer(snapshots, in_lane(BACKGROUND, analyze_symbol), universe_symbols,
+                                 timeframe_ms=timeframe_ms(TF_LOW), each=scheduler.each)
+scheduler.add("analysis", timeframe_ms(TF_LOW), snapshot_warmer.warm, run_on_start=True)
+if SCHEDULER_UNIVERSE_TIMEFRAME:
+    scheduler.add("universe", timeframe_ms(SCHEDULER_UNIVERSE_TIMEFRAME), lambda bar: universe_warmer.warm())
+if candle_store:
+    scheduler.add("candle-store", timeframe_ms(TF_HIGH), sync_candle_store)
     
 
+@bp.route('/health')
+def health():
+    """Status proses + metrik antrian persistence (back-pressure) dan pool DB"""
+    try:
+        db = pool_stats()
+    except Exception as e:
+        db = {"error": str(e)}
+    return jsonify({"status": "ok", "persistence": analysis_writer.stats(), "db_pool": db,
+                    "cooldowns": dict(cooldowns.stats, size=len(cooldowns)),
+                    "analysis_flight": dict(analysis_flight.stats, keys=len(analysis_flight)),
+                    "exchange": gateway.snapshot(), "signals": signal_hub.snapshot(),
+                    "outcomes": outcome_resolver.snapshot(),
+                    "snapshots": dict(snapshots.snapshot(), warmer=snapshot_warmer.stats),
+                    "scheduler": scheduler.snapshot()})
+
+
+# --- METRICS & PROFILING ---
+# /metrics (format Prometheus): latency per route, per tahap analisa (analyzer_stage_seconds),
+# per panggilan exchange + error (gateway.py), dan gauge antrian/cache di bawah.
+# Profiler sampling opt-in per request: ?profile=1 atau header "X-Profile: 1", hanya untuk user
+# yang login dan terdaftar di PROFILE_USERS; hasilnya (collapsed stacks) dibaca pemiliknya di
+# /debug/profile/<X-Profile-Id>.
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_seconds", "Latency request HTTP sampai header response", ("route", "method", "status"))
+
+REGISTRY.gauge("analysis_write_queue_depth", "Baris analisa yang menunggu ditulis ke MySQL",
+               lambda: analysis_writer.stats()["depth"])
+REGISTRY.gauge("analysis_writer_stats", "Counter write-behind queue (written, dropped, batch, ...)",
+               lambda: {k: v for k, v in analysis_writer.stats().items()
+                        if isinstance(v, (int, float)) and not isinstance(v, bool) and k not in ("depth", "capacity")},
+               ("stat",))
+REGISTRY.gauge("cooldown_entries", "Entri CooldownMap di memori", lambda: len(cooldowns))
+REGISTRY.gauge("candle_cache_entries", "Entri candle_cache", lambda: len(candle_cache))
+REGISTRY.gauge("exchange_budget_available", "Sisa budget weight exchange", lambda: gateway.limiter.available())
+REGISTRY.gauge("exchange_circuit_open", "1 jika circuit breaker exchange tidak closed",
+               lambda: int(gateway.breaker.state != "closed"))
+REGISTRY.gauge("signal_subscribers", "Subscriber SSE /signals/stream", lambda: signal_hub.snapshot()["subscribers"])
+REGISTRY.gauge("smc_indexes", "SMCIndex (symbol, timeframe) di memori", lambda: len(smc_engine))
+REGISTRY.gauge("outcome_open_analyses", "Analisa terbuka (no_entry/filled) pada siklus resolver terakhir",
+               lambda: outcome_resolver.snapshot()["rows"])
+REGISTRY.gauge("outcome_resolved", "Analisa yang diputuskan resolver sejak start",
+               lambda: outcome_resolver.snapshot()["resolved"], ("status",))
+REGISTRY.gauge("scheduler_job_runs", "Run job bar close sejak start",
+               lambda: {name: job.stats["runs"] for name, job in scheduler.jobs.items()}, ("job",))
+REGISTRY.gauge("scheduler_job_failures", "Run job bar close yang gagal",
+               lambda: {name: job.stats["failures"] for name, job in scheduler.jobs.items()}, ("job",))
+REGISTRY.gauge("snapshot_entries", "Snapshot analisa (koin, bar) di LRU proses", lambda: len(snapshots))
+REGISTRY.gauge("snapshot_stats", "Counter snapshot cache (hits, remote_hits, misses, stale, ...)",
+               lambda: dict(snapshots.stats), ("stat",))
+
+
+def profile_requested() -> bool:
+    return request.args.get("profile") == "1" or request.headers.get("X-Profile") == "1"
+
+
+@bp.before_app_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    # Session sudah terbaca di sini; tanpa user_id (belum login) profiler tidak pernah dimulai
+    g.profiler = profiles.start(session.get("user_id"), thread_ids=[threading.get_ident()],
+                                thread_prefixes=("fetch",)) if profile_requested() else None
+
+
+@bp.after_app_request
+def record_request_metrics(response):
+    started = g.get("request_started")
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, route=route, method=request.method,
+                                     status=response.status_code)
+    profiler = g.pop("profiler", None)
+    if profiler is not None:
+        response.headers["X-Profile-Id"] = profiles.finish(profiler, f"{request.method} {request.full_path}",
+                                                           session.get("user_id"))
+    return response
+
+
+@bp.teardown_app_request
+def release_profiler(exc):
+    # Exception yang tidak tertangani melewati after_request: jangan biarkan slot profiler bocor
+    profiler = g.pop("profiler", None)
+    if profiler is not None:
+        profiles.finish(profiler, f"{request.method} {request.full_path} (error)", session.get("user_id"))
+
+
+@bp.route('/metrics')
+def metrics():
+    return Response(REGISTRY.render(), content_type=METRICS_CONTENT_TYPE)
+
+
+@bp.app_errorhandler(DatabaseUnavailable)
+def database_unavailable(e):
+    logger.error(f"Database unavailable: {e}")
+    return jsonify({"error": "Database unavailable"}), 503
+
+
+@bp.app_errorhandler(GatewayError)
+def exchange_failed(e):
+    logger.error(f"Exchange error: {e}")
+    response = jsonify(e.to_dict())
+    if e.retry_after is not None:
+        response.headers["Retry-After"] = str(math.ceil(e.retry_after))
+    return response, e.status
+
+
 # Login and Register Auth
 def login_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
         if "user_id" not in session:
-            return redirect(url_for("login"))
+            return redirect(url_for(".login"))
 
         return f(*args, **kwargs)
     return decorated
 
 
-@app.route('/register', methods=['GET', 'POST'])
+@bp.route('/register', methods=['GET', 'POST'])
 def register ():
     if request.method == 'POST':
         username = request.form.get("username","").strip() 
@@ -483,59 +945,50 @@ def register ():
             return render_template('register.html', error="Username and Password Required!")
         
         hashed = generate_password_hash(password)
-        conn = get_conn()
-
-        if not conn:
-            return render_template('register.html', error="Ups! Cannot connect DB")
         try:
-            cur = conn.cursor()
-            cur.execute("INSERT INTO users (username, password) VALUES (%s,%s)", (username, hashed))
-            conn.commit()
+            with db_cursor(commit=True) as cur:
+                cur.execute("INSERT INTO users (username, password) VALUES (%s,%s)", (username, hashed))
+        except DatabaseUnavailable:
+            return render_template('register.html', error="Ups! Cannot connect DB")
         except Exception as e:
             return render_template("register.html", error="Username Already exist!")
-        finally:
-            cur.close()
-            conn.close()
  
-        return redirect(url_for('register', success='true'))
+        return redirect(url_for('.register', success='true'))
     return render_template('register.html')
 
-@app.route('/login', methods=['GET', 'POST'])
+@bp.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
         username = request.form.get("username").strip()
         password = request.form.get("password").strip()
-        conn = get_conn()
-
-        if not conn:
-            return redirect(url_for('login', error='true', message='Tidak dapat terhubung ke database!'))
-        
-        cur = conn.cursor(dictionary=True)
-        cur.execute("SELECT * FROM users WHERE username = %s", (username,))
-        user = cur.fetchone()
-        cur.close(); conn.close()
+        try:
+            with db_cursor(dictionary=True) as cur:
+                cur.execute("SELECT * FROM users WHERE username = %s", (username,))
+                user = cur.fetchone()
+        except DatabaseUnavailable:
+            return redirect(url_for('.login', error='true', message='Tidak dapat terhubung ke database!'))
 
         if user and check_password_hash(user['password'], password):
             session['user_id'] = user['id']
             session['username'] = user['username']
-            return redirect(url_for('login', success='true'))
+            return redirect(url_for('.login', success='true'))
         
-        return redirect(url_for('login', error='true', message='Username atau password salah!'))
+        return redirect(url_for('.login', error='true', message='Username atau password salah!'))
     
     return render_template('login.html')
 
-@app.route('/logout')
+@bp.route('/logout')
 def logout():
     session.clear()
-    return redirect(url_for('login'))
+    return redirect(url_for('.login'))
 
-@app.route('/')
+@bp.route('/')
 @login_required
 def index():
     """Merender index.html dari folder templates"""
     return render_template('index.html')
 
-@app.route('/analyze', methods=['POST'])
+@bp.route('/analyze', methods=['POST'])
 @login_required
 def analyze_single_coin():
 
@@ -548,173 +1001,170 @@ def analyze_single_coin():
     
     user_id = session["user_id"]
 
-    # Cooldown Search
-    conn = get_conn()
-    cursor = conn.cursor(dictionary=True)
-
-    cursor.execute("""
-        SELECT created_at 
-        FROM analyses
-        WHERE user_id = %s AND coin_name = %s
-        ORDER BY created_at DESC
-        LIMIT 1
-    """, (session["user_id"], coin_symbol))
-
-    last_record = cursor.fetchone()
-
-    if last_record:
-
-        last_time = last_record["created_at"]
-        Allowed_time = last_time + timedelta(minutes=5)
-        now = datetime.now()
-
-        if now < Allowed_time:
-            cursor.close()
-            conn.close()
-
-            return jsonify({
-                "cooldown" : True,
-                "coin" : coin_symbol,
-                "until" : Allowed_time.isoformat()
-            })
-    
-    cursor.close()
-    conn.close()
-
-        # end cooldown
+    # Cooldown dari memori (diisi saat insert, warm-up sekali dari DB)
+    cooldowns.warm(load_recent_analyses)
+    until = cooldowns.try_acquire(user_id, coin_symbol)
+    if until is not None:
+        return jsonify({
+            "cooldown" : True,
+            "coin" : coin_symbol,
+            "until" : datetime.fromtimestamp(until).isoformat()
+        })
 
     logger.info(f"Analyzing {coin_symbol}...")
     
-    data = get_all_market_data(coin_symbol)
-    if not data: 
+    try:
+        snapshot = analysis_snapshot(coin_symbol)
+    except GatewayError:
+        cooldowns.release(user_id, coin_symbol)
+        raise
+    if not snapshot: 
+        cooldowns.release(user_id, coin_symbol)
         return jsonify({"error": f"Failed to fetch market data for {coin_symbol}"}), 500
 
-    output_data, recommendation, trade_levels = analyze_and_generate_signal(data)
-
-    save_to_db(output_data, recommendation, trade_levels)
+    save_to_db(snapshot.output, snapshot.recommendation, snapshot.trade_levels, user_id=user_id)
 
     latency = round(time.time() - start_time, 3)
-    logger.info(f"✅ {output_data['coin_name']} | {recommendation} | {latency}s")
+    logger.info(f"✅ {snapshot.output['coin_name']} | {snapshot.recommendation} | {latency}s")
 
-    return jsonify(output_data)
+    # Body sudah diserialisasi saat snapshot dibuat (sama dengan jsonify(output_data))
+    return Response(snapshot.body, mimetype="application/json")
 
-# Profile
-@app.route('/profile')
+@bp.route('/scan', methods=['GET', 'POST'])
+@login_required
+def scan_universe():
+    """Scan banyak koin sekaligus; hasil di-stream sebagai NDJSON, baris terakhir berisi ranking"""
+    coins = [c.strip().upper() for c in request.values.get('coins', '').split(',') if c.strip()]
+    coins = (coins or load_universe())[:SCAN_MAX_SYMBOLS]
+    workers = scan_workers(request.values.get('workers', SCAN_WORKERS, type=int))
+    top = request.values.get('top', 20, type=int)
+
+    logger.info(f"Scanning {len(coins)} coins with {workers} workers...")
+
+    def generate():
+        started = time.time()
+        results = []
+        # Lane background: budget weight gateway selalu menyisakan ruang untuk /analyze
+        for result in scan(coins, in_lane(BACKGROUND, get_all_market_data), analyze_and_generate_signal,
+                           max_workers=workers):
+            results.append(result)
+            yield json.dumps(result) + "\n"
+        summary = scan_summary(results, started, top)
+        summary["workers"] = workers
+        logger.info(f"✅ Scan {summary['scanned']} coins | {len(summary['ranked'])} setups | {summary['elapsed']}s")
+        yield json.dumps(summary) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+@bp.route('/signals/stream', methods=['GET'])
 @login_required
+def signal_stream():
+    """Server-Sent Events: push sinyal live untuk ?coins=BTC,ETH setiap kali bar close mengubah
+    recommendation / trade_levels / liquidity sweep. Event "snapshot" berisi state terakhir saat subscribe."""
+    coins = parse_coins(request.args.get('coins', ''))
+    if not coins:
+        return jsonify({"error": "coins is required"}), 400
+
+    def generate():
+        sub = signal_hub.subscribe(coins)
+        try:
+            yield "retry: 5000\n\n"
+            while not sub.closed:
+                events = sub.get(SIGNAL_HEARTBEAT_SECONDS)
+                if not events:
+                    yield ": keep-alive\n\n"
+                for event in events:
+                    yield event.frame
+        finally:
+            signal_hub.unsubscribe(sub)
 
-def profile():
+    return Response(stream_with_context(generate()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
-    conn = get_conn()
-    cursor = conn.cursor(dictionary=True)
+@bp.route('/debug/profile/<profile_id>', methods=['GET'])
+@login_required
+def get_profile(profile_id):
+    """Collapsed stacks dari request yang diprofil (input flamegraph.pl / speedscope), hanya untuk pemiliknya"""
+    text = profiles.get(profile_id, session["user_id"])
+    if text is None:
+        return jsonify({"error": "Profile not found"}), 404
+    return Response(text, mimetype="text/plain")
+
+# Profile
+@bp.route('/profile')
+@login_required
 
-    cursor.execute("SELECT id, username, created_at FROM users WHERE id = %s", (session['user_id'],))
-    user = cursor.fetchone()
+def profile():
 
-    cursor.close()
-    conn.close()
+    with db_cursor(dictionary=True) as cursor:
+        cursor.execute("SELECT id, username, created_at FROM users WHERE id = %s", (session['user_id'],))
+        user = cursor.fetchone()
 
     return render_template("profile.html", user=user)
 
 
 # delete profile
-@app.route('/delete_profile', methods=["POST"])
+@bp.route('/delete_profile', methods=["POST"])
 @login_required
 def delete_profile():
     user_id = session["user_id"]
 
-    conn = get_conn()
-    cursor = conn.cursor()
-
-    # delete history
-    cursor.execute("DELETE from analyses WHERE user_id = %s", (user_id,))
-
-     # delete profile
-    cursor.execute("DELETE from users WHERE id = %s", (user_id,))
-
-    conn.commit()
-    cursor.close()
-    conn.close()
+    with db_cursor(commit=True) as cursor:
+        # delete history
+        cursor.execute("DELETE from analyses WHERE user_id = %s", (user_id,))
 
+        # delete profile
+        cursor.execute("DELETE from users WHERE id = %s", (user_id,))
 
     session.clear()
 
-    return redirect(url_for("login"))
+    return redirect(url_for(".login"))
 
 
 # function History 
-@app.route('/history', methods=["GET"])
+@bp.route('/history', methods=["GET"])
 @login_required
 def get_history():
+    """Riwayat analisa, paginasi keyset + filter coin/recommendation/status (lihat history.py)"""
+    try:
+        sql, params, limit = history_query(session['user_id'], request.args)
+    except HistoryQueryError as e:
+        return jsonify({"error": str(e)}), 400
+
     try:    
-        conn = get_conn()
-        cursor = conn.cursor(dictionary=True)
-
-        cursor.execute("""
-            SELECT 
-                id,
-                coin_name, 
-                entry_price, 
-                recommendation,
-                created_at,
-                entry,
-                sl,
-                tp1,
-                rrr,
-                status_entry
-            FROM analyses
-            WHERE user_id = %s
-            ORDER BY created_at DESC 
-            LIMIT 5
-        """,(session['user_id'],))
-
-        rows = cursor.fetchall()
-
-        for row in rows:
-            row ["has_trade_levels"] = (
-                row["entry"] is not None and
-                row["sl"] is not None and
-                row["tp1"] is not None and
-                row["rrr"] is not None
-            )
-
-        return jsonify(rows), 200
+        with db_cursor(dictionary=True) as cursor:
+            cursor.execute(sql, params)
+            rows, next_cursor = history_page(cursor.fetchall(), limit)
+
+        response = jsonify(mark_trade_levels(rows))
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        return response, 200
 
     except Exception as e:  
         return jsonify({"error": str(e)}), 500
+
+
+@bp.route('/stats', methods=["GET"])
+@login_required
+def get_stats():
+    """Win rate, rata-rata RRR dan jumlah analisa per user dan per koin (dari analysis_stats)"""
+    try:
+        with db_cursor(dictionary=True) as cursor:
+            cursor.execute(STATS_SQL, (session['user_id'],))
+            rows = cursor.fetchall()
+
+        return jsonify(summarize_stats(rows)), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
     
 
-@app.route("/history/<int:record_id>", methods=["GET"])
+@bp.route("/history/<int:record_id>", methods=["GET"])
 def get_history_detail(record_id):
-    conn = get_conn()
-    cursor = conn.cursor(dictionary=True)
-
-    cursor.execute("""
-        SELECT 
-            id,
-            coin_name,
-            entry_price,
-            market_structure_1h,
-            market_structure_4h,
-            rsi_1h,
-            macd_1h,
-            funding_rate,
-            long_short_ratio,
-            volatility_prediction,
-            recommendation,
-            entry,
-            sl,
-            tp1,
-            rrr,
-            position_size_units,
-            ob_type,
-            created_at
-        FROM analyses
-        WHERE id = %s AND user_id = %s 
-    """, (record_id, session['user_id']))
-
-    row = cursor.fetchone()  
-    cursor.close()
-    conn.close()
+    with db_cursor(dictionary=True) as cursor:
+        cursor.execute(HISTORY_DETAIL_SQL, (record_id, session['user_id']))
+        row = cursor.fetchone()  
 
     if not row:
         return jsonify({"error": "Record not found"}), 404
@@ -722,32 +1172,68 @@ def get_history_detail(record_id):
     return jsonify(row), 200
 
 
-@app.route("/update_status/<int:record_id>", methods=["POST"])
+@bp.route("/update_status/<int:record_id>", methods=["POST"])
 @login_required
 def update_status(record_id):
     new_status = request.form.get("status")
 
-    if new_status not in ["no_entry", "TP", "SL"]:
+    if new_status not in ENTRY_STATUSES:
         return jsonify({"error": "Invalid status"}), 400
 
-    conn = get_conn()
-    cursor = conn.cursor()
+    with db_cursor(commit=True) as cursor:
+        cursor.execute(UPDATE_STATUS_SQL, (new_status, record_id, session['user_id']))
 
-    cursor.execute("""
-        UPDATE analyses 
-        SET status_entry = %s 
-        WHERE id = %s AND user_id = %s
-    """, (new_status, record_id, session['user_id']))
+    return jsonify({"success": True})
 
-    conn.commit()
-    cursor.close()
-    conn.close()
 
-    return jsonify({"success": True})
+# ==============================================================
+# APP FACTORY & SHARED STATE
+# ==============================================================
+
+def create_app() -> Flask:
+    """Flask app dengan semua route (blueprint `analyzer`), session secret dan CORS"""
+    flask_app = Flask(__name__)
+    flask_app.secret_key = os.getenv("FLASK_SECRET", "replace-with-a-random-secret")
+    CORS(flask_app, expose_headers=[NEXT_CURSOR_HEADER])
+    flask_app.register_blueprint(bp)
+    return flask_app
+
+
+_app: Optional[Flask] = None
+_app_lock = threading.Lock()
+
+
+def get_app() -> Flask:
+    """App bersama proses ini (dibuat sekali); `analyzer.app` tetap bekerja lewat __getattr__"""
+    global _app
+    if _app is None:
+        with _app_lock:
+            if _app is None:
+                _app = create_app()
+    return _app
+
+
+def __getattr__(name: str) -> Any:
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
+def use_shared_state(kv: Any, limiter: Optional[Any] = None) -> None:
+    """Pindahkan state per proses ke key-value bersama (dipanggil tiap worker serve.py setelah fork):
+    cooldown, lease + L2 snapshot, candle cache, dan (opsional) budget weight exchange."""
+    global cooldowns
+    cooldowns = SharedCooldownMap(kv, ANALYZE_COOLDOWN_SECONDS)
+    snapshots.remote = kv
+    candle_cache.remote = kv
+    if limiter is not None:
+        gateway.limiter = limiter
 
 
 if __name__ == '__main__':
     port = int(os.environ.get("PORT", 5001))
     logger.info(f"Starting Hybrid Analyzer V8 (Final Simple + Sweep Core) on port {port}")
-    app.run(host="0.0.0.0", port=port, debug=False)
\ No newline at end of file
+    start_market_stream()
+    start_outcome_resolver()
+    start_scheduler()
+    get_app().run(host="0.0.0.0", port=port, debug=False)
\ No newline at end of file
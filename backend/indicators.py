@@ -0,0 +1,297 @@
+# indicators.py (Engine indikator tervektorisasi: EMA, MACD, RSI & ATR Wilder)
+#
+# Semua fungsi bekerja di sumbu terakhir, jadi input 2D (symbol, bar) dengan
+# panjang sama menghitung satu batch symbol sekaligus.
+import math
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Batas pembesaran w^-k di dalam satu blok; menjaga galat relatif ~1e-12
+_BLOCK_GAIN = 1e4
+# Deret 1D sampai panjang ini memakai rekursi langsung: ~20 operasi numpy versi blok
+# lebih mahal daripada loop float untuk jendela analisa biasa (300 bar)
+_DIRECT_MAX = 320
+
+
+def _ewma_direct(x: np.ndarray, alpha: float, y0: float) -> np.ndarray:
+    w = 1.0 - alpha
+    y = float(y0)
+    out = []
+    append = out.append
+    for v in x.tolist():
+        y = alpha * v + w * y
+        append(y)
+    return np.array(out)
+
+
+def ewma(x: np.ndarray, alpha: float, y0: float = 0.0) -> np.ndarray:
+    """Rekursi y[i] = alpha * x[i] + (1 - alpha) * y[i-1], dengan y[-1] = y0.
+
+    Deret 1D pendek (<= _DIRECT_MAX) dihitung dengan loop biasa. Selebihnya
+    tanpa loop per bar: deret dipotong menjadi blok sepanjang m,
+    tiap blok diselesaikan dengan trik cumsum (x * w^-k), lalu nilai akhir
+    antar blok disambung. Faktor peluruhan antar blok w^m ~ 1e-4, jadi
+    sambungan cukup beberapa suku geser untuk presisi mesin.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    lead, n = x.shape[:-1], x.shape[-1]
+    w = 1.0 - alpha
+    if n == 0:
+        return np.empty(x.shape)
+    if w <= 0.0:
+        return alpha * x
+    if x.ndim == 1 and n <= _DIRECT_MAX:
+        return _ewma_direct(x, alpha, y0)
+
+    m = min(n, max(1, int(math.log(_BLOCK_GAIN) / -math.log(w))))
+    nb = -(-n // m)
+    blocks = np.zeros(lead + (nb * m,))
+    blocks[..., :n] = x
+    blocks = blocks.reshape(lead + (nb, m))
+
+    k = np.arange(m)
+    partial = alpha * np.cumsum(blocks * w ** -k, axis=-1) * w ** k  # tiap blok dengan y awal = 0
+
+    # ends[b] = y di akhir blok b; ends[b] = w^m * ends[b-1] + partial[b, -1]
+    y0 = np.asarray(y0, dtype=np.float64)[..., None]
+    wm = w ** m
+    tails = partial[..., -1]
+    ends = tails + y0 * wm ** np.arange(1, nb + 1)
+    shift, coef = 1, wm
+    while shift < nb and coef > 1e-18:
+        ends[..., shift:] += coef * tails[..., :-shift]
+        shift, coef = shift + 1, coef * wm
+
+    prev = np.concatenate((np.broadcast_to(y0, lead + (1,)), ends[..., :-1]), axis=-1)
+    out = partial + prev[..., None] * w ** (k + 1)
+    return out.reshape(lead + (nb * m,))[..., :n]
+
+
+def ema_series(data: np.ndarray, period: int) -> np.ndarray:
+    """EMA penuh (panjang sama dengan data, NaN sebelum bar ke-period). Seed = SMA periode pertama."""
+    data = np.asarray(data, dtype=np.float64)
+    out = np.full(data.shape, np.nan)
+    if data.shape[-1] < period:
+        return out
+    seed = data[..., :period].mean(axis=-1)
+    out[..., period - 1] = seed
+    out[..., period:] = ewma(data[..., period:], 2.0 / (period + 1), seed)
+    return out
+
+
+def wilder_series(values: np.ndarray, period: int) -> np.ndarray:
+    """Smoothing Wilder (RMA, alpha = 1/period). Seed = SMA periode pertama."""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    if values.shape[-1] < period:
+        return out
+    seed = values[..., :period].mean(axis=-1)
+    out[..., period - 1] = seed
+    out[..., period:] = ewma(values[..., period:], 1.0 / period, seed)
+    return out
+
+
+def rsi_series(closes: np.ndarray, period: int = 14) -> np.ndarray:
+    """RSI Wilder untuk setiap bar (NaN untuk `period` bar pertama)."""
+    closes = np.asarray(closes, dtype=np.float64)
+    out = np.full(closes.shape, np.nan)
+    if closes.shape[-1] < period + 1:
+        return out
+    deltas = np.diff(closes)
+    avg_gain = wilder_series(np.maximum(deltas, 0.0), period)[..., period - 1:]
+    avg_loss = wilder_series(np.maximum(-deltas, 0.0), period)[..., period - 1:]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    flat = avg_loss == 0
+    rsi[flat] = np.where(avg_gain[flat] > 0, 100.0, 50.0)
+    out[..., period:] = rsi
+    return out
+
+
+def macd_series(closes: np.ndarray, fast: int = 12, slow: int = 26,
+                signal: int = 9) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """MACD line, signal line dan histogram (sejajar dengan closes, NaN di awal)."""
+    closes = np.asarray(closes, dtype=np.float64)
+    line = ema_series(closes, fast) - ema_series(closes, slow)
+    signal_line = np.full(closes.shape, np.nan)
+    if closes.shape[-1] >= slow:
+        signal_line[..., slow - 1:] = ema_series(line[..., slow - 1:], signal)
+    return line, signal_line, line - signal_line
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """True Range mulai bar ke-2 (butuh close sebelumnya); panjang n - 1."""
+    h, l, pc = high[..., 1:], low[..., 1:], close[..., :-1]
+    return np.maximum(h - l, np.maximum(np.abs(h - pc), np.abs(l - pc)))
+
+
+def atr_series(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+    """ATR Wilder sejajar dengan bar (NaN untuk `period` bar pertama)."""
+    close = np.asarray(close, dtype=np.float64)
+    out = np.full(close.shape, np.nan)
+    if close.shape[-1] < period + 1:
+        return out
+    out[..., 1:] = wilder_series(true_range(np.asarray(high, dtype=np.float64),
+                                            np.asarray(low, dtype=np.float64), close), period)
+    return out
+
+
+# ==============================================================
+# INCREMENTAL STATE (O(1) per bar close, untuk stream.py)
+# ==============================================================
+#
+# update(x) memajukan state dengan bar yang sudah close; peek(x) menghitung
+# nilai seandainya x adalah bar berikutnya (dipakai untuk bar yang masih
+# berjalan) tanpa mengubah state. seed(...) mengisi state dari histori
+# memakai fungsi *_series di atas, jadi hasilnya identik dengan versi batch.
+
+class EMAState:
+    """EMA inkremental dengan seed SMA, sama seperti ema_series."""
+
+    def __init__(self, period: int, alpha: Optional[float] = None):
+        self.period = period
+        self.alpha = alpha if alpha is not None else 2.0 / (period + 1)
+        self.count = 0
+        self.value: Optional[float] = None
+        self._warmup_sum = 0.0
+
+    def _series(self, values: np.ndarray) -> np.ndarray:
+        return ema_series(values, self.period)
+
+    def _next(self, x: float) -> Optional[float]:
+        if self.count + 1 < self.period:
+            return None
+        if self.count + 1 == self.period:
+            return (self._warmup_sum + x) / self.period
+        return self.alpha * x + (1.0 - self.alpha) * self.value
+
+    def peek(self, x: float) -> Optional[float]:
+        return self._next(x)
+
+    def update(self, x: float) -> Optional[float]:
+        self.value = self._next(x)
+        if self.count < self.period:
+            self._warmup_sum += x
+        self.count += 1
+        return self.value
+
+    def seed(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        self.__init__(self.period, self.alpha)
+        if len(values) < self.period:
+            for v in values:
+                self.update(float(v))
+            return
+        self.count = len(values)
+        self.value = float(self._series(values)[-1])
+
+
+class WilderState(EMAState):
+    """Smoothing Wilder inkremental (alpha = 1/period), sama seperti wilder_series."""
+
+    def __init__(self, period: int, alpha: Optional[float] = None):
+        super().__init__(period, 1.0 / period)
+
+    def _series(self, values: np.ndarray) -> np.ndarray:
+        return wilder_series(values, self.period)
+
+
+def _rsi_value(avg_gain: Optional[float], avg_loss: Optional[float]) -> Optional[float]:
+    if avg_gain is None or avg_loss is None:
+        return None
+    if avg_loss == 0:
+        return 100.0 if avg_gain > 0 else 50.0
+    return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+
+class RSIState:
+    """RSI Wilder inkremental."""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.gain = WilderState(period)
+        self.loss = WilderState(period)
+        self.prev_close: Optional[float] = None
+
+    def peek(self, close: float) -> Optional[float]:
+        if self.prev_close is None:
+            return None
+        d = close - self.prev_close
+        return _rsi_value(self.gain.peek(max(d, 0.0)), self.loss.peek(max(-d, 0.0)))
+
+    def update(self, close: float) -> Optional[float]:
+        if self.prev_close is None:
+            self.prev_close = close
+            return None
+        d = close - self.prev_close
+        self.prev_close = close
+        return _rsi_value(self.gain.update(max(d, 0.0)), self.loss.update(max(-d, 0.0)))
+
+    def seed(self, closes: np.ndarray) -> None:
+        closes = np.asarray(closes, dtype=np.float64)
+        deltas = np.diff(closes)
+        self.gain.seed(np.maximum(deltas, 0.0))
+        self.loss.seed(np.maximum(-deltas, 0.0))
+        self.prev_close = float(closes[-1]) if len(closes) else None
+
+
+class MACDState:
+    """MACD inkremental: (line, signal, histogram) per bar."""
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast = EMAState(fast)
+        self.slow = EMAState(slow)
+        self.signal = EMAState(signal)
+
+    @staticmethod
+    def _combine(f: Optional[float], s: Optional[float], signal: EMAState,
+                 commit: bool) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        if f is None or s is None:
+            return None, None, None
+        line = f - s
+        sig = signal.update(line) if commit else signal.peek(line)
+        return line, sig, (line - sig if sig is not None else None)
+
+    def peek(self, close: float) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        return self._combine(self.fast.peek(close), self.slow.peek(close), self.signal, commit=False)
+
+    def update(self, close: float) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        return self._combine(self.fast.update(close), self.slow.update(close), self.signal, commit=True)
+
+    def seed(self, closes: np.ndarray) -> None:
+        closes = np.asarray(closes, dtype=np.float64)
+        self.fast.seed(closes)
+        self.slow.seed(closes)
+        slow = self.slow.period
+        line = ema_series(closes, self.fast.period) - ema_series(closes, slow)
+        self.signal.seed(line[slow - 1:] if len(closes) >= slow else np.empty(0))
+
+
+class ATRState:
+    """ATR Wilder inkremental."""
+
+    def __init__(self, period: int = 14):
+        self.tr = WilderState(period)
+        self.prev_close: Optional[float] = None
+
+    def _true_range(self, high: float, low: float) -> float:
+        pc = self.prev_close
+        return max(high - low, abs(high - pc), abs(low - pc))
+
+    def peek(self, high: float, low: float, close: float) -> Optional[float]:
+        if self.prev_close is None:
+            return None
+        return self.tr.peek(self._true_range(high, low))
+
+    def update(self, high: float, low: float, close: float) -> Optional[float]:
+        value = None if self.prev_close is None else self.tr.update(self._true_range(high, low))
+        self.prev_close = close
+        return value
+
+    def seed(self, high: np.ndarray, low: np.ndarray, close: np.ndarray) -> None:
+        close = np.asarray(close, dtype=np.float64)
+        self.tr.seed(true_range(np.asarray(high, dtype=np.float64), np.asarray(low, dtype=np.float64), close)
+                     if len(close) > 1 else np.empty(0))
+        self.prev_close = float(close[-1]) if len(close) else None
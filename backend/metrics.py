@@ -0,0 +1,369 @@
+# metrics.py (Instrumentasi: timer per tahap, counter, histogram, format Prometheus, sampling profiler)
+#
+# Semua metrik terdaftar di REGISTRY dan di-render oleh route /metrics dalam format
+# teks Prometheus (text/plain; version=0.0.4). Observasi hanya berupa bisect + tambah
+# angka di bawah lock, jadi aman dipanggil di jalur panas /analyze.
+import os
+import sys
+import time
+import uuid
+import bisect
+import logging
+import threading
+from collections import Counter as Tally, OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+logger = logging.getLogger("HybridAnalyzerV8")
+
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", 0.005))   # Jarak antar sampel profiler (detik)
+PROFILE_MAX_ACTIVE = int(os.getenv("PROFILE_MAX_ACTIVE", 2))     # Profil bersamaan; 0 = profiler mati
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", 20))                # Profil terakhir yang disimpan
+# User id (dipisah koma) yang boleh memprofil request dengan ?profile=1; kosong = profiler mati
+PROFILE_USERS = frozenset(u.strip() for u in os.getenv("PROFILE_USERS", "").split(",") if u.strip())
+
+# Detik; cukup rapat di bawah 100 ms (indikator, cache hit) dan sampai FETCH_TIMEOUT
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[Any], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+# ==============================================================
+# METRIC TYPES
+# ==============================================================
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple:
+        return tuple(labels.get(n, "") for n in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in items]
+
+
+class Histogram(Metric):
+    """Histogram kumulatif ala Prometheus (bucket `le`, _sum, _count) per kombinasi label"""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple, List] = {}   # key -> [counts per bucket (+Inf terakhir), sum]
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def summary(self, **labels) -> Dict[str, float]:
+        """count, sum dan perkiraan p50/p95/p99 (batas atas bucket) untuk satu seri"""
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            counts, total = (list(series[0]), series[1]) if series else ([0] * (len(self.buckets) + 1), 0.0)
+        n = sum(counts)
+        out = {"count": n, "sum": total}
+        bounds = self.buckets + (float("inf"),)
+        for q in (0.5, 0.95, 0.99):
+            seen, rank = 0, q * n
+            for bound, c in zip(bounds, counts):
+                seen += c
+                if n and seen >= rank:
+                    out[f"p{int(q * 100)}"] = bound
+                    break
+        return out
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v[0]), v[1]) for k, v in self._series.items())
+        lines = []
+        bounds = self.buckets + (float("inf"),)
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, c in zip(bounds, counts):
+                cumulative += c
+                le = 'le="%s"' % _number(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Gauge(Metric):
+    """Nilai dibaca saat scrape dari callback: angka, atau dict {tuple label: angka}"""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, fn: Callable[[], Any], labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self.fn = fn
+
+    def samples(self) -> List[str]:
+        try:
+            value = self.fn()
+        except Exception as e:
+            logger.warning(f"Gauge {self.name} failed: {e}")
+            return []
+        if value is None:
+            return []
+        if not isinstance(value, dict):
+            return [f"{self.name} {_number(value)}"]
+        return [f"{self.name}{_labels(self.labelnames, k if isinstance(k, tuple) else (k,))} {_number(v)}"
+                for k, v in sorted(value.items())]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: "OrderedDict[str, Metric]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _register(self, metric: Metric) -> Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None and not isinstance(metric, Gauge):
+                return existing   # get-or-create: modul boleh di-import ulang (benchmark, async_app)
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name: str, help: str, fn: Callable[[], Any], labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help, fn, labelnames))
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(m.render() for m in metrics) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# ==============================================================
+# STAGE TIMERS
+# ==============================================================
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "analyzer_stage_seconds", "Durasi tiap tahap analisa (fetch, indikator, SMC, DB)", ("stage",))
+
+
+class stage:
+    """with stage("order_block"): ... -> analyzer_stage_seconds{stage="order_block"}
+    (kelas, bukan @contextmanager: tanpa generator, lebih murah per blok)"""
+    __slots__ = ("name", "started")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self) -> "stage":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        STAGE_SECONDS.observe(time.perf_counter() - self.started, stage=self.name)
+
+
+def timed(name: str) -> Callable:
+    """Decorator versi stage() untuk satu fungsi"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                STAGE_SECONDS.observe(time.perf_counter() - started, stage=name)
+        return wrapper
+    return decorator
+
+
+# ==============================================================
+# SAMPLING PROFILER
+# ==============================================================
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class SamplingProfiler:
+    """Ambil stack thread target setiap `interval` detik (sys._current_frames), hasilnya
+    collapsed stacks ("a;b;c <jumlah>") yang bisa langsung dibaca flamegraph.pl / speedscope.
+
+    Target: `thread_ids` ditambah thread yang namanya berawalan `thread_prefixes`
+    (misal "fetch" untuk pool fetch exchange). Thread pool dipakai bersama, jadi
+    di bawah beban profil ikut berisi request lain.
+    """
+
+    def __init__(self, interval: float = PROFILE_INTERVAL, thread_ids: Iterable[int] = (),
+                 thread_prefixes: Sequence[str] = (), max_depth: int = 64):
+        self.interval = interval
+        self.thread_ids: Set[int] = set(thread_ids)
+        self.thread_prefixes = tuple(thread_prefixes)
+        self.max_depth = max_depth
+        self.stacks: Tally = Tally()
+        self.samples = 0
+        self.started = 0.0
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _targets(self) -> Dict[int, str]:
+        targets = {}
+        for t in threading.enumerate():
+            if t.ident in self.thread_ids or (self.thread_prefixes and t.name.startswith(self.thread_prefixes)):
+                targets[t.ident] = t.name
+        return targets
+
+    def _sample(self) -> None:
+        me = threading.get_ident()
+        targets = self._targets()
+        for ident, frame in sys._current_frames().items():
+            if ident == me or ident not in targets:
+                continue
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.append(targets[ident].split("_")[0])
+            self.stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self) -> "SamplingProfiler":
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> "SamplingProfiler":
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.elapsed = time.perf_counter() - self.started
+        return self
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
+
+
+class ProfileStore:
+    """Batasi profiler aktif dan simpan `keep` hasil terakhir untuk /debug/profile/<id>.
+    Hanya user di `users` yang boleh memprofil, dan profil hanya bisa dibaca pemiliknya."""
+
+    def __init__(self, max_active: int = PROFILE_MAX_ACTIVE, keep: int = PROFILE_KEEP,
+                 users: Iterable[Any] = PROFILE_USERS):
+        self.max_active = max_active
+        self.keep = keep
+        self.users = frozenset(str(u) for u in users)
+        self._active = 0
+        self._profiles: "OrderedDict[str, Tuple[str, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def allowed(self, user_id: Any) -> bool:
+        return user_id is not None and str(user_id) in self.users
+
+    def start(self, user_id: Any = None, **kwargs) -> Optional[SamplingProfiler]:
+        """Profiler baru yang sudah berjalan, atau None jika user tidak diizinkan atau slot penuh"""
+        if not self.allowed(user_id):
+            return None
+        with self._lock:
+            if self._active >= self.max_active:
+                return None
+            self._active += 1
+        return SamplingProfiler(**kwargs).start()
+
+    def finish(self, profiler: SamplingProfiler, label: str = "", user_id: Any = None) -> str:
+        profiler.stop()
+        profile_id = uuid.uuid4().hex[:12]
+        header = f"# {label} samples={profiler.samples} interval={profiler.interval}s elapsed={profiler.elapsed:.3f}s\n"
+        with self._lock:
+            self._active -= 1
+            self._profiles[profile_id] = (str(user_id), header + profiler.collapsed())
+            while len(self._profiles) > self.keep:
+                self._profiles.popitem(last=False)
+        return profile_id
+
+    def get(self, profile_id: str, user_id: Any = None) -> Optional[str]:
+        """Profil milik `user_id`, atau None (tidak ada / milik user lain)"""
+        with self._lock:
+            item = self._profiles.get(profile_id)
+        if item is None or not self.allowed(user_id) or item[0] != str(user_id):
+            return None
+        return item[1]
+
+
+profiles = ProfileStore()
@@ -0,0 +1,131 @@
+# migrate.py (Menjalankan file SQL di migrations/ secara berurutan, sekali per database)
+#
+#   cd backend && python migrate.py            # terapkan migrasi yang belum jalan
+#   cd backend && python migrate.py --status   # lihat status
+#
+# DDL MySQL (CREATE/ALTER/DROP) di-commit implisit, jadi rollback tidak membatalkan migrasi
+# yang gagal di tengah. Karena itu setiap migrasi harus aman diulang dari awal: file SQL
+# memakai IF NOT EXISTS / DROP ... IF EXISTS / upsert / UPDATE dengan guard, dan ADD INDEX yang sudah ada di
+# information_schema.statistics dibuang dari ALTER TABLE sebelum dijalankan.
+import os
+import re
+import sys
+import argparse
+from typing import Callable, List, Optional, Set
+
+from db import connect_mysql
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+
+def migration_files() -> List[str]:
+    return sorted(f for f in os.listdir(MIGRATIONS_DIR) if f.endswith(".sql"))
+
+
+def split_statements(sql: str) -> List[str]:
+    """Pisahkan per ';' setelah membuang komentar baris (--)"""
+    lines = [line for line in sql.splitlines() if not line.strip().startswith("--")]
+    return [s.strip() for s in "\n".join(lines).split(";") if s.strip()]
+
+
+ALTER_TABLE = re.compile(r"^\s*ALTER\s+TABLE\s+`?(\w+)`?\s+(.*)$", re.I | re.S)
+ADD_INDEX = re.compile(r"^\s*ADD\s+(?:UNIQUE\s+)?(?:INDEX|KEY)\s+`?(\w+)`?", re.I)
+ALTER_OPTION = re.compile(r"^\s*(?:ALGORITHM|LOCK)\s*=", re.I)
+
+
+def split_clauses(body: str) -> List[str]:
+    """Klausa ALTER TABLE dipisah per koma di luar kurung"""
+    clauses, depth, start = [], 0, 0
+    for i, ch in enumerate(body):
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            clauses.append(body[start:i].strip())
+            start = i + 1
+    clauses.append(body[start:].strip())
+    return [c for c in clauses if c]
+
+
+def without_existing_indexes(statement: str, indexes: Callable[[str], Set[str]]) -> Optional[str]:
+    """ALTER TABLE ... ADD INDEX tanpa index yang sudah ada; None jika tidak ada yang tersisa.
+    Statement lain dikembalikan apa adanya."""
+    match = ALTER_TABLE.match(statement)
+    if not match:
+        return statement
+    table, clauses = match.group(1), split_clauses(match.group(2))
+    existing = indexes(table)
+    kept = [c for c in clauses if not (ADD_INDEX.match(c) and ADD_INDEX.match(c).group(1) in existing)]
+    if len(kept) == len(clauses):
+        return statement
+    if all(ALTER_OPTION.match(c) for c in kept):
+        return None
+    return f"ALTER TABLE {table}\n    " + ",\n    ".join(kept)
+
+
+def table_indexes(cursor) -> Callable[[str], Set[str]]:
+    def indexes(table: str) -> Set[str]:
+        cursor.execute("SELECT DISTINCT index_name FROM information_schema.statistics "
+                       "WHERE table_schema = DATABASE() AND table_name = %s", (table,))
+        return {row[0] for row in cursor.fetchall()}
+    return indexes
+
+
+def apply_migration(conn, cursor, name: str, statements: List[str]) -> int:
+    """Jalankan satu migrasi lalu catat di schema_migrations; return jumlah statement yang dilewati"""
+    indexes = table_indexes(cursor)
+    skipped = 0
+    for statement in statements:
+        statement = without_existing_indexes(statement, indexes)
+        if statement is None:
+            skipped += 1
+            continue
+        cursor.execute(statement)
+    cursor.execute("INSERT INTO schema_migrations (name) VALUES (%s)", (name,))
+    conn.commit()
+    return skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Jalankan migrasi skema database")
+    parser.add_argument("--status", action="store_true")
+    args = parser.parse_args()
+
+    conn = connect_mysql()
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            name VARCHAR(128) NOT NULL PRIMARY KEY,
+            applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("SELECT name FROM schema_migrations")
+    applied = {row[0] for row in cursor.fetchall()}
+
+    pending = [f for f in migration_files() if f not in applied]
+    if args.status:
+        for name in migration_files():
+            print(f"{'applied' if name in applied else 'pending'}  {name}")
+        return
+
+    for name in pending:
+        with open(os.path.join(MIGRATIONS_DIR, name)) as f:
+            statements = split_statements(f.read())
+        print(f"Applying {name} ({len(statements)} statements)...")
+        try:
+            skipped = apply_migration(conn, cursor, name, statements)
+        except Exception as e:
+            conn.rollback()   # Hanya DML yang belum di-commit; DDL yang sudah jalan tetap (migrasi aman diulang)
+            print(f"Failed on {name}: {e}")
+            sys.exit(1)
+        if skipped:
+            print(f"  {skipped} statement(s) skipped: indexes already exist")
+
+    print("Up to date." if not pending else f"Applied {len(pending)} migration(s).")
+    cursor.close()
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
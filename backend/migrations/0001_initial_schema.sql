@@ -0,0 +1,35 @@
+-- Skema dasar yang dipakai hybrid_analyzer_nofilter.py.
+-- IF NOT EXISTS: aman dijalankan di database yang tabelnya sudah dibuat manual.
+
+CREATE TABLE IF NOT EXISTS users (
+    id INT UNSIGNED NOT NULL AUTO_INCREMENT,
+    username VARCHAR(64) NOT NULL,
+    password VARCHAR(255) NOT NULL,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id),
+    UNIQUE KEY uq_users_username (username)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS analyses (
+    id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+    user_id INT UNSIGNED NOT NULL,
+    coin_name VARCHAR(20) NOT NULL,
+    entry_price DOUBLE NOT NULL,
+    market_structure_1h VARCHAR(16) NOT NULL,
+    market_structure_4h VARCHAR(16) NOT NULL,
+    rsi_1h DOUBLE NULL,
+    macd_1h DOUBLE NULL,
+    funding_rate DOUBLE NULL,
+    long_short_ratio DOUBLE NULL,
+    volatility_prediction VARCHAR(32) NULL,
+    recommendation VARCHAR(64) NOT NULL,
+    entry DOUBLE NULL,
+    sl DOUBLE NULL,
+    tp1 DOUBLE NULL,
+    rrr DOUBLE NULL,
+    position_size_units BIGINT NULL,
+    ob_type VARCHAR(16) NULL,
+    status_entry VARCHAR(16) NOT NULL DEFAULT 'no_entry',
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,11 @@
+-- Index komposit untuk query panas:
+--   cooldown /analyze : WHERE user_id = ? AND coin_name = ? ORDER BY created_at DESC LIMIT 1
+--   /history          : WHERE user_id = ? ORDER BY created_at DESC LIMIT n
+--   warm-up cooldown  : WHERE created_at >= ? GROUP BY user_id, coin_name
+-- Online DDL (INPLACE, LOCK=NONE) supaya tabel besar tetap bisa ditulis selama build index.
+
+ALTER TABLE analyses
+    ADD INDEX idx_analyses_user_coin_created (user_id, coin_name, created_at),
+    ADD INDEX idx_analyses_user_created (user_id, created_at),
+    ADD INDEX idx_analyses_created (created_at),
+    ALGORITHM=INPLACE, LOCK=NONE;
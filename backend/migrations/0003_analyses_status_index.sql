@@ -0,0 +1,7 @@
+-- Index untuk resolver outcome (outcomes.py):
+--   WHERE status_entry IN ('no_entry', 'filled') AND id > ? ORDER BY id LIMIT n
+-- Baris yang sudah TP/SL/expired tidak ikut dipindai, jadi biaya siklus mengikuti jumlah analisa terbuka.
+
+ALTER TABLE analyses
+    ADD INDEX idx_analyses_status_id (status_entry, id),
+    ALGORITHM=INPLACE, LOCK=NONE;
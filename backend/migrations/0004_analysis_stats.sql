@@ -0,0 +1,95 @@
+-- Ringkasan per (user, koin) untuk /stats, dijaga trigger di setiap INSERT/UPDATE/DELETE
+-- analyses: /stats membaca satu baris per koin, bukan memindai semua analisa user.
+-- Trigger satu statement (tanpa BEGIN ... END) supaya bisa dipisah migrate.py per ';'.
+-- Jika binlog aktif, user migrasi perlu TRIGGER privilege (+ log_bin_trust_function_creators).
+
+CREATE TABLE IF NOT EXISTS analysis_stats (
+    user_id INT UNSIGNED NOT NULL,
+    coin_name VARCHAR(20) NOT NULL,
+    total BIGINT NOT NULL DEFAULT 0,
+    with_levels BIGINT NOT NULL DEFAULT 0,
+    no_entry BIGINT NOT NULL DEFAULT 0,
+    filled BIGINT NOT NULL DEFAULT 0,
+    expired BIGINT NOT NULL DEFAULT 0,
+    tp BIGINT NOT NULL DEFAULT 0,
+    sl BIGINT NOT NULL DEFAULT 0,
+    rrr_sum DOUBLE NOT NULL DEFAULT 0,
+    rrr_count BIGINT NOT NULL DEFAULT 0,
+    last_at DATETIME NULL,
+    PRIMARY KEY (user_id, coin_name)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+DROP TRIGGER IF EXISTS trg_analyses_stats_insert;
+DROP TRIGGER IF EXISTS trg_analyses_stats_update;
+DROP TRIGGER IF EXISTS trg_analyses_stats_delete;
+
+CREATE TRIGGER trg_analyses_stats_insert AFTER INSERT ON analyses FOR EACH ROW
+    INSERT INTO analysis_stats (user_id, coin_name, total, with_levels, no_entry, filled, expired, tp, sl,
+                                rrr_sum, rrr_count, last_at)
+    VALUES (NEW.user_id, NEW.coin_name, 1,
+            NEW.entry IS NOT NULL AND NEW.sl IS NOT NULL AND NEW.tp1 IS NOT NULL,
+            NEW.status_entry = 'no_entry', NEW.status_entry = 'filled', NEW.status_entry = 'expired',
+            NEW.status_entry = 'TP', NEW.status_entry = 'SL',
+            IFNULL(NEW.rrr, 0), NEW.rrr IS NOT NULL, NEW.created_at)
+    ON DUPLICATE KEY UPDATE
+        total = total + 1,
+        with_levels = with_levels + VALUES(with_levels),
+        no_entry = no_entry + VALUES(no_entry),
+        filled = filled + VALUES(filled),
+        expired = expired + VALUES(expired),
+        tp = tp + VALUES(tp),
+        sl = sl + VALUES(sl),
+        rrr_sum = rrr_sum + VALUES(rrr_sum),
+        rrr_count = rrr_count + VALUES(rrr_count),
+        last_at = GREATEST(IFNULL(last_at, VALUES(last_at)), VALUES(last_at));
+
+-- Aplikasi hanya mengubah status_entry (/update_status, resolver outcome)
+CREATE TRIGGER trg_analyses_stats_update AFTER UPDATE ON analyses FOR EACH ROW
+    UPDATE analysis_stats SET
+        no_entry = no_entry + (NEW.status_entry = 'no_entry') - (OLD.status_entry = 'no_entry'),
+        filled = filled + (NEW.status_entry = 'filled') - (OLD.status_entry = 'filled'),
+        expired = expired + (NEW.status_entry = 'expired') - (OLD.status_entry = 'expired'),
+        tp = tp + (NEW.status_entry = 'TP') - (OLD.status_entry = 'TP'),
+        sl = sl + (NEW.status_entry = 'SL') - (OLD.status_entry = 'SL')
+    WHERE user_id = NEW.user_id AND coin_name = NEW.coin_name;
+
+CREATE TRIGGER trg_analyses_stats_delete AFTER DELETE ON analyses FOR EACH ROW
+    UPDATE analysis_stats SET
+        total = total - 1,
+        with_levels = with_levels - (OLD.entry IS NOT NULL AND OLD.sl IS NOT NULL AND OLD.tp1 IS NOT NULL),
+        no_entry = no_entry - (OLD.status_entry = 'no_entry'),
+        filled = filled - (OLD.status_entry = 'filled'),
+        expired = expired - (OLD.status_entry = 'expired'),
+        tp = tp - (OLD.status_entry = 'TP'),
+        sl = sl - (OLD.status_entry = 'SL'),
+        rrr_sum = rrr_sum - IFNULL(OLD.rrr, 0),
+        rrr_count = rrr_count - (OLD.rrr IS NOT NULL)
+    WHERE user_id = OLD.user_id AND coin_name = OLD.coin_name;
+
+-- Isi awal dari data yang sudah ada (nilai di-set, bukan ditambah, jadi aman diulang)
+INSERT INTO analysis_stats (user_id, coin_name, total, with_levels, no_entry, filled, expired, tp, sl,
+                            rrr_sum, rrr_count, last_at)
+SELECT user_id, coin_name, COUNT(*),
+       SUM(entry IS NOT NULL AND sl IS NOT NULL AND tp1 IS NOT NULL),
+       SUM(status_entry = 'no_entry'), SUM(status_entry = 'filled'), SUM(status_entry = 'expired'),
+       SUM(status_entry = 'TP'), SUM(status_entry = 'SL'),
+       IFNULL(SUM(rrr), 0), COUNT(rrr), MAX(created_at)
+FROM analyses
+GROUP BY user_id, coin_name
+ON DUPLICATE KEY UPDATE
+    total = VALUES(total),
+    with_levels = VALUES(with_levels),
+    no_entry = VALUES(no_entry),
+    filled = VALUES(filled),
+    expired = VALUES(expired),
+    tp = VALUES(tp),
+    sl = VALUES(sl),
+    rrr_sum = VALUES(rrr_sum),
+    rrr_count = VALUES(rrr_count),
+    last_at = VALUES(last_at);
+
+-- /history?status=...: WHERE user_id = ? AND status_entry = ? ORDER BY created_at DESC, id DESC
+-- (filter coin memakai idx_analyses_user_coin_created; id ikut di setiap index sekunder InnoDB)
+ALTER TABLE analyses
+    ADD INDEX idx_analyses_user_status_created (user_id, status_entry, created_at),
+    ALGORITHM=INPLACE, LOCK=NONE;
@@ -0,0 +1,25 @@
+-- analyses.created_at dalam UTC. Dulu kolom diisi DEFAULT CURRENT_TIMESTAMP (time zone session MySQL);
+-- aplikasi sekarang menulis created_at UTC sendiri dan membacanya sebagai UTC (outcomes.utc_epoch).
+-- Baris lama dikonversi dari time zone session migrasi, yang sama dengan koneksi aplikasi selama
+-- keduanya tidak mengubah time_zone (zona bernama butuh tabel mysql.time_zone_*).
+-- Baris yang ditulis versi aplikasi baru sebelum migrasi ini jalan sudah UTC dan ikut tergeser,
+-- jadi jalankan migrasi ini bersamaan dengan deploy.
+--
+-- UPDATE tidak idempoten: hanya jalan selama default kolom masih CURRENT_TIMESTAMP. ALTER di akhir
+-- mengganti default dan commit implisit, jadi rerun setelah gagal tidak mengonversi dua kali.
+-- Trigger update analyses ikut jalan per baris tapi tidak mengubah apa pun (status_entry tetap).
+
+UPDATE analysis_stats SET last_at = CONVERT_TZ(last_at, @@session.time_zone, '+00:00')
+WHERE last_at IS NOT NULL
+  AND (SELECT LOWER(column_default) FROM information_schema.columns
+       WHERE table_schema = DATABASE() AND table_name = 'analyses' AND column_name = 'created_at')
+      LIKE 'current_timestamp%';
+
+UPDATE analyses SET created_at = CONVERT_TZ(created_at, @@session.time_zone, '+00:00')
+WHERE (SELECT LOWER(column_default) FROM information_schema.columns
+       WHERE table_schema = DATABASE() AND table_name = 'analyses' AND column_name = 'created_at')
+      LIKE 'current_timestamp%';
+
+-- Hanya metadata (tanpa rebuild tabel); default ekspresi butuh MySQL 8.0.13+
+ALTER TABLE analyses
+    ALTER COLUMN created_at SET DEFAULT (UTC_TIMESTAMP());
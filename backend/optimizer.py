@@ -0,0 +1,246 @@
+# optimizer.py (Parameter sweep StrategyConfig lewat backtest, paralel di semua core)
+#
+# CLI:
+#   cd backend && python optimizer.py --data data/*_1h.csv --grid min_rrr=1.5,2,2.5 --grid atr_multiplier=1.5,2,3
+#   cd backend && python optimizer.py --data data/*_1h.csv --random 500 --range atr_period=10:30 \
+#       --range distance_tolerance=0.02:0.08 --checkpoint sweep.jsonl
+#
+# Candle setiap symbol ditulis sekali ke file .npy lalu dibuka sebagai memmap oleh
+# setiap worker (initializer), jadi task hanya mengirim dict parameter. Setiap hasil
+# ditambahkan ke file checkpoint JSONL; menjalankan ulang perintah yang sama
+# melanjutkan dari parameter yang belum dievaluasi.
+import os
+import json
+import time
+import random
+import shutil
+import logging
+import argparse
+import itertools
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import fields
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from backtest import load_ohlcv, run_backtest
+from candles import Candles, FIELDS
+from strategy import DEFAULT_STRATEGY, StrategyConfig
+
+logger = logging.getLogger("HybridAnalyzerV8")
+
+_INT_FIELDS = {f.name for f in fields(StrategyConfig) if f.type is int}
+
+# Diisi _init_worker di setiap proses worker: symbol -> Candles (view memmap)
+_CANDLES: Dict[str, Candles] = {}
+
+
+# ==============================================================
+# PARAMETER SPACE
+# ==============================================================
+
+def _check_field(name: str) -> None:
+    if name not in DEFAULT_STRATEGY.to_dict():
+        raise ValueError(f"Unknown StrategyConfig field: {name}")
+
+
+def parse_grid(specs: Iterable[str]) -> Dict[str, List[Any]]:
+    """["min_rrr=1.5,2,2.5", ...] -> {"min_rrr": [1.5, 2.0, 2.5]}"""
+    grid = {}
+    for spec in specs:
+        name, values = spec.split("=", 1)
+        _check_field(name)
+        cast = int if name in _INT_FIELDS else float
+        grid[name] = [cast(v) for v in values.split(",")]
+    return grid
+
+
+def parse_ranges(specs: Iterable[str]) -> Dict[str, tuple]:
+    """["atr_period=10:30", ...] -> {"atr_period": (10, 30)} (batas inklusif)"""
+    ranges = {}
+    for spec in specs:
+        name, bounds = spec.split("=", 1)
+        _check_field(name)
+        lo, hi = bounds.split(":")
+        cast = int if name in _INT_FIELDS else float
+        ranges[name] = (cast(lo), cast(hi))
+    return ranges
+
+
+def grid_candidates(grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+
+def random_candidates(ranges: Dict[str, tuple], n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Deterministik untuk seed yang sama, jadi resume menghasilkan kandidat yang sama"""
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        out.append({name: (rng.randint(lo, hi) if name in _INT_FIELDS else round(rng.uniform(lo, hi), 4))
+                    for name, (lo, hi) in sorted(ranges.items())})
+    return out
+
+
+def param_key(params: Dict[str, Any]) -> str:
+    return json.dumps(params, sort_keys=True)
+
+
+# ==============================================================
+# SHARED ARRAYS & WORKER
+# ==============================================================
+
+def export_arrays(paths: List[str], cache_dir: str) -> Dict[str, str]:
+    """Tulis setiap file OHLCV sebagai blok (6, n) float64 .npy; return symbol -> path"""
+    out = {}
+    for path in paths:
+        symbol = os.path.splitext(os.path.basename(path))[0]
+        candles = load_ohlcv(path)
+        target = os.path.join(cache_dir, f"{symbol}.npy")
+        np.save(target, np.vstack([getattr(candles, f).astype(np.float64) for f in FIELDS]))
+        out[symbol] = target
+    return out
+
+
+def _init_worker(arrays: Dict[str, str]) -> None:
+    _CANDLES.clear()
+    for symbol, path in arrays.items():
+        block = np.load(path, mmap_mode="r")
+        _CANDLES[symbol] = Candles(block[0].astype(np.int64), *(block[k] for k in range(1, len(FIELDS))))
+
+
+def evaluate(params: Dict[str, Any], options: Dict[str, Any]) -> Dict[str, Any]:
+    """Backtest satu set parameter di semua symbol (dijalankan di worker)"""
+    t0 = time.perf_counter()
+    config = StrategyConfig.from_dict(params)
+    per_symbol, r, pnl = {}, [], 0.0
+    for symbol, candles in _CANDLES.items():
+        result = run_backtest(candles, config, **options)
+        s = result["summary"]
+        per_symbol[symbol] = {k: s[k] for k in ("trades", "win_rate", "expectancy_r", "net_pnl", "max_drawdown_pct")}
+        r += [t["r"] for t in result["trades"] if t["outcome"] != "open"]
+        pnl += s["net_pnl"]
+    r = np.array(r)
+    return {
+        "key": param_key(params),
+        "params": params,
+        "trades": len(r),
+        "win_rate": round(float((r > 0).mean()), 4) if len(r) else None,
+        "expectancy_r": round(float(r.mean()), 4) if len(r) else None,
+        "net_pnl": round(pnl, 4),
+        "max_drawdown_pct": max((s["max_drawdown_pct"] for s in per_symbol.values()), default=None),
+        "per_symbol": per_symbol,
+        "elapsed": round(time.perf_counter() - t0, 4),
+    }
+
+
+# ==============================================================
+# SWEEP
+# ==============================================================
+
+def load_checkpoint(path: Optional[str]) -> Dict[str, Dict[str, Any]]:
+    """Hasil yang sudah ada; baris terakhir yang terpotong (proses dibunuh) diabaikan"""
+    done = {}
+    if not path or not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            done[record["key"]] = record
+    return done
+
+
+def optimize(data_paths: List[str], candidates: List[Dict[str, Any]], checkpoint: Optional[str] = None,
+             workers: Optional[int] = None, options: Optional[Dict[str, Any]] = None,
+             progress_every: int = 50) -> List[Dict[str, Any]]:
+    """Evaluasi semua kandidat yang belum ada di checkpoint; return hasil untuk semua kandidat"""
+    options = options or {}
+    workers = workers or os.cpu_count() or 1
+    done = load_checkpoint(checkpoint)
+    todo = [p for p in candidates if param_key(p) not in done]
+    logger.info(f"Optimizer: {len(candidates)} candidates, {len(candidates) - len(todo)} from checkpoint, "
+                f"{len(todo)} to run on {workers} workers")
+
+    cache_dir = tempfile.mkdtemp(prefix="optimizer-")
+    out = open(checkpoint, "a+") if checkpoint else None
+    if out and out.tell():
+        out.seek(out.tell() - 1)
+        if out.read(1) != "\n":
+            out.write("\n")  # tutup baris terpotong supaya hasil berikutnya tidak ikut rusak
+    started = time.time()
+
+    def record(result: Dict[str, Any]) -> None:
+        done[result["key"]] = result
+        if out:
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+        finished = len(done)
+        if progress_every and finished % progress_every == 0:
+            logger.info(f"Optimizer: {finished}/{len(candidates)} done ({time.time() - started:.1f}s)")
+
+    try:
+        if todo:
+            arrays = export_arrays(data_paths, cache_dir)
+            if workers <= 1:
+                _init_worker(arrays)
+                for params in todo:
+                    record(evaluate(params, options))
+            else:
+                with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(arrays,)) as pool:
+                    futures = [pool.submit(evaluate, params, options) for params in todo]
+                    for future in as_completed(futures):
+                        record(future.result())
+    finally:
+        if out:
+            out.close()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    return [done[param_key(p)] for p in candidates if param_key(p) in done]
+
+
+def rank(results: List[Dict[str, Any]], metric: str = "expectancy_r", min_trades: int = 30) -> List[Dict[str, Any]]:
+    """Urutkan menurun berdasarkan `metric`; set dengan trade terlalu sedikit dibuang"""
+    valid = [r for r in results if r["trades"] >= min_trades and r.get(metric) is not None]
+    return sorted(valid, key=lambda r: r[metric], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grid/random search StrategyConfig lewat backtest paralel")
+    parser.add_argument("--data", nargs="+", required=True, help="file OHLCV 1h (.csv/.parquet), satu per symbol")
+    parser.add_argument("--grid", action="append", default=[], metavar="FIELD=V1,V2,...")
+    parser.add_argument("--random", type=int, default=0, help="jumlah sampel random search (pakai --range)")
+    parser.add_argument("--range", action="append", default=[], metavar="FIELD=LO:HI")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="default: semua core")
+    parser.add_argument("--checkpoint", help="file JSONL hasil; dipakai ulang untuk resume")
+    parser.add_argument("--metric", default="expectancy_r", choices=["expectancy_r", "win_rate", "net_pnl"])
+    parser.add_argument("--min-trades", type=int, default=30)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--tp", choices=["tp1", "tp2"], default="tp1")
+    parser.add_argument("--ttl", type=int, default=24)
+    parser.add_argument("--fee", type=float, default=0.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    if args.random:
+        candidates = random_candidates(parse_ranges(args.range), args.random, args.seed)
+    elif args.grid:
+        candidates = grid_candidates(parse_grid(args.grid))
+    else:
+        parser.error("pakai --grid atau --random dengan --range")
+
+    results = optimize(args.data, candidates, args.checkpoint, args.workers,
+                       {"tp": args.tp, "order_ttl": args.ttl, "fee_rate": args.fee})
+    ranked = rank(results, args.metric, args.min_trades)
+    print(f"{len(results)} parameter sets evaluated, {len(ranked)} with >= {args.min_trades} trades")
+    for r in ranked[:args.top]:
+        print(f"{args.metric} {r[args.metric]:<10} trades {r['trades']:<6} win {r['win_rate']:<7} "
+              f"maxDD {r['max_drawdown_pct']:<8} {r['params']}")
+
+
+if __name__ == "__main__":
+    main()
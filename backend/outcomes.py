@@ -0,0 +1,362 @@
+# outcomes.py (Resolver otomatis status_entry: entry terisi? SL atau TP1 yang kena duluan?)
+#
+# Menggantikan update manual lewat /update_status (route itu tetap ada sebagai override).
+# Setiap siklus: analisa yang masih terbuka (no_entry / filled) dibaca per halaman keyset
+# (id), dikelompokkan per koin, candle sejak created_at tertua dimuat SEKALI per koin,
+# lalu semua baris satu koin diputuskan sekaligus dengan perbandingan numpy. Hasil
+# ditulis per status dengan UPDATE ... WHERE id IN (...), jadi jumlah query dan fetch
+# bergantung pada jumlah koin, bukan jumlah baris.
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from candle_cache import timeframe_ms
+from candles import Candles
+
+logger = logging.getLogger("HybridAnalyzerV8")
+
+OUTCOME_INTERVAL_SECONDS = float(os.getenv("OUTCOME_INTERVAL_SECONDS", 300))
+OUTCOME_TIMEFRAME = os.getenv("OUTCOME_TIMEFRAME", "1h")
+OUTCOME_ORDER_TTL_BARS = int(os.getenv("OUTCOME_ORDER_TTL_BARS", 24))   # Sama dengan order_ttl backtest; 0 = tidak expire
+OUTCOME_MAX_AGE_DAYS = float(os.getenv("OUTCOME_MAX_AGE_DAYS", 30))     # Analisa lebih tua tidak dipantau lagi
+OUTCOME_PAGE_SIZE = int(os.getenv("OUTCOME_PAGE_SIZE", 5000))           # Baris per SELECT
+OUTCOME_UPDATE_CHUNK = int(os.getenv("OUTCOME_UPDATE_CHUNK", 1000))     # id per UPDATE ... IN (...)
+OUTCOME_WORKERS = int(os.getenv("OUTCOME_WORKERS", 4))                  # Koin yang dimuat bersamaan
+OUTCOME_MATRIX_CELLS = 4_000_000      # Batas sel (baris x bar) per blok perbandingan
+
+NO_ENTRY = "no_entry"
+FILLED = "filled"      # Entry tersentuh, SL/TP1 belum
+EXPIRED = "expired"    # Entry tidak tersentuh selama OUTCOME_ORDER_TTL_BARS bar
+TP = "TP"
+SL = "SL"
+
+OPEN_STATUSES = (NO_ENTRY, FILLED)
+OUTCOME_STATUSES = [NO_ENTRY, FILLED, EXPIRED, TP, SL]
+_RANK = {NO_ENTRY: 0, FILLED: 1, EXPIRED: 2, TP: 2, SL: 2}
+
+OPEN_ANALYSES_SQL = """
+    SELECT id, coin_name, entry, sl, tp1, status_entry, created_at
+    FROM analyses
+    WHERE status_entry IN ('no_entry', 'filled')
+      AND id > %s
+      AND created_at >= %s
+      AND entry IS NOT NULL AND sl IS NOT NULL AND tp1 IS NOT NULL
+    ORDER BY id
+    LIMIT %s
+"""
+
+# Status hanya berubah jika baris masih terbuka: status yang diset manual tidak ditimpa
+RESOLVE_SQL = """
+    UPDATE analyses
+    SET status_entry = %s
+    WHERE status_entry IN ('no_entry', 'filled') AND id IN ({ids})
+"""
+
+# analyses.created_at disimpan sebagai DATETIME naif dalam UTC (ditulis aplikasi, lihat
+# analysis_row), bukan waktu lokal host, jadi konversi ke/dari epoch selalu lewat UTC.
+def utc_datetime(epoch: Optional[float] = None) -> datetime:
+    """Epoch detik (default: sekarang) -> datetime naif UTC untuk kolom created_at"""
+    epoch = time.time() if epoch is None else epoch
+    return datetime.fromtimestamp(epoch, timezone.utc).replace(tzinfo=None)
+
+
+def utc_epoch(value: datetime) -> float:
+    """created_at (naif = UTC) -> epoch detik"""
+    return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).timestamp()
+
+
+# (id, coin_name, entry, sl, tp1, status_entry, created_at)
+Row = Tuple[Any, str, float, float, float, str, datetime]
+# select_page(after_id, created_since, limit) -> rows; write([(status, [id, ...]), ...])
+PageLoader = Callable[[int, datetime, int], Sequence[Row]]
+UpdateWriter = Callable[[List[Tuple[str, List[int]]]], None]
+# load(symbol, timeframe, since_ms, now_ms) -> bar close sejak since_ms
+CandleLoader = Callable[[str, str, int, int], Candles]
+# fetch(symbol, timeframe, since, limit) -> list OHLCV ccxt (sama dengan Fetcher candle_store)
+Fetcher = Callable[[str, str, Optional[int], int], Sequence[Sequence[float]]]
+
+
+def resolve_sql(n: int) -> str:
+    return RESOLVE_SQL.format(ids=", ".join(["%s"] * n))
+
+
+# ==============================================================
+# KEPUTUSAN VEKTOR
+# ==============================================================
+
+def first_touch(low: np.ndarray, high: np.ndarray, levels: np.ndarray, starts: np.ndarray,
+                stops: np.ndarray, below: np.ndarray, chunk: int = 16,
+                max_cells: int = OUTCOME_MATRIX_CELLS) -> np.ndarray:
+    """Per baris: index bar pertama di [start, stop) dengan low <= level (below) atau
+    high >= level; -1 jika tidak ada.
+
+    Versi vektor dari _first_hit (backtest.py): semua baris dicek sekaligus per blok
+    bar yang membesar (16, 32, 64, ...); baris yang sudah ketemu keluar dari blok
+    berikutnya, jadi kebanyakan analisa hanya memindai beberapa bar setelah start.
+    """
+    out = np.full(len(levels), -1, dtype=np.int64)
+    rows = np.flatnonzero(starts < stops)
+    last = len(low) - 1
+    offset = 0
+    while len(rows):
+        width = max(1, min(chunk, max_cells // len(rows)))
+        cols = starts[rows, None] + offset + np.arange(width)
+        valid = cols < stops[rows, None]
+        np.minimum(cols, last, out=cols)
+        level = levels[rows, None]
+        down = below[rows]
+        hit = np.empty(cols.shape, dtype=bool)
+        hit[down] = low[cols[down]] <= level[down]
+        hit[~down] = high[cols[~down]] >= level[~down]
+        hit &= valid
+        found = hit.any(axis=1)
+        out[rows[found]] = cols[found, hit[found].argmax(axis=1)]
+        offset += width
+        rows = rows[~found & (starts[rows] + offset < stops[rows])]
+        chunk *= 2
+    return out
+
+
+def resolve(candles: Candles, entry: np.ndarray, sl: np.ndarray, tp: np.ndarray, created_ms: np.ndarray,
+            now_ms: int, timeframe: str = OUTCOME_TIMEFRAME,
+            order_ttl: int = OUTCOME_ORDER_TTL_BARS) -> np.ndarray:
+    """Status setiap analisa satu koin dari bar close `candles` (aturan sama dengan run_backtest).
+
+    - Bar pertama yang dipakai adalah bar yang dibuka setelah created_at (high/low bar
+      berjalan saat analisa dibuat bisa terjadi sebelum analisa).
+    - Fill jika entry tersentuh dalam `order_ttl` bar; jika tidak dan semua bar itu
+      sudah close -> expired.
+    - Di bar fill hanya SL yang dicek; setelahnya SL didahulukan jika SL & TP1
+      tersentuh di bar yang sama (asumsi konservatif).
+    Long/short dari posisi SL terhadap entry.
+    """
+    step = timeframe_ms(timeframe)
+    candles = candles[:int(np.searchsorted(candles.open_time, now_ms - step, side="right"))]
+    status = np.full(len(entry), NO_ENTRY, dtype=object)
+    n = len(candles)
+    if not n or not len(entry):
+        return status
+    low, high = candles.low, candles.high
+    long = sl < entry
+    start = np.searchsorted(candles.open_time, created_ms, side="left")
+    end = np.full(len(entry), n, dtype=np.int64)
+    expiry = np.minimum(start + order_ttl, n) if order_ttl > 0 else end
+
+    fill = first_touch(low, high, entry, start, expiry, below=long)
+    filled = fill >= 0
+    at = np.where(filled, fill, 0)
+    sl_on_fill = filled & np.where(long, low[at] <= sl, high[at] >= sl)
+    after = np.where(filled, fill + 1, n)
+    sl_bar = first_touch(low, high, sl, after, end, below=long)
+    tp_bar = first_touch(low, high, tp, after, end, below=~long)
+
+    status[filled] = FILLED
+    status[filled & (sl_bar >= 0)] = SL
+    status[filled & (tp_bar >= 0) & ((sl_bar < 0) | (tp_bar < sl_bar))] = TP
+    status[sl_on_fill] = SL
+    if order_ttl > 0:
+        status[~filled & (start + order_ttl <= n)] = EXPIRED
+    return status
+
+
+# ==============================================================
+# SUMBER CANDLE
+# ==============================================================
+
+def fetch_closed(fetch: Fetcher, symbol: str, timeframe: str, since: int, now_ms: int,
+                 page: int = 1000) -> Candles:
+    """Bar close sejak `since` dengan paginasi (bar berjalan tidak ikut)"""
+    step = timeframe_ms(timeframe)
+    end = now_ms // step * step
+    pages: List[Candles] = []
+    while since < end:
+        rows = fetch(symbol, timeframe, since, page)
+        chunk = Candles.from_ccxt(rows).since(since) if len(rows) else Candles.empty()
+        chunk = chunk[:int(np.searchsorted(chunk.open_time, end))]
+        if not len(chunk):
+            break
+        pages.append(chunk)
+        since = int(chunk.open_time[-1]) + step
+        if len(rows) < page:
+            break
+    return Candles.concat(pages) if pages else Candles.empty()
+
+
+class CandleHistory:
+    """Bar close per symbol yang disimpan di memori antar siklus (dipakai tanpa candle store).
+
+    Siklus berikutnya hanya mem-fetch bar setelah bar tersimpan terakhir; fetch penuh
+    hanya untuk symbol baru atau jika ada analisa yang lebih tua dari bar pertama.
+    """
+
+    def __init__(self, fetch: Fetcher, page: int = 1000):
+        self.fetch = fetch
+        self.page = page
+        self._bars: Dict[Tuple[str, str], Candles] = {}
+        self._lock = threading.Lock()
+        self.stats = {"full": 0, "incremental": 0}
+
+    def load(self, symbol: str, timeframe: str, since: int, now_ms: int) -> Candles:
+        key = (symbol, timeframe)
+        with self._lock:
+            bars = self._bars.get(key)
+        step = timeframe_ms(timeframe)
+        since = since // step * step
+        if bars is not None and len(bars) and int(bars.open_time[0]) <= since:
+            fresh = fetch_closed(self.fetch, symbol, timeframe, int(bars.open_time[-1]) + step, now_ms, self.page)
+            bars = Candles.concat([bars, fresh]) if len(fresh) else bars
+            self.stats["incremental"] += 1
+        else:
+            bars = fetch_closed(self.fetch, symbol, timeframe, since, now_ms, self.page)
+            self.stats["full"] += 1
+        bars = bars.since(since)
+        with self._lock:
+            self._bars[key] = bars
+        return bars
+
+    def retain(self, symbols) -> None:
+        """Buang histori symbol yang tidak lagi punya analisa terbuka"""
+        keep = set(symbols)
+        with self._lock:
+            for key in [k for k in self._bars if k[0] not in keep]:
+                del self._bars[key]
+
+    def __len__(self) -> int:
+        return len(self._bars)
+
+
+# ==============================================================
+# RESOLVER
+# ==============================================================
+
+class OutcomeResolver:
+    """Thread latar yang menjalankan `run_once` setiap `interval` detik.
+
+    Per siklus: SELECT keyset per `page_size` baris, satu `load` candle per koin
+    (paralel `workers` koin), satu keputusan vektor per koin, lalu semua perubahan
+    ditulis dalam satu transaksi `write` (UPDATE per status per `update_chunk` id).
+    Status hanya bergerak maju: no_entry -> filled -> TP/SL, no_entry -> expired.
+    """
+
+    def __init__(self, select_page: PageLoader, write: UpdateWriter, load: CandleLoader,
+                 timeframe: str = OUTCOME_TIMEFRAME, interval: float = OUTCOME_INTERVAL_SECONDS,
+                 order_ttl: int = OUTCOME_ORDER_TTL_BARS, max_age_days: float = OUTCOME_MAX_AGE_DAYS,
+                 page_size: int = OUTCOME_PAGE_SIZE, update_chunk: int = OUTCOME_UPDATE_CHUNK,
+                 workers: int = OUTCOME_WORKERS, clock: Callable[[], float] = time.time,
+                 retain: Optional[Callable[[List[str]], None]] = None):
+        self.select_page = select_page
+        self.write = write
+        self.load = load
+        self.timeframe = timeframe
+        self.interval = interval
+        self.order_ttl = order_ttl
+        self.max_age_days = max_age_days
+        self.page_size = page_size
+        self.update_chunk = update_chunk
+        self.workers = workers
+        self.clock = clock
+        self.retain = retain
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Any] = {"cycles": 0, "failed": 0, "rows": 0, "coins": 0, "queries": 0,
+                                      "loads": 0, "load_errors": 0, "last_cycle_ms": 0.0,
+                                      "resolved": {s: 0 for s in OUTCOME_STATUSES if s != NO_ENTRY}}
+
+    def open_rows(self, now: float) -> List[Row]:
+        since = utc_datetime(now) - timedelta(days=self.max_age_days)
+        rows: List[Row] = []
+        after = 0
+        while True:
+            page = self.select_page(after, since, self.page_size)
+            self.stats["queries"] += 1
+            rows.extend(page)
+            if len(page) < self.page_size:
+                return rows
+            after = page[-1][0]
+
+    def _resolve_coin(self, coin: str, rows: List[Row], now_ms: int) -> List[Tuple[Any, str]]:
+        created = np.array([int(utc_epoch(r[6]) * 1000) for r in rows], dtype=np.int64)
+        try:
+            candles = self.load(coin + "/USDT", self.timeframe, int(created.min()), now_ms)
+        except Exception as e:
+            logger.warning(f"Outcome resolver: candle {coin} gagal dimuat: {e}")
+            with self._lock:
+                self.stats["load_errors"] += 1
+            return []
+        with self._lock:
+            self.stats["loads"] += 1
+        status = resolve(candles, np.array([r[2] for r in rows], dtype=np.float64),
+                         np.array([r[3] for r in rows], dtype=np.float64),
+                         np.array([r[4] for r in rows], dtype=np.float64),
+                         created, now_ms, self.timeframe, self.order_ttl)
+        return [(r[0], s) for r, s in zip(rows, status.tolist()) if _RANK[s] > _RANK.get(r[5], 0)]
+
+    def run_once(self, now: Optional[float] = None) -> Dict[str, int]:
+        """Satu siklus; return {status: jumlah baris yang berubah}"""
+        now = self.clock() if now is None else now
+        t0 = time.perf_counter()
+        rows = self.open_rows(now)
+        by_coin: Dict[str, List[Row]] = {}
+        for row in rows:
+            by_coin.setdefault(row[1], []).append(row)
+        now_ms = int(now * 1000)
+        changes: Dict[str, List[int]] = {}
+        with ThreadPoolExecutor(max_workers=max(1, self.workers), thread_name_prefix="outcomes") as pool:
+            for resolved in pool.map(lambda item: self._resolve_coin(item[0], item[1], now_ms), by_coin.items()):
+                for row_id, status in resolved:
+                    changes.setdefault(status, []).append(row_id)
+        updates = [(status, ids[i:i + self.update_chunk])
+                   for status, ids in changes.items() for i in range(0, len(ids), self.update_chunk)]
+        if updates:
+            self.write(updates)
+        if self.retain:
+            self.retain([coin + "/USDT" for coin in by_coin])
+        counts = {status: len(ids) for status, ids in changes.items()}
+        with self._lock:
+            self.stats["cycles"] += 1
+            self.stats["rows"] = len(rows)
+            self.stats["coins"] = len(by_coin)
+            self.stats["last_cycle_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+            for status, n in counts.items():
+                self.stats["resolved"][status] += n
+        if counts:
+            logger.info(f"Outcome resolver: {len(rows)} analisa terbuka, {len(by_coin)} koin, diperbarui {counts}")
+        return counts
+
+    # --- Lifecycle ---
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="outcome-resolver", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                with self._lock:
+                    self.stats["failed"] += 1
+                logger.error(f"Outcome resolver cycle failed: {e}")
+            self._stop.wait(self.interval)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Metrik untuk /health"""
+        with self._lock:
+            return dict(self.stats, resolved=dict(self.stats["resolved"]),
+                        running=bool(self._thread and self._thread.is_alive()))
@@ -0,0 +1,149 @@
+# persistence.py (Write-behind queue untuk menyimpan hasil analisa ke DB)
+import time
+import queue
+import atexit
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger("HybridAnalyzerV8")
+
+# execute_batch(rows) menulis banyak baris dalam satu transaksi (executemany + commit)
+BatchExecutor = Callable[[List[Sequence[Any]]], None]
+
+
+class WriteBehindQueue:
+    """Antrian terbatas + worker yang menulis baris secara batch di belakang layar.
+
+    Request hanya memanggil submit() lalu langsung lanjut. Worker mengambil
+    hingga `batch_size` baris atau menunggu paling lama `flush_interval`
+    detik, lalu memanggil `execute_batch` sekali. Jika antrian penuh lebih
+    dari `put_timeout`, baris ditulis langsung di thread pemanggil, satu kali
+    tanpa retry supaya request tidak ikut menunggu saat DB down; jika gagal
+    baris dibuang (stat "dropped"). Batch di worker yang gagal dicoba ulang
+    `max_retries` kali sebelum dibuang (stat "failed"). Data bisa hilang pada
+    dua kondisi itu: keduanya dicatat di log dan /metrics.
+    """
+
+    def __init__(self, execute_batch: BatchExecutor, maxsize: int = 10000, batch_size: int = 500,
+                 flush_interval: float = 0.5, put_timeout: float = 0.05, max_retries: int = 3,
+                 name: str = "db-writer"):
+        self.execute_batch = execute_batch
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.max_retries = max_retries
+        self.name = name
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=maxsize)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "enqueued": 0, "written": 0, "batches": 0, "failed": 0, "dropped": 0, "retries": 0,
+            "overflow_sync_writes": 0, "max_depth": 0, "last_batch_ms": 0.0, "last_batch_rows": 0,
+        }
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def submit(self, row: Sequence[Any]) -> None:
+        """Masukkan satu baris ke antrian (non-blocking kecuali antrian penuh)."""
+        self.start()
+        try:
+            self._queue.put(row, timeout=self.put_timeout)
+        except queue.Full:
+            self._count("overflow_sync_writes")
+            logger.warning(f"{self.name} queue full, writing synchronously")
+            if not self._write([row], retries=0):
+                self._count("dropped")
+            return
+        with self._stats_lock:
+            self._stats["enqueued"] += 1
+            self._stats["max_depth"] = max(self._stats["max_depth"], self._queue.qsize())
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[key] += n
+
+    def _drain(self, first: Sequence[Any]) -> List[Sequence[Any]]:
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: List[Sequence[Any]], retries: Optional[int] = None) -> bool:
+        """Tulis satu batch dengan `retries` percobaan ulang (default max_retries); False jika gagal"""
+        retries = self.max_retries if retries is None else retries
+        for attempt in range(retries + 1):
+            t0 = time.perf_counter()
+            try:
+                self.execute_batch(batch)
+            except Exception as e:
+                logger.error(f"{self.name} batch of {len(batch)} failed (attempt {attempt + 1}): {e}")
+                if attempt < retries:
+                    self._count("retries")
+                    time.sleep(min(0.2 * 2 ** attempt, 2.0))
+                continue
+            with self._stats_lock:
+                self._stats["written"] += len(batch)
+                self._stats["batches"] += 1
+                self._stats["last_batch_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+                self._stats["last_batch_rows"] = len(batch)
+            return True
+        return False
+
+    def _run(self) -> None:
+        while not self._stop.is_set() or not self._queue.empty():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = self._drain(first)
+            if not self._write(batch):
+                self._count("failed", len(batch))
+            for _ in batch:
+                self._queue.task_done()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Tunggu sampai semua baris yang sudah masuk antrian tertulis."""
+        if not self._thread or not self._thread.is_alive():
+            return self._queue.empty()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Flush sisa antrian lalu hentikan worker (dipanggil juga saat proses exit)."""
+        if not self._thread:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.error(f"{self.name} did not drain within {timeout}s, {self._queue.qsize()} rows left")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["depth"] = self._queue.qsize()
+        stats["capacity"] = self._queue.maxsize
+        stats["running"] = bool(self._thread and self._thread.is_alive())
+        return stats
@@ -0,0 +1,159 @@
+# resample.py (Timeframe tinggi dari satu deret base: agregasi vektor + bar parsial inkremental)
+#
+# 4h, 1d (dan 2h, 12h, 1w, ...) diturunkan dari satu deret 1h, jadi satu fetch per koin
+# cukup untuk semua timeframe dan bar antar timeframe selalu konsisten (bar 4h berjalan =
+# agregat bar 1h yang sama dengan yang dipakai analisa 1h).
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from candle_cache import timeframe_ms
+from candles import Candles
+
+RESAMPLE_MAX_SYMBOLS = int(os.getenv("RESAMPLE_MAX_SYMBOLS", 1024))
+
+DAY_MS = 86_400_000
+WEEK_MS = 7 * DAY_MS
+WEEK_OFFSET_MS = 4 * DAY_MS      # Bar 1w Binance dibuka Senin 00:00 UTC; 1970-01-01 adalah Kamis
+
+
+def bucket_start(open_time: np.ndarray, timeframe: str) -> np.ndarray:
+    """open_time bar `timeframe` yang memuat setiap open_time (UTC, selaras dengan bar exchange)"""
+    if timeframe.endswith("M"):
+        raise ValueError(f"Resample ke timeframe bulanan ({timeframe}) tidak didukung")
+    step = timeframe_ms(timeframe)
+    offset = WEEK_OFFSET_MS if step % WEEK_MS == 0 else 0
+    return (open_time - offset) // step * step + offset
+
+
+def resample(candles: Candles, timeframe: str) -> Tuple[Candles, np.ndarray]:
+    """Gabungkan bar ke timeframe lebih tinggi; return (candles, index bucket untuk setiap bar sumber).
+
+    Bar terakhir bisa parsial (bucket belum lengkap), begitu juga bar pertama jika
+    deret sumber dimulai di tengah bucket.
+    """
+    if not len(candles):
+        return candles, np.zeros(0, dtype=np.int64)
+    bucket = bucket_start(candles.open_time, timeframe)
+    is_start = np.r_[True, bucket[1:] != bucket[:-1]]
+    starts = np.flatnonzero(is_start)
+    ends = np.r_[starts[1:], len(candles)] - 1
+    out = Candles(bucket[starts], candles.open[starts],
+                  np.maximum.reduceat(candles.high, starts), np.minimum.reduceat(candles.low, starts),
+                  candles.close[ends], np.add.reduceat(candles.volume, starts))
+    return out, np.cumsum(is_start) - 1
+
+
+def _partial(open_time: int, part: Candles) -> Candles:
+    return Candles(np.array([open_time], dtype=np.int64), part.open[:1], np.array([part.high.max()]),
+                   np.array([part.low.min()]), part.close[-1:], np.add.reduceat(part.volume, [0]))
+
+
+class Resampler:
+    """Timeframe tinggi untuk satu deret base, diperbarui inkremental.
+
+    Bar yang sudah close disimpan; setiap update hanya bar base sejak awal bucket
+    yang sedang berjalan yang diagregasi (bar base terakhir boleh berubah, misal
+    bar 1h yang belum close di-refresh). Bar terakhir output = bar parsial.
+
+    Histori bar close bisa di-`seed` dari exchange sekali (misal 200 bar 1d), jadi
+    deret base cukup sepanjang limit-nya sendiri. Tanpa seed / saat deret base tidak
+    lagi mencakup awal bucket berjalan, bar dibangun ulang penuh dari deret base.
+    """
+
+    def __init__(self, base: str, limits: Dict[str, int]):
+        for tf in limits:
+            if tf != base and timeframe_ms(tf) % timeframe_ms(base):
+                raise ValueError(f"{tf} bukan kelipatan timeframe base {base}")
+        self.base = base
+        self.limits = {tf: limit for tf, limit in limits.items() if tf != base}
+        self.base_limit = limits.get(base, 0)
+        self._closed: Dict[str, Candles] = {}
+        self._lock = threading.Lock()
+
+    def seed(self, timeframe: str, candles: Candles) -> None:
+        """Histori dari exchange; bar terakhir (masih berjalan) dibuang, nanti disusun dari deret base"""
+        with self._lock:
+            self._closed[timeframe] = candles[:-1].tail(self.limits[timeframe])
+
+    def covered(self, first_open_time: int) -> bool:
+        """True jika deret base yang dimulai di `first_open_time` cukup untuk semua timeframe"""
+        with self._lock:
+            return all(tf in self._closed and len(self._closed[tf])
+                       and int(self._closed[tf].open_time[-1]) + timeframe_ms(tf) >= first_open_time
+                       for tf in self.limits)
+
+    def update(self, candles: Candles) -> Dict[str, Candles]:
+        """{timeframe: candles} untuk semua timeframe (base dipotong ke limit-nya)"""
+        with self._lock:
+            out = {tf: self._update(tf, limit, candles) for tf, limit in self.limits.items()}
+        out[self.base] = candles.tail(self.base_limit) if self.base_limit else candles
+        return out
+
+    def _update(self, timeframe: str, limit: int, candles: Candles) -> Candles:
+        if not len(candles):
+            return candles
+        closed = self._closed.get(timeframe)
+        start = int(closed.open_time[-1]) + timeframe_ms(timeframe) if closed is not None and len(closed) else None
+        if start is not None and int(candles.open_time[0]) <= start <= int(candles.open_time[-1]):
+            part = candles.since(start)
+            if int(part.open_time[-1]) < start + timeframe_ms(timeframe):
+                # Jalur umum: semua bar baru masih di bucket berjalan -> cukup hitung bar parsial
+                return Candles.concat([closed.tail(limit - 1), _partial(start, part)])
+            fresh, _ = resample(part, timeframe)
+        else:
+            fresh, _ = resample(candles, timeframe)
+            if len(fresh) > 1 and int(fresh.open_time[0]) < int(candles.open_time[0]):
+                fresh = fresh[1:]          # Bucket pertama terpotong: bukan bar yang valid
+            closed = None
+        if closed is None:
+            closed = fresh[:-1].tail(limit)
+        elif len(fresh) > 1:
+            closed = Candles.concat([closed, fresh[:-1]]).tail(limit)
+        self._closed[timeframe] = closed
+        return Candles.concat([closed.tail(limit - 1), fresh[-1:]])
+
+
+class ResampleCache:
+    """Resampler per symbol (LRU), dipakai saat market data dibangun dari satu deret base"""
+
+    def __init__(self, base: str, limits: Dict[str, int], max_symbols: int = RESAMPLE_MAX_SYMBOLS):
+        self.base = base
+        self.limits = dict(limits)
+        self.max_symbols = max_symbols
+        self._resamplers: "OrderedDict[str, Resampler]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"seeded": 0, "updates": 0}
+        Resampler(base, self.limits)   # Validasi kombinasi timeframe sejak awal
+
+    def needs_seed(self, symbol: str, now_ms: int) -> bool:
+        """True jika histori timeframe tinggi harus di-fetch (symbol baru, ter-evict, atau
+        bucket berjalan sudah di luar jendela deret base yang akan di-fetch)"""
+        with self._lock:
+            resampler = self._resamplers.get(symbol)
+        if resampler is None:
+            return True
+        step = timeframe_ms(self.base)
+        return not resampler.covered((now_ms // step - self.limits[self.base] + 1) * step)
+
+    def update(self, symbol: str, candles: Candles,
+               seeds: Optional[Dict[str, Candles]] = None) -> Dict[str, Candles]:
+        with self._lock:
+            resampler: Optional[Resampler] = self._resamplers.get(symbol)
+            if resampler is None:
+                resampler = self._resamplers[symbol] = Resampler(self.base, self.limits)
+                while len(self._resamplers) > self.max_symbols:
+                    self._resamplers.popitem(last=False)
+            else:
+                self._resamplers.move_to_end(symbol)
+            self.stats["seeded" if seeds else "updates"] += 1
+        for tf, history in (seeds or {}).items():
+            if tf in resampler.limits and history is not None and len(history):
+                resampler.seed(tf, history)
+        return resampler.update(candles)
+
+    def __len__(self) -> int:
+        return len(self._resamplers)
@@ -0,0 +1,144 @@
+# scanner.py (Scan banyak koin sekaligus untuk setup OB + RRR)
+#
+# CLI:
+#   cd backend && python scanner.py --coins BTC,ETH,SOL --workers 3
+#   cd backend && python scanner.py --all --top 20 --ndjson
+import os
+import json
+import time
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from gateway import BACKGROUND, in_lane
+
+logger = logging.getLogger("HybridAnalyzerV8")
+
+COIN_LIST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "data-coin.json")
+
+
+def load_universe(path: str = COIN_LIST_PATH) -> List[str]:
+    """Daftar baseCoin pasangan USDT yang masih aktif (harga > 0) dari data-coin.json"""
+    with open(path) as f:
+        rows = json.load(f)["data"]
+    coins = []
+    for row in rows:
+        if row["symbol"].endswith("USDT") and float(row.get("price") or 0) > 0 and row["baseCoin"] not in coins:
+            coins.append(row["baseCoin"])
+    return coins
+
+
+def summarize(coin: str, output: Dict[str, Any], recommendation: str,
+              trade_levels: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Baris hasil scan yang ringkas (satu baris NDJSON)"""
+    return {
+        "type": "result",
+        "coin": coin,
+        "recommendation": recommendation,
+        "entry_price": output["entry_price"],
+        "market_structure": output["market_structure"],
+        "indicators": output["indicators"],
+        "volatility_pred": output["volatility_pred"],
+        "trade_levels": trade_levels,
+    }
+
+
+def rank(results: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Hanya koin dengan trade_levels; urut RRR tertinggi lalu entry terdekat ke harga"""
+    ranked = [r for r in results if r.get("trade_levels")]
+    ranked.sort(key=lambda r: (-r["trade_levels"]["rrr"],
+                               abs(r["trade_levels"]["entry"] - r["entry_price"]) / r["entry_price"]))
+    return ranked
+
+
+def scan(coins: List[str], fetch: Callable[[str], Optional[Dict[str, Any]]],
+         analyze: Callable[[Dict[str, Any]], Tuple[Dict[str, Any], str, Optional[Dict[str, Any]]]],
+         max_workers: int = 4) -> Iterator[Dict[str, Any]]:
+    """Jalankan fetch + analyze untuk setiap koin, yield hasil saat selesai.
+
+    Jumlah koin yang berjalan bersamaan dibatasi `max_workers`. Budget weight exchange
+    diatur gateway.py: bungkus `fetch` dengan in_lane(BACKGROUND, ...) supaya scan
+    mengalah ke request interactive.
+    """
+    def run(coin: str) -> Dict[str, Any]:
+        try:
+            data = fetch(coin)
+            if not data:
+                return {"type": "error", "coin": coin, "error": "Failed to fetch market data"}
+            return summarize(coin, *analyze(data))
+        except Exception as e:
+            logger.error(f"Scan error {coin}: {e}")
+            return {"type": "error", "coin": coin, "error": str(e)}
+
+    pending = iter(coins)
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scan") as pool:
+        in_flight = set()
+
+        def submit_next() -> bool:
+            coin = next(pending, None)
+            if coin is None:
+                return False
+            in_flight.add(pool.submit(run, coin))
+            return True
+
+        for _ in range(max_workers):
+            if not submit_next():
+                break
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                in_flight.discard(future)
+                yield future.result()
+                submit_next()
+
+
+def scan_summary(results: List[Dict[str, Any]], started: float, top: int = 20) -> Dict[str, Any]:
+    elapsed = time.time() - started
+    return {
+        "type": "summary",
+        "scanned": len(results),
+        "errors": sum(1 for r in results if r["type"] == "error"),
+        "elapsed": round(elapsed, 3),
+        "symbols_per_sec": round(len(results) / elapsed, 2) if elapsed > 0 else None,
+        "ranked": rank(results)[:top],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan koin untuk setup OB + RRR")
+    parser.add_argument("--coins", help="daftar koin dipisah koma, misal BTC,ETH")
+    parser.add_argument("--all", action="store_true", help="scan seluruh data-coin.json")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--ndjson", action="store_true", help="cetak setiap hasil sebagai NDJSON")
+    args = parser.parse_args()
+
+    import hybrid_analyzer_nofilter as analyzer
+
+    coins = load_universe() if args.all else [c.strip().upper() for c in (args.coins or "").split(",") if c.strip()]
+    if not coins:
+        parser.error("pakai --coins atau --all")
+
+    started = time.time()
+    results = []
+    for result in scan(coins, in_lane(BACKGROUND, analyzer.get_all_market_data), analyzer.analyze_and_generate_signal,
+                       max_workers=analyzer.scan_workers(args.workers)):
+        results.append(result)
+        if args.ndjson:
+            print(json.dumps(result), flush=True)
+
+    summary = scan_summary(results, started, args.top)
+    if args.ndjson:
+        print(json.dumps(summary))
+        return
+    print(f"Scanned {summary['scanned']} coins in {summary['elapsed']}s ({summary['symbols_per_sec']}/s), "
+          f"{summary['errors']} errors")
+    for r in summary["ranked"]:
+        tl = r["trade_levels"]
+        print(f"{r['coin']:<10} {tl['recommendation']:<6} entry {tl['entry']:<12} sl {tl['sl']:<12} "
+              f"tp1 {tl['tp1']:<12} rrr {tl['rrr']}")
+
+
+if __name__ == "__main__":
+    main()
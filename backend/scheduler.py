@@ -0,0 +1,197 @@
+# scheduler.py (Job periodik yang selaras dengan bar close exchange: 1h, 4h, 1d)
+#
+# Setiap job terdaftar untuk satu timeframe dan dijalankan sekali per bar, `settle` detik
+# setelah bar close (+ jitter acak supaya banyak proses/job tidak menembak exchange di
+# detik yang sama). Aturan:
+#   - overlap: job yang masih berjalan tidak dijalankan dua kali; begitu selesai, bar
+#     yang terlewat langsung dikejar (tidak menunggu close berikutnya)
+#   - catch-up: setelah proses tertidur / run terlalu lama, job jalan segera untuk bar
+#     terbaru; bar di antaranya dihitung "missed" atau diulang satu per satu (`replay`)
+#   - worker pool: kerja per symbol di semua job lewat `each`, dibatasi `workers` thread
+import os
+import time
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger("HybridAnalyzerV8")
+
+SCHEDULER_WORKERS = int(os.getenv("SCHEDULER_WORKERS", 3))              # Thread untuk kerja per symbol (semua job)
+SCHEDULER_SETTLE_SECONDS = float(os.getenv("SCHEDULER_SETTLE_SECONDS", 3))   # Jeda setelah bar close
+SCHEDULER_JITTER_SECONDS = float(os.getenv("SCHEDULER_JITTER_SECONDS", 5))   # Tambahan acak 0..N detik
+
+JobFn = Callable[[int], Any]
+
+
+class BarJob:
+    """Satu job terjadwal. `fn(bar)` menerima nomor bar yang baru terbuka (open_time //
+    durasi bar), jadi bar yang baru close adalah `bar - 1`."""
+
+    def __init__(self, name: str, timeframe_ms: int, fn: JobFn, settle: float, jitter: float, replay: int):
+        self.name = name
+        self.timeframe_ms = timeframe_ms
+        self.fn = fn
+        self.settle = settle
+        self.jitter = jitter
+        self.replay = replay
+        self.last_bar: Optional[int] = None     # Bar terakhir yang sudah diklaim untuk dijalankan
+        self.next_at = 0.0
+        self.running = False
+        self.blocked = False                    # Sudah jatuh tempo tapi run sebelumnya belum selesai
+        self.stats: Dict[str, Any] = {"runs": 0, "failures": 0, "overlaps": 0, "missed": 0, "replayed": 0,
+                                      "last_bar": None, "last_ms": 0.0, "last_error": None}
+
+    def bar(self, now: float) -> int:
+        return int(now * 1000) // self.timeframe_ms
+
+    def due_at(self, bar: int, rng: random.Random) -> float:
+        """Waktu jalan untuk `bar`: open_time bar + settle + jitter"""
+        return bar * self.timeframe_ms / 1000 + self.settle + (rng.uniform(0, self.jitter) if self.jitter > 0 else 0.0)
+
+
+class BarScheduler:
+    """Menjalankan BarJob di thread latar; `tick` memuat seluruh logika penjadwalan
+    (dipanggil loop, atau langsung dengan jam buatan di benchmark)."""
+
+    def __init__(self, workers: int = SCHEDULER_WORKERS, settle: float = SCHEDULER_SETTLE_SECONDS,
+                 jitter: float = SCHEDULER_JITTER_SECONDS, clock: Callable[[], float] = time.time,
+                 rng: Optional[random.Random] = None):
+        self.workers = max(1, workers)
+        self.settle = settle
+        self.jitter = jitter
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self.jobs: Dict[str, BarJob] = {}
+        self._cond = threading.Condition()
+        self._stopped = True
+        self._thread: Optional[threading.Thread] = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def add(self, name: str, timeframe_ms: int, fn: JobFn, settle: Optional[float] = None,
+            jitter: Optional[float] = None, replay: int = 0, run_on_start: bool = False) -> BarJob:
+        """Daftarkan job; `run_on_start` = jalan segera untuk bar berjalan (hasil siap sebelum
+        close pertama), jika tidak job menunggu bar close berikutnya."""
+        job = BarJob(name, timeframe_ms, fn, self.settle if settle is None else settle,
+                     self.jitter if jitter is None else jitter, replay)
+        now = self.clock()
+        current = job.bar(now)
+        with self._cond:
+            if run_on_start:
+                job.last_bar, job.next_at = current - 1, now
+            else:
+                job.last_bar, job.next_at = current, job.due_at(current + 1, self.rng)
+            self.jobs[name] = job
+            self._cond.notify_all()
+        return job
+
+    # --- Worker pool ---
+
+    def each(self, fn: Callable[[Any], Any], items: Iterable[Any]) -> List[Any]:
+        """map(fn, items) di pool bersama: total kerja paralel semua job <= `workers`"""
+        with self._cond:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="scheduler")
+            pool = self._pool
+        return list(pool.map(fn, items))
+
+    # --- Penjadwalan ---
+
+    def due(self, now: Optional[float] = None) -> List[Tuple[BarJob, List[int]]]:
+        """Klaim run yang jatuh tempo: [(job, [bar, ...])]; bar lama (catch-up) lebih dulu"""
+        now = self.clock() if now is None else now
+        claimed = []
+        with self._cond:
+            for job in self.jobs.values():
+                if now < job.next_at:
+                    continue
+                if job.running:
+                    if not job.blocked:
+                        job.blocked = True
+                        job.stats["overlaps"] += 1
+                    continue
+                current = job.bar(now)
+                pending = current - job.last_bar
+                if pending <= 0:   # Jam mundur: tunggu bar berikutnya
+                    job.next_at = job.due_at(job.last_bar + 1, self.rng)
+                    continue
+                replay = min(pending - 1, job.replay)
+                job.stats["missed"] += pending - 1 - replay
+                job.stats["replayed"] += replay
+                job.last_bar, job.running, job.blocked = current, True, False
+                job.next_at = job.due_at(current + 1, self.rng)
+                claimed.append((job, list(range(current - replay, current + 1))))
+        return claimed
+
+    def run(self, job: BarJob, bars: List[int]) -> None:
+        """Jalankan satu klaim secara sinkron (stats + lepas flag running)"""
+        t0 = time.perf_counter()
+        try:
+            for bar in bars:
+                job.fn(bar)
+                job.stats["runs"] += 1
+                job.stats["last_bar"] = bar
+        except Exception as e:
+            job.stats["failures"] += 1
+            job.stats["last_error"] = str(e)
+            logger.error(f"Scheduled job {job.name} failed: {e}")
+        finally:
+            with self._cond:
+                job.running = False
+                job.stats["last_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+                self._cond.notify_all()
+
+    def tick(self, now: Optional[float] = None, wait: bool = False) -> int:
+        """Jalankan semua run yang jatuh tempo, masing-masing di thread sendiri (`wait` = tunggu selesai)"""
+        threads = []
+        for job, bars in self.due(now):
+            thread = threading.Thread(target=self.run, args=(job, bars), name=f"job-{job.name}", daemon=True)
+            thread.start()
+            threads.append(thread)
+        if wait:
+            for thread in threads:
+                thread.join()
+        return len(threads)
+
+    # --- Lifecycle ---
+
+    def start(self) -> None:
+        with self._cond:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name="bar-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=5)
+        with self._cond:
+            if self._pool:
+                self._pool.shutdown(wait=False)
+                self._pool = None
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._stopped:
+                    now = self.clock()
+                    waiting = [job.next_at for job in self.jobs.values() if not job.running]
+                    if any(now >= at for at in waiting):
+                        break
+                    # Job yang sedang berjalan membangunkan loop lewat notify saat selesai
+                    self._cond.wait(min([at - now for at in waiting] + [60.0]))
+                if self._stopped:
+                    return
+            self.tick()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Metrik untuk /health"""
+        with self._cond:
+            return {"workers": self.workers, "running": bool(self._thread and self._thread.is_alive()),
+                    "jobs": {name: dict(job.stats, running=job.running, next_run=round(job.next_at, 3))
+                             for name, job in self.jobs.items()}}
@@ -0,0 +1,191 @@
+# serve.py (Launcher prefork: beberapa proses worker di belakang satu port, state dibagi antar worker)
+#
+# Jalankan:
+#   cd backend && python serve.py --workers 4 --port 5001                  # Flask (threaded) per worker
+#   cd backend && python serve.py --workers 4 --port 5002 --worker-class async   # aiohttp per worker
+#
+# Satu proses Python dibatasi GIL ke satu core; launcher ini meniru model prefork gunicorn
+# tanpa dependensi tambahan. Master:
+#   1. import aplikasi (factory: app/exchange/pool DB belum dibuat), bind socket listen
+#   2. buat budget weight exchange di shared memory (SharedTokenBucket) dan state server
+#      (shared.py) untuk cooldown, lease single-flight, snapshot L2 dan candle cache
+#   3. fork N worker yang accept() dari socket yang sama; worker mati di-restart
+# Worker 0 juga menjalankan stream market, outcome resolver dan scheduler (sekali per host).
+# SHARED_STATE_URL=redis://... memakai Redis sebagai state store alih-alih state server.
+import os
+import sys
+import time
+import socket
+import signal
+import logging
+import argparse
+import threading
+import multiprocessing
+from functools import partial
+from typing import Any, Callable, List, Optional
+
+from gateway import SharedTokenBucket
+from shared import SHARED_STATE_URL, connect_kv, connect_state, start_state_server
+
+logger = logging.getLogger("HybridAnalyzerV8")
+
+SERVE_WORKERS = int(os.getenv("SERVE_WORKERS", os.cpu_count() or 1))   # Jumlah proses worker
+SERVE_BACKLOG = int(os.getenv("SERVE_BACKLOG", 2048))                   # Antrian koneksi socket listen
+SERVE_RESTART_DELAY = float(os.getenv("SERVE_RESTART_DELAY", 1))        # Jeda sebelum restart worker yang mati
+
+
+def bind_socket(host: str, port: int, backlog: int = SERVE_BACKLOG) -> socket.socket:
+    """Socket listen yang diwarisi semua worker (port 0 = port acak, lihat getsockname)"""
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(index: int, sock: socket.socket, connect: Callable[[], Any], limiter: Optional[Any],
+               worker_class: str, background: bool) -> None:
+    """Isi proses worker (setelah fork): sambungkan state bersama lalu layani socket master.
+    SIGTERM dari master = berhenti menerima koneksi, hentikan job latar, flush write-behind, exit."""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)   # Sebelum serving belum ada yang perlu di-flush
+    signal.signal(signal.SIGINT, signal.SIG_IGN)    # Ctrl-C ditangani master
+    import hybrid_analyzer_nofilter as analyzer
+
+    kv = connect()
+    if kv is not None:
+        analyzer.use_shared_state(kv, limiter)
+    elif limiter is not None:
+        analyzer.gateway.limiter = limiter
+    if background:
+        analyzer.start_market_stream()
+        analyzer.start_outcome_resolver()
+        analyzer.start_scheduler()
+    logger.info(f"Worker {index} (pid {os.getpid()}, {worker_class}) serving")
+
+    try:
+        if worker_class == "async":
+            from aiohttp import web
+            import async_app
+            # run_app memasang handler SIGTERM sendiri (GracefulExit) dan kembali setelah cleanup
+            web.run_app(async_app.make_app(), sock=sock, print=None, handle_signals=True)
+        else:
+            from werkzeug.serving import make_server
+            host, port = sock.getsockname()[:2]
+            server = make_server(host, port, analyzer.get_app(), threaded=True, fd=sock.fileno())
+            # shutdown() menunggu serve_forever selesai, jadi tidak boleh dipanggil dari handler di thread yang sama
+            signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=server.shutdown).start())
+            server.serve_forever()
+            server.server_close()
+    finally:
+        analyzer.stop_services()
+        logger.info(f"Worker {index} (pid {os.getpid()}) stopped")
+
+
+class PreforkServer:
+    """Master: memegang socket, state server dan budget bersama; menjaga `workers` proses tetap hidup"""
+
+    def __init__(self, workers: int = SERVE_WORKERS, host: str = "0.0.0.0", port: int = 5001,
+                 worker_class: str = "sync", state_url: str = SHARED_STATE_URL, background: bool = True):
+        if worker_class not in ("sync", "async"):
+            raise ValueError(f"Unknown worker class: {worker_class}")
+        self.workers = max(1, workers)
+        self.worker_class = worker_class
+        self.background = background
+        self.context = multiprocessing.get_context("fork")
+        self.sock = bind_socket(host, port)
+        self.address = self.sock.getsockname()[:2]
+        self.limiter = SharedTokenBucket(context=self.context)
+        self.manager = None
+        if state_url:
+            self.connect: Callable[[], Any] = partial(connect_kv, state_url)
+        else:
+            authkey = os.urandom(16)
+            self.manager = start_state_server(authkey=authkey)
+            self.connect = partial(connect_state, self.manager.address, authkey)
+        self.procs: List[Optional[multiprocessing.Process]] = [None] * self.workers
+        self.stats = {"started": 0, "restarted": 0}
+        self._stopping = False
+
+    def spawn(self, index: int) -> None:
+        proc = self.context.Process(
+            target=run_worker, name=f"worker-{index}", daemon=False,
+            args=(index, self.sock, self.connect, self.limiter, self.worker_class, self.background and index == 0))
+        proc.start()
+        self.procs[index] = proc
+        self.stats["started"] += 1
+
+    def start(self) -> None:
+        for index in range(self.workers):
+            self.spawn(index)
+        logger.info(f"Serving {self.worker_class} app on {self.address[0]}:{self.address[1]} "
+                    f"with {self.workers} workers")
+
+    def check(self) -> int:
+        """Restart worker yang mati; return jumlah yang di-restart"""
+        restarted = 0
+        for index, proc in enumerate(self.procs):
+            if self._stopping or proc is None or proc.is_alive():
+                continue
+            logger.warning(f"Worker {index} (pid {proc.pid}) exited with {proc.exitcode}; restarting")
+            self.spawn(index)
+            self.stats["restarted"] += 1
+            restarted += 1
+        return restarted
+
+    def run(self) -> None:
+        """Loop master sampai SIGTERM/SIGINT"""
+        def handle(signum, frame):
+            self._stopping = True
+
+        signal.signal(signal.SIGTERM, handle)
+        signal.signal(signal.SIGINT, handle)
+        self.start()
+        try:
+            while not self._stopping:
+                time.sleep(SERVE_RESTART_DELAY)
+                self.check()
+        finally:
+            self.stop()
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """SIGTERM ke worker (flush write-behind), kill jika tidak selesai dalam `timeout`"""
+        self._stopping = True
+        for proc in self.procs:
+            if proc is not None and proc.is_alive():
+                proc.terminate()
+        deadline = time.monotonic() + timeout
+        for proc in self.procs:
+            if proc is not None:
+                proc.join(max(0.0, deadline - time.monotonic()))
+                if proc.is_alive():
+                    proc.kill()
+                    proc.join()
+        if self.manager is not None:
+            self.manager.shutdown()
+            self.manager = None
+        self.sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hybrid Analyzer: launcher multi-proses (prefork)")
+    parser.add_argument("--workers", type=int, default=SERVE_WORKERS)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 5001)))
+    parser.add_argument("--worker-class", choices=("sync", "async"), default="sync")
+    parser.add_argument("--state", default=SHARED_STATE_URL,
+                        help="redis://... untuk Redis; kosong = state server bawaan")
+    args = parser.parse_args()
+
+    # Import di master sebelum fork: modul dimuat sekali (copy-on-write), app/exchange/pool tetap lazy
+    import hybrid_analyzer_nofilter  # noqa: F401
+    if args.worker_class == "async":
+        import async_app  # noqa: F401
+
+    server = PreforkServer(args.workers, args.host, args.port, args.worker_class, args.state)
+    server.run()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
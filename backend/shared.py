@@ -0,0 +1,123 @@
+# shared.py (Key-value bergaya Redis untuk state yang dibagi antar proses worker)
+#
+# serve.py menjalankan beberapa worker; cache/cooldown/lease yang tadinya hanya hidup di satu
+# proses disimpan di sini. Semua pemakai cukup subset API redis-py:
+#   get(key) / set(key, value, ex=, px=, nx=) / delete(*keys)
+# jadi ada tiga backend yang saling menggantikan:
+#   LocalKV                 - dict + TTL di proses (satu proses / benchmark)
+#   state server (manager)  - satu LocalKV di proses terpisah, worker memakai proxy multiprocessing
+#   redis.Redis             - Redis lokal sungguhan jika redis-py terpasang (redis://...)
+import os
+import time
+import logging
+import threading
+from multiprocessing.managers import BaseManager
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    import redis
+except ImportError:  # opsional: tanpa redis-py, pakai LocalKV / state server
+    redis = None
+
+logger = logging.getLogger("HybridAnalyzerV8")
+
+SHARED_STATE_URL = os.getenv("SHARED_STATE_URL", "")   # Kosong = state server bawaan serve.py; redis://... = Redis
+
+
+class LocalKV:
+    """Stand-in Redis: subset API redis-py (get, set dengan ex/px/nx, delete) + TTL, thread-safe.
+
+    Dipakai sebagai L2 snapshot saat SNAPSHOT_REDIS_URL=local, dan sebagai isi state
+    server yang dibagi antar worker lewat proxy multiprocessing.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic, purge_every: int = 1024):
+        self.clock = clock
+        self.purge_every = purge_every
+        self._data: Dict[str, Tuple[Any, float]] = {}
+        self._lock = threading.Lock()
+        self._ops = 0
+
+    def _live(self, key: str, now: float) -> Optional[Tuple[Any, float]]:
+        # Dipanggil dengan lock dipegang
+        item = self._data.get(key)
+        if item is not None and item[1] and now >= item[1]:
+            del self._data[key]
+            return None
+        return item
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._live(key, self.clock())
+            return None if item is None else item[0]
+
+    def set(self, key: str, value: Any, ex: Optional[float] = None, px: Optional[int] = None,
+            nx: bool = False) -> Optional[bool]:
+        """Seperti SET redis: True jika tersimpan, None jika nx=True dan key sudah ada"""
+        with self._lock:
+            now = self.clock()
+            if nx and self._live(key, now) is not None:
+                return None
+            ttl = px / 1000 if px else ex
+            self._data[key] = (value, now + ttl if ttl else 0.0)
+            self._ops += 1
+            if self._ops % self.purge_every == 0:
+                for k in [k for k, (_, exp) in self._data.items() if exp and now >= exp]:
+                    del self._data[k]
+        return True
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            return sum(self._data.pop(k, None) is not None for k in keys)
+
+    def dbsize(self) -> int:
+        return len(self._data)
+
+
+def connect_kv(url: str) -> Optional[Any]:
+    """"" -> None, "local" -> LocalKV, redis://... -> redis.Redis (jika redis-py terpasang)"""
+    if not url:
+        return None
+    if url == "local":
+        return LocalKV()
+    if redis is None:
+        logger.warning(f"{url} requested but redis-py is not installed; shared key-value store disabled")
+        return None
+    return redis.Redis.from_url(url, socket_timeout=0.5)
+
+
+# ==============================================================
+# STATE SERVER (multiprocessing manager)
+# ==============================================================
+
+_server_kv: Optional[LocalKV] = None
+
+
+def _state_kv() -> LocalKV:
+    # Berjalan di proses state server: satu LocalKV untuk semua worker
+    global _server_kv
+    if _server_kv is None:
+        _server_kv = LocalKV()
+    return _server_kv
+
+
+class StateManager(BaseManager):
+    pass
+
+
+StateManager.register("kv", callable=_state_kv, exposed=("get", "set", "delete", "dbsize"))
+
+
+def start_state_server(address: Any = ("127.0.0.1", 0), authkey: Optional[bytes] = None) -> StateManager:
+    """Jalankan state server di proses anak (dipanggil master sebelum fork worker)"""
+    manager = StateManager(address=address, authkey=authkey or os.urandom(16))
+    manager.start()
+    logger.info(f"Shared state server listening on {manager.address}")
+    return manager
+
+
+def connect_state(address: Any, authkey: bytes) -> Any:
+    """Proxy LocalKV di state server (thread-safe: satu koneksi per thread)"""
+    manager = StateManager(address=address, authkey=authkey)
+    manager.connect()
+    return manager.kv()
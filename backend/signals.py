@@ -0,0 +1,291 @@
+# signals.py (Push sinyal live: dihitung sekali per symbol per bar close, di-fan-out ke semua subscriber)
+#
+# Klien (dashboard) berlangganan sekumpulan koin lewat SSE. Setelah setiap bar 1h
+# close, SignalHub menghitung analisa satu kali untuk setiap koin yang punya
+# subscriber, membandingkan recommendation / trade_levels / liquidity sweep
+# dengan hasil sebelumnya, dan hanya mengirim event jika ada yang berubah.
+# Frame SSE diserialisasi sekali per event lalu dibagi ke semua subscriber.
+import os
+import json
+import time
+import asyncio
+import logging
+import itertools
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger("HybridAnalyzerV8")
+
+SIGNAL_MAX_COINS = int(os.getenv("SIGNAL_MAX_COINS", 20))           # Koin per langganan
+SIGNAL_SETTLE_SECONDS = float(os.getenv("SIGNAL_SETTLE_SECONDS", 3))  # Jeda setelah bar close sebelum menghitung
+SIGNAL_HEARTBEAT_SECONDS = float(os.getenv("SIGNAL_HEARTBEAT_SECONDS", 15))
+
+# Field yang perubahannya memicu event (field lain ikut dikirim sebagai konteks)
+SIGNAL_FIELDS = ("recommendation", "trade_levels", "liquidity_sweep")
+
+Compute = Callable[[str], Optional[Tuple[Dict[str, Any], str, Optional[Dict[str, Any]]]]]
+
+
+def parse_coins(text: str, limit: int = SIGNAL_MAX_COINS) -> List[str]:
+    """"btc, eth" -> ["BTC", "ETH"] (unik, maksimal `limit`)"""
+    coins: List[str] = []
+    for c in text.split(","):
+        c = c.strip().upper()
+        if c and c not in coins:
+            coins.append(c)
+    return coins[:limit]
+
+
+def signal_view(output: Dict[str, Any], recommendation: str, trade_levels: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Bagian output analyze_and_generate_signal yang dikirim ke klien"""
+    return {
+        "recommendation": recommendation,
+        "trade_levels": trade_levels,
+        "liquidity_sweep": output.get("liquidity_sweep"),
+        "market_structure": output["market_structure"],
+        "entry_price": output["entry_price"],
+        "analysis": output["analysis"],
+    }
+
+
+class SignalEvent:
+    __slots__ = ("id", "coin", "kind", "frame")
+
+    def __init__(self, event_id: int, coin: str, kind: str, payload: Dict[str, Any]):
+        self.id = event_id
+        self.coin = coin
+        self.kind = kind
+        self.frame = f"id: {event_id}\nevent: {kind}\ndata: {json.dumps(payload, default=str)}\n\n"
+
+
+class Subscriber:
+    """Antrian event satu klien. Hanya event terakhir per koin yang disimpan, jadi klien
+    lambat tidak menumpuk memori; `get` untuk thread, `aget` untuk event loop."""
+
+    def __init__(self, coins: Iterable[str]):
+        self.coins = frozenset(coins)
+        self.closed = False
+        self.dropped = 0
+        self._pending: "OrderedDict[str, SignalEvent]" = OrderedDict()
+        self._cond = threading.Condition()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def push(self, event: SignalEvent) -> None:
+        with self._cond:
+            if self._pending.pop(event.coin, None) is not None:
+                self.dropped += 1
+            self._pending[event.coin] = event
+            self._cond.notify_all()
+            loop, wakeup = self._loop, self._wakeup
+        if loop is not None:
+            loop.call_soon_threadsafe(wakeup.set)
+
+    def close(self) -> None:
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+            loop, wakeup = self._loop, self._wakeup
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(wakeup.set)
+
+    def _drain(self) -> List[SignalEvent]:
+        events = list(self._pending.values())
+        self._pending.clear()
+        return events
+
+    def get(self, timeout: float = SIGNAL_HEARTBEAT_SECONDS) -> List[SignalEvent]:
+        """Blok sampai ada event atau `timeout`; [] berarti waktunya heartbeat"""
+        with self._cond:
+            if not self._pending and not self.closed:
+                self._cond.wait(timeout)
+            return self._drain()
+
+    async def aget(self, timeout: float = SIGNAL_HEARTBEAT_SECONDS) -> List[SignalEvent]:
+        with self._cond:
+            if self._wakeup is None:
+                self._loop = asyncio.get_running_loop()
+                self._wakeup = asyncio.Event()
+            self._wakeup.clear()
+            events = self._drain()
+        if events or self.closed:
+            return events
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        with self._cond:
+            return self._drain()
+
+
+class SignalHub:
+    """Hitung sinyal koin yang punya subscriber setiap bar `timeframe_ms` close, kirim delta.
+
+    `compute(coin)` mengembalikan (output, recommendation, trade_levels) seperti
+    analyze_symbol, atau None jika data gagal diambil. Koin yang baru pertama kali
+    di-subscribe dihitung segera; subscriber yang bergabung belakangan menerima
+    event "snapshot" berisi state terakhir.
+    """
+
+    def __init__(self, compute: Compute, timeframe_ms: int = 3_600_000, settle: float = SIGNAL_SETTLE_SECONDS,
+                 workers: int = 3, clock: Callable[[], float] = time.time):
+        self.compute = compute
+        self.timeframe_ms = timeframe_ms
+        self.settle = settle
+        self.workers = workers
+        self.clock = clock
+        self._subscribers: Set[Subscriber] = set()
+        self._refs: Dict[str, int] = {}
+        self._last: Dict[str, Dict[str, Any]] = {}
+        self._snapshots: Dict[str, SignalEvent] = {}
+        self._new: Set[str] = set()
+        self._known: Set[str] = set()   # Koin yang sudah dijadwalkan/dihitung (cegah compute ganda)
+        self._ids = itertools.count(1)
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stopped = False
+        self.stats = {"computes": 0, "deltas": 0, "unchanged": 0, "errors": 0, "bars": 0}
+
+    # --- Subscriptions ---
+
+    def subscribe(self, coins: Iterable[str]) -> Subscriber:
+        sub = Subscriber(coins)
+        with self._cond:
+            self._subscribers.add(sub)
+            for coin in sub.coins:
+                self._refs[coin] = self._refs.get(coin, 0) + 1
+                if coin in self._snapshots:
+                    sub.push(self._snapshots[coin])
+                if coin not in self._known:
+                    self._known.add(coin)
+                    self._new.add(coin)
+            self._cond.notify_all()
+        self.start()
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        with self._cond:
+            if sub in self._subscribers:
+                self._subscribers.discard(sub)
+                for coin in sub.coins:
+                    self._refs[coin] -= 1
+                    if not self._refs[coin]:
+                        # Tanpa subscriber state tidak diperbarui lagi; jangan kirim snapshot basi nanti
+                        del self._refs[coin]
+                        self._known.discard(coin)
+                        self._last.pop(coin, None)
+                        self._snapshots.pop(coin, None)
+        sub.close()
+
+    @property
+    def coins(self) -> List[str]:
+        with self._cond:
+            return sorted(self._refs)
+
+    # --- Compute & fan-out ---
+
+    def bar_open_ms(self) -> int:
+        now_ms = int(self.clock() * 1000)
+        return now_ms - now_ms % self.timeframe_ms
+
+    def publish(self, coin: str, result: Tuple[Dict[str, Any], str, Optional[Dict[str, Any]]]) -> bool:
+        """Bandingkan hasil dengan state terakhir; kirim event "signal" jika field sinyal berubah"""
+        view = signal_view(*result)
+        bar = self.bar_open_ms()
+        with self._cond:
+            if coin not in self._refs:
+                return False
+            prev = self._last.get(coin)
+            changed = [f for f in SIGNAL_FIELDS if prev is None or prev[f] != view[f]]
+            self._last[coin] = view
+            if not changed:
+                self.stats["unchanged"] += 1
+                return False
+            event_id = next(self._ids)
+            event = SignalEvent(event_id, coin, "signal", {"coin": coin, "bar": bar, "changed": changed, "signal": view})
+            self._snapshots[coin] = SignalEvent(event_id, coin, "snapshot", {"coin": coin, "bar": bar, "signal": view})
+            self.stats["deltas"] += 1
+            targets = [s for s in self._subscribers if coin in s.coins]
+        for sub in targets:
+            sub.push(event)
+        return True
+
+    def _compute_one(self, coin: str) -> Optional[Tuple]:
+        try:
+            return self.compute(coin)
+        except Exception as e:
+            logger.warning(f"Signal compute failed for {coin}: {e}")
+            with self._cond:
+                self.stats["errors"] += 1
+            return None
+
+    def refresh(self, coins: Optional[Iterable[str]] = None) -> int:
+        """Hitung `coins` (default semua koin yang di-subscribe) sekali; return jumlah delta"""
+        coins = sorted(coins) if coins is not None else self.coins
+        if not coins:
+            return 0
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="signals")
+        deltas = 0
+        for coin, result in zip(coins, self._executor.map(self._compute_one, coins)):
+            with self._cond:
+                self.stats["computes"] += 1
+            if result is not None and self.publish(coin, result):
+                deltas += 1
+        return deltas
+
+    def _next_run(self) -> float:
+        """Waktu (epoch) bar close berikutnya + settle"""
+        step = self.timeframe_ms / 1000
+        now = self.clock()
+        run = (now // step) * step + self.settle
+        return run if run > now else run + step
+
+    # --- Lifecycle ---
+
+    def start(self) -> None:
+        with self._cond:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name="signal-hub", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=5)
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _run(self) -> None:
+        next_run = self._next_run()
+        while True:
+            with self._cond:
+                while not self._stopped and not self._new and self.clock() < next_run:
+                    self._cond.wait(min(next_run - self.clock(), 60.0))
+                if self._stopped:
+                    return
+                due = self.clock() >= next_run
+                new, self._new = self._new & set(self._refs), set()
+                coins = set(self._refs) if due else new
+            if due:
+                next_run = self._next_run()
+                with self._cond:
+                    self.stats["bars"] += 1
+            try:
+                self.refresh(coins)
+            except Exception as e:
+                logger.error(f"Signal hub refresh failed: {e}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Metrik untuk /health"""
+        with self._cond:
+            return dict(self.stats, subscribers=len(self._subscribers), coins=len(self._refs),
+                        dropped=sum(s.dropped for s in self._subscribers))
@@ -0,0 +1,145 @@
+# singleflight.py (Gabungkan panggilan bersamaan dengan key yang sama menjadi satu eksekusi)
+import time
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "expires_at", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.expires_at = 0.0
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Hanya satu eksekusi `fn` per key yang berjalan; pemanggil lain menunggu hasilnya.
+
+    Pemanggil pertama (leader) menjalankan fn, pemanggil berikutnya dengan key
+    yang sama menerima hasil atau exception yang sama. Hasil yang berhasil
+    (bukan None) boleh dipakai ulang selama `ttl` detik setelah selesai;
+    ttl=0 berarti hanya panggilan yang benar-benar bersamaan yang digabung.
+    Hasil dibagi ke semua pemanggil, jadi jangan dimutasi.
+    """
+
+    def __init__(self, ttl: float = 0.0, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.stats = {"leaders": 0, "shared": 0, "errors": 0}
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args: Any) -> Tuple[Any, bool]:
+        """Return (hasil, shared); shared=True jika hasil berasal dari eksekusi pemanggil lain."""
+        with self._lock:
+            now = self.clock()
+            call = self._calls.get(key)
+            if call is not None and call.done.is_set() and now >= call.expires_at:
+                del self._calls[key]
+                call = None
+            if call is not None:
+                call.waiters += 1
+                self.stats["shared"] += 1
+                leader = False
+            else:
+                self._purge(now)
+                call = self._calls[key] = _Call()
+                self.stats["leaders"] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn(*args)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if call.error is not None:
+                    self.stats["errors"] += 1
+                if call.error is not None or call.result is None or self.ttl <= 0:
+                    if self._calls.get(key) is call:
+                        del self._calls[key]
+                else:
+                    call.expires_at = self.clock() + self.ttl
+            call.done.set()
+        return call.result, False
+
+    def forget(self, key: Hashable) -> None:
+        """Buang hasil yang tersimpan untuk key (panggilan berikutnya eksekusi ulang)."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None and call.done.is_set():
+                del self._calls[key]
+
+    def _purge(self, now: float) -> None:
+        # Dipanggil dengan lock dipegang; key lama (bar sebelumnya) tidak akan diminta lagi
+        expired = [k for k, c in self._calls.items() if c.done.is_set() and now >= c.expires_at]
+        for k in expired:
+            del self._calls[k]
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """SingleFlight untuk coroutine dalam satu event loop (semantik ttl/stats sama).
+
+    Leader menjalankan `await fn(*args)` dalam task terpisah supaya pembatalan
+    satu request tidak ikut membatalkan hasil yang ditunggu request lain.
+    """
+
+    def __init__(self, ttl: float = 0.0, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self._calls: Dict[Hashable, Tuple[asyncio.Future, float]] = {}
+        self.stats = {"leaders": 0, "shared": 0, "errors": 0}
+
+    async def do(self, key: Hashable, fn: Callable[..., Awaitable[Any]], *args: Any) -> Tuple[Any, bool]:
+        now = self.clock()
+        entry = self._calls.get(key)
+        if entry is not None and entry[0].done() and now >= entry[1]:
+            del self._calls[key]
+            entry = None
+        if entry is not None:
+            self.stats["shared"] += 1
+            return await asyncio.shield(entry[0]), True
+
+        self._purge(now)
+        self.stats["leaders"] += 1
+        task = asyncio.ensure_future(fn(*args))
+        self._calls[key] = (task, float("inf"))
+        task.add_done_callback(lambda t: self._finished(key, t))
+        return await asyncio.shield(task), False
+
+    def _finished(self, key: Hashable, task: asyncio.Future) -> None:
+        failed = task.cancelled() or task.exception() is not None
+        if failed:
+            self.stats["errors"] += 1
+        if failed or task.result() is None or self.ttl <= 0:
+            if key in self._calls and self._calls[key][0] is task:
+                del self._calls[key]
+        else:
+            self._calls[key] = (task, self.clock() + self.ttl)
+
+    def forget(self, key: Hashable) -> None:
+        entry = self._calls.get(key)
+        if entry is not None and entry[0].done():
+            del self._calls[key]
+
+    def _purge(self, now: float) -> None:
+        expired = [k for k, (t, expires_at) in self._calls.items() if t.done() and now >= expires_at]
+        for k in expired:
+            del self._calls[k]
+
+    def __len__(self) -> int:
+        return len(self._calls)
@@ -0,0 +1,431 @@
+# smc.py (Engine deteksi SMC inkremental: swing, Order Block + mitigasi, FVG, equal highs/lows)
+#
+# SMCIndex memproses setiap bar tepat sekali (O(1) amortized per bar), jadi histori
+# panjang dibangun dalam satu pass dan bar baru cukup di-append. Zona yang masih
+# aktif disimpan terurut per harga:
+#   - demand OB / bullish FVG terurut berdasarkan `top`: bar yang low-nya <= top
+#     memitigasi satu suffix list sekaligus (bisect), sisanya pasti di bawah harga
+#   - supply OB / bearish FVG terurut berdasarkan `bottom` (prefix, simetris)
+#   - pool likuiditas buy-side/sell-side terurut berdasarkan level
+# Zona terdekat dari harga mana pun dicari dengan bisect (O(log n)).
+import os
+import bisect
+import threading
+from collections import OrderedDict, deque
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from candle_cache import timeframe_ms
+from candles import Candles
+
+SMC_SWING_LENGTH = int(os.getenv("SMC_SWING_LENGTH", 3))        # Bar kiri/kanan untuk pivot swing
+SMC_EQUAL_TOLERANCE = float(os.getenv("SMC_EQUAL_TOLERANCE", 0.001))  # Jarak relatif equal highs/lows
+SMC_MAX_INDEXES = int(os.getenv("SMC_MAX_INDEXES", 1024))        # Index (symbol, timeframe) di memori
+
+DEMAND, SUPPLY = "demand", "supply"
+BULLISH_FVG, BEARISH_FVG = "bullish_fvg", "bearish_fvg"
+BUY_SIDE, SELL_SIDE = "buy", "sell"
+
+# Nama status sweep sama dengan strategy.detect_liquidity_sweep
+SWEEP_LABELS = {BUY_SIDE: "Buy-side liquidity sweep", SELL_SIDE: "Sell-side liquidity sweep", None: "None"}
+
+
+@dataclass
+class Swing:
+    kind: str               # "high" | "low"
+    price: float
+    index: int
+    open_time: int
+
+
+@dataclass
+class Zone:
+    kind: str               # demand | supply | bullish_fvg | bearish_fvg
+    top: float
+    bottom: float
+    index: int              # Bar pembentuk (candle OB / candle tengah FVG)
+    created: int            # Bar yang mengonfirmasi zona (break of structure / candle ke-3 FVG)
+    open_time: int
+    mitigated: Optional[int] = None     # Bar pertama yang kembali menyentuh zona
+
+    @property
+    def mid(self) -> float:
+        return (self.top + self.bottom) / 2
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(asdict(self), mid=self.mid)
+
+
+@dataclass
+class LiquidityPool:
+    side: str               # buy (di atas swing high) | sell (di bawah swing low)
+    level: float
+    touches: int            # Jumlah swing yang membentuk pool; >= 2 = equal highs/lows
+    first: int
+    last: int
+    swept: Optional[int] = None
+
+    @property
+    def equal(self) -> bool:
+        return self.touches >= 2
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(asdict(self), equal=self.equal)
+
+
+@dataclass
+class Sweep:
+    side: str
+    level: float
+    index: int
+    equal: bool             # Pool equal highs/lows (likuiditas lebih besar)
+
+
+class _Sorted:
+    """List item terurut berdasarkan key (harga) + list key paralel untuk bisect"""
+    __slots__ = ("keys", "items")
+
+    def __init__(self):
+        self.keys: List[float] = []
+        self.items: List[Any] = []
+
+    def add(self, key: float, item: Any) -> None:
+        i = bisect.bisect_right(self.keys, key)
+        self.keys.insert(i, key)
+        self.items.insert(i, item)
+
+    def remove(self, key: float, item: Any) -> None:
+        i = bisect.bisect_left(self.keys, key)
+        while self.items[i] is not item:
+            i += 1
+        del self.keys[i], self.items[i]
+
+    def pop_from(self, i: int) -> List[Any]:
+        out = self.items[i:]
+        del self.keys[i:], self.items[i:]
+        return out
+
+    def pop_until(self, i: int) -> List[Any]:
+        out = self.items[:i]
+        del self.keys[:i], self.items[:i]
+        return out
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+
+class SMCIndex:
+    """Index SMC satu deret candle, dibangun inkremental (satu pass, bar demi bar).
+
+    - Swing high/low: pivot `swing_length` bar kiri dan kanan (terkonfirmasi
+      `swing_length` bar setelah pivot).
+    - Order Block: saat close menembus swing high terakhir (BOS bullish), candle
+      bearish terakhir sebelum bar penembus menjadi demand OB; simetris untuk supply.
+      OB termitigasi saat harga kembali menyentuh zona.
+    - FVG: gap tiga candle (low[i] > high[i-2] bullish, high[i] < low[i-2] bearish).
+    - Pool likuiditas: setiap swing high (buy-side) / swing low (sell-side); swing
+      berikutnya dalam `equal_tolerance` digabung menjadi equal highs/lows. Pool
+      tersapu saat harga menembus level; jika close kembali di dalam = sweep.
+    """
+
+    def __init__(self, swing_length: int = SMC_SWING_LENGTH, equal_tolerance: float = SMC_EQUAL_TOLERANCE):
+        self.swing_length = swing_length
+        self.equal_tolerance = equal_tolerance
+        self.count = 0
+        self.last_time: Optional[int] = None
+        self.last_close: Optional[float] = None
+        self.trend = "Sideways"                 # Arah break of structure terakhir
+
+        self.swings: List[Swing] = []
+        self.zones: List[Zone] = []
+        self.pools: List[LiquidityPool] = []
+        self.sweeps: List[Sweep] = []
+
+        self._active = {DEMAND: _Sorted(), SUPPLY: _Sorted(), BULLISH_FVG: _Sorted(), BEARISH_FVG: _Sorted()}
+        self._pools = {BUY_SIDE: _Sorted(), SELL_SIDE: _Sorted()}
+        size = 2 * swing_length + 1            # Jendela pivot: (index, open_time), high, low
+        self._bars: Deque[Tuple[int, int]] = deque(maxlen=size)
+        self._highs: Deque[float] = deque(maxlen=size)
+        self._lows: Deque[float] = deque(maxlen=size)
+        self._prev: Deque[Tuple[float, float]] = deque(maxlen=2)      # (high, low) dua bar sebelumnya
+        self._last_high: Optional[Swing] = None                        # Swing yang belum ditembus
+        self._last_low: Optional[Swing] = None
+        self._last_bear: Optional[Tuple[int, int, float, float]] = None   # (index, time, high, low)
+        self._last_bull: Optional[Tuple[int, int, float, float]] = None
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_candles(cls, candles: Candles, **kwargs) -> "SMCIndex":
+        index = cls(**kwargs)
+        index.extend(candles)
+        return index
+
+    # --- Ingest ---
+
+    def extend(self, candles: Candles) -> int:
+        """Append bar yang lebih baru dari bar terakhir di index; return jumlah bar baru"""
+        start = 0
+        if self.last_time is not None:
+            start = int(np.searchsorted(candles.open_time, self.last_time, side="right"))
+        if start >= len(candles):
+            return 0
+        cols = (candles.open_time[start:].tolist(), candles.open[start:].tolist(), candles.high[start:].tolist(),
+                candles.low[start:].tolist(), candles.close[start:].tolist())
+        for t, o, h, l, c in zip(*cols):
+            self.append(t, o, h, l, c)
+        return len(cols[0])
+
+    def append(self, open_time: int, o: float, h: float, l: float, c: float) -> None:
+        i = self.count
+
+        # 1. Mitigasi zona & sapuan pool oleh bar ini (hanya zona yang dibuat sebelum bar ini)
+        for kind in (DEMAND, BULLISH_FVG):
+            active = self._active[kind]
+            if active.keys and active.keys[-1] >= l:
+                for zone in active.pop_from(bisect.bisect_left(active.keys, l)):
+                    zone.mitigated = i
+        for kind in (SUPPLY, BEARISH_FVG):
+            active = self._active[kind]
+            if active.keys and active.keys[0] <= h:
+                for zone in active.pop_until(bisect.bisect_right(active.keys, h)):
+                    zone.mitigated = i
+        buy = self._pools[BUY_SIDE]
+        if buy.keys and buy.keys[0] < h:
+            for pool in buy.pop_until(bisect.bisect_left(buy.keys, h)):
+                pool.swept = i
+                if c < pool.level:
+                    self.sweeps.append(Sweep(BUY_SIDE, pool.level, i, pool.equal))
+        sell = self._pools[SELL_SIDE]
+        if sell.keys and sell.keys[-1] > l:
+            for pool in sell.pop_from(bisect.bisect_right(sell.keys, l)):
+                pool.swept = i
+                if c > pool.level:
+                    self.sweeps.append(Sweep(SELL_SIDE, pool.level, i, pool.equal))
+
+        # 2. Break of structure -> Order Block dari candle berlawanan terakhir
+        if self._last_high is not None and c > self._last_high.price:
+            if self._last_bear is not None:
+                j, t, bh, bl = self._last_bear
+                self._add_zone(Zone(DEMAND, bh, bl, j, i, t))
+            self._last_high = None
+            self.trend = "Bullish"
+        if self._last_low is not None and c < self._last_low.price:
+            if self._last_bull is not None:
+                j, t, bh, bl = self._last_bull
+                self._add_zone(Zone(SUPPLY, bh, bl, j, i, t))
+            self._last_low = None
+            self.trend = "Bearish"
+
+        # 3. Fair Value Gap (candle i-2 vs i)
+        if len(self._prev) == 2:
+            h2, l2 = self._prev[0]
+            if l > h2:
+                self._add_zone(Zone(BULLISH_FVG, l, h2, i - 1, i, self._bars[-1][1]))
+            elif h < l2:
+                self._add_zone(Zone(BEARISH_FVG, l2, h, i - 1, i, self._bars[-1][1]))
+        self._prev.append((h, l))
+
+        if c < o:
+            self._last_bear = (i, open_time, h, l)
+        elif c > o:
+            self._last_bull = (i, open_time, h, l)
+
+        # 4. Swing pivot di tengah jendela (terkonfirmasi swing_length bar kemudian)
+        self._bars.append((i, open_time))
+        self._highs.append(h)
+        self._lows.append(l)
+        if len(self._bars) == self._bars.maxlen:
+            self._confirm_pivot()
+
+        self.count = i + 1
+        self.last_time = open_time
+        self.last_close = c
+
+    def _confirm_pivot(self) -> None:
+        n = self.swing_length
+        highs, lows = self._highs, self._lows
+        ph, pl = highs[n], lows[n]
+        # Jalur cepat: hampir semua bar bukan pivot (bukan max/min jendela)
+        if max(highs) == ph and all(highs[k] < ph for k in range(n)):
+            j, t = self._bars[n]
+            swing = Swing("high", ph, j, t)
+            self.swings.append(swing)
+            self._last_high = swing
+            self._add_pool(BUY_SIDE, ph, j)
+        if min(lows) == pl and all(lows[k] > pl for k in range(n)):
+            j, t = self._bars[n]
+            swing = Swing("low", pl, j, t)
+            self.swings.append(swing)
+            self._last_low = swing
+            self._add_pool(SELL_SIDE, pl, j)
+
+    def _add_zone(self, zone: Zone) -> None:
+        self.zones.append(zone)
+        key = zone.top if zone.kind in (DEMAND, BULLISH_FVG) else zone.bottom
+        self._active[zone.kind].add(key, zone)
+
+    def _add_pool(self, side: str, price: float, index: int) -> None:
+        pools = self._pools[side]
+        # Pool aktif terdekat dalam toleransi -> equal highs/lows
+        i = bisect.bisect_left(pools.keys, price)
+        nearest = None
+        for k in (i - 1, i):
+            if 0 <= k < len(pools) and abs(pools.keys[k] - price) <= price * self.equal_tolerance:
+                if nearest is None or abs(pools.keys[k] - price) < abs(nearest.level - price):
+                    nearest = pools.items[k]
+        if nearest is not None:
+            pools.remove(nearest.level, nearest)
+            nearest.level = max(nearest.level, price) if side == BUY_SIDE else min(nearest.level, price)
+            nearest.touches += 1
+            nearest.last = index
+            pools.add(nearest.level, nearest)
+            return
+        pool = LiquidityPool(side, price, 1, index, index)
+        self.pools.append(pool)
+        pools.add(price, pool)
+
+    # --- Query ---
+
+    def nearest(self, kind: str, price: float) -> Optional[Zone]:
+        """Zona aktif (belum termitigasi) terdekat: demand/bullish_fvg di bawah `price`,
+        supply/bearish_fvg di atas `price`. O(log n)."""
+        active = self._active[kind]
+        if kind in (DEMAND, BULLISH_FVG):
+            i = bisect.bisect_left(active.keys, price) - 1
+            return active.items[i] if i >= 0 else None
+        i = bisect.bisect_right(active.keys, price)
+        return active.items[i] if i < len(active) else None
+
+    def active(self, kind: str) -> List[Zone]:
+        return list(self._active[kind].items)
+
+    def nearest_pool(self, side: str, price: float, equal_only: bool = False) -> Optional[LiquidityPool]:
+        """Pool buy-side terdekat di atas `price` / sell-side di bawah `price`"""
+        pools = self._pools[side]
+        if side == BUY_SIDE:
+            candidates = pools.items[bisect.bisect_right(pools.keys, price):]
+        else:
+            candidates = reversed(pools.items[:bisect.bisect_left(pools.keys, price)])
+        for pool in candidates:
+            if pool.equal or not equal_only:
+                return pool
+        return None
+
+    def sweep_status(self, high: float, low: float, close: float) -> str:
+        """Apakah bar (misal bar berjalan yang belum di-append) menyapu pool aktif lalu close kembali"""
+        buy = self._pools[BUY_SIDE].keys
+        if bisect.bisect_right(buy, close) < bisect.bisect_left(buy, high):
+            return SWEEP_LABELS[BUY_SIDE]
+        sell = self._pools[SELL_SIDE].keys
+        if bisect.bisect_right(sell, low) < bisect.bisect_left(sell, close):
+            return SWEEP_LABELS[SELL_SIDE]
+        return SWEEP_LABELS[None]
+
+    def order_block(self, bias: str, price: float) -> Optional[Dict[str, float]]:
+        """OB aktif terdekat searah bias (Sideways: yang paling dekat dengan harga), format
+        sama dengan strategy.detect_valid_order_block"""
+        demand = self.nearest(DEMAND, price) if bias != "Bearish" else None
+        supply = self.nearest(SUPPLY, price) if bias != "Bullish" else None
+        if demand and supply:
+            zone = demand if price - demand.top <= supply.bottom - price else supply
+        else:
+            zone = demand or supply
+        if zone is None:
+            return None
+        return {"type": "Demand" if zone.kind == DEMAND else "Supply",
+                "low": zone.bottom, "high": zone.top, "mid": zone.mid}
+
+    def summary(self, price: float) -> Dict[str, Any]:
+        """Zona/pool terdekat dari `price` untuk output API"""
+        def zone(kind):
+            z = self.nearest(kind, price)
+            return z and {"top": round(z.top, 8), "bottom": round(z.bottom, 8), "open_time": z.open_time}
+
+        def pool(side):
+            p = self.nearest_pool(side, price, equal_only=True)
+            return p and {"level": round(p.level, 8), "touches": p.touches}
+
+        last_sweep = self.sweeps[-1] if self.sweeps else None
+        return {
+            "bars": self.count,
+            "trend": self.trend,
+            "demand_ob": zone(DEMAND),
+            "supply_ob": zone(SUPPLY),
+            "bullish_fvg": zone(BULLISH_FVG),
+            "bearish_fvg": zone(BEARISH_FVG),
+            "equal_highs": pool(BUY_SIDE),
+            "equal_lows": pool(SELL_SIDE),
+            "last_sweep": last_sweep and {"side": last_sweep.side, "level": round(last_sweep.level, 8),
+                                          "bars_ago": self.count - 1 - last_sweep.index},
+            "active": {k: len(v) for k, v in self._active.items()},
+        }
+
+
+class SMCEngine:
+    """SMCIndex per (symbol, timeframe) yang diperbarui inkremental dari candle request.
+
+    Bar terakhir dianggap masih berjalan dan tidak di-commit ke index (dievaluasi
+    lewat query). Index baru dibangun dari `history(symbol, timeframe)` jika ada
+    (misal candle store lokal dengan histori panjang), selain itu dari candle yang
+    diberikan. Celah antara index dan candle baru (proses lama tidak dipakai)
+    memicu rebuild.
+
+    Satu index dipakai bersama semua request untuk (symbol, timeframe) dan extend()
+    memotong list zona/pool aktif, jadi baca index (sweep_status, order_block,
+    summary, ...) lewat query() yang memegang `index.lock`.
+    """
+
+    def __init__(self, max_indexes: int = SMC_MAX_INDEXES,
+                 history: Optional[Callable[[str, str], Candles]] = None, **params):
+        self.max_indexes = max_indexes
+        self.history = history
+        self.params = params
+        self._indexes: "OrderedDict[Tuple[str, str], SMCIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"builds": 0, "appended": 0, "hits": 0}
+
+    def _build(self, symbol: str, timeframe: str, closed: Candles) -> SMCIndex:
+        index = SMCIndex(**self.params)
+        if self.history is not None:
+            try:
+                index.extend(self.history(symbol, timeframe))
+            except Exception:
+                index = SMCIndex(**self.params)
+        index.extend(closed)
+        self.stats["builds"] += 1
+        return index
+
+    def index(self, symbol: str, timeframe: str, candles: Candles, live_last: bool = True) -> SMCIndex:
+        key = (symbol, timeframe)
+        closed = candles[:-1] if live_last and len(candles) else candles
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None:
+                self._indexes.move_to_end(key)
+        if index is not None and len(closed) and index.last_time is not None \
+                and closed.open_time[0] > index.last_time + timeframe_ms(timeframe):
+            index = None   # celah: histori baru tidak nyambung dengan index lama
+        if index is None:
+            index = self._build(symbol, timeframe, closed)
+            with self._lock:
+                self._indexes[key] = index
+                while len(self._indexes) > self.max_indexes:
+                    self._indexes.popitem(last=False)
+            return index
+        with index.lock:
+            added = index.extend(closed)
+        with self._lock:
+            self.stats["appended" if added else "hits"] += added or 1
+        return index
+
+    def query(self, symbol: str, timeframe: str, candles: Candles, fn: Callable[[SMCIndex], Any],
+              live_last: bool = True) -> Any:
+        """Perbarui index lalu jalankan fn(index) di bawah `index.lock` (tidak bentrok dengan extend)"""
+        index = self.index(symbol, timeframe, candles, live_last)
+        with index.lock:
+            return fn(index)
+
+    def __len__(self) -> int:
+        return len(self._indexes)
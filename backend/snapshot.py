@@ -0,0 +1,319 @@
+# snapshot.py (Snapshot analisa per (symbol, bar): output + JSON yang sudah diserialisasi, dibagi semua user)
+#
+# Output analyze_and_generate_signal hanya bergantung pada data market, jadi cukup
+# dihitung dan diserialisasi sekali per koin per bar. /analyze menjadi lookup snapshot
+# + persistence per user. Dua tingkat: LRU di proses (bytes + dict siap pakai) dan
+# opsional key-value store bergaya Redis (shared.py) yang dibagi antar proses worker.
+# Snapshot dihangatkan setelah setiap bar close untuk koin yang dilacak (SnapshotWarmer,
+# dijalankan job scheduler.py).
+import os
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from singleflight import SingleFlight
+
+logger = logging.getLogger("HybridAnalyzerV8")
+
+SNAPSHOT_MAX_ENTRIES = int(os.getenv("SNAPSHOT_MAX_ENTRIES", 2048))
+SNAPSHOT_MAX_AGE = float(os.getenv("SNAPSHOT_MAX_AGE", 60))            # Detik; lebih tua -> refresh di belakang layar
+SNAPSHOT_REDIS_URL = os.getenv("SNAPSHOT_REDIS_URL", "")               # Kosong = hanya LRU di proses; local / redis://...
+SNAPSHOT_LEASE_SECONDS = float(os.getenv("SNAPSHOT_LEASE_SECONDS", 30))  # Lease L2: satu proses menghitung, sisanya menunggu
+SNAPSHOT_SYMBOLS = [s.strip().upper() for s in os.getenv("SNAPSHOT_SYMBOLS", "").split(",") if s.strip()]
+SNAPSHOT_TRACK_BARS = int(os.getenv("SNAPSHOT_TRACK_BARS", 24))        # Koin yang diminta N bar terakhir ikut dihangatkan
+SNAPSHOT_MAX_TRACKED = int(os.getenv("SNAPSHOT_MAX_TRACKED", 200))
+
+Result = Tuple[Dict[str, Any], str, Optional[Dict[str, Any]]]
+Compute = Callable[[str], Optional[Result]]
+
+
+class Snapshot:
+    """Hasil analisa satu (symbol, epoch) + body JSON response yang sudah jadi. Dibagi antar
+    request, jadi jangan dimutasi."""
+    __slots__ = ("symbol", "epoch", "body", "output", "recommendation", "trade_levels", "computed_at")
+
+    def __init__(self, symbol: str, epoch: int, body: bytes, output: Dict[str, Any], recommendation: str,
+                 trade_levels: Optional[Dict[str, Any]], computed_at: float):
+        self.symbol = symbol
+        self.epoch = epoch
+        self.body = body
+        self.output = output
+        self.recommendation = recommendation
+        self.trade_levels = trade_levels
+        self.computed_at = computed_at
+
+    def encode(self) -> bytes:
+        """Format L2: satu baris JSON metadata, lalu body response apa adanya"""
+        meta = json.dumps({"recommendation": self.recommendation, "trade_levels": self.trade_levels,
+                           "computed_at": self.computed_at}, default=str)
+        return meta.encode() + b"\n" + self.body
+
+    @classmethod
+    def decode(cls, symbol: str, epoch: int, raw: bytes) -> "Snapshot":
+        head, body = raw.split(b"\n", 1)
+        meta = json.loads(head)
+        return cls(symbol, epoch, body, json.loads(body), meta["recommendation"], meta["trade_levels"],
+                   meta["computed_at"])
+
+
+class SnapshotCache:
+    """Snapshot per (symbol, epoch bar): LRU di proses + L2 opsional.
+
+    `get_or_compute` mengembalikan snapshot bar berjalan; miss dihitung sekali untuk
+    semua request bersamaan (SingleFlight), dan dengan L2 juga sekali untuk semua proses:
+    pemegang lease `snapshot:...:lease` (SET NX PX) menghitung, proses lain menunggu
+    hasilnya muncul di L2. Snapshot yang lebih tua dari `max_age`
+    detik tetap dilayani sementara satu refresh berjalan di belakang layar, supaya
+    harga live di output tidak tertinggal lama. max_age=0 = snapshot berlaku satu bar.
+    """
+
+    def __init__(self, dumps: Callable[[Any], bytes], max_entries: int = SNAPSHOT_MAX_ENTRIES,
+                 max_age: float = SNAPSHOT_MAX_AGE, remote: Optional[Any] = None, ttl: float = 7200.0,
+                 clock: Callable[[], float] = time.time, refresh_workers: int = 2,
+                 max_tracked: int = SNAPSHOT_MAX_TRACKED, lease: float = SNAPSHOT_LEASE_SECONDS,
+                 lease_poll: float = 0.02):
+        self.dumps = dumps
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.remote = remote
+        self.ttl = ttl
+        self.clock = clock
+        self.refresh_workers = refresh_workers
+        self.max_tracked = max_tracked
+        self.lease = lease
+        self.lease_poll = lease_poll
+        self._entries: "OrderedDict[Tuple[str, int], Snapshot]" = OrderedDict()
+        self._requested: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._refreshing: set = set()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.stats = {"hits": 0, "remote_hits": 0, "misses": 0, "stale": 0, "refreshes": 0, "stored": 0,
+                      "remote_errors": 0, "lease_waits": 0}
+
+    @staticmethod
+    def key(symbol: str, epoch: int) -> str:
+        return f"snapshot:{symbol}:{epoch}"
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+    # --- Lookup ---
+
+    def peek(self, symbol: str, epoch: int) -> Optional[Snapshot]:
+        """Hanya LRU di proses (tanpa I/O; aman dipanggil dari event loop)"""
+        with self._lock:
+            snap = self._entries.get((symbol, epoch))
+            if snap is not None:
+                self._entries.move_to_end((symbol, epoch))
+                self.stats["hits"] += 1
+            return snap
+
+    def get(self, symbol: str, epoch: int) -> Optional[Snapshot]:
+        snap = self.peek(symbol, epoch)
+        if snap is not None or self.remote is None:
+            return snap
+        return self._remote_get(symbol, epoch)
+
+    def _remote_get(self, symbol: str, epoch: int, newer_than: float = 0.0) -> Optional[Snapshot]:
+        """Snapshot dari L2 yang dihitung setelah `newer_than` (disimpan juga ke LRU)"""
+        try:
+            raw = self.remote.get(self.key(symbol, epoch))
+        except Exception as e:
+            self.count("remote_errors")
+            logger.warning(f"Snapshot L2 get failed: {e}")
+            return None
+        if raw is None:
+            return None
+        snap = Snapshot.decode(symbol, epoch, raw)
+        if snap.computed_at <= newer_than:
+            return None
+        self._remember(snap)
+        self.count("remote_hits")
+        return snap
+
+    def put(self, symbol: str, epoch: int, result: Result, publish: bool = True) -> Snapshot:
+        """Serialisasi sekali lalu simpan di LRU (+ L2 jika `publish`)"""
+        output, recommendation, trade_levels = result
+        snap = Snapshot(symbol, epoch, self.dumps(output), output, recommendation, trade_levels, self.clock())
+        self._remember(snap)
+        self.count("stored")
+        if publish and self.remote is not None:
+            try:
+                self.remote.set(self.key(symbol, epoch), snap.encode(), ex=int(self.ttl))
+            except Exception as e:
+                self.count("remote_errors")
+                logger.warning(f"Snapshot L2 set failed: {e}")
+        return snap
+
+    def _remember(self, snap: Snapshot) -> None:
+        with self._lock:
+            key = (snap.symbol, snap.epoch)
+            current = self._entries.get(key)
+            if current is None or current.computed_at <= snap.computed_at:
+                self._entries[key] = snap
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def fresh(self, snap: Snapshot) -> bool:
+        return self.max_age <= 0 or self.clock() - snap.computed_at <= self.max_age
+
+    # --- Compute ---
+
+    def compute(self, symbol: str, epoch: int, fn: Compute, newer_than: float = 0.0) -> Optional[Snapshot]:
+        """Hitung + simpan; request bersamaan untuk (symbol, epoch) yang sama berbagi satu eksekusi
+        (antar proses lewat lease L2; `newer_than` = snapshot lama yang sedang diganti)"""
+        def run() -> Optional[Snapshot]:
+            lease = self._acquire_lease(symbol, epoch, newer_than)
+            if isinstance(lease, Snapshot):
+                return lease
+            try:
+                result = fn(symbol)
+                return self.put(symbol, epoch, result) if result else None
+            finally:
+                if lease:
+                    self._release_lease(lease)
+        snap, _ = self._flight.do((symbol, epoch), run)
+        return snap
+
+    def _acquire_lease(self, symbol: str, epoch: int, newer_than: float) -> Any:
+        """Key lease jika proses ini yang menghitung, Snapshot jika proses lain sudah
+        menyelesaikannya, None jika tanpa L2 (atau L2 gagal: hitung sendiri)"""
+        if self.remote is None or self.lease <= 0:
+            return None
+        key = self.key(symbol, epoch) + ":lease"
+        waited = False
+        while True:
+            try:
+                if self.remote.set(key, os.getpid(), nx=True, px=int(self.lease * 1000)):
+                    return key
+            except Exception as e:
+                self.count("remote_errors")
+                logger.warning(f"Snapshot lease failed: {e}")
+                return None
+            if not waited:
+                waited = True
+                self.count("lease_waits")
+            time.sleep(self.lease_poll)
+            snap = self._remote_get(symbol, epoch, newer_than)
+            if snap is not None:
+                return snap
+
+    def _release_lease(self, key: str) -> None:
+        try:
+            self.remote.delete(key)
+        except Exception as e:
+            self.count("remote_errors")
+            logger.warning(f"Snapshot lease release failed: {e}")
+
+    def get_or_compute(self, symbol: str, epoch: int, fn: Compute) -> Optional[Snapshot]:
+        self.track(symbol, epoch)
+        snap = self.get(symbol, epoch)
+        if snap is None:
+            self.count("misses")
+            return self.compute(symbol, epoch, fn)
+        if not self.fresh(snap):
+            # Proses lain mungkin sudah me-refresh
+            newer = self._remote_get(symbol, epoch, snap.computed_at) if self.remote is not None else None
+            if newer is not None:
+                return newer
+            self.count("stale")
+            self.refresh_later(symbol, epoch, fn, snap.computed_at)
+        return snap
+
+    def refresh_later(self, symbol: str, epoch: int, fn: Compute, newer_than: float = 0.0) -> None:
+        with self._lock:
+            if (symbol, epoch) in self._refreshing:
+                return
+            self._refreshing.add((symbol, epoch))
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.refresh_workers,
+                                                    thread_name_prefix="snapshot")
+
+        def run() -> None:
+            try:
+                self.compute(symbol, epoch, fn, newer_than)
+                self.count("refreshes")
+            except Exception as e:
+                logger.warning(f"Snapshot refresh {symbol} failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard((symbol, epoch))
+        self._executor.submit(run)
+
+    # --- Koin yang dilacak ---
+
+    def track(self, symbol: str, epoch: int) -> None:
+        with self._lock:
+            self._requested[symbol] = epoch
+            self._requested.move_to_end(symbol)
+            while len(self._requested) > self.max_tracked:
+                self._requested.popitem(last=False)
+
+    def tracked(self, epoch: int, bars: int = SNAPSHOT_TRACK_BARS) -> List[str]:
+        """Koin yang diminta dalam `bars` bar terakhir (terbaru dulu)"""
+        with self._lock:
+            return [s for s, last in reversed(self._requested.items()) if epoch - last < bars]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Metrik untuk /health"""
+        with self._lock:
+            return dict(self.stats, entries=len(self._entries), tracked=len(self._requested),
+                        remote=type(self.remote).__name__ if self.remote is not None else None)
+
+
+class SnapshotWarmer:
+    """Menghitung snapshot bar baru untuk semua koin yang dilacak; dipanggil job bar close
+    (scheduler.py), jadi request pertama setelah close sudah berupa lookup."""
+
+    def __init__(self, cache: SnapshotCache, compute: Compute, symbols: Callable[[int], Iterable[str]],
+                 timeframe_ms: int = 3_600_000, each: Optional[Callable[[Callable, Iterable], List]] = None,
+                 workers: int = 3, clock: Callable[[], float] = time.time):
+        self.cache = cache
+        self.compute = compute
+        self.symbols = symbols
+        self.timeframe_ms = timeframe_ms
+        self.each = each          # map(fn, items) dengan pool terbatas (BarScheduler.each); None = pool sendiri
+        self.workers = workers
+        self.clock = clock
+        self.stats = {"runs": 0, "computed": 0, "failed": 0, "last_run_ms": 0.0}
+
+    def epoch(self, now: Optional[float] = None) -> int:
+        return int((self.clock() if now is None else now) * 1000) // self.timeframe_ms
+
+    def _map(self, fn: Callable[[str], bool], symbols: List[str]) -> List[bool]:
+        if self.each is not None:
+            return self.each(fn, symbols)
+        with ThreadPoolExecutor(max_workers=max(1, self.workers), thread_name_prefix="snapshot-warm") as pool:
+            return list(pool.map(fn, symbols))
+
+    def warm(self, epoch: Optional[int] = None) -> int:
+        """Hitung snapshot `epoch` (default bar berjalan) untuk semua koin yang dilacak"""
+        epoch = self.epoch() if epoch is None else epoch
+        symbols = list(dict.fromkeys(self.symbols(epoch)))
+        t0 = time.perf_counter()
+
+        def one(symbol: str) -> bool:
+            try:
+                return self.cache.compute(symbol, epoch, self.compute) is not None
+            except Exception as e:
+                logger.warning(f"Snapshot warm {symbol} failed: {e}")
+                return False
+
+        done = sum(self._map(one, symbols))
+        self.stats["runs"] += 1
+        self.stats["computed"] += done
+        self.stats["failed"] += len(symbols) - done
+        self.stats["last_run_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+        if symbols:
+            logger.info(f"Snapshot warm: {done}/{len(symbols)} symbols for bar {epoch}")
+        return done
@@ -0,0 +1,174 @@
+# strategy.py (Parameter & fungsi inti strategi SMC: bias, Order Block, Liquidity Sweep, level trade)
+#
+# Tidak bergantung pada Flask/ccxt/DB, jadi bisa dipakai analyzer, backtest dan
+# worker optimizer (proses terpisah) dengan konfigurasi yang berbeda-beda.
+import math
+from dataclasses import asdict, dataclass, fields, replace
+from typing import Any, Dict, Optional
+
+from candles import Candles
+from indicators import atr_series
+
+
+@dataclass(frozen=True)
+class StrategyConfig:
+    """Semua angka yang menentukan sinyal; default = perilaku live saat ini."""
+
+    min_rrr: float = 2.0                # RRR minimal (TP1 = entry + risk * min_rrr)
+    tp2_rrr: float = 3.5                # Kelipatan risk untuk TP2
+    atr_multiplier: float = 2.0         # Koefisien ATR untuk SL
+    atr_period: int = 14                # Periode ATR 4H
+    ob_lookback: int = 10               # Jendela pencarian OB (candle 4H terakhir)
+    sweep_window: int = 5               # Jendela liquidity sweep (candle 1H terakhir)
+    distance_tolerance: float = 0.05    # Maks. jarak entry dari harga sekarang
+    bias_slope: float = 0.01            # Ambang slope Bullish/Bearish
+    equity: float = 10000               # Asumsi modal untuk ukuran posisi
+    risk_per_trade_percent: float = 1.0
+
+    def replace(self, **changes: Any) -> "StrategyConfig":
+        return replace(self, **changes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, values: Dict[str, Any]) -> "StrategyConfig":
+        """Abaikan key yang tidak dikenal; tipe int dipertahankan untuk periode/jendela"""
+        known = {f.name: f.type for f in fields(cls)}
+        return cls(**{k: (int(v) if known[k] is int else float(v)) for k, v in values.items() if k in known})
+
+
+DEFAULT_STRATEGY = StrategyConfig()
+
+
+def calc_structure_and_bias(candles: Candles, config: StrategyConfig = DEFAULT_STRATEGY) -> str:
+    """Menentukan bias dasar pasar"""
+    if len(candles) < 20: return "Sideways"
+    closes = candles.close
+    slope = (closes[-1] - closes[0]) / closes[0]
+    if slope > config.bias_slope: return "Bullish"
+    elif slope < -config.bias_slope: return "Bearish"
+    else: return "Sideways"
+
+
+def detect_valid_order_block(candles: Candles, bias: str,
+                             config: StrategyConfig = DEFAULT_STRATEGY) -> Optional[Dict[str, float]]:
+    """Mendeteksi Order Block dasar (tanpa FVG ketat) di `ob_lookback` candle terakhir."""
+    lookback = config.ob_lookback
+    if len(candles) < lookback: return None
+
+    window = candles.tail(lookback)   # Hanya jendela yang diperiksa, bukan seluruh histori
+    opens, closes = window.open.tolist(), window.close.tolist()
+    highs, lows = window.high.tolist(), window.low.tolist()
+    current_price = closes[-1]
+
+    for i in range(lookback - 1):
+        is_bullish_ob = closes[i] < opens[i] # Lilin Merah/Bearish -> Demand OB
+        is_bearish_ob = closes[i] > opens[i] # Lilin Hijau/Bullish -> Supply OB
+
+        # Filter: Harga saat ini tidak boleh berada di dalam OB
+        if min(opens[i], closes[i]) < current_price < max(opens[i], closes[i]):
+            continue
+
+        if is_bullish_ob or is_bearish_ob:
+            return {
+                "type": "Demand" if is_bullish_ob else "Supply",
+                "low": lows[i],
+                "high": highs[i],
+                "mid": (highs[i] + lows[i]) / 2,
+            }
+    return None
+
+
+def detect_liquidity_sweep(candles: Candles, config: StrategyConfig = DEFAULT_STRATEGY) -> str:
+    """Mendeteksi pola stop-hunt di `sweep_window` lilin terakhir."""
+    window = config.sweep_window
+    if len(candles) < window: return "None"
+    last_highs = candles.high[-window:]
+    last_lows = candles.low[-window:]
+
+    # Sweep terjadi jika lilin terakhir menembus High/Low sebelumnya (tanpa menembus Low/High)
+    sweep_high = bool(last_highs[-1] > last_highs[:-1].max())
+    sweep_low = bool(last_lows[-1] < last_lows[:-1].min())
+
+    if sweep_high: return "Buy-side liquidity sweep"
+    elif sweep_low: return "Sell-side liquidity sweep"
+    return "None"
+
+
+def calculate_rrr(entry: float, sl: float, tp: float, side: str) -> float:
+    """Menghitung Rasio Risiko/Imbalan"""
+    if side == "Long":
+        risk = abs(entry - sl)
+        reward = abs(tp - entry)
+    else:
+        risk = abs(sl - entry)
+        reward = abs(entry - tp)
+
+    return reward / risk if risk > 0 else 0.0
+
+
+def generate_trade_levels(ob_zone: Dict[str, float], bias: str, current_price: float, candles_4h: Candles,
+                          atr: Optional[float] = None,
+                          config: StrategyConfig = DEFAULT_STRATEGY) -> Optional[Dict[str, Any]]:
+    """Menghitung level Entry, SL, TP dinamis. RRR minimal `min_rrr` untuk semua sinyal."""
+    entry = ob_zone["mid"]
+    if atr is not None:
+        current_atr = atr
+    elif len(candles_4h) < config.atr_period + 1:
+        current_atr = 0.0
+    else:
+        current_atr = float(atr_series(candles_4h.high, candles_4h.low, candles_4h.close, config.atr_period)[-1])
+
+    # Tentukan Side
+    if ob_zone["type"] == "Demand": side = "Long"
+    elif ob_zone["type"] == "Supply": side = "Short"
+    else: return None
+
+    # Filter 1: POSISI HARGA SAAT INI (Logika Limit Order)
+    tolerance = config.distance_tolerance
+    if side == "Long":
+        # Entry di bawah Current Price
+        if entry >= current_price or (current_price - entry) / current_price > tolerance: return None
+    else:
+        # Entry di atas Current Price
+        if entry <= current_price or (entry - current_price) / current_price > tolerance: return None
+
+    # SL Dinamis (ATR-Based)
+    atr_risk = current_atr * config.atr_multiplier
+
+    if side == "Long":
+        sl = min(ob_zone["low"] * 0.999, entry - atr_risk)
+        tp1 = entry + (entry - sl) * config.min_rrr
+        tp2 = entry + (entry - sl) * config.tp2_rrr
+    else: # side == "Short"
+        sl = max(ob_zone["high"] * 1.001, entry + atr_risk)
+        tp1 = entry - (sl - entry) * config.min_rrr
+        tp2 = entry - (sl - entry) * config.tp2_rrr
+
+    # 2. Hitung RRR dan Filter
+    rrr1 = calculate_rrr(entry, sl, tp1, side)
+
+    if rrr1 < config.min_rrr:
+        return None
+
+    # Periksa apakah ini counter-trend
+    is_counter = (bias == "Bearish" and side == "Long") or (bias == "Bullish" and side == "Short")
+
+    # Jika lolos RRR, kembalikan level
+    risk_dollars = config.equity * (config.risk_per_trade_percent / 100)
+    risk_per_unit = abs(entry - sl)
+    size_units = math.floor(risk_dollars / risk_per_unit)
+
+    return {
+        "recommendation": side,
+        "ob_type": ob_zone["type"],
+        "is_counter_trend": is_counter, # Pertahankan flag risiko
+        "entry": round(entry, 4),
+        "sl": round(sl, 4),
+        "tp1": round(tp1, 4),
+        "tp2": round(tp2, 4),
+        "rrr": round(rrr1, 2),
+        "required_rrr": config.min_rrr,
+        "position_size_units": size_units,
+    }
@@ -0,0 +1,330 @@
+# stream.py (Ingestion kline & mark price via websocket, dengan state indikator inkremental)
+import time
+import asyncio
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from candles import Candles, FIELDS
+from candle_cache import timeframe_ms
+from indicators import RSIState, MACDState, ATRState
+
+logger = logging.getLogger("HybridAnalyzerV8")
+
+# loader(symbol, timeframe, limit) -> Candles (biasanya fetch_candles_ccxt)
+Loader = Callable[[str, str, int], Candles]
+
+
+class KlineBuffer:
+    """Buffer rolling `capacity` bar terakhir untuk satu (symbol, timeframe).
+
+    Array dialokasikan 2x capacity dan dipadatkan saat penuh, jadi append
+    amortized O(1) dan jendela terakhir selalu kontigu. Bar terakhir adalah
+    bar yang sedang berjalan; saat kline dengan open_time baru datang, bar
+    sebelumnya dianggap close dan indikator dimajukan satu langkah.
+    """
+
+    def __init__(self, timeframe: str, capacity: int, atr_period: int = 14):
+        self.timeframe = timeframe
+        self.capacity = capacity
+        self.step = timeframe_ms(timeframe)
+        self._data = {f: np.zeros(2 * capacity, dtype=np.int64 if f == "open_time" else np.float64) for f in FIELDS}
+        self._start = 0
+        self._end = 0
+        self.rsi = RSIState()
+        self.macd = MACDState()
+        self.atr = ATRState(atr_period)
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def seed(self, candles: Candles) -> None:
+        """Isi ulang dari histori REST; indikator di-seed dari bar yang sudah close."""
+        candles = candles.tail(self.capacity)
+        n = len(candles)
+        for f in FIELDS:
+            self._data[f][:n] = getattr(candles, f)
+        self._start, self._end = 0, n
+        closed = candles[:-1]
+        self.rsi.seed(closed.close)
+        self.macd.seed(closed.close)
+        self.atr.seed(closed.high, closed.low, closed.close)
+
+    def on_kline(self, row: List[float]) -> bool:
+        """Terapkan satu update kline [ts, o, h, l, c, v]. Return False jika ada gap (perlu seed ulang)."""
+        open_time = int(row[0])
+        last_open = int(self._data["open_time"][self._end - 1])
+        if open_time < last_open:
+            return True  # update basi
+        if open_time > last_open:
+            if open_time - last_open != self.step:
+                return False
+            self._close_last()
+            self._append()
+        i = self._end - 1
+        for j, f in enumerate(FIELDS):
+            self._data[f][i] = row[j]
+        return True
+
+    def _close_last(self) -> None:
+        i = self._end - 1
+        h, l, c = self._data["high"][i], self._data["low"][i], self._data["close"][i]
+        self.rsi.update(c)
+        self.macd.update(c)
+        self.atr.update(h, l, c)
+
+    def _append(self) -> None:
+        if self._end == len(self._data["close"]):
+            keep = self.capacity - 1
+            for arr in self._data.values():
+                arr[:keep] = arr[self._end - keep:self._end]
+            self._start, self._end = 0, keep
+        self._end += 1
+        if len(self) > self.capacity:
+            self._start += 1
+
+    def candles(self) -> Candles:
+        """Salinan jendela saat ini (aman dibaca saat stream terus menulis)."""
+        return Candles(*(self._data[f][self._start:self._end].copy() for f in FIELDS))
+
+    def indicators(self) -> Dict[str, Optional[float]]:
+        """Nilai indikator untuk bar yang sedang berjalan (peek, O(1))."""
+        i = self._end - 1
+        h, l, c = float(self._data["high"][i]), float(self._data["low"][i]), float(self._data["close"][i])
+        return {"rsi": self.rsi.peek(c), "macd": self.macd.peek(c)[0], "atr": self.atr.peek(h, l, c)}
+
+
+class SymbolState:
+    __slots__ = ("buffers", "lock", "funding_rate", "long_short_ratio", "mark_price", "updated_at", "ready")
+
+    def __init__(self, limits: Dict[str, int], atr_period: int = 14):
+        self.buffers = {tf: KlineBuffer(tf, limit, atr_period) for tf, limit in limits.items()}
+        self.lock = threading.Lock()
+        self.funding_rate = 0.0
+        self.long_short_ratio = 1.0
+        self.mark_price: Optional[float] = None
+        self.updated_at = 0.0
+        self.ready = False
+
+
+class MarketStream:
+    """Menyimpan buffer 1h/4h/1d + sentimen live untuk sekumpulan symbol.
+
+    `source` adalah WebsocketSource (produksi) atau ReplaySource (test/bench);
+    keduanya memanggil on_kline / on_mark_price. market_data() mengembalikan
+    dict dengan bentuk yang sama seperti get_all_market_data, ditambah
+    indikator yang sudah dihitung, tanpa panggilan exchange.
+    """
+
+    def __init__(self, symbols: Iterable[str], limits: Dict[str, int], loader: Loader,
+                 source: Optional[Any] = None, max_staleness: float = 120.0,
+                 tf_low: str = "1h", tf_mid: str = "4h", atr_period: int = 14):
+        self.limits = limits
+        self.tf_low = tf_low
+        self.tf_mid = tf_mid
+        self.loader = loader
+        self.source = source or WebsocketSource()
+        self.max_staleness = max_staleness
+        self.states: Dict[str, SymbolState] = {s: SymbolState(limits, atr_period) for s in symbols}
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(self.states)
+
+    @property
+    def timeframes(self) -> List[str]:
+        return list(self.limits)
+
+    def seed(self, symbol: str) -> None:
+        state = self.states[symbol]
+        for tf, buffer in state.buffers.items():
+            candles = self.loader(symbol, tf, self.limits[tf])
+            if not len(candles):
+                logger.warning(f"Stream seed failed for {symbol} {tf}")
+                return
+            with state.lock:
+                buffer.seed(candles)
+        with state.lock:
+            state.ready = True
+            state.updated_at = time.time()
+
+    def _reseed(self, symbol: str) -> None:
+        try:
+            self.seed(symbol)
+        except Exception as e:
+            logger.error(f"Stream reseed error {symbol}: {e}")
+
+    def on_kline(self, symbol: str, timeframe: str, row: List[float]) -> None:
+        state = self.states.get(symbol)
+        if not state or timeframe not in state.buffers:
+            return
+        with state.lock:
+            if not state.ready:
+                return
+            ok = state.buffers[timeframe].on_kline(row)
+            state.updated_at = time.time()
+            if not ok:
+                state.ready = False
+        if not ok:
+            # Seed ulang di thread terpisah supaya loop websocket tidak tertahan
+            logger.warning(f"Kline gap on {symbol} {timeframe}, reseeding from REST")
+            threading.Thread(target=self._reseed, args=(symbol,), daemon=True).start()
+
+    def on_mark_price(self, symbol: str, mark_price: float, funding_rate: Optional[float] = None) -> None:
+        state = self.states.get(symbol)
+        if not state:
+            return
+        with state.lock:
+            state.mark_price = mark_price
+            if funding_rate is not None:
+                state.funding_rate = funding_rate
+
+    def on_long_short_ratio(self, symbol: str, ratio: float) -> None:
+        state = self.states.get(symbol)
+        if state:
+            state.long_short_ratio = ratio
+
+    def market_data(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Data analisa dari memori; None jika symbol tidak di-stream atau data basi."""
+        state = self.states.get(symbol)
+        if not state or not state.ready or time.time() - state.updated_at > self.max_staleness:
+            return None
+        with state.lock:
+            candles = {tf: b.candles() for tf, b in state.buffers.items()}
+            low_ind = state.buffers[self.tf_low].indicators()
+            mid_ind = state.buffers[self.tf_mid].indicators()
+            sentiment = {"funding_rate": state.funding_rate, "open_interest": 0.0,
+                         "long_short_ratio": state.long_short_ratio}
+        return {
+            "symbol": symbol,
+            "candles": candles,
+            "sentiment": sentiment,
+            "current_price": float(candles[self.tf_low].close[-1]),
+            "precomputed": {"RSI_1h": low_ind["rsi"], "MACD_1h": low_ind["macd"], "ATR_4h": mid_ind["atr"]},
+        }
+
+    # --- Lifecycle ---
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="market-stream", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        for symbol in self.symbols:
+            try:
+                self.seed(symbol)
+            except Exception as e:
+                logger.error(f"Stream seed error {symbol}: {e}")
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._task = self._loop.create_task(self.source.run(self))
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._loop.close()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        if self._loop and self._task and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._task.cancel)
+        if self._thread:
+            self._thread.join(timeout)
+
+
+# ==============================================================
+# SOURCES
+# ==============================================================
+
+class WebsocketSource:
+    """Stream kline & mark price Binance Futures lewat ccxt.pro.
+
+    Long/short ratio tidak tersedia di websocket, jadi diambil ulang lewat
+    `ls_ratio_loader` tiap `ls_ratio_interval` detik.
+    """
+
+    def __init__(self, ls_ratio_loader: Optional[Callable[[str], float]] = None,
+                 ls_ratio_interval: float = 300.0, reconnect_delay: float = 5.0):
+        self.ls_ratio_loader = ls_ratio_loader
+        self.ls_ratio_interval = ls_ratio_interval
+        self.reconnect_delay = reconnect_delay
+
+    async def run(self, stream: MarketStream) -> None:
+        import ccxt.pro as ccxtpro
+
+        exchange = ccxtpro.binance({'options': {'defaultType': 'future'}})
+        tasks = [self._watch_klines(exchange, stream, s, tf) for s in stream.symbols for tf in stream.timeframes]
+        tasks += [self._watch_mark_price(exchange, stream, s) for s in stream.symbols]
+        if self.ls_ratio_loader:
+            tasks.append(self._poll_ls_ratio(stream))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            await exchange.close()
+
+    async def _watch_klines(self, exchange, stream: MarketStream, symbol: str, timeframe: str) -> None:
+        while True:
+            try:
+                for row in await exchange.watch_ohlcv(symbol, timeframe):
+                    stream.on_kline(symbol, timeframe, row)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Kline stream error {symbol} {timeframe}: {e}")
+                await asyncio.sleep(self.reconnect_delay)
+
+    async def _watch_mark_price(self, exchange, stream: MarketStream, symbol: str) -> None:
+        while True:
+            try:
+                ticker = await exchange.watch_mark_price(symbol)
+                info = ticker.get("info") or {}
+                funding = info.get("r")
+                stream.on_mark_price(symbol, float(ticker.get("markPrice") or info.get("p") or 0.0),
+                                     float(funding) if funding is not None else None)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Mark price stream error {symbol}: {e}")
+                await asyncio.sleep(self.reconnect_delay)
+
+    async def _poll_ls_ratio(self, stream: MarketStream) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            for symbol in stream.symbols:
+                try:
+                    ratio = await loop.run_in_executor(None, self.ls_ratio_loader, symbol)
+                except Exception as e:
+                    logger.warning(f"Long/short ratio poll failed for {symbol}: {e}")
+                    continue
+                stream.on_long_short_ratio(symbol, ratio)
+            await asyncio.sleep(self.ls_ratio_interval)
+
+
+class ReplaySource:
+    """Pengganti websocket lokal: memutar ulang event kline/mark yang direkam.
+
+    `events` berisi tuple ("kline", symbol, timeframe, row) atau
+    ("mark", symbol, mark_price, funding_rate), diputar berurutan dengan jeda
+    `interval` detik (0 = secepatnya). `done` di-set saat replay selesai.
+    """
+
+    def __init__(self, events: List[Tuple], interval: float = 0.0):
+        self.events = events
+        self.interval = interval
+        self.done = threading.Event()
+
+    async def run(self, stream: MarketStream) -> None:
+        for event in self.events:
+            if event[0] == "kline":
+                stream.on_kline(event[1], event[2], event[3])
+            elif event[0] == "mark":
+                stream.on_mark_price(event[1], event[2], event[3])
+            if self.interval:
+                await asyncio.sleep(self.interval)
+        self.done.set()
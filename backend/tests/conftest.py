@@ -0,0 +1,21 @@
+# conftest.py (State global analyzer dipulihkan setelah setiap test yang menggantinya)
+import logging
+
+import pytest
+
+
+@pytest.fixture
+def analyzer(monkeypatch):
+    """hybrid_analyzer_nofilter dengan FakeExchange, budget tanpa batas dan writer DB no-op"""
+    import hybrid_analyzer_nofilter as analyzer
+    from benchmarks.fake_exchange import FakeExchange
+    from gateway import PriorityTokenBucket
+
+    monkeypatch.setattr(analyzer, "exchange", FakeExchange(latency=0.0))
+    monkeypatch.setattr(analyzer.gateway, "limiter", PriorityTokenBucket(capacity=10 ** 9))
+    monkeypatch.setattr(analyzer.analysis_writer, "execute_batch", lambda rows: None)
+    monkeypatch.setattr(analyzer.logger, "level", logging.WARNING)
+    analyzer.candle_cache.invalidate()
+    yield analyzer
+    analyzer.analysis_writer.flush(5)      # Baris antri ditulis no-op sebelum writer asli dipulihkan
+    analyzer.candle_cache.invalidate()
@@ -0,0 +1,59 @@
+"""Paritas fitur backtest (vektor) dengan fungsi analisa live pada jendela 4H yang sama"""
+import os
+import random
+
+import numpy as np
+import pytest
+
+from backtest import aggregate, load_ohlcv, run_backtest, save_ohlcv_csv, strategy_frame
+from benchmarks.fake_exchange import synthetic_ohlcv
+from candles import Candles
+
+
+def live_window(c1h, c4, group, i, window):
+    """Jendela 4H seperti yang dilihat analyze_and_generate_signal di close bar 1h ke-i"""
+    g = group[i]
+    start = int(np.searchsorted(group, g))
+    part = c1h[start:i + 1]
+    partial = [[c4.open_time[g], part.open[0], part.high.max(), part.low.min(), part.close[-1], part.volume.sum()]]
+    return Candles.concat([c4[g - window + 1:g], Candles.from_ccxt(partial)])
+
+
+@pytest.fixture(scope="module")
+def series(tmp_path_factory):
+    import hybrid_analyzer_nofilter as analyzer
+    window = analyzer.CANDLE_LIMITS[analyzer.TF_MID]
+    path = os.path.join(tmp_path_factory.mktemp("ohlcv"), "SYNTH_1h.csv")
+    save_ohlcv_csv(path, Candles.from_ccxt(synthetic_ohlcv(2000 + window * 4, "1h", seed=5)))
+    return load_ohlcv(path), window
+
+
+def test_features_match_live_functions(series):
+    import hybrid_analyzer_nofilter as analyzer
+    c1h, window = series
+    frame = strategy_frame(c1h, analyzer.STRATEGY, window=window)
+    c4, group = aggregate(c1h, analyzer.TF_MID)
+    ready = np.flatnonzero(frame["ready"])
+    assert len(ready)
+    for i in sorted(random.Random(3).sample(ready.tolist(), min(60, len(ready)))):
+        w = live_window(c1h, c4, group, i, window)
+        bias = analyzer.calc_structure_and_bias(w)
+        assert bias == frame["bias"][i], f"bias mismatch at {i}"
+        ob = analyzer.detect_valid_order_block(w, bias)
+        assert bool(ob) == bool(frame["has_ob"][i]), f"OB presence mismatch at {i}"
+        if ob:
+            assert ob["type"] == ("Demand" if frame["demand"][i] else "Supply")
+            assert (ob["low"], ob["high"]) == (frame["ob_low"][i], frame["ob_high"][i])
+        np.testing.assert_allclose(analyzer.calculate_atr(w, analyzer.ATR_PERIOD), frame["atr"][i], rtol=1e-6)
+        sweep = analyzer.detect_liquidity_sweep(c1h[i - 4:i + 1])
+        assert sweep == {1: "Buy-side liquidity sweep", -1: "Sell-side liquidity sweep", 0: "None"}[frame["sweep"][i]]
+
+
+def test_backtest_summary_is_deterministic(series):
+    import hybrid_analyzer_nofilter as analyzer
+    c1h, window = series
+    first = run_backtest(c1h, analyzer.STRATEGY, window=window)["summary"]
+    again = run_backtest(c1h, analyzer.STRATEGY, window=window)["summary"]
+    first.pop("elapsed"), again.pop("elapsed")
+    assert first == again
+    assert first["signals"] >= first["trades"] >= 0
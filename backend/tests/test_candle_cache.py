@@ -0,0 +1,48 @@
+"""CandleCache: refresh inkremental vs fetch penuh setelah entry lama menganggur"""
+import numpy as np
+
+from candle_cache import CandleCache, timeframe_ms
+
+STEP = timeframe_ms("1h")
+BARS = 2000
+
+
+class Series:
+    """Fetcher dengan semantik ccxt: since = bar pertama >= since, tanpa since = `limit` bar terakhir"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.rows = np.column_stack([np.arange(BARS) * STEP] + [np.arange(BARS, dtype=float) + k for k in range(5)])
+        self.calls = []
+
+    def __call__(self, symbol, timeframe, since, limit):
+        self.calls.append((since, limit))
+        live = self.rows[self.rows[:, 0] <= self.clock() * 1000]
+        if since is None:
+            return live[-limit:]
+        return live[live[:, 0] >= since][:limit]
+
+
+def test_refresh_after_short_gap_is_incremental():
+    now = [300.5 * STEP / 1000]
+    series = Series(lambda: now[0])
+    cache = CandleCache(series, live_ttl=None, clock=lambda: now[0])
+    assert int(cache.get("BTC/USDT", "1h", 200).open_time[-1]) == 300 * STEP
+    now[0] += 5 * STEP / 1000
+    rows = cache.get("BTC/USDT", "1h", 200)
+    assert series.calls[-1] == (300 * STEP, 7)
+    assert int(rows.open_time[-1]) == 305 * STEP
+    assert np.all(np.diff(rows.open_time) == STEP) and len(rows) == 200
+
+
+def test_refresh_after_long_idle_gap_fetches_latest_bars():
+    now = [1000.5 * STEP / 1000]
+    series = Series(lambda: now[0])
+    cache = CandleCache(series, live_ttl=None, clock=lambda: now[0])
+    cache.get("BTC/USDT", "1h", 300)
+    now[0] += 400 * STEP / 1000                      # Idle lebih lama dari entry.limit bar
+    rows = cache.get("BTC/USDT", "1h", 300)
+    assert series.calls[-1] == (None, 300)
+    assert int(rows.open_time[-1]) == 1400 * STEP
+    assert rows.close[-1] == 1400 + 3
+    assert np.all(np.diff(rows.open_time) == STEP) and len(rows) == 300
@@ -0,0 +1,63 @@
+"""CandleStore: append menyambung gap dari exchange, repair() mengisi gap yang tersimpan"""
+import numpy as np
+import pytest
+
+from benchmarks.bench_candle_store import SYMBOL, HistoryExchange
+from benchmarks.fake_exchange import synthetic_ohlcv
+from candle_store import CandleStore
+from candles import Candles
+
+STEP = 3_600_000
+
+
+@pytest.fixture
+def ex():
+    return HistoryExchange(synthetic_ohlcv(600, "1h", seed=4, end_time=1_700_000_000_000 // STEP * STEP))
+
+
+@pytest.fixture
+def store(tmp_path, ex):
+    return CandleStore(str(tmp_path), clock=lambda: ex.now)
+
+
+def test_append_fetches_missing_range(store, ex):
+    store.append(SYMBOL, "1h", ex.rows[:300])
+    later = ex.rows[400:500]
+    assert store.append(SYMBOL, "1h", later, fetch=ex.fetch) == 200
+    assert store.gaps(SYMBOL, "1h") == []
+    np.testing.assert_array_equal(store.read(SYMBOL, "1h").close, ex.rows[:500].close)
+    assert store.stats["gap_fills"] == 100 and store.stats["gaps"] == 0
+
+
+def test_sync_fills_gap_left_by_exchange(store, ex):
+    store.append(SYMBOL, "1h", ex.rows[:300])
+    calls = []
+
+    def hole(symbol, timeframe, since, limit):
+        # Respons pertama melompati 50 bar (misal exchange sempat mengembalikan data terpotong)
+        calls.append(since)
+        return ex.fetch(symbol, timeframe, since + 50 * STEP if len(calls) == 1 else since, limit)
+    store.sync(hole, SYMBOL, "1h")
+    assert calls[-1] == int(ex.rows.open_time[300])
+    assert store.gaps(SYMBOL, "1h") == []
+    np.testing.assert_array_equal(store.read(SYMBOL, "1h").open_time, ex.rows.open_time[:int(np.searchsorted(ex.rows.open_time, ex.now * 1000 - STEP, side="right"))])
+
+
+def test_repair_fills_stored_gaps(store, ex):
+    store.append(SYMBOL, "1h", ex.rows[:200])
+    ex.offline = True
+    store.append(SYMBOL, "1h", ex.rows[260:400], fetch=ex.fetch)      # Fetch gagal: gap tetap ditulis
+    assert store.gaps(SYMBOL, "1h") == [(int(ex.rows.open_time[199]), int(ex.rows.open_time[260]))]
+    assert store.stats["gaps"] == 1
+    ex.offline = False
+    assert store.repair(ex.fetch, SYMBOL, "1h") == 60
+    assert store.gaps(SYMBOL, "1h") == []
+    np.testing.assert_array_equal(store.read(SYMBOL, "1h").close, ex.rows[:400].close)
+
+
+def test_repair_keeps_gap_exchange_cannot_fill(store, ex):
+    store.append(SYMBOL, "1h", ex.rows[:200])
+    store.append(SYMBOL, "1h", ex.rows[260:400])
+    ex.rows = Candles.concat([ex.rows[:200], ex.rows[260:]])   # Exchange juga tanpa bar itu
+    assert store.repair(ex.fetch, SYMBOL, "1h") == 0
+    assert len(store.gaps(SYMBOL, "1h")) == 1
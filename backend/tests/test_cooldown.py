@@ -0,0 +1,153 @@
+"""Cooldown /analyze: CooldownMap di memori dan SharedCooldownMap lintas worker"""
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from benchmarks.bench_cooldown import COINS, COOLDOWN_SQL, populate
+from cooldown import CooldownMap, SharedCooldownMap
+from shared import LocalKV
+
+WINDOW = 300
+
+
+def race(acquire, n=16):
+    """n thread memanggil acquire() bersamaan; return hasilnya"""
+    barrier = threading.Barrier(n)
+    out = []
+
+    def run():
+        barrier.wait()
+        out.append(acquire())
+    threads = [threading.Thread(target=run) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return out
+
+
+def test_warm_matches_db():
+    conn = sqlite3.connect(":memory:")
+    now = populate(conn, 20_000, 50)
+    cooldowns = CooldownMap(WINDOW, clock=lambda: float(now))
+    warmed = cooldowns.warm(lambda window: conn.execute(
+        "SELECT user_id, coin_name, MAX(created_at) FROM analyses WHERE created_at >= ? GROUP BY user_id, coin_name",
+        (now - window,)).fetchall())
+    assert warmed > 0
+    for user_id in range(50):
+        for coin in COINS:
+            row = conn.execute(COOLDOWN_SQL, (user_id, coin)).fetchone()
+            in_db = row is not None and now < row[0] + WINDOW
+            assert (cooldowns.until(user_id, coin) is not None) == in_db, (user_id, coin)
+    assert cooldowns.warm(lambda window: []) == 0   # Sekali saja
+
+
+def test_try_acquire_admits_one_concurrent_request():
+    cooldowns = CooldownMap(WINDOW)
+    results = race(lambda: cooldowns.try_acquire(1, "BTC"))
+    assert results.count(None) == 1
+    assert cooldowns.stats["blocked"] == len(results) - 1
+
+
+def test_release_and_expiry():
+    now = [1000.0]
+    cooldowns = CooldownMap(WINDOW, clock=lambda: now[0])
+    assert cooldowns.try_acquire(1, "BTC") is None
+    assert cooldowns.try_acquire(1, "BTC") == 1000.0 + WINDOW
+    assert cooldowns.try_acquire(2, "BTC") is None                 # Per user
+    cooldowns.release(1, "BTC")
+    assert cooldowns.try_acquire(1, "BTC") is None
+    now[0] += WINDOW
+    assert cooldowns.until(1, "BTC") is None and cooldowns.try_acquire(1, "BTC") is None
+
+
+def test_shared_map_one_winner_across_workers():
+    kv = LocalKV()
+    workers = [SharedCooldownMap(kv, WINDOW) for _ in range(4)]
+    picks = iter(range(1_000))
+    results = race(lambda: workers[next(picks) % len(workers)].try_acquire(1, "ETH"))
+    assert results.count(None) == 1
+    assert all(w.until(1, "ETH") is not None for w in workers)
+    workers[2].release(1, "ETH")
+    assert workers[0].try_acquire(1, "ETH") is None
+
+
+def test_shared_map_touch_and_warm_once():
+    kv = LocalKV()
+    now = time.time()
+    first, second = SharedCooldownMap(kv, WINDOW), SharedCooldownMap(kv, WINDOW)
+    assert first.warm(lambda window: [(7, "SOL", now - 10)]) == 1
+    assert second.warm(lambda window: pytest.fail("second worker must not reload")) == 0
+    assert second.until(7, "SOL") == pytest.approx(now - 10 + WINDOW)
+    second.touch(7, "SOL", now)
+    assert first.until(7, "SOL") == pytest.approx(now + WINDOW)
+    assert SharedCooldownMap(kv, 0).try_acquire(7, "SOL") is None   # Window 0 = cooldown mati
+
+
+def failing(window):
+    raise RuntimeError("db down")
+
+
+def test_failed_warm_is_retried():
+    now = [1000.0]
+    cooldowns = CooldownMap(WINDOW, clock=lambda: now[0], retry_after=30)
+    assert cooldowns.warm(failing) == 0 and not cooldowns.warmed
+    assert cooldowns.warm(lambda window: pytest.fail("retry before retry_after")) == 0
+    now[0] += 30
+    assert cooldowns.warm(lambda window: [(1, "BTC", now[0] - 10)]) == 1
+    assert cooldowns.warmed and cooldowns.stats["warm_failed"] == 1
+    assert cooldowns.try_acquire(1, "BTC") == pytest.approx(now[0] - 10 + WINDOW)
+
+
+@pytest.mark.parametrize("make", [lambda: CooldownMap(WINDOW), lambda: SharedCooldownMap(LocalKV(), WINDOW)])
+def test_try_acquire_waits_for_first_load(make):
+    cooldowns = make()
+    loading, release = threading.Event(), threading.Event()
+    now = time.time()
+
+    def loader(window):
+        loading.set()
+        release.wait(5)
+        return [(1, "BTC", now)]
+    warmer = threading.Thread(target=cooldowns.warm, args=(loader,))
+    warmer.start()
+    loading.wait(5)
+    out = []
+    caller = threading.Thread(target=lambda: out.append(cooldowns.try_acquire(1, "BTC")))
+    caller.start()
+    caller.join(0.2)
+    assert caller.is_alive()          # Diblok selama load pertama
+    release.set()
+    warmer.join()
+    caller.join(5)
+    assert out == [pytest.approx(now + WINDOW)]
+
+
+def test_shared_failed_warm_lets_next_worker_load():
+    kv = LocalKV()
+    now = time.time()
+    first, second = SharedCooldownMap(kv, WINDOW), SharedCooldownMap(kv, WINDOW)
+    assert first.warm(failing) == 0 and not first.warmed
+    assert second.warm(lambda window: [(7, "SOL", now)]) == 1
+    assert first.until(7, "SOL") == pytest.approx(now + WINDOW)
+
+
+def test_shared_worker_waits_for_loading_worker():
+    kv = LocalKV()
+    now = time.time()
+    first, second = SharedCooldownMap(kv, WINDOW), SharedCooldownMap(kv, WINDOW, poll=0.01)
+    loading, release = threading.Event(), threading.Event()
+
+    def loader(window):
+        loading.set()
+        release.wait(5)
+        return [(7, "SOL", now)]
+    warmer = threading.Thread(target=first.warm, args=(loader,))
+    warmer.start()
+    loading.wait(5)
+    threading.Timer(0.2, release.set).start()
+    assert second.warm(lambda window: pytest.fail("second worker must not reload")) == 0
+    assert second.warmed and second.try_acquire(7, "SOL") == pytest.approx(now + WINDOW)
+    warmer.join()
@@ -0,0 +1,167 @@
+"""ConnectionPool dan db_cursor dengan factory koneksi palsu (tanpa MySQL)"""
+import threading
+
+import pytest
+
+import db
+from db import ConnectionPool, DatabaseUnavailable, PooledConnection
+
+
+class StubConnection:
+    def __init__(self, n):
+        self.n = n
+        self.alive = True
+        self.closed = False
+        self.log = []
+
+    def cursor(self, dictionary=False):
+        self.log.append(("cursor", dictionary))
+        return StubCursor(self)
+
+    def commit(self):
+        self.log.append("commit")
+
+    def rollback(self):
+        if not self.alive:
+            raise RuntimeError("Lost connection")
+        self.log.append("rollback")
+
+    def close(self):
+        self.closed = True
+
+
+class StubCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, params=None):
+        self.conn.log.append(sql)
+
+    def close(self):
+        self.conn.log.append("cursor.close")
+
+
+class Factory:
+    def __init__(self):
+        self.made = []
+
+    def __call__(self):
+        conn = StubConnection(len(self.made))
+        self.made.append(conn)
+        return conn
+
+
+def make_pool(**kwargs):
+    factory = Factory()
+    kwargs.setdefault("timeout", 0.05)
+    return ConnectionPool(factory, health_check=lambda c: c.alive, **kwargs), factory
+
+
+def test_idle_connection_is_reused():
+    pool, factory = make_pool(size=2)
+    conn = pool.acquire()
+    pool.release(conn)
+    assert pool.acquire() is conn
+    assert len(factory.made) == 1 and pool.stats["reused"] == 1
+
+
+def test_checkout_times_out_when_exhausted():
+    pool, factory = make_pool(size=2)
+    held = [pool.acquire(), pool.acquire()]
+    with pytest.raises(DatabaseUnavailable, match="pool size 2"):
+        pool.acquire()
+    assert pool.stats["timeouts"] == 1 and pool.stats["waits"] == 1
+    assert len(factory.made) == 2 and pool.in_use == 2
+
+    pool.release(held[0])                                        # Koneksi kembali: checkout berikutnya berhasil
+    assert pool.acquire() is held[0]
+
+
+def test_waiter_gets_released_connection():
+    pool, _ = make_pool(size=1, timeout=5)
+    conn = pool.acquire()
+    got = []
+    t = threading.Thread(target=lambda: got.append(pool.acquire()))
+    t.start()
+    threading.Timer(0.05, pool.release, args=(conn,)).start()
+    t.join(5)
+    assert got == [conn] and pool.stats["waits"] == 1
+
+
+def test_release_rolls_back():
+    pool, _ = make_pool()
+    conn = pool.acquire()
+    pool.release(conn)
+    assert conn.log == ["rollback"] and not conn.closed
+
+
+def test_failed_rollback_discards_connection():
+    pool, factory = make_pool(size=1)
+    conn = pool.acquire()
+    conn.alive = False
+    pool.release(conn)
+    assert conn.closed and pool.stats["discarded"] == 1 and pool.in_use == 0
+    assert pool.acquire() is factory.made[1]
+
+
+def test_unhealthy_idle_connection_is_replaced():
+    pool, factory = make_pool(size=1, check_interval=0)
+    conn = pool.acquire()
+    pool.release(conn)
+    conn.alive = False                                           # Mati saat idle (mis. wait_timeout MySQL)
+    fresh = pool.acquire()
+    assert fresh is factory.made[1] and fresh is not conn
+    assert conn.closed and pool.stats["discarded"] == 1 and pool._open == 1
+
+
+def test_factory_error_frees_slot():
+    calls = []
+
+    def factory():
+        calls.append(1)
+        if len(calls) == 1:
+            raise OSError("Connection refused")
+        return StubConnection(len(calls))
+
+    pool = ConnectionPool(factory, size=1, timeout=0.05)
+    with pytest.raises(DatabaseUnavailable, match="Cannot connect"):
+        pool.acquire()
+    assert pool.acquire().n == 2                                # Slot tidak bocor
+
+
+def test_pooled_connection_close_returns_to_pool():
+    pool, _ = make_pool(size=1)
+    proxy = PooledConnection(pool, pool.acquire())
+    raw = proxy._raw
+    proxy.close()
+    proxy.close()                                                # close kedua tidak melepas ulang
+    assert pool._idle.qsize() == 1 and pool.acquire() is raw
+
+
+@pytest.fixture
+def stub_pool(monkeypatch):
+    pool, factory = make_pool(size=1)
+    monkeypatch.setattr(db, "_pool", pool)
+    return pool, factory
+
+
+def test_db_cursor_commits_and_rolls_back_on_release(stub_pool):
+    pool, factory = stub_pool
+    with db.db_cursor(dictionary=True, commit=True) as cursor:
+        cursor.execute("INSERT ...")
+    conn = factory.made[0]
+    assert conn.log == [("cursor", True), "INSERT ...", "commit", "cursor.close", "rollback"]
+    assert pool.in_use == 0
+
+
+def test_db_cursor_error_skips_commit_and_releases(stub_pool):
+    pool, factory = stub_pool
+    with pytest.raises(ValueError):
+        with db.db_cursor(commit=True) as cursor:
+            cursor.execute("UPDATE ...")
+            raise ValueError("boom")
+    conn = factory.made[0]
+    assert "commit" not in conn.log and conn.log[-2:] == ["cursor.close", "rollback"]
+    with db.db_cursor() as cursor:                               # Pool size 1: koneksi sudah kembali
+        pass
+    assert len(factory.made) == 1
@@ -0,0 +1,184 @@
+"""ExchangeGateway: budget weight + lane prioritas, retry/backoff, circuit breaker, translate()"""
+import asyncio
+import threading
+import time
+
+import ccxt
+import pytest
+
+from benchmarks.fake_exchange import AsyncFakeExchange, FakeExchange
+from gateway import (BACKGROUND, INTERACTIVE, BadRequest, Banned, CircuitBreaker, CircuitOpen, ExchangeGateway,
+                     ExchangeUnavailable, GatewayError, PriorityTokenBucket, RateLimited, lane, translate)
+
+SYMBOL = "BTC/USDT"
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_gateway(ex, **kwargs):
+    sleeps = []
+    kwargs.setdefault("limiter", PriorityTokenBucket(capacity=10 ** 6))
+    gw = ExchangeGateway(lambda: ex, sleep=sleeps.append, **kwargs)
+    return gw, sleeps
+
+
+# --- Circuit breaker ---
+
+def test_breaker_opens_then_half_open_trial_closes_it():
+    clock = Clock()
+    breaker = CircuitBreaker(threshold=3, cooldown=30, clock=clock)
+    ex = FakeExchange(latency=0.0)
+    gw, _ = make_gateway(ex, breaker=breaker, max_retries=0)
+    ex.inject(503, 503, 503)
+    for _ in range(3):
+        with pytest.raises(ExchangeUnavailable):
+            gw.fetch_ohlcv(SYMBOL, "1h", limit=10)
+    assert breaker.state == "open"
+
+    calls = len(ex.calls)
+    with pytest.raises(CircuitOpen) as info:
+        gw.fetch_ohlcv(SYMBOL, "1h", limit=10)
+    assert len(ex.calls) == calls                                 # Gagal cepat tanpa menyentuh exchange
+    assert info.value.retry_after == pytest.approx(30)
+
+    clock.now += 30
+    assert len(gw.fetch_ohlcv(SYMBOL, "1h", limit=10)) == 10      # Percobaan half-open berhasil
+    assert breaker.state == "closed" and breaker.failures == 0
+    assert breaker.stats == {"opened": 1, "rejected": 1}
+
+
+def test_half_open_allows_one_trial_and_failure_reopens():
+    clock = Clock()
+    breaker = CircuitBreaker(threshold=1, cooldown=10, clock=clock)
+    breaker.failure()
+    clock.now += 10
+    breaker.before("fetch_ohlcv")
+    assert breaker.state == "half_open"
+    with pytest.raises(CircuitOpen):
+        breaker.before("fetch_ohlcv")                             # Percobaan kedua ditolak selama trial
+    breaker.failure()
+    assert breaker.state == "open" and breaker.opened_at == clock.now
+    with pytest.raises(CircuitOpen):
+        breaker.before("fetch_ohlcv")
+
+
+# --- Lane prioritas ---
+
+def test_background_keeps_interactive_reserve():
+    clock = Clock()
+    bucket = PriorityTokenBucket(capacity=100, period=60, reserve=0.25, clock=clock)
+    bucket.tokens = 30.0
+    assert bucket.acquire(5, BACKGROUND, max_wait=0) == 0         # 30 - 5 >= 25
+    with pytest.raises(RateLimited):
+        bucket.acquire(5, BACKGROUND, max_wait=0)                 # Akan memakai cadangan interactive
+    assert bucket.acquire(25, INTERACTIVE, max_wait=0) == 0
+    assert bucket.tokens == 0
+
+
+def test_background_yields_budget_to_waiting_interactive():
+    bucket = PriorityTokenBucket(capacity=20, period=1.0, reserve=0.25)   # 20 token/s, cadangan 5
+    bucket.tokens = 0.0
+    order = []
+
+    def take(weight, lane_name):
+        bucket.acquire(weight, lane_name)
+        order.append(lane_name)
+    background = threading.Thread(target=take, args=(1, BACKGROUND))      # Butuh 6 token: ~0.3 s
+    interactive = threading.Thread(target=take, args=(8, INTERACTIVE))    # Butuh 8 token: ~0.4 s
+    interactive.start()
+    time.sleep(0.05)
+    background.start()
+    interactive.join(5)
+    background.join(5)
+    assert order == [INTERACTIVE, BACKGROUND]
+
+
+def test_lane_context_selects_bucket_lane():
+    ex = FakeExchange(latency=0.0)
+    bucket = PriorityTokenBucket(capacity=100, reserve=0.25)
+    gw, _ = make_gateway(ex, limiter=bucket, max_wait={INTERACTIVE: 0.0, BACKGROUND: 0.0})
+    bucket.tokens = 26.0
+    with lane(BACKGROUND):
+        gw.fetch_ohlcv(SYMBOL, "1h", limit=10)                   # weight 1: sisa 25 >= cadangan
+        with pytest.raises(RateLimited):
+            gw.fetch_ohlcv(SYMBOL, "1h", limit=10)
+    gw.fetch_ohlcv(SYMBOL, "1h", limit=10)                       # Interactive boleh memakai cadangan
+    assert len(ex.calls) == 2
+
+
+# --- Retry ---
+
+def test_transient_errors_are_retried_with_backoff():
+    ex = FakeExchange(latency=0.0)
+    gw, sleeps = make_gateway(ex, base_delay=0.25, max_delay=8.0)
+    ex.inject(503, 504)
+    assert len(gw.fetch_ohlcv(SYMBOL, "1h", limit=10)) == 10
+    assert gw.stats["retries"] == 2 and len(ex.calls) == 3
+    assert len(sleeps) == 2 and 0 <= sleeps[0] <= 0.25 and 0 <= sleeps[1] <= 0.5
+
+
+def test_retries_stop_after_max_retries():
+    ex = FakeExchange(latency=0.0)
+    gw, sleeps = make_gateway(ex, max_retries=2)
+    ex.inject(503, 503, 503, 503)
+    with pytest.raises(ExchangeUnavailable):
+        gw.fetch_ohlcv(SYMBOL, "1h", limit=10)
+    assert len(ex.calls) == 3 and len(sleeps) == 2
+
+
+@pytest.mark.parametrize("status, error, breaker_state", [
+    (400, BadRequest, "closed"),          # Request salah: exchange hidup
+    (418, Banned, "open"),                # Retry hanya memperpanjang ban
+])
+def test_non_retryable_errors_are_not_retried(status, error, breaker_state):
+    ex = FakeExchange(latency=0.0)
+    gw, sleeps = make_gateway(ex)
+    ex.inject(status)
+    with pytest.raises(error):
+        gw.fetch_ohlcv(SYMBOL, "1h", limit=10)
+    assert len(ex.calls) == 1 and sleeps == [] and gw.stats["retries"] == 0
+    assert gw.breaker.state == breaker_state
+
+
+def test_rate_limit_drains_budget_for_every_lane():
+    clock = Clock()
+    ex = FakeExchange(latency=0.0)
+    gw, _ = make_gateway(ex, limiter=PriorityTokenBucket(capacity=600, period=60, clock=clock),
+                         max_wait={INTERACTIVE: 0.0, BACKGROUND: 0.0})
+    ex.inject(429)                                                # Retry-After: 1
+    with pytest.raises(RateLimited) as info:
+        gw.fetch_ohlcv(SYMBOL, "1h", limit=10)                    # Retry ditahan bucket, bukan dikirim
+    assert len(ex.calls) == 1 and info.value.retry_after == pytest.approx(1.1)
+    clock.now += 1.1
+    assert len(gw.fetch_ohlcv(SYMBOL, "1h", limit=10)) == 10
+
+
+def test_call_async_retries_like_sync():
+    ex = AsyncFakeExchange(latency=0.0)
+    gw, _ = make_gateway(ex, base_delay=0.0)
+    ex.inject(503)
+    rows = asyncio.run(gw.call_async("fetch_ohlcv", SYMBOL, "1h", limit=10))
+    assert len(rows) == 10 and gw.stats["retries"] == 1
+
+
+# --- translate ---
+
+@pytest.mark.parametrize("exc, expected, status", [
+    (ccxt.DDoSProtection("418"), Banned, 503),
+    (ccxt.RateLimitExceeded("429"), RateLimited, 429),
+    (ccxt.RequestTimeout("timeout"), ExchangeUnavailable, 503),
+    (ccxt.ExchangeNotAvailable("503"), ExchangeUnavailable, 503),
+    (TimeoutError("socket"), ExchangeUnavailable, 503),
+    (ccxt.BadSymbol("no market"), BadRequest, 400),
+    (ValueError("parse"), GatewayError, 502),
+])
+def test_translate_maps_ccxt_errors(exc, expected, status):
+    error = translate(exc, "fetch_ohlcv", retry_after=2.0)
+    assert type(error) is expected and error.status == status and error.endpoint == "fetch_ohlcv"
+    assert error.to_dict()["type"] == expected.__name__
@@ -0,0 +1,79 @@
+"""/history keyset pagination dan ringkasan /stats di SQLite (index + trigger seperti migrations/)"""
+import random
+import sqlite3
+
+import pytest
+
+from benchmarks.bench_history import FULL_SCAN_STATS_SQL, SCHEMA, populate, sqlite
+from history import STATS_SQL, encode_cursor, history_page, history_query, summarize_stats
+
+ROWS, PAGE = 4000, 50
+
+
+@pytest.fixture(scope="module")
+def conn():
+    rng = random.Random(3)
+    conn = sqlite3.connect(":memory:", detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES)
+    conn.row_factory = lambda cursor, row: {c[0]: v for c, v in zip(cursor.description, row)}
+    for ddl in SCHEMA:
+        conn.execute(ddl)
+    populate(conn, ROWS, 20, rng)
+    ids = [r["id"] for r in conn.execute("SELECT id FROM analyses WHERE entry IS NOT NULL")]
+    for status in ("filled", "expired", "TP", "SL"):
+        chosen = rng.sample(ids, len(ids) // 8)
+        conn.executemany("UPDATE analyses SET status_entry = ? WHERE id = ?", [(status, i) for i in chosen])
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def page(conn, params, user_id=0):
+    sql, values, limit = history_query(user_id, params)
+    return history_page(conn.execute(sqlite(sql), values).fetchall(), limit)
+
+
+def ordered(conn):
+    return conn.execute("SELECT id, coin_name, status_entry, recommendation, created_at FROM analyses "
+                        "WHERE user_id = 0 ORDER BY created_at DESC, id DESC").fetchall()
+
+
+def test_keyset_walk_matches_full_order(conn):
+    walked, cursor = [], None
+    while True:
+        rows, cursor = page(conn, {"limit": str(PAGE), **({"cursor": cursor} if cursor else {})})
+        walked += [r["id"] for r in rows]
+        if not cursor:
+            break
+    assert walked == [r["id"] for r in ordered(conn)]
+
+
+def test_deep_page_matches_offset(conn):
+    full = ordered(conn)
+    anchor = full[-PAGE - 1]
+    rows, cursor = page(conn, {"limit": str(PAGE), "cursor": encode_cursor(anchor["created_at"], anchor["id"])})
+    assert [r["id"] for r in rows] == [r["id"] for r in full[-PAGE:]]
+    assert cursor is None
+
+
+@pytest.mark.parametrize("params", [{"coin": "btc"}, {"status": "TP"}, {"recommendation": "long"},
+                                    {"coin": "ETH", "status": "SL", "recommendation": "short"},
+                                    {"recommendation": "100%"}])
+def test_filters_match_python_filter(conn, params):
+    want = [r["id"] for r in ordered(conn)
+            if r["coin_name"] == params.get("coin", r["coin_name"]).upper()
+            and r["status_entry"] == params.get("status", r["status_entry"])
+            and r["recommendation"].startswith(params.get("recommendation", "").upper())][:PAGE]
+    rows, _ = page(conn, dict(params, limit=str(PAGE)))
+    assert [r["id"] for r in rows] == want
+
+
+@pytest.mark.parametrize("params", [{"limit": "0"}, {"limit": "x"}, {"status": "WIN"}, {"cursor": "???"}])
+def test_bad_params_raise(conn, params):
+    with pytest.raises(ValueError):
+        page(conn, params)
+
+
+def test_stats_table_matches_full_scan(conn):
+    summary = summarize_stats(conn.execute(sqlite(STATS_SQL), (0,)).fetchall())
+    assert summary == summarize_stats(conn.execute(FULL_SCAN_STATS_SQL, (0,)).fetchall())
+    assert summary["user"]["total"] == ROWS // 2
@@ -0,0 +1,90 @@
+"""indicators.py: nilai golden RSI StockCharts/Wilder dan loop referensi EMA/MACD/ATR"""
+import numpy as np
+import pytest
+
+import indicators as ind
+from benchmarks.bench_indicators import ref_ema, synthetic
+
+# Contoh RSI(14) klasik StockCharts: closes dan RSI mulai close ke-15
+GOLDEN_CLOSES = [
+    44.3389, 44.0902, 44.1497, 43.6124, 44.3278, 44.8264, 45.0955, 45.4245, 45.8433, 46.0826,
+    45.8931, 46.0328, 45.6140, 46.2820, 46.2820, 46.0028, 46.0328, 46.4116, 46.2222, 45.6439,
+    46.2122, 46.2521, 45.7137, 46.4515, 45.7835, 45.3548, 44.0288, 44.1783, 44.2181, 44.5672,
+    43.4205, 42.6628, 43.1314,
+]
+GOLDEN_RSI = [
+    70.53, 66.32, 66.55, 69.41, 66.36, 57.97, 62.93, 63.26, 56.06, 62.38,
+    54.71, 50.42, 39.99, 41.46, 41.87, 45.46, 37.30, 33.08, 37.77,
+]
+
+
+def ref_wilder(values, period):
+    avg = [sum(values[:period]) / period]
+    for v in values[period:]:
+        avg.append((avg[-1] * (period - 1) + v) / period)
+    return np.array(avg)
+
+
+def ref_atr(high, low, close, period):
+    trs = [max(high[i] - low[i], abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1]))
+           for i in range(1, len(close))]
+    return ref_wilder(trs, period)
+
+
+@pytest.fixture(scope="module")
+def hlc():
+    return synthetic(2000, seed=1)
+
+
+def test_rsi_golden_values():
+    rsi = ind.rsi_series(GOLDEN_CLOSES, 14)
+    assert np.all(np.isnan(rsi[:14]))
+    np.testing.assert_allclose(np.round(rsi[14:], 2), GOLDEN_RSI, atol=1e-9)
+
+
+@pytest.mark.parametrize("period", [9, 12, 26, 50, 200])
+def test_ema_matches_loop(hlc, period):
+    close = hlc[2]
+    np.testing.assert_allclose(ind.ema_series(close, period)[period - 1:], ref_ema(close, period), rtol=1e-10)
+
+
+def test_macd_matches_loop(hlc):
+    close = hlc[2]
+    line, signal, hist = ind.macd_series(close)
+    ref_line = ref_ema(close, 12)[26 - 12:] - ref_ema(close, 26)
+    np.testing.assert_allclose(line[25:], ref_line, rtol=1e-9, atol=1e-12)
+    np.testing.assert_allclose(signal[33:], ref_ema(ref_line, 9), rtol=1e-9, atol=1e-12)
+    np.testing.assert_allclose(hist[33:], line[33:] - signal[33:])
+
+
+def test_atr_matches_loop(hlc):
+    np.testing.assert_allclose(ind.atr_series(*hlc, 14)[14:], ref_atr(*hlc, 14), rtol=1e-10)
+
+
+def test_short_series_are_nan(hlc):
+    high, low, close = hlc
+    assert np.all(np.isnan(ind.rsi_series([1.0, 2.0], 14)))
+    assert np.all(np.isnan(ind.atr_series(high[:5], low[:5], close[:5], 14)))
+
+
+def test_2d_batch_matches_per_symbol():
+    series = [synthetic(300, seed=i) for i in range(8)]
+    batch = tuple(np.stack(col) for col in zip(*series))   # (symbols, bars) per field
+    for i, (h, l, c) in enumerate(series):
+        np.testing.assert_allclose(ind.rsi_series(batch[2], 14)[i], ind.rsi_series(c, 14))
+        np.testing.assert_allclose(ind.atr_series(*batch, 14)[i], ind.atr_series(h, l, c, 14))
+        for got, want in zip(ind.macd_series(batch[2]), ind.macd_series(c)):
+            np.testing.assert_allclose(got[i], want)
+
+
+@pytest.mark.parametrize("n", [1, 5, ind._DIRECT_MAX, ind._DIRECT_MAX + 1, 3000])
+@pytest.mark.parametrize("alpha", [2 / 27, 1 / 14, 2 / 201])
+def test_ewma_direct_and_block_agree(n, alpha):
+    x = synthetic(n, seed=n)[2]
+    y = ind.ewma(x, alpha, 1.5)
+    expected, prev = [], 1.5
+    for v in x:
+        prev = alpha * v + (1 - alpha) * prev
+        expected.append(prev)
+    np.testing.assert_allclose(y, expected, rtol=1e-10)
+    np.testing.assert_allclose(ind.ewma(x[None, :], alpha, np.array([1.5]))[0], y, rtol=1e-10)   # Jalur blok
@@ -0,0 +1,91 @@
+"""migrate.py: migrasi yang gagal di tengah aman diulang (ADD INDEX yang sudah ada dilewati)"""
+import os
+
+import pytest
+
+from migrate import ADD_INDEX, ALTER_OPTION, ALTER_TABLE, MIGRATIONS_DIR, apply_migration, migration_files, split_clauses, \
+    split_statements, without_existing_indexes
+
+ALTER = """ALTER TABLE analyses
+    ADD INDEX idx_a (user_id, coin_name, created_at),
+    ADD INDEX idx_b (user_id, created_at),
+    ALGORITHM=INPLACE, LOCK=NONE"""
+
+
+def test_split_clauses_ignores_commas_in_parentheses():
+    assert split_clauses("ADD INDEX a (x, y), ADD INDEX b (z), LOCK=NONE") == \
+        ["ADD INDEX a (x, y)", "ADD INDEX b (z)", "LOCK=NONE"]
+
+
+@pytest.mark.parametrize("existing, expected", [
+    (set(), ALTER),
+    ({"idx_a"}, "ALTER TABLE analyses\n    ADD INDEX idx_b (user_id, created_at),\n    ALGORITHM=INPLACE,\n    LOCK=NONE"),
+    ({"idx_a", "idx_b", "PRIMARY"}, None),
+])
+def test_existing_indexes_are_dropped_from_alter(existing, expected):
+    assert without_existing_indexes(ALTER, lambda table: existing) == expected
+
+
+def test_other_statements_unchanged():
+    sql = "CREATE TABLE IF NOT EXISTS t (id INT)"
+    assert without_existing_indexes(sql, lambda table: pytest.fail("no lookup")) == sql
+
+
+class FakeMySQL:
+    """Cursor + koneksi: index yang dibuat ALTER TABLE dicatat; gagal pada statement ke-`fail_at`"""
+
+    def __init__(self, fail_at=None):
+        self.indexes = {}
+        self.executed = []
+        self.fail_at = fail_at
+        self._rows = []
+
+    def execute(self, sql, params=()):
+        if sql.startswith("SELECT DISTINCT index_name"):
+            self._rows = [(name,) for name in self.indexes.get(params[0], ())]
+            return
+        self.executed.append(sql)
+        if self.fail_at is not None and len(self.executed) == self.fail_at:
+            raise RuntimeError("lost connection")
+        match = ALTER_TABLE.match(sql)
+        if match:
+            for clause in split_clauses(match.group(2)):
+                index = ADD_INDEX.match(clause)
+                if index:
+                    assert index.group(1) not in self.indexes.setdefault(match.group(1), set()), "Duplicate key name"
+                    self.indexes[match.group(1)].add(index.group(1))
+
+    def fetchall(self):
+        return self._rows
+
+    def commit(self):
+        pass
+
+
+def read_statements(name):
+    with open(os.path.join(MIGRATIONS_DIR, name)) as f:
+        return split_statements(f.read())
+
+
+def adds_indexes_only(statement):
+    match = ALTER_TABLE.match(statement)
+    return bool(match) and all(ADD_INDEX.match(c) or ALTER_OPTION.match(c) for c in split_clauses(match.group(2)))
+
+
+@pytest.mark.parametrize("name", migration_files())
+def test_migration_rerun_after_failure(name):
+    statements = read_statements(name)
+    db = FakeMySQL(fail_at=len(statements) + 1)        # Semua DDL jalan, INSERT schema_migrations gagal
+    with pytest.raises(RuntimeError):
+        apply_migration(db, db, name, statements)
+    db.fail_at = None
+    assert apply_migration(db, db, name, statements) == sum(adds_indexes_only(s) for s in statements)
+
+
+def test_created_at_conversion_runs_once():
+    """UPDATE CONVERT_TZ tidak idempoten: dijaga default kolom, yang baru diganti oleh ALTER terakhir"""
+    statements = read_statements("0005_analyses_created_at_utc.sql")
+    updates = [s for s in statements if "CONVERT_TZ" in s]
+    assert len(updates) == 2 and statements[:2] == updates
+    assert all("column_default" in s and "LIKE 'current_timestamp%'" in s for s in updates)
+    assert "SET DEFAULT (UTC_TIMESTAMP())" in statements[-1]
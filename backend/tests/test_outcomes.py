@@ -0,0 +1,109 @@
+"""Resolver outcome: resolve() vektor == simulasi per baris, dan round trip per siklus"""
+import math
+import time
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from benchmarks.bench_outcomes import STEP, MemoryAnalyses, random_levels, reference
+from benchmarks.fake_exchange import synthetic_ohlcv
+from benchmarks.fixtures import synthetic_candles
+from outcomes import (EXPIRED, FILLED, NO_ENTRY, OPEN_STATUSES, SL, TP, CandleHistory, OutcomeResolver, resolve,
+                      utc_datetime, utc_epoch)
+
+BARS, TTL = 720, 24
+
+
+@pytest.fixture(params=["UTC", "Asia/Jakarta", "America/New_York"])
+def host_tz(request, monkeypatch):
+    """Zona waktu lokal host; created_at (UTC) tidak boleh bergantung padanya"""
+    monkeypatch.setenv("TZ", request.param)
+    time.tzset()
+    yield request.param
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_resolve_matches_per_row_loop():
+    rng = np.random.default_rng(5)
+    c = synthetic_candles(BARS, seed=2)
+    now_ms = int(c.open_time[-1]) + STEP // 2          # Bar terakhir masih berjalan
+    entry, sl, tp, created = random_levels(rng, c, 3000, now_ms)
+    fast = resolve(c, entry, sl, tp, created, now_ms, "1h", TTL)
+    slow = [reference(c, *vals, now_ms, TTL) for vals in zip(entry, sl, tp, created)]
+    assert fast.tolist() == slow
+    assert all((fast == s).any() for s in (NO_ENTRY, FILLED, EXPIRED, TP, SL))
+
+
+def test_resolver_cycle_round_trips_and_statuses(host_tz):
+    rng = np.random.default_rng(6)
+    coins = [f"C{i}" for i in range(20)]
+    series = {coin + "/USDT": synthetic_candles(BARS, seed=100 + i) for i, coin in enumerate(coins)}
+    now_ms = int(series["C0/USDT"].open_time[-1]) + STEP // 2
+    db = MemoryAnalyses()
+    row_id = 0
+    for coin in coins:
+        for vals in zip(*random_levels(rng, series[coin + "/USDT"], 300, now_ms)):
+            row_id += 1
+            db.rows[row_id] = [coin, float(vals[0]), float(vals[1]), float(vals[2]), NO_ENTRY,
+                               utc_datetime(int(vals[3]) / 1000)]
+    loads = []
+
+    def load(symbol, timeframe, since, now):
+        loads.append(symbol)
+        return series[symbol].since(since // STEP * STEP)
+
+    resolver = OutcomeResolver(db.select_page, db.write, load, timeframe="1h", order_ttl=TTL,
+                               max_age_days=3650, page_size=1000, update_chunk=500, clock=lambda: now_ms / 1000)
+    changed = resolver.run_once()
+    # Round trip mengikuti halaman / koin / status, bukan jumlah baris
+    assert db.selects == row_id // 1000 + 1
+    assert sorted(loads) == sorted(series)
+    assert db.updates == sum(math.ceil(v / 500) for v in changed.values())
+
+    for coin, e, s, t, status, created in db.rows.values():
+        created_ms = int(utc_epoch(created) * 1000)
+        assert status == reference(series[coin + "/USDT"], e, s, t, created_ms, now_ms, TTL)
+
+    # Siklus berikutnya hanya memindai baris yang masih terbuka; status final tidak berubah
+    still_open = sum(r[4] in OPEN_STATUSES for r in db.rows.values())
+    final = {k: r[4] for k, r in db.rows.items() if r[4] not in OPEN_STATUSES}
+    resolver.run_once()
+    assert resolver.stats["rows"] == still_open
+    assert all(db.rows[k][4] == v for k, v in final.items())
+
+
+def test_candle_history_fetches_only_new_bars():
+    end = int(synthetic_candles(BARS, seed=2).open_time[-1])
+    now_ms = end + STEP // 2
+    rows = synthetic_ohlcv(3000, end_time=end)
+    calls = []
+
+    def fetch(symbol, timeframe, since, limit):
+        calls.append(since)
+        return [r for r in rows if r[0] >= since][:limit]
+
+    history = CandleHistory(fetch)
+    first = history.load("C0/USDT", "1h", end - 2000 * STEP, now_ms)
+    cold = len(calls)
+    again = history.load("C0/USDT", "1h", end - 1500 * STEP, now_ms + STEP)
+    assert (len(first), len(again), cold, len(calls) - cold) == (2000, 1501, 2, 1)
+
+
+def test_created_at_is_utc(host_tz):
+    epoch = 1_700_000_000.25
+    assert utc_datetime(epoch) == datetime(2023, 11, 14, 22, 13, 20, 250000)
+    assert utc_epoch(utc_datetime(epoch)) == epoch
+    assert abs(utc_epoch(utc_datetime()) - time.time()) < 5
+
+
+def test_analysis_row_writes_utc_created_at(analyzer, host_tz):
+    output = {"coin_name": "BTC", "entry_price": 1.0, "market_structure": {"1h": "up", "4h": "up"},
+              "indicators": {"RSI_1h": 50.0, "MACD_1h": 0.0}, "funding_rate": {"fundingRate": 0.0},
+              "long_short_ratio": {"longShortRatio": 1.0}, "volatility_pred": 0.01}
+    row = analyzer.analysis_row(1, output, "WAIT", None)
+    columns = analyzer.ANALYSIS_INSERT_SQL.split("(")[1].split(")")[0].split(",")
+    assert len(row) == len(columns) == analyzer.ANALYSIS_INSERT_SQL.count("%s")
+    assert columns[-1].strip() == "created_at"
+    assert abs(utc_epoch(row[-1]) - time.time()) < 5
@@ -0,0 +1,112 @@
+"""WriteBehindQueue: batch, overflow (tulis sinkron lalu buang), retry dan flush saat stop"""
+import threading
+
+from persistence import WriteBehindQueue
+
+
+class FakeWriter:
+    """execute_batch palsu: catat baris, gagal `fail` kali pertama, worker bisa ditahan lewat `hold`"""
+
+    def __init__(self, fail=0, name="db-writer"):
+        self.fail = fail
+        self.name = name
+        self.batches = []
+        self.sync_batches = []
+        self.hold = threading.Event()
+        self.hold.set()
+        self.entered = threading.Event()
+
+    def __call__(self, rows):
+        if threading.current_thread().name == self.name:
+            self.entered.set()
+            self.hold.wait(5)
+        else:
+            self.sync_batches.append(list(rows))
+        if self.fail:
+            self.fail -= 1
+            raise RuntimeError("MySQL server has gone away")
+        self.batches.append(list(rows))
+
+    @property
+    def rows(self):
+        return [row for batch in self.batches for row in batch]
+
+
+def test_rows_are_written_in_batches_and_order():
+    writer = FakeWriter()
+    wb = WriteBehindQueue(writer, batch_size=10, flush_interval=0.05)
+    for i in range(25):
+        wb.submit((i,))
+    assert wb.flush(5)
+    assert writer.rows == [(i,) for i in range(25)]
+    assert all(len(b) <= 10 for b in writer.batches)
+    stats = wb.stats()
+    assert stats["written"] == 25 and stats["failed"] == stats["dropped"] == 0
+    wb.stop()
+
+
+def full_queue(writer):
+    """Worker tertahan di batch (0,), antrian (maxsize 1) berisi (1,)"""
+    writer.hold.clear()
+    wb = WriteBehindQueue(writer, maxsize=1, batch_size=1, flush_interval=0.01, put_timeout=0.01, max_retries=0)
+    wb.submit((0,))
+    assert writer.entered.wait(5)
+    wb.submit((1,))
+    return wb
+
+
+def test_overflow_writes_synchronously():
+    writer = FakeWriter()
+    wb = full_queue(writer)
+    wb.submit((2,))                                              # Antrian penuh: tulis di thread pemanggil
+    assert writer.sync_batches == [[(2,)]]
+    writer.hold.set()
+    wb.stop()
+    assert sorted(writer.rows) == [(0,), (1,), (2,)]
+    stats = wb.stats()
+    assert stats["overflow_sync_writes"] == 1 and stats["dropped"] == 0 and stats["written"] == 3
+
+
+def test_overflow_drops_row_when_sync_write_fails():
+    writer = FakeWriter()
+    wb = full_queue(writer)
+    writer.fail = 1                                              # Tulis sinkron gagal, tanpa retry
+    wb.submit((2,))
+    writer.hold.set()
+    wb.stop()
+    assert sorted(writer.rows) == [(0,), (1,)]
+    stats = wb.stats()
+    assert stats["overflow_sync_writes"] == 1 and stats["dropped"] == 1 and stats["retries"] == 0
+
+
+def test_failed_batch_is_retried():
+    writer = FakeWriter(fail=2)
+    wb = WriteBehindQueue(writer, flush_interval=0.01, max_retries=3)
+    wb.submit(("a",))
+    assert wb.flush(10)
+    assert writer.rows == [("a",)]
+    stats = wb.stats()
+    assert stats["retries"] == 2 and stats["failed"] == 0 and stats["written"] == 1
+    wb.stop()
+
+
+def test_batch_counted_failed_after_max_retries():
+    writer = FakeWriter(fail=10)
+    wb = WriteBehindQueue(writer, flush_interval=0.01, max_retries=1)
+    wb.submit(("a",))
+    wb.submit(("b",))
+    assert wb.flush(10)
+    stats = wb.stats()
+    assert writer.rows == [] and stats["failed"] == 2 and stats["retries"] == 1
+
+
+def test_stop_flushes_pending_rows():
+    writer = FakeWriter()
+    writer.hold.clear()
+    wb = WriteBehindQueue(writer, batch_size=5, flush_interval=0.01)
+    for i in range(12):
+        wb.submit((i,))
+    writer.hold.set()
+    wb.stop()
+    assert writer.rows == [(i,) for i in range(12)]
+    assert not wb.stats()["running"] and wb.stats()["depth"] == 0
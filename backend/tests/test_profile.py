@@ -0,0 +1,42 @@
+"""Profiler per request: hanya user login di PROFILE_USERS, profil hanya untuk pemiliknya"""
+import pytest
+
+from metrics import ProfileStore
+
+
+@pytest.fixture
+def client(analyzer, monkeypatch):
+    monkeypatch.setattr(analyzer, "profiles", ProfileStore(users=["1"]))
+    app = analyzer.get_app()
+    client = app.test_client()
+
+    def login(user_id):
+        client.set_cookie(app.config["SESSION_COOKIE_NAME"],
+                          app.session_interface.get_signing_serializer(app).dumps({"user_id": user_id}))
+    client.login = login
+    return client
+
+
+def test_anonymous_request_is_not_profiled(client):
+    response = client.get("/metrics?profile=1")
+    assert "X-Profile-Id" not in response.headers
+
+
+def test_only_allowed_users_profile(client):
+    client.login(2)
+    assert "X-Profile-Id" not in client.get("/metrics", headers={"X-Profile": "1"}).headers
+    client.login(1)
+    assert "X-Profile-Id" in client.get("/metrics", headers={"X-Profile": "1"}).headers
+
+
+def test_profile_readable_by_owner_only(client, analyzer):
+    client.login(1)
+    profile_id = client.get("/metrics?profile=1").headers["X-Profile-Id"]
+    assert client.get(f"/debug/profile/{profile_id}").status_code == 200
+    client.login(2)
+    assert client.get(f"/debug/profile/{profile_id}").status_code == 404
+
+
+def test_profiler_off_by_default():
+    store = ProfileStore(users=())
+    assert store.start(1) is None and store.start(None) is None
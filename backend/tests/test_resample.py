@@ -0,0 +1,85 @@
+"""Resampling inkremental == agregasi vektor, dan request klines per koin dengan resampling"""
+import time
+
+import numpy as np
+import pytest
+
+from benchmarks.bench_resample import expected, kline_calls
+from benchmarks.fixtures import synthetic_candles
+from candle_cache import timeframe_ms
+from candles import Candles
+from resample import ResampleCache, Resampler, bucket_start
+
+TIMEFRAMES = {"2h": 100, "4h": 300, "12h": 100, "1d": 200, "1w": 30}
+UPDATES = 300
+WINDOW = max((limit + 1) * timeframe_ms(tf) // timeframe_ms("1h") for tf, limit in TIMEFRAMES.items())
+LIMITS = dict(TIMEFRAMES, **{"1h": 300})
+
+
+@pytest.fixture(scope="module")
+def base():
+    return synthetic_candles(WINDOW + UPDATES, seed=21)
+
+
+def same(a: Candles, b: Candles) -> bool:
+    return len(a) == len(b) and all(np.array_equal(getattr(a, f), getattr(b, f))
+                                    for f in ("open_time", "open", "high", "low", "close", "volume"))
+
+
+def replay(base, resampler, window_size):
+    """Majukan bar 1h satu per satu (bar berjalan kadang di-refresh); return jumlah mismatch"""
+    rng = np.random.default_rng(1)
+    bad = 0
+    for end in range(WINDOW, len(base)):
+        window = base[max(end - window_size + 1, 0):end + 1]
+        for scale in (0.5, 1.0) if rng.random() < 0.3 else (1.0,):
+            last = window[-1:]
+            live = Candles(last.open_time, last.open, last.open + (last.high - last.open) * scale,
+                           last.open - (last.open - last.low) * scale, last.close, last.volume * scale)
+            out = resampler.update(Candles.concat([window[:-1], live]))
+        for tf, limit in TIMEFRAMES.items():
+            bad += not same(out[tf], expected(base[:end + 1], tf, limit))
+        bad += len(out["1h"]) != min(300, len(window))
+    return bad
+
+
+def test_incremental_matches_vectorized(base):
+    assert replay(base, Resampler("1h", LIMITS), WINDOW) == 0
+
+
+def test_seeded_incremental_matches_vectorized(base):
+    seeded = Resampler("1h", LIMITS)
+    for tf, limit in TIMEFRAMES.items():
+        seeded.seed(tf, expected(base[:WINDOW], tf, limit))
+    assert seeded.covered(int(base.open_time[WINDOW - 300]))
+    assert replay(base, seeded, 300) == 0
+
+
+def test_weekly_bucket_opens_monday_utc():
+    week = bucket_start(np.array([1_700_000_000_000], dtype=np.int64), "1w")[0]
+    monday = time.gmtime(week / 1000)
+    assert (monday.tm_wday, monday.tm_hour, monday.tm_min) == (0, 0, 0)
+
+
+@pytest.mark.parametrize("mode, klines", [("per-timeframe", (3, 3)), ("resampled", (3, 1))])
+def test_kline_requests_per_coin(analyzer, monkeypatch, mode, klines):
+    resampler = ResampleCache(analyzer.TF_LOW, analyzer.CANDLE_LIMITS) if mode == "resampled" else None
+    monkeypatch.setattr(analyzer, "resampler", resampler)
+    coins = [f"R{i}" for i in range(4)]
+    datas = [analyzer.get_all_market_data(coin) for coin in coins]
+    cold = kline_calls(analyzer.exchange)
+    for entry in analyzer.candle_cache._entries.values():
+        entry.expires_at = 0   # paksa refresh bar berjalan
+    again = [analyzer.get_all_market_data(coin) for coin in coins]
+    warm = kline_calls(analyzer.exchange) - cold
+    assert (cold // len(coins), warm // len(coins)) == klines
+    for a, b in zip(datas, again):
+        assert {tf: len(c) for tf, c in b["candles"].items()} == analyzer.CANDLE_LIMITS
+        # Bar close tidak berubah oleh refresh bar berjalan
+        assert all(same(a["candles"][tf][:-1], b["candles"][tf][:-1]) for tf in analyzer.CANDLE_LIMITS)
+    if resampler is None:
+        return
+    # Bar 4h berjalan dibangun dari bar 1h yang sama
+    c1h, c4h = again[0]["candles"][analyzer.TF_LOW], again[0]["candles"][analyzer.TF_MID]
+    tail = c1h.since(int(c4h.open_time[-1]))
+    assert float(c4h.high[-1]) == float(tail.high.max()) and float(c4h.close[-1]) == float(c1h.close[-1])
@@ -0,0 +1,28 @@
+"""/scan: jumlah worker efektif dan ukuran pool fetch"""
+import json
+
+from benchmarks.fake_exchange import FakeExchange
+
+
+def test_scan_workers_capped_by_scan_max(analyzer):
+    assert analyzer.scan_workers(2) == 2
+    assert analyzer.scan_workers(0) == 1
+    assert analyzer.scan_workers(10 ** 3) == analyzer.SCAN_MAX_WORKERS
+    # Semua koin yang dianalisa bersamaan muat di fetch_executor tanpa mengantri
+    concurrent = analyzer.SCAN_MAX_WORKERS + analyzer.SCAN_WORKERS + analyzer.SCHEDULER_WORKERS
+    assert analyzer.fetch_executor._max_workers >= analyzer.FETCH_JOBS_PER_COIN * concurrent
+
+
+def test_scan_reports_effective_workers(analyzer, monkeypatch):
+    monkeypatch.setattr(analyzer, "exchange", FakeExchange(latency=0.02))
+    app = analyzer.get_app()
+    client = app.test_client()
+    client.set_cookie(app.config["SESSION_COOKIE_NAME"],
+                      app.session_interface.get_signing_serializer(app).dumps({"user_id": 1}))
+    coins = ",".join(f"W{i}" for i in range(12))
+    response = client.get(f"/scan?coins={coins}&workers=64")
+    lines = [json.loads(line) for line in response.data.decode().splitlines()]
+    summary = lines[-1]
+    assert response.status_code == 200
+    assert summary["workers"] == analyzer.SCAN_MAX_WORKERS
+    assert summary["scanned"] == 12 and summary["errors"] == 0
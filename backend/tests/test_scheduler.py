@@ -0,0 +1,147 @@
+"""BarScheduler.due/run dengan jam buatan: keselarasan, overlap, catch-up/replay dan hitungan missed"""
+import threading
+import time
+
+import pytest
+
+from scheduler import BarScheduler
+
+H = 3_600_000
+START = 480_000 * 3600 + 600            # 10 menit setelah bar 480000 terbuka (detik)
+BAR = START * 1000 // H
+
+
+class Clock:
+    def __init__(self, now=START):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_scheduler(**kwargs):
+    clock = Clock()
+    return BarScheduler(settle=3, jitter=0, clock=clock, **kwargs), clock
+
+
+def test_runs_once_per_bar_after_settle():
+    sched, clock = make_scheduler()
+    bars = []
+    job = sched.add("1h", H, bars.append)
+    close = (BAR + 1) * 3600
+    assert sched.tick(now=close + 2.9, wait=True) == 0
+    assert sched.tick(now=close + 3, wait=True) == 1
+    assert sched.tick(now=close + 600, wait=True) == 0            # Bar yang sama tidak dijalankan ulang
+    assert sched.tick(now=close + 3600 + 3, wait=True) == 1
+    assert bars == [BAR + 1, BAR + 2]
+    assert job.stats["runs"] == 2 and job.stats["last_bar"] == BAR + 2 and job.stats["missed"] == 0
+
+
+def test_jitter_stays_inside_window():
+    clock = Clock()
+    sched = BarScheduler(settle=3, jitter=5, clock=clock)
+    job = sched.add("1h", H, lambda bar: None)
+    close = (BAR + 1) * 3600
+    assert close + 3 <= job.next_at <= close + 8
+
+
+def test_run_on_start_runs_current_bar():
+    sched, clock = make_scheduler()
+    bars = []
+    sched.add("1h", H, bars.append, run_on_start=True)
+    assert sched.tick(now=clock.now, wait=True) == 1
+    assert bars == [BAR]
+
+
+def blocking_job(sched):
+    release, started = threading.Event(), []
+    job = sched.add("slow", H, lambda bar: (started.append(bar), release.wait(5)), run_on_start=True)
+    sched.tick(now=START)
+    return job, release, started
+
+
+@pytest.mark.parametrize("bars_late, missed", [(1, 0), (3, 2)])
+def test_overlap_is_skipped_then_caught_up(bars_late, missed):
+    sched, _ = make_scheduler()
+    job, release, started = blocking_job(sched)
+    late = START + bars_late * 3600
+    assert sched.tick(now=late) == 0                               # Masih berjalan: tidak dobel
+    assert sched.tick(now=late + 1) == 0
+    assert job.stats["overlaps"] == 1 and job.blocked
+
+    release.set()
+    while job.running:
+        time.sleep(0.001)
+    assert sched.tick(now=late + 2, wait=True) == 1                # Dikejar segera, tanpa menunggu close berikutnya
+    assert started == [BAR, BAR + bars_late]
+    assert job.stats["missed"] == missed and job.stats["runs"] == 2 and not job.blocked
+
+
+@pytest.mark.parametrize("replay, bars, missed", [
+    (0, [BAR + 5], 4),
+    (2, [BAR + 3, BAR + 4, BAR + 5], 2),
+    (10, [BAR + 1, BAR + 2, BAR + 3, BAR + 4, BAR + 5], 0),       # replay dibatasi bar yang benar-benar lewat
+])
+def test_catch_up_after_sleep(replay, bars, missed):
+    sched, _ = make_scheduler()
+    seen = []
+    job = sched.add("1h", H, seen.append, replay=replay)
+    assert sched.tick(now=START + 5 * 3600, wait=True) == 1
+    assert seen == bars
+    assert job.stats["missed"] == missed and job.stats["replayed"] == len(bars) - 1
+    assert job.stats["runs"] == len(bars) and job.next_at == (BAR + 6) * 3600 + 3
+
+
+def test_missed_counts_accumulate():
+    sched, _ = make_scheduler()
+    job = sched.add("1h", H, lambda bar: None)
+    sched.tick(now=START + 3 * 3600, wait=True)
+    sched.tick(now=START + 4 * 3600, wait=True)
+    sched.tick(now=START + 8 * 3600, wait=True)
+    assert job.stats["missed"] == 2 + 0 + 3 and job.stats["runs"] == 3
+
+
+def test_failure_is_recorded_and_next_bar_still_runs():
+    sched, _ = make_scheduler()
+    bars = []
+
+    def flaky(bar):
+        if not bars:
+            bars.append(None)
+            raise RuntimeError("exchange down")
+        bars.append(bar)
+
+    job = sched.add("1h", H, flaky, replay=1)
+    sched.tick(now=START + 2 * 3600, wait=True)                    # Replay berhenti di bar pertama yang gagal
+    assert job.stats["failures"] == 1 and job.stats["last_error"] == "exchange down"
+    assert job.stats["runs"] == 0 and not job.running
+    sched.tick(now=START + 3 * 3600, wait=True)
+    assert bars == [None, BAR + 3] and job.stats["runs"] == 1
+
+
+def test_clock_going_backwards_waits_for_next_bar():
+    sched, _ = make_scheduler()
+    job = sched.add("1h", H, lambda bar: None)
+    sched.tick(now=START + 3600, wait=True)
+    job.next_at = 0                                                # Paksa jatuh tempo di bar yang sudah dijalankan
+    assert sched.tick(now=START, wait=True) == 0
+    assert job.next_at == (BAR + 2) * 3600 + 3 and job.stats["runs"] == 1
+
+
+def test_each_shares_worker_limit():
+    sched, _ = make_scheduler(workers=3)
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def work(_):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.002)
+        with lock:
+            active[0] -= 1
+
+    for name in ("a", "b"):
+        sched.add(name, H, lambda bar: sched.each(work, range(20)), run_on_start=True)
+    assert sched.tick(now=START, wait=True) == 2
+    sched.stop()
+    assert 1 <= peak[0] <= 3
@@ -0,0 +1,124 @@
+"""serve.py: cooldown, lease snapshot dan flush write-behind lintas proses worker (HTTP sungguhan)"""
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from benchmarks.bench_serve import CTX, concurrently, post, serve, session_cookie
+from benchmarks.fake_exchange import FakeExchange
+from candle_cache import CandleCache
+from gateway import RateLimited, SharedTokenBucket
+from shared import connect_state, start_state_server
+
+WORKERS = 3
+
+
+def grants(bucket, seconds):
+    """Ambil weight 1 sebanyak mungkin selama `seconds` (max_wait kecil: tidak menunggu refill lama)"""
+    granted, deadline = 0, time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        try:
+            bucket.acquire(1, max_wait=0.05)
+            granted += 1
+        except RateLimited:
+            pass
+    return granted
+
+
+@pytest.fixture
+def prefork(analyzer, monkeypatch):
+    """serve(workers, cooldown) yang dihentikan di akhir test; state analyzer dipulihkan.
+    Thread pool yang sudah dipakai test sebelumnya tidak ikut hidup setelah fork, jadi worker
+    mendapat pool baru (di produksi master belum pernah fetch sebelum fork)."""
+    monkeypatch.setattr(analyzer, "ANALYZE_COOLDOWN_SECONDS", analyzer.ANALYZE_COOLDOWN_SECONDS)
+    monkeypatch.setattr(analyzer, "fetch_executor", ThreadPoolExecutor(max_workers=analyzer.FETCH_POOL_SIZE))
+    servers = []
+
+    def start(cooldown):
+        servers.append(serve(WORKERS, cooldown))
+        return servers[-1]
+    yield start
+    for server in servers:
+        server.stop()
+
+
+@pytest.fixture
+def computes(analyzer, monkeypatch):
+    """Jumlah analyze_symbol di semua worker (shared memory, dihitung setelah fork)"""
+    counter = CTX.Value("i", 0)
+    analyze = analyzer.analyze_symbol
+
+    def counted(symbol):
+        with counter.get_lock():
+            counter.value += 1
+        return analyze(symbol)
+    monkeypatch.setattr(analyzer, "analyze_symbol", counted)
+    monkeypatch.setattr(analyzer, "exchange", FakeExchange(latency=0.2))
+    return counter
+
+
+def test_budget_shared_by_processes():
+    bucket = SharedTokenBucket(capacity=100, period=1.0, reserve=0.0, context=CTX)
+    t0 = time.monotonic()
+    granted = sum(concurrently(lambda: grants(bucket, 1.0), [()] * 3))
+    assert 150 <= granted <= 100 + 100 * (time.monotonic() - t0)
+
+
+def test_candle_cache_shared_through_state_server():
+    authkey = b"test-state"
+    manager = start_state_server(authkey=authkey)
+    fake = FakeExchange(latency=0.0)
+    fetches = CTX.Value("i", 0)
+
+    def fetcher(symbol, timeframe, since, limit):
+        with fetches.get_lock():
+            fetches.value += 1
+        return fake.fetch_ohlcv(symbol, timeframe, since=since, limit=limit)
+
+    def load(symbols):
+        cache = CandleCache(fetcher, remote=connect_state(manager.address, authkey))
+        return [float(cache.get(s, "1h", 200).close[-1]) for s in symbols], cache.stats["remote_hits"]
+
+    symbols = [f"C{i}USDT" for i in range(5)]
+    try:
+        first, _ = concurrently(load, [(symbols,)])[0]
+        second, remote_hits = concurrently(load, [(symbols,)])[0]
+    finally:
+        manager.shutdown()
+    assert first == second
+    assert (fetches.value, remote_hits) == (len(symbols), len(symbols))
+
+
+def test_cooldown_shared_by_workers(prefork, computes):
+    server = prefork(cooldown=300)
+    n = WORKERS * 3
+    same = concurrently(post, [(server.address, "/analyze", {"coin_name": "COOL"}, session_cookie(1))] * n)
+    assert all(status == 200 for status, _ in same)
+    assert sum(not body.get("cooldown") for _, body in same) == 1
+    assert computes.value == 1
+
+
+def test_lease_single_analysis_across_workers(prefork, computes):
+    server = prefork(cooldown=300)
+    n = WORKERS * 3
+    users = concurrently(post, [(server.address, "/analyze", {"coin_name": "LEASE"}, session_cookie(100 + i))
+                                for i in range(n)])
+    assert all(status == 200 for status, _ in users)
+    assert len({json.dumps(body, sort_keys=True) for _, body in users}) == 1
+    assert computes.value == 1
+
+
+def test_sigterm_flushes_write_behind(analyzer, monkeypatch, prefork):
+    written = CTX.Value("i", 0)
+
+    def slow_batch(rows):
+        time.sleep(0.3)
+        with written.get_lock():
+            written.value += len(rows)
+    monkeypatch.setattr(analyzer.analysis_writer, "execute_batch", slow_batch)
+    server = prefork(cooldown=0)
+    sent = sum(post(server.address, "/analyze", {"coin_name": "FLUSH"}, session_cookie(1))[0] == 200
+               for _ in range(10))
+    server.stop()
+    assert sent == 10 and written.value == sent
@@ -0,0 +1,158 @@
+"""SignalHub.publish/Subscriber: deteksi delta, coalescing per koin, dan state dilepas saat unsubscribe terakhir"""
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from signals import SignalEvent, SignalHub, Subscriber
+
+H = 3_600_000
+START = 480_000 * 3600 + 600
+
+
+class Clock:
+    def __init__(self, now=START):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def result(recommendation="BUY", tp=110.0, sweep=None, price=100.0):
+    output = {"liquidity_sweep": sweep, "market_structure": "bullish", "entry_price": price,
+              "analysis": {"rsi": 55}}
+    levels = {"entry": 100.0, "tp": tp, "sl": 95.0} if recommendation != "HOLD" else None
+    return output, recommendation, levels
+
+
+def payload(event):
+    return json.loads(event.frame.split("data: ", 1)[1])
+
+
+@pytest.fixture
+def hub():
+    """Hub dengan compute palsu dari dict `hub.results`; koin tanpa hasil -> None (tidak publish)"""
+    results = {}
+    hub = SignalHub(lambda coin: results.get(coin), settle=3, workers=2, clock=Clock())
+    hub.results = results
+    yield hub
+    hub.stop()
+
+
+def subscribe(hub, coins):
+    """subscribe() menghitung koin baru di thread hub; tunggu sampai selesai supaya urutan deterministik"""
+    before = hub.stats["computes"]
+    new = [c for c in coins if c not in hub._known]
+    sub = hub.subscribe(coins)
+    deadline = time.monotonic() + 5
+    while hub.stats["computes"] < before + len(new) and time.monotonic() < deadline:
+        time.sleep(0.001)
+    return sub
+
+
+def test_publish_sends_only_changed_signals(hub):
+    sub = subscribe(hub, ["BTC"])
+    assert hub.publish("BTC", result()) is True
+    first, = sub.get(0)
+    assert first.kind == "signal" and payload(first)["changed"] == ["recommendation", "trade_levels", "liquidity_sweep"]
+    assert payload(first)["bar"] == START * 1000 // H * H
+
+    assert hub.publish("BTC", result()) is False                   # Sama persis: tidak ada event
+    assert hub.publish("BTC", result(price=101.0)) is False        # Field konteks berubah saja: tidak ada event
+    assert sub.get(0.01) == []
+    assert hub.publish("BTC", result(tp=120.0)) is True
+    assert hub.publish("BTC", result("SELL", tp=90.0, sweep={"type": "high"})) is True
+    event, = sub.get(0)                                             # Dua delta, hanya yang terakhir tersisa
+    assert payload(event)["changed"] == ["recommendation", "trade_levels", "liquidity_sweep"]
+    assert payload(event)["signal"]["recommendation"] == "SELL" and sub.dropped == 1
+    assert hub.stats["deltas"] == 3 and hub.stats["unchanged"] == 2
+
+
+def test_publish_only_reaches_subscribers_of_the_coin(hub):
+    btc, eth = subscribe(hub, ["BTC"]), subscribe(hub, ["ETH"])
+    hub.publish("BTC", result())
+    assert [e.coin for e in btc.get(0)] == ["BTC"] and eth.get(0.01) == []
+    assert hub.publish("SOL", result()) is False                    # Tanpa subscriber: diabaikan
+
+
+def test_subscriber_keeps_latest_event_per_coin():
+    sub = Subscriber(["BTC", "ETH"])
+    btc1, eth1, btc2 = (SignalEvent(1, "BTC", "signal", {}), SignalEvent(2, "ETH", "signal", {}),
+                        SignalEvent(3, "BTC", "signal", {}))
+    for event in (btc1, eth1, btc2):
+        sub.push(event)
+    assert sub.get(0) == [eth1, btc2] and sub.dropped == 1
+    assert sub.get(0.01) == []                                      # Kosong = heartbeat
+
+
+def test_closed_subscriber_returns_immediately():
+    sub = Subscriber(["BTC"])
+    threading.Timer(0.02, sub.close).start()
+    t0 = time.monotonic()
+    assert sub.get(5) == [] and sub.closed
+    assert time.monotonic() - t0 < 2
+
+
+def test_async_get_is_woken_by_push_from_other_thread():
+    sub = Subscriber(["BTC"])
+    event = SignalEvent(1, "BTC", "signal", {})
+
+    async def main():
+        threading.Timer(0.02, sub.push, args=(event,)).start()
+        return await sub.aget(5)
+
+    assert asyncio.run(main()) == [event]
+
+
+def test_late_subscriber_gets_snapshot(hub):
+    subscribe(hub, ["BTC"])
+    hub.publish("BTC", result())
+    late = subscribe(hub, ["BTC"])
+    snap, = late.get(0)
+    assert snap.kind == "snapshot" and payload(snap)["signal"]["recommendation"] == "BUY"
+    assert hub.stats["computes"] == 1                              # Koin yang sudah dikenal tidak dihitung ulang
+
+
+def test_last_unsubscribe_drops_state(hub):
+    a, b = subscribe(hub, ["BTC"]), subscribe(hub, ["BTC"])
+    hub.publish("BTC", result())
+    hub.unsubscribe(a)
+    assert a.closed and hub.coins == ["BTC"]
+    assert [e.kind for e in subscribe(hub, ["BTC"]).get(0)] == ["snapshot"]
+
+    for sub in list(hub._subscribers):
+        hub.unsubscribe(sub)
+    assert hub.coins == [] and "BTC" not in hub._last and "BTC" not in hub._snapshots
+    assert hub.publish("BTC", result()) is False                    # Hasil compute yang terlambat dibuang
+
+    fresh = subscribe(hub, ["BTC"])                                 # Dihitung ulang, tanpa snapshot basi
+    assert fresh.get(0.01) == [] and hub.stats["computes"] == 2
+    assert hub.publish("BTC", result()) is True
+    assert payload(fresh.get(0)[0])["changed"] == ["recommendation", "trade_levels", "liquidity_sweep"]
+
+
+def test_refresh_uses_stub_compute_and_counts_errors(hub):
+    sub = subscribe(hub, ["BTC", "ETH", "SOL"])
+    hub.results.update(BTC=result(), ETH=result("HOLD"))
+
+    def compute(coin):
+        if coin == "SOL":
+            raise RuntimeError("exchange down")
+        return hub.results[coin]
+
+    hub.compute = compute
+    assert hub.refresh() == 2
+    assert sorted(e.coin for e in sub.get(0)) == ["BTC", "ETH"]
+    assert hub.stats["errors"] == 1 and hub.stats["computes"] == 6
+    assert hub.refresh() == 0 and hub.stats["unchanged"] == 2
+
+
+def test_next_run_is_bar_close_plus_settle(hub):
+    close = (START // 3600 + 1) * 3600
+    assert hub._next_run() == close + 3
+    hub.clock.now = close + 1                                       # Sebelum settle: masih bar yang sama
+    assert hub._next_run() == close + 3
+    hub.clock.now = close + 3
+    assert hub._next_run() == close + 3600 + 3
@@ -0,0 +1,145 @@
+"""SingleFlight / AsyncSingleFlight: satu eksekusi per key, exception ke semua waiter, TTL"""
+import asyncio
+import threading
+
+import pytest
+
+from singleflight import AsyncSingleFlight, SingleFlight
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def burst(fn, n=8):
+    """n thread memanggil fn() bersamaan; return hasil atau exception per thread"""
+    barrier = threading.Barrier(n)
+    out = [None] * n
+
+    def run(i):
+        barrier.wait()
+        try:
+            out[i] = fn()
+        except Exception as e:   # noqa: BLE001
+            out[i] = e
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    return out
+
+
+def blocking(release, result=None, error=None):
+    """fn yang menahan leader sampai `release` di-set; hitung eksekusi"""
+    calls = []
+
+    def fn():
+        calls.append(1)
+        release.wait(5)
+        if error is not None:
+            raise error
+        return result if result is not None else object()
+    return fn, calls
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    fn, calls = blocking(release)
+    threading.Timer(0.1, release.set).start()
+    out = burst(lambda: flight.do("BTC", fn))
+    assert len(calls) == 1
+    assert len({id(result) for result, _ in out}) == 1
+    assert sorted(shared for _, shared in out) == [False] + [True] * 7
+    assert flight.stats == {"leaders": 1, "shared": 7, "errors": 0}
+    assert len(flight) == 0                                      # ttl=0: tidak disimpan
+
+
+def test_exception_propagates_to_every_waiter():
+    flight = SingleFlight(ttl=60)
+    release = threading.Event()
+    error = RuntimeError("exchange down")
+    fn, calls = blocking(release, error=error)
+    threading.Timer(0.1, release.set).start()
+    out = burst(lambda: flight.do("BTC", fn))
+    assert len(calls) == 1 and all(e is error for e in out)
+    assert flight.stats["errors"] == 1
+    assert flight.do("BTC", lambda: "ok") == ("ok", False)       # Error tidak di-cache
+
+
+def test_result_reused_until_ttl_expires():
+    clock = Clock()
+    flight = SingleFlight(ttl=10, clock=clock)
+    assert flight.do("BTC", lambda: 1) == (1, False)
+    clock.now += 9.9
+    assert flight.do("BTC", lambda: 2) == (1, True)
+    clock.now += 0.1
+    assert flight.do("BTC", lambda: 3) == (3, False)
+    assert flight.do("ETH", lambda: None) == (None, False)
+    assert flight.do("ETH", lambda: 4) == (4, False)             # None tidak di-cache
+    flight.forget("BTC")
+    assert flight.do("BTC", lambda: 5) == (5, False)
+
+
+def test_async_callers_share_one_execution_and_error():
+    async def main():
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def fetch(value):
+            calls.append(value)
+            await asyncio.sleep(0.05)
+            if value == "boom":
+                raise RuntimeError(value)
+            return {"value": value}
+        ok = await asyncio.gather(*[flight.do("BTC", fetch, "x") for _ in range(8)])
+        failed = await asyncio.gather(*[flight.do("ETH", fetch, "boom") for _ in range(8)], return_exceptions=True)
+        return flight, calls, ok, failed
+
+    flight, calls, ok, failed = asyncio.run(main())
+    assert calls == ["x", "boom"]
+    assert all(result is ok[0][0] for result, _ in ok) and [s for _, s in ok].count(False) == 1
+    assert all(isinstance(e, RuntimeError) and e is failed[0] for e in failed)
+    assert flight.stats == {"leaders": 2, "shared": 14, "errors": 1}
+
+
+def test_async_ttl_and_cancelled_waiter():
+    clock = Clock()
+
+    async def main():
+        flight = AsyncSingleFlight(ttl=10, clock=clock)
+        started = asyncio.Event()
+
+        async def slow():
+            started.set()
+            await asyncio.sleep(0.05)
+            return "fresh"
+        first = asyncio.ensure_future(flight.do("BTC", slow))
+        await started.wait()
+        waiter = asyncio.ensure_future(flight.do("BTC", slow))
+        first.cancel()                                           # Pembatalan satu request tidak membatalkan hasil
+        assert await waiter == ("fresh", True)
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        clock.now += 5
+        cached = await flight.do("BTC", slow)
+        clock.now += 5
+        return cached, await flight.do("BTC", slow), flight.stats
+
+    cached, expired, stats = asyncio.run(main())
+    assert cached == ("fresh", True) and expired == ("fresh", False)
+    assert stats["leaders"] == 2
+
+
+def test_analyze_symbol_shares_one_analysis(analyzer):
+    """Semua request bersamaan menerima objek hasil yang sama, isinya sama dengan jalur tanpa coalescing"""
+    out = burst(lambda: analyzer.analyze_symbol("SFT"))
+    assert all(r is out[0] for r in out)
+    data = analyzer.get_all_market_data("SFT")
+    _, recommendation, levels = analyzer.analyze_and_generate_signal(data)
+    assert out[0][1] == recommendation and out[0][2] == levels
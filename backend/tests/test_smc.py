@@ -0,0 +1,132 @@
+"""SMCIndex: build inkremental == sekali jalan, swing/mitigasi/nearest/sweep == brute force,
+dan query() tidak membaca bersamaan dengan extend()"""
+import random
+import threading
+
+import numpy as np
+import pytest
+
+from benchmarks.fixtures import market_data, synthetic_candles
+from smc import BEARISH_FVG, BULLISH_FVG, BUY_SIDE, DEMAND, SELL_SIDE, SUPPLY, SMCEngine, SMCIndex
+
+KINDS = (DEMAND, SUPPLY, BULLISH_FVG, BEARISH_FVG)
+
+
+def brute_swings(c, n):
+    h, l = c.high, c.low
+    highs, lows = [], []
+    for j in range(n, len(c) - n):
+        if h[j] > h[j - n:j].max() and h[j] >= h[j + 1:j + n + 1].max():
+            highs.append(j)
+        if l[j] < l[j - n:j].min() and l[j] <= l[j + 1:j + n + 1].min():
+            lows.append(j)
+    return highs, lows
+
+
+def brute_mitigation(c, zone):
+    after = slice(zone.created + 1, len(c))
+    if zone.kind in (DEMAND, BULLISH_FVG):
+        hit = np.nonzero(c.low[after] <= zone.top)[0]
+    else:
+        hit = np.nonzero(c.high[after] >= zone.bottom)[0]
+    return int(hit[0]) + zone.created + 1 if len(hit) else None
+
+
+def brute_nearest(index, kind, price):
+    live = [z for z in index.zones if z.kind == kind and z.mitigated is None]
+    if kind in (DEMAND, BULLISH_FVG):
+        below = [z for z in live if z.top < price]
+        return max(below, key=lambda z: z.top) if below else None
+    above = [z for z in live if z.bottom > price]
+    return min(above, key=lambda z: z.bottom) if above else None
+
+
+def fingerprint(index):
+    return ([(s.kind, s.index) for s in index.swings],
+            [(z.kind, z.index, z.created, z.mitigated) for z in index.zones],
+            [(p.side, p.level, p.touches, p.swept) for p in index.pools],
+            [(s.side, s.index) for s in index.sweeps])
+
+
+@pytest.fixture(scope="module")
+def candles():
+    return synthetic_candles(20_000, seed=11)
+
+
+@pytest.fixture(scope="module")
+def full(candles):
+    return SMCIndex.from_candles(candles)
+
+
+def test_incremental_matches_full_build(candles, full):
+    step = SMCIndex()
+    for i in range(0, len(candles), 997):
+        step.extend(candles[:i + 997])
+    assert fingerprint(step) == fingerprint(full)
+    assert all(len(part) for part in fingerprint(full))
+
+
+def test_swings_and_mitigation_match_brute_force(candles, full):
+    highs, lows = brute_swings(candles, full.swing_length)
+    assert [s.index for s in full.swings if s.kind == "high"] == highs
+    assert [s.index for s in full.swings if s.kind == "low"] == lows
+    assert all(z.mitigated == brute_mitigation(candles, z) for z in full.zones)
+
+
+def test_nearest_and_sweep_match_linear_scan(candles, full):
+    rng = random.Random(7)
+    prices = [float(p) for p in np.linspace(candles.low.min() * 0.9, candles.high.max() * 1.1, 500)]
+    for p in prices:
+        for kind in KINDS:
+            assert full.nearest(kind, p) is brute_nearest(full, kind, p)
+    buy = [p.level for p in full.pools if p.side == BUY_SIDE and p.swept is None]
+    sell = [p.level for p in full.pools if p.side == SELL_SIDE and p.swept is None]
+    for _ in range(500):
+        lo, hi = sorted(rng.sample(prices, 2))
+        close = rng.uniform(lo, hi)
+        expected = ("Buy-side liquidity sweep" if any(close < v < hi for v in buy) else
+                    "Sell-side liquidity sweep" if any(lo < v < close for v in sell) else "None")
+        assert full.sweep_status(hi, lo, close) == expected
+
+
+def test_engine_builds_once_and_appends():
+    engine = SMCEngine()
+    live = synthetic_candles(900, seed=9, timeframe="4h")
+    for i in range(400, len(live)):
+        engine.index("T/USDT", "4h", live[i - 400:i])
+    assert engine.stats["builds"] == 1
+    assert engine.query("T/USDT", "4h", live[-400:], lambda index: index.count) == len(live) - 1
+
+
+def test_query_holds_index_lock_against_extend():
+    """extend() (request lain untuk symbol yang sama) menunggu sampai query selesai membaca"""
+    engine = SMCEngine()
+    c = synthetic_candles(1200, seed=5)
+    engine.index("R/USDT", "1h", c[:500])
+    reading, release = threading.Event(), threading.Event()
+
+    def read(index):
+        assert index.lock.locked()
+        reading.set()
+        release.wait(5)
+        return index.count
+    out = []
+    reader = threading.Thread(target=lambda: out.append(engine.query("R/USDT", "1h", c[:500], read)))
+    reader.start()
+    reading.wait(5)
+    writer = threading.Thread(target=engine.index, args=("R/USDT", "1h", c[:1200]))
+    writer.start()
+    writer.join(0.2)
+    assert writer.is_alive()
+    release.set()
+    reader.join(5)
+    writer.join(5)
+    assert out == [499]
+    assert engine.query("R/USDT", "1h", c[:1200], lambda index: index.count) == 1199
+
+
+def test_analyze_smc_section(analyzer, monkeypatch):
+    monkeypatch.setattr(analyzer, "OB_DETECTOR", "smc")
+    output, _, _ = analyzer.analyze_and_generate_signal(market_data(synthetic_candles(2000, seed=4)))
+    assert output["smc"]["1h"]["bars"] == 1999
+    assert output["liquidity_sweep"] in ("Buy-side liquidity sweep", "Sell-side liquidity sweep", "None")
@@ -0,0 +1,110 @@
+"""SnapshotCache: single-flight + lease L2 (satu perhitungan untuk semua proses), dan refresh snapshot basi"""
+import json
+import threading
+import time
+
+from shared import LocalKV
+from snapshot import SnapshotCache, SnapshotWarmer
+
+EPOCH = 480_000
+
+
+def dumps(output):
+    return json.dumps(output).encode()
+
+
+class Counter:
+    """Compute lambat yang mencatat setiap pemanggilan"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, symbol):
+        with self._lock:
+            self.calls.append(symbol)
+        time.sleep(self.delay)
+        return {"coin": symbol, "n": len(self.calls)}, "LONG", {"entry": 1.0}
+
+
+def test_lease_single_compute_across_caches():
+    kv = LocalKV()
+    caches = [SnapshotCache(dumps, remote=kv, lease_poll=0.005) for _ in range(4)]   # 4 "worker"
+    compute = Counter(delay=0.2)
+    barrier = threading.Barrier(16)
+    out = []
+
+    def request(i):
+        barrier.wait()
+        out.append(caches[i % len(caches)].get_or_compute("BTC", EPOCH, compute))
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert compute.calls == ["BTC"]
+    assert len({s.body for s in out}) == 1
+    assert sum(c.stats["lease_waits"] for c in caches) >= 1
+    assert kv.get(SnapshotCache.key("BTC", EPOCH) + ":lease") is None   # Lease dilepas
+
+
+def test_second_cache_reads_l2():
+    kv = LocalKV()
+    first, second = SnapshotCache(dumps, remote=kv), SnapshotCache(dumps, remote=kv)
+    compute = Counter()
+    coins = [f"C{i}" for i in range(5)]
+    made = [first.get_or_compute(c, EPOCH, compute) for c in coins]
+    shared = [second.get_or_compute(c, EPOCH, compute) for c in coins]
+    assert compute.calls == coins
+    assert second.stats["remote_hits"] == len(coins)
+    assert [(s.body, s.recommendation, s.trade_levels) for s in shared] == \
+        [(s.body, s.recommendation, s.trade_levels) for s in made]
+
+
+def test_warmer_fills_tracked_symbols_for_new_bar():
+    now = [EPOCH * 3600 + 1800.0]
+    cache = SnapshotCache(dumps, clock=lambda: now[0], max_age=60)
+    compute = Counter()
+    for coin in ("A", "B"):
+        cache.get_or_compute(coin, EPOCH, compute)
+    warmer = SnapshotWarmer(cache, compute, lambda e: ["EXTRA"] + cache.tracked(e), clock=lambda: now[0])
+    now[0] = (EPOCH + 1) * 3600 + 3.0
+    compute.calls.clear()
+    assert warmer.warm() == 3
+    assert sorted(compute.calls) == ["A", "B", "EXTRA"]
+    assert all(cache.peek(c, EPOCH + 1) is not None for c in ("A", "B", "EXTRA"))
+
+
+def test_stale_snapshot_served_while_one_refresh_runs():
+    now = [1000.0]
+    cache = SnapshotCache(dumps, clock=lambda: now[0], max_age=60)
+    compute = Counter()
+    stale = cache.get_or_compute("BTC", EPOCH, compute)
+    now[0] += 61
+    served = [cache.get_or_compute("BTC", EPOCH, compute) for _ in range(50)]
+    deadline = time.time() + 5
+    while cache.stats["refreshes"] < 1 and time.time() < deadline:
+        time.sleep(0.01)
+    refreshed = cache.get("BTC", EPOCH)
+    assert served[0] is stale and all(s is stale or s is refreshed for s in served)
+    assert compute.calls == ["BTC", "BTC"]
+    assert refreshed is not stale and cache.fresh(refreshed)
+
+
+def test_analyze_body_is_jsonify_output(analyzer, monkeypatch):
+    from flask import jsonify
+    from cooldown import CooldownMap
+
+    monkeypatch.setattr(analyzer, "cooldowns", CooldownMap(0))
+    monkeypatch.setattr(analyzer, "snapshots", SnapshotCache(analyzer.response_bytes))
+    app = analyzer.get_app()
+    client = app.test_client()
+    client.set_cookie(app.config["SESSION_COOKIE_NAME"],
+                      app.session_interface.get_signing_serializer(app).dumps({"user_id": 1}))
+    first = client.post("/analyze", data={"coin_name": "BODY"})
+    again = client.post("/analyze", data={"coin_name": "BODY"})
+    assert first.status_code == again.status_code == 200
+    assert analyzer.snapshots.stats["misses"] == 1
+    with app.test_request_context():
+        assert first.data == again.data == jsonify(analyzer.analyze_symbol("BODY")[0]).get_data()